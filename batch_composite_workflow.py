@@ -2,18 +2,26 @@
 #!/usr/bin/env python3
 """
 Modified batch_composite_workflow.py with hash tracking to avoid reprocessing unchanged files
+
+Files are analysed by the in-process engine in composite_batch_engine.py, in
+parallel worker processes; --engine subprocess runs complete_composite_workflow.py
+per file as before.
 """
 
+import os
 import subprocess
 import sys
 import glob
 import hashlib
 import json
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 import argparse
 import time
 from datetime import datetime
 
+from composite_batch_engine import WORKFLOW_STEPS, load_analyzers, run_composite_analysis
+
 def find_app_code_files(data_dir="data"):
     """Find all App_Code_* CSV files in the data directory"""
     pattern = str(Path(data_dir) / "App_Code_*.csv")
@@ -73,7 +81,72 @@ def should_process_file(file_path, processed_hashes):
     
     return False, "unchanged"
 
-def run_batch_analysis(data_dir="data", output_base="batch_analysis_results"):
+def _run_file_subprocess(file_path, output_dir):
+    """Legacy engine: run complete_composite_workflow.py for one file in a child interpreter"""
+    filename = Path(file_path).name
+    file_start_time = time.time()
+    try:
+        result = subprocess.run([
+            sys.executable, "complete_composite_workflow.py",
+            "--input", filename,
+            "--output-dir", str(output_dir)
+        ], capture_output=True, text=True, timeout=600, encoding='utf-8', errors='replace')
+        
+        if result.returncode == 0:
+            status, error_msg = "SUCCESS", ""
+        else:
+            status, error_msg = "FAILED", result.stderr[:500]
+    
+    except subprocess.TimeoutExpired:
+        status, error_msg = "TIMEOUT", "Analysis timed out after 10 minutes"
+    
+    except Exception as e:
+        status, error_msg = "ERROR", str(e)
+    
+    return {
+        'status': status,
+        'error': error_msg,
+        'step_seconds': {},
+        'processing_time_seconds': time.time() - file_start_time
+    }
+
+def iter_file_results(files_to_process, output_base, engine="inprocess", workers=1):
+    """
+    Run the composite workflow for each file and yield
+    (file_path, app_name, reason, output_dir, result) as files finish.
+    
+    The in-process engine imports the analyzers once per worker process and
+    runs files in parallel when workers > 1; the subprocess engine starts
+    complete_composite_workflow.py in a child interpreter per file.
+    """
+    jobs = [(file_path, app_name, reason, Path(output_base) / f"{app_name}_analysis")
+            for file_path, app_name, reason in files_to_process]
+    
+    if engine == "subprocess":
+        for file_path, app_name, reason, output_dir in jobs:
+            yield file_path, app_name, reason, output_dir, _run_file_subprocess(file_path, output_dir)
+        return
+    
+    if workers <= 1 or len(jobs) == 1:
+        for file_path, app_name, reason, output_dir in jobs:
+            yield file_path, app_name, reason, output_dir, run_composite_analysis(file_path, output_dir)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=load_analyzers) as executor:
+        futures = {
+            executor.submit(run_composite_analysis, file_path, output_dir): (file_path, app_name, reason, output_dir)
+            for file_path, app_name, reason, output_dir in jobs
+        }
+        for future in as_completed(futures):
+            file_path, app_name, reason, output_dir = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # Worker crashed (e.g. killed for memory) rather than the analysis failing
+                result = {'status': "ERROR", 'error': str(e), 'step_seconds': {}, 'processing_time_seconds': 0.0}
+            yield file_path, app_name, reason, output_dir, result
+
+def run_batch_analysis(data_dir="data", output_base="batch_analysis_results", engine="inprocess", workers=None):
     """Run composite analysis for all App_Code files with hash tracking"""
     
     # Load previously processed hashes
@@ -110,8 +183,13 @@ def run_batch_analysis(data_dir="data", output_base="batch_analysis_results"):
         print("No files need processing. All files are up to date.")
         return True
     
+    if workers is None:
+        workers = min(4, os.cpu_count() or 1)
+    workers = max(1, min(workers, len(files_to_process)))
+    
     print("\n" + "="*80)
     print("BATCH COMPOSITE ARCHITECTURE ANALYSIS")
+    print(f"Engine: {engine}" + (f" ({workers} worker processes)" if engine == "inprocess" else ""))
     print("="*80)
     
     results_summary = []
@@ -119,63 +197,40 @@ def run_batch_analysis(data_dir="data", output_base="batch_analysis_results"):
     failed_analyses = 0
     start_time = time.time()
     
-    # Process only the files that need it
-    for i, (file_path, app_name, reason) in enumerate(files_to_process, 1):
+    # Results arrive in completion order when files run in parallel
+    results = iter_file_results(files_to_process, output_base, engine, workers)
+    for i, (file_path, app_name, reason, output_dir, result) in enumerate(results, 1):
         filename = Path(file_path).name
+        file_time = result['processing_time_seconds']
+        status = result['status']
+        error_msg = result['error']
         
-        print(f"\n[{i}/{len(files_to_process)}] Processing: {app_name} ({reason})")
+        print(f"\n[{i}/{len(files_to_process)}] {app_name} ({reason})")
         print(f"File: {filename}")
         print("-" * 50)
         
-        # Create output directory for this application
-        output_dir = Path(output_base) / f"{app_name}_analysis"
-        
-        # Run the composite workflow for this file
-        file_start_time = time.time()
-        try:
-            result = subprocess.run([
-                sys.executable, "complete_composite_workflow.py",
-                "--input", filename,
-                "--output-dir", str(output_dir)
-            ], capture_output=True, text=True, timeout=600, encoding='utf-8', errors='replace')
-            
-            file_time = time.time() - file_start_time
-            
-            if result.returncode == 0:
-                # Update hash on successful processing
-                current_hash = calculate_file_hash(file_path)
-                if current_hash:
-                    processed_hashes[str(file_path)] = current_hash
-                    save_processed_hashes(processed_hashes)
-                    print(f"SUCCESS: {app_name} analysis completed in {file_time:.1f}s ({file_time/60:.1f}min)")
-                    print(f"         Hash updated to track completion")
-                else:
-                    print(f"SUCCESS: {app_name} analysis completed in {file_time:.1f}s ({file_time/60:.1f}min)")
-                    print(f"         Warning: Could not update hash")
-                
-                successful_analyses += 1
-                status = "SUCCESS"
-                error_msg = ""
+        if status == "SUCCESS":
+            # Update hash on successful processing
+            current_hash = calculate_file_hash(file_path)
+            if current_hash:
+                processed_hashes[str(file_path)] = current_hash
+                save_processed_hashes(processed_hashes)
+                print(f"SUCCESS: {app_name} analysis completed in {file_time:.1f}s ({file_time/60:.1f}min)")
+                print(f"         Hash updated to track completion")
             else:
-                print(f"FAILED: {app_name} analysis failed after {file_time:.1f}s")
-                print(f"   Error: {result.stderr[:200]}...")
-                failed_analyses += 1
-                status = "FAILED"
-                error_msg = result.stderr[:500]
-        
-        except subprocess.TimeoutExpired:
-            file_time = time.time() - file_start_time
+                print(f"SUCCESS: {app_name} analysis completed in {file_time:.1f}s ({file_time/60:.1f}min)")
+                print(f"         Warning: Could not update hash")
+            successful_analyses += 1
+        elif status == "TIMEOUT":
             print(f"TIMEOUT: {app_name} analysis timed out after {file_time:.1f}s")
             failed_analyses += 1
-            status = "TIMEOUT"
-            error_msg = "Analysis timed out after 10 minutes"
-        
-        except Exception as e:
-            file_time = time.time() - file_start_time
-            print(f"ERROR: {app_name} analysis crashed after {file_time:.1f}s: {e}")
+        else:
+            print(f"{status}: {app_name} analysis failed after {file_time:.1f}s")
+            print(f"   Error: {error_msg[:200]}...")
             failed_analyses += 1
-            status = "ERROR"
-            error_msg = str(e)
+        
+        for step, seconds in result['step_seconds'].items():
+            print(f"   {step:<22} {seconds:8.2f}s")
         
         # Record results
         results_summary.append({
@@ -184,6 +239,7 @@ def run_batch_analysis(data_dir="data", output_base="batch_analysis_results"):
             'status': status,
             'processing_time_seconds': file_time,
             'processing_time_minutes': file_time/60,
+            'step_seconds': result['step_seconds'],
             'output_dir': str(output_dir),
             'error': error_msg,
             'reason': reason
@@ -202,11 +258,6 @@ def run_batch_analysis(data_dir="data", output_base="batch_analysis_results"):
         print(f"   Total elapsed: {elapsed/60:.1f} minutes")
         print(f"   Estimated remaining: {estimated_remaining/60:.1f} minutes")
         print(f"   Success rate so far: {successful_analyses/i*100:.1f}%")
-        
-        if remaining_files > 0:
-            next_file_path, next_app_name, next_reason = files_to_process[i]
-            print(f"   Next App ID: {next_app_name} ({next_reason})")
-        
         print("   " + "="*50)
     
     # Generate batch summary report (including skipped files info)
@@ -229,8 +280,23 @@ def run_batch_analysis(data_dir="data", output_base="batch_analysis_results"):
     if len(files_to_process) > 0:
         print(f"Average time per processed file: {total_time/len(files_to_process):.1f} seconds")
     
+    step_totals = summarize_step_timings(results_summary)
+    if step_totals:
+        print("Time per step (total / average per file):")
+        for step, (total, average) in step_totals.items():
+            print(f"   {step:<22} {total:8.1f}s / {average:6.2f}s")
+    
     return successful_analyses > 0
 
+def summarize_step_timings(results_summary):
+    """Total and average seconds per workflow step across analysed files"""
+    step_totals = {}
+    for step in WORKFLOW_STEPS:
+        times = [r['step_seconds'][step] for r in results_summary if step in r.get('step_seconds', {})]
+        if times:
+            step_totals[step] = (sum(times), sum(times) / len(times))
+    return step_totals
+
 def generate_batch_summary(results_summary, output_base, total_time, 
                           successful_analyses, failed_analyses, skipped_count, total_count):
     """Generate comprehensive batch analysis summary with skip information"""
@@ -258,6 +324,16 @@ def generate_batch_summary(results_summary, output_base, total_time,
         f.write(f"- **Modified files:** {len([r for r in results_summary if r.get('reason') == 'modified'])}\n")
         f.write(f"- **Unchanged files (skipped):** {skipped_count}\n\n")
         
+        # Step timings (in-process engine only)
+        step_totals = summarize_step_timings(results_summary)
+        if step_totals:
+            f.write("## ⏱️ Step Timings\n\n")
+            f.write("| Step | Total (s) | Average per file (s) |\n")
+            f.write("|------|-----------|----------------------|\n")
+            for step, (total, average) in step_totals.items():
+                f.write(f"| {step} | {total:.1f} | {average:.2f} |\n")
+            f.write("\n")
+        
         # Successful analyses
         successful_apps = [r for r in results_summary if r['status'] == 'SUCCESS']
         if successful_apps:
@@ -293,12 +369,17 @@ def generate_batch_summary(results_summary, output_base, total_time,
     # Generate a CSV summary for easy analysis
     csv_file = output_dir / "batch_results.csv"
     with open(csv_file, 'w') as f:
-        f.write("app_name,filename,status,output_dir,has_error,reason,processing_time_minutes\n")
+        step_columns = "".join(f",{step}_seconds" for step in WORKFLOW_STEPS)
+        f.write(f"app_name,filename,status,output_dir,has_error,reason,processing_time_minutes{step_columns}\n")
         for result in results_summary:
             has_error = "Yes" if result['error'] else "No"
             reason = result.get('reason', 'unknown')
             processing_time = result.get('processing_time_minutes', 0)
-            f.write(f"{result['app_name']},{result['filename']},{result['status']},{result['output_dir']},{has_error},{reason},{processing_time:.2f}\n")
+            step_seconds = result.get('step_seconds', {})
+            step_values = "".join(
+                f",{step_seconds[step]:.2f}" if step in step_seconds else "," for step in WORKFLOW_STEPS
+            )
+            f.write(f"{result['app_name']},{result['filename']},{result['status']},{result['output_dir']},{has_error},{reason},{processing_time:.2f}{step_values}\n")
     
     print(f"📈 Results CSV generated: {csv_file}")
     
@@ -309,6 +390,9 @@ def main():
     parser.add_argument("--preview", action="store_true", help="Preview files to be processed without running analysis")
     parser.add_argument("--filter", help="Filter files by application name pattern (e.g., 'WEB' to process only App_Code_*WEB*)")
     parser.add_argument("--limit", type=int, help="Limit number of files to process (for testing)")
+    parser.add_argument("--engine", choices=["inprocess", "subprocess"], default="inprocess",
+                        help="Run the analyzers in worker processes (default) or one subprocess per file")
+    parser.add_argument("--workers", type=int, help="Worker processes for the in-process engine (default: CPU count, max 4)")
     
     args = parser.parse_args()
     
@@ -351,7 +435,7 @@ def main():
         import __main__
         __main__.find_app_code_files = find_app_code_files_filtered
     
-    success = run_batch_analysis(args.data_dir, args.output_dir)
+    success = run_batch_analysis(args.data_dir, args.output_dir, args.engine, args.workers)
     
     if success:
         print("\n🌟 Batch analysis completed with some successful results!")
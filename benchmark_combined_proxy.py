@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Load benchmark for static/ui/combined_proxy.py
+Starts stub API and frontend upstreams in this process and the proxy as a
+child process in front of them, then measures:
+
+- throughput and latency of many concurrent small API/frontend requests
+- latency of small requests while slow requests and large downloads are in flight
+- proxy memory (RSS) before and after concurrent large downloads
+- streamed uploads and a WebSocket echo through the proxy
+
+Usage:
+    python benchmark_combined_proxy.py
+    python benchmark_combined_proxy.py --concurrency 500 --requests 20000
+    python benchmark_combined_proxy.py --large-mb 100 --large-downloads 20
+"""
+
+import argparse
+import asyncio
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, WSMsgType, web
+
+PROXY_SCRIPT = Path(__file__).resolve().parent / "static" / "ui" / "combined_proxy.py"
+CHUNK = b"x" * (64 * 1024)
+
+
+# ---------------------------------------------------------------- stubs
+
+async def api_small(request):
+    return web.json_response({"status": "ok", "items": list(range(20))})
+
+
+async def api_slow(request):
+    await asyncio.sleep(float(request.query.get("delay", "2")))
+    return web.json_response({"status": "slow"})
+
+
+async def api_large(request):
+    """Stream ``mb`` megabytes without buffering them"""
+    total = int(float(request.query.get("mb", "50")) * 1024 * 1024)
+    response = web.StreamResponse(headers={"Content-Type": "application/octet-stream",
+                                           "Content-Length": str(total)})
+    await response.prepare(request)
+    sent = 0
+    while sent < total:
+        chunk = CHUNK[:min(len(CHUNK), total - sent)]
+        await response.write(chunk)
+        sent += len(chunk)
+    await response.write_eof()
+    return response
+
+
+async def api_upload(request):
+    received = 0
+    async for chunk in request.content.iter_chunked(64 * 1024):
+        received += len(chunk)
+    return web.json_response({"received": received})
+
+
+async def api_ws(request):
+    ws = web.WebSocketResponse()
+    await ws.prepare(request)
+    async for message in ws:
+        if message.type == WSMsgType.TEXT:
+            await ws.send_str(message.data)
+        elif message.type == WSMsgType.BINARY:
+            await ws.send_bytes(message.data)
+    return ws
+
+
+async def frontend_page(request):
+    return web.Response(text="<html><body>" + "frontend " * 200 + "</body></html>", content_type="text/html")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def start_site(app: web.Application, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def api_stub() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/api/small", api_small)
+    app.router.add_get("/api/slow", api_slow)
+    app.router.add_get("/api/large", api_large)
+    app.router.add_post("/api/upload", api_upload)
+    app.router.add_get("/ws", api_ws)
+    return app
+
+
+def frontend_stub() -> web.Application:
+    app = web.Application()
+    app.router.add_get("/{tail:.*}", frontend_page)
+    return app
+
+
+# ---------------------------------------------------------------- measurements
+
+def proxy_rss_mb(pid: int) -> Optional[float]:
+    try:
+        import psutil
+        return psutil.Process(pid).memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def latency_summary(latencies: List[float]) -> str:
+    if not latencies:
+        return "no samples"
+    return (f"p50 {percentile(latencies, 50) * 1000:.1f}ms  p95 {percentile(latencies, 95) * 1000:.1f}ms  "
+            f"max {max(latencies) * 1000:.1f}ms")
+
+
+async def small_request_load(session: ClientSession, base: str, total: int, concurrency: int) -> Dict:
+    latencies: List[float] = []
+    errors = 0
+    paths = ["/api/small", "/html/index.html"]
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(total):
+        queue.put_nowait(paths[i % len(paths)])
+
+    async def worker():
+        nonlocal errors
+        while not queue.empty():
+            path = queue.get_nowait()
+            started = time.perf_counter()
+            try:
+                async with session.get(base + path) as response:
+                    await response.read()
+                    if response.status != 200:
+                        errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"latencies": latencies, "errors": errors, "elapsed": elapsed}
+
+
+async def large_download(session: ClientSession, base: str, mb: float) -> int:
+    received = 0
+    async with session.get(f"{base}/api/large?mb={mb}") as response:
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            received += len(chunk)
+    return received
+
+
+async def upload(session: ClientSession, base: str, mb: float) -> int:
+    async def body():
+        remaining = int(mb * 1024 * 1024)
+        while remaining > 0:
+            chunk = CHUNK[:min(len(CHUNK), remaining)]
+            remaining -= len(chunk)
+            yield chunk
+
+    async with session.post(f"{base}/api/upload", data=body()) as response:
+        return (await response.json())["received"]
+
+
+async def websocket_echo(session: ClientSession, base: str, messages: int) -> List[float]:
+    latencies = []
+    async with session.ws_connect(base.replace("http", "ws", 1) + "/ws") as ws:
+        for i in range(messages):
+            started = time.perf_counter()
+            await ws.send_str(f"ping {i}")
+            reply = await ws.receive()
+            assert reply.data == f"ping {i}", reply
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def wait_for_port(port: int, timeout: float = 15.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"Proxy did not start listening on port {port}")
+
+
+async def run(args):
+    api_port, frontend_port, proxy_port = free_port(), free_port(), free_port()
+    runners = [await start_site(api_stub(), api_port), await start_site(frontend_stub(), frontend_port)]
+
+    proxy = subprocess.Popen([
+        sys.executable, str(PROXY_SCRIPT),
+        "--port", str(proxy_port),
+        "--api-upstream", f"http://127.0.0.1:{api_port}",
+        "--frontend-upstream", f"http://127.0.0.1:{frontend_port}",
+        "--quiet"
+    ], stdout=subprocess.DEVNULL)
+    base = f"http://127.0.0.1:{proxy_port}"
+
+    try:
+        await wait_for_port(proxy_port)
+        connector = TCPConnector(limit=0)
+        async with ClientSession(connector=connector, timeout=ClientTimeout(total=600)) as session:
+            # Warm up the proxy's upstream pools
+            await small_request_load(session, base, 200, 50)
+            baseline_rss = proxy_rss_mb(proxy.pid)
+
+            print(f"Small requests: {args.requests} with {args.concurrency} concurrent clients")
+            result = await small_request_load(session, base, args.requests, args.concurrency)
+            print(f"  {args.requests / result['elapsed']:.0f} req/s, {result['errors']} errors, "
+                  f"{latency_summary(result['latencies'])}")
+
+            print(f"\nSmall requests while {args.slow} slow (2s) requests and "
+                  f"{args.large_downloads} x {args.large_mb} MB downloads are in flight")
+            background = [asyncio.create_task(session.get(f"{base}/api/slow?delay=2")) for _ in range(args.slow)]
+            downloads = [asyncio.create_task(large_download(session, base, args.large_mb))
+                         for _ in range(args.large_downloads)]
+
+            peak_rss = baseline_rss or 0.0
+
+            async def sample_rss():
+                nonlocal peak_rss
+                while True:
+                    rss = proxy_rss_mb(proxy.pid)
+                    if rss:
+                        peak_rss = max(peak_rss, rss)
+                    await asyncio.sleep(0.1)
+
+            sampler = asyncio.create_task(sample_rss())
+            started = time.perf_counter()
+            under_load = await small_request_load(session, base, min(args.requests, 2000), args.concurrency)
+            print(f"  small requests: {under_load['errors']} errors, {latency_summary(under_load['latencies'])}")
+
+            received = await asyncio.gather(*downloads)
+            download_time = time.perf_counter() - started
+            for response in await asyncio.gather(*background):
+                response.release()
+            sampler.cancel()
+
+            expected = int(args.large_mb * 1024 * 1024)
+            complete = sum(1 for r in received if r == expected)
+            total_mb = sum(received) / (1024 * 1024)
+            print(f"  downloads: {complete}/{len(received)} complete, {total_mb:.0f} MB "
+                  f"in {download_time:.1f}s ({total_mb / download_time:.0f} MB/s)")
+
+            if baseline_rss:
+                print(f"  proxy RSS: {baseline_rss:.1f} MB idle, {peak_rss:.1f} MB peak "
+                      f"(vs {total_mb:.0f} MB streamed)")
+
+            uploaded = await upload(session, base, args.upload_mb)
+            print(f"\nStreamed upload: {uploaded / (1024 * 1024):.0f} MB received by the upstream")
+
+            ws_latencies = await websocket_echo(session, base, 200)
+            print(f"WebSocket echo via proxy: 200 messages, {latency_summary(ws_latencies)}")
+    finally:
+        proxy.terminate()
+        proxy.wait(timeout=10)
+        for runner in runners:
+            await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the combined reverse proxy against stub upstreams")
+    parser.add_argument("--requests", type=int, default=5000, help="Small requests to send")
+    parser.add_argument("--concurrency", type=int, default=200, help="Concurrent clients")
+    parser.add_argument("--slow", type=int, default=50, help="Slow upstream requests kept in flight")
+    parser.add_argument("--large-downloads", type=int, default=10, help="Concurrent large downloads")
+    parser.add_argument("--large-mb", type=float, default=50, help="Size of each large download")
+    parser.add_argument("--upload-mb", type=float, default=100, help="Size of the streamed upload")
+    args = parser.parse_args()
+
+    if not PROXY_SCRIPT.exists():
+        print(f"Proxy script not found: {PROXY_SCRIPT}")
+        return 1
+
+    asyncio.run(run(args))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
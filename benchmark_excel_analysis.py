@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Benchmark for the Excel application analysis
+Compares the vectorized analyze_applications_from_excel_enhanced against the
+previous per-group loop on a synthetic (or supplied) flow sheet and checks
+that both produce the same applications.
+
+Usage:
+    python benchmark_excel_analysis.py                 # 1M synthetic rows
+    python benchmark_excel_analysis.py --rows 200000
+    python benchmark_excel_analysis.py --sheet flows.xlsx
+"""
+
+import argparse
+import logging
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+import pandas as pd
+
+from routers.excel_processing_router import (
+    analyze_applications_from_excel_enhanced,
+    calculate_confidence_score_enhanced,
+    calculate_risk_level,
+    classify_architecture_from_enhanced_data,
+    parse_traffic_info,
+)
+
+PORT_COLUMNS = "port,dst_port,destination_port,dport"
+PROTOCOL_COLUMNS = "protocol,proto,ip_proto"
+APP_COLUMNS = "app_id,application_id,id"
+INFO_COLUMNS = "info,description,details"
+
+INFO_SAMPLES = [
+    "web server over tcp port 443",
+    "api gateway :8080 protocol http",
+    "database replication 5432/tcp",
+    "mail relay over smtp port 25",
+    "file share port=445",
+    "auth service: ldap 389/udp",
+    "monitoring agent",
+    "admin console over https :9090",
+    None,
+]
+
+
+def generate_flow_sheet(rows: int, apps: int = 2000, seed: int = 42) -> pd.DataFrame:
+    """Synthetic flow export shaped like the sheets uploaded to the Excel router"""
+    rng = np.random.default_rng(seed)
+    ports = np.array([80, 443, 22, 25, 3306, 5432, 1433, 8080, 8443, 9092, 3389, 53], dtype=object)
+
+    port_values = ports[rng.integers(0, len(ports), rows)]
+    # Some sheets carry ports as text and leave gaps
+    as_text = rng.random(rows) < 0.1
+    port_values[as_text] = [str(p) for p in port_values[as_text]]
+    port_values[rng.random(rows) < 0.05] = None
+
+    protocols = np.array(["tcp", "udp", "http", "https", "icmp"], dtype=object)
+    protocol_values = protocols[rng.integers(0, len(protocols), rows)]
+    # Every seventh application has no usable port/protocol columns and relies on the info field
+    app_ids = rng.integers(0, apps, rows)
+    fallback_rows = app_ids % 7 == 0
+    port_values[fallback_rows] = None
+    protocol_values[fallback_rows] = None
+
+    info = np.array(INFO_SAMPLES, dtype=object)[rng.integers(0, len(INFO_SAMPLES), rows)]
+
+    return pd.DataFrame({
+        "app_id": [f"APP{a:05d}" for a in app_ids],
+        "src_ip": [f"10.{a % 256}.{b}.{c}" for a, b, c in zip(app_ids, rng.integers(0, 4, rows), rng.integers(1, 20, rows))],
+        "dst_ip": [f"10.200.{a % 256}.{b}" for a, b in zip(app_ids, rng.integers(1, 30, rows))],
+        "port": port_values,
+        "protocol": protocol_values,
+        "info": info,
+    })
+
+
+def legacy_analyze_applications(df: pd.DataFrame, port_columns: str, protocol_columns: str,
+                                app_columns: str, info_columns: str,
+                                fallback_parsing: bool) -> List[Dict[str, Any]]:
+    """The previous per-group implementation, kept as the benchmark baseline"""
+    applications = []
+
+    port_col = next((c.strip() for c in port_columns.split(',') if c.strip() in df.columns), None)
+    protocol_col = next((c.strip() for c in protocol_columns.split(',') if c.strip() in df.columns), None)
+    app_col = next((c.strip() for c in app_columns.split(',') if c.strip() in df.columns), None)
+    info_col = next((c.strip() for c in info_columns.split(',') if c.strip() in df.columns), None)
+
+    if app_col:
+        app_groups = df.groupby(app_col)
+    else:
+        if info_col:
+            df['synthetic_app'] = df[info_col].fillna('unknown').apply(
+                lambda x: f"App_{hash(str(x)[:50]) % 1000:03d}"
+            )
+        else:
+            df['synthetic_app'] = df.index // 100
+        app_groups = df.groupby('synthetic_app')
+
+    for app_name, group in app_groups:
+        ports, protocols, services = [], [], []
+
+        if port_col and port_col in group.columns:
+            for val in group[port_col].dropna():
+                try:
+                    if isinstance(val, (int, float)) and not pd.isna(val):
+                        ports.append(int(val))
+                    elif isinstance(val, str) and val.isdigit():
+                        ports.append(int(val))
+                except (ValueError, TypeError):
+                    pass
+
+        if protocol_col and protocol_col in group.columns:
+            protocol_values = group[protocol_col].dropna().unique()
+            protocols = [str(p).upper() for p in protocol_values if str(p).upper() in ['TCP', 'UDP', 'HTTP', 'HTTPS']]
+
+        if fallback_parsing and (not ports or not protocols) and info_col and info_col in group.columns:
+            for info_text in group[info_col].dropna():
+                parsed = parse_traffic_info(str(info_text))
+                if parsed.get("port") and parsed["port"] not in ports:
+                    ports.append(parsed["port"])
+                if parsed.get("protocol") and parsed["protocol"] not in protocols:
+                    protocols.append(parsed["protocol"])
+                if parsed.get("service") and parsed["service"] not in services:
+                    services.append(parsed["service"])
+
+        ports = sorted(list(set(ports)))
+        protocols = list(set(protocols))
+        services = list(set(services))
+
+        has_ip_pairs = 'src_ip' in group.columns and 'dst_ip' in group.columns
+        applications.append({
+            "app_id": str(app_name),
+            "app_name": str(app_name),
+            "architecture": classify_architecture_from_enhanced_data(ports, protocols, services),
+            "ports": [str(p) for p in ports],
+            "protocols": protocols,
+            "services": services,
+            "port_count": len(ports),
+            "flow_count": len(group),
+            "risk_level": calculate_risk_level(ports, len(group)),
+            "confidence": calculate_confidence_score_enhanced(len(group), ports, protocols, services, has_ip_pairs),
+            "source_ips": group.get('src_ip', group.get('source_ip', pd.Series())).nunique() if 'src_ip' in group.columns or 'source_ip' in group.columns else 0,
+            "dest_ips": group.get('dst_ip', group.get('dest_ip', pd.Series())).nunique() if 'dst_ip' in group.columns or 'dest_ip' in group.columns else 0,
+            "parsing_method": "dedicated_columns" if (port_col or protocol_col) else "info_field_fallback"
+        })
+
+    return applications
+
+
+def compare_results(legacy: List[Dict[str, Any]], vectorized: List[Dict[str, Any]]) -> List[str]:
+    """Differences between the two result lists (protocol/service order is not significant)"""
+    problems = []
+    if len(legacy) != len(vectorized):
+        return [f"application count differs: {len(legacy)} vs {len(vectorized)}"]
+
+    for old, new in zip(legacy, vectorized):
+        for key, old_value in old.items():
+            new_value = new.get(key)
+            if key in ("protocols", "services"):
+                same = sorted(old_value) == sorted(new_value)
+            else:
+                same = old_value == new_value
+            if not same:
+                problems.append(f"{old['app_id']}.{key}: {old_value!r} != {new_value!r}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Excel application analysis")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Synthetic rows to generate")
+    parser.add_argument("--apps", type=int, default=2000, help="Synthetic applications")
+    parser.add_argument("--sheet", help="Benchmark an existing Excel/CSV file instead")
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the vectorized analysis")
+    args = parser.parse_args()
+
+    logging.getLogger("routers.excel_processing_router").setLevel(logging.WARNING)
+
+    if args.sheet:
+        print(f"📂 Loading {args.sheet}...")
+        df = pd.read_csv(args.sheet) if args.sheet.endswith('.csv') else pd.read_excel(args.sheet)
+    else:
+        print(f"🧪 Generating {args.rows:,} synthetic rows for {args.apps:,} applications...")
+        df = generate_flow_sheet(args.rows, args.apps)
+
+    print(f"📊 Rows: {len(df):,}  Columns: {list(df.columns)}")
+
+    start = time.perf_counter()
+    vectorized = analyze_applications_from_excel_enhanced(
+        df.copy(), PORT_COLUMNS, PROTOCOL_COLUMNS, APP_COLUMNS, INFO_COLUMNS, True, "benchmark"
+    )
+    vectorized_time = time.perf_counter() - start
+    print(f"⚡ Vectorized: {vectorized_time:.2f}s ({len(vectorized):,} applications)")
+
+    if args.skip_legacy:
+        return
+
+    start = time.perf_counter()
+    legacy = legacy_analyze_applications(
+        df.copy(), PORT_COLUMNS, PROTOCOL_COLUMNS, APP_COLUMNS, INFO_COLUMNS, True
+    )
+    legacy_time = time.perf_counter() - start
+    print(f"🐢 Per-group loop: {legacy_time:.2f}s ({len(legacy):,} applications)")
+    print(f"🚀 Speedup: {legacy_time / max(vectorized_time, 1e-9):.1f}x")
+
+    problems = compare_results(legacy, vectorized)
+    if problems:
+        print(f"❌ {len(problems)} differences, first few:")
+        for problem in problems[:10]:
+            print(f"   {problem}")
+    else:
+        print("✅ Results match")
+
+
+if __name__ == "__main__":
+    main()
@@ -16,11 +16,9 @@ os.environ['PYTHONIOENCODING'] = 'utf-8'
 import sys
 import io
 
-import subprocess
 import pandas as pd
 from pathlib import Path
 import argparse
-import time
 import shutil
 
 # Fix Windows terminal encoding for Unicode characters
@@ -31,193 +29,38 @@ if hasattr(sys.stdout, 'buffer'):
 def run_composite_analysis_workflow(input_file: str, output_dir: str = "composite_analysis_results"):
     """Run complete composite architecture analysis workflow"""
     
-    workflow_start = time.time()
-    
-    # Extract app name from input file
-    app_name = extract_app_name(input_file)  # You'll need this function
-    
-    results_dir = Path(output_dir)
-    results_dir.mkdir(exist_ok=True)
-    
-    # Create centralized directory for final consolidated files
-    central_dir = Path("complete_composite_analysis")
-    central_dir.mkdir(exist_ok=True)
+    # The steps run in this process through the same engine batch runs use
+    from composite_batch_engine import WORKFLOW_STEPS, run_composite_analysis
     
     print("🏗️  COMPOSITE ARCHITECTURE ANALYSIS WORKFLOW")
     print("=" * 60)
     
-    # Step 1: Process raw data through enhanced generate_file.py
-    step_start = time.time()
-    print(f"\n📊 Step 1: Processing raw network data with enhanced generate_file.py...")
-    
-    try:
-        # Run enhanced generate_file.py to process raw data
-        result = subprocess.run([
-            sys.executable, "data/generate_file.py",
-            "--input", input_file,
-            "--staging-dir", "data_staging",
-            "--show-archetype-details",
-            "--show-service-stats",
-            "--dns", "socket",          # Keep DNS but use faster method
-            "--threads", "100",         # Increase parallelization
-            "--timeout", "0.5"          # Reduce per-lookup timeout
-        ], capture_output=True, text=True, check=True, encoding='utf-8', errors='replace')
-        
-        step_time = time.time() - step_start
-        print(f"Raw data processing completed! ({step_time:.1f}s)")
-        
-        # Find the generated processed file in data_staging
-        staging_dir = Path("data_staging")
-        if not staging_dir.exists():
-            print("❌ data_staging directory not found")
-            return False
-        
-        # Look for the most recent processed file
-        processed_files = list(staging_dir.glob("*_complete_*.csv"))
-        if not processed_files:
-            # Fallback to any CSV files in staging
-            processed_files = list(staging_dir.glob("*.csv"))
-        
-        if not processed_files:
-            print("❌ No processed files found in data_staging")
-            return False
-        
-        # Get the most recent file
-        input_file = max(processed_files, key=lambda p: p.stat().st_mtime)
-        print(f"📄 Using processed file: {input_file}")
-        
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Data processing failed: {e}")
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
-        return False
+    # Relative inputs are looked up in data/, as generate_file.py does
+    input_path = Path(input_file)
+    if not input_path.is_absolute():
+        input_path = Path("data") / input_path
     
-    # Step 2: Analyze composite patterns
-    step_start = time.time()
-    print(f"Composite pattern analysis started! ({step_time:.1f}s)")
+    result = run_composite_analysis(str(input_path), output_dir, timeout=None, capture_output=False)
     
-    try:
-
-        result = subprocess.run([
-            sys.executable, "data/composite_architecture_analyzer.py",
-            "--input", str(input_file),
-            "--output", str(results_dir / "composite_patterns.png"),
-            "--show-summary"
-        ], capture_output=True, text=True, check=True, encoding='utf-8', errors='replace')
-        
-        step_time = time.time() - step_start
-        print(f"Composite pattern analysis completed! ({step_time:.1f}s)")
-        
-        print("Key findings from composite analysis:")
-        
-        # Extract and display key findings from output
-        output_lines = result.stdout.split('\n')
-        in_summary = False
-        for line in output_lines:
-            if "COMPOSITE ARCHITECTURE ANALYSIS SUMMARY" in line:
-                in_summary = True
-            if in_summary and (line.startswith("  ") or ":" in line):
-                print(f"    {line}")
-                
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Composite analysis failed: {e}")
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
-        return False
+    print(f"\n⏱️  Step timings:")
+    for step in WORKFLOW_STEPS:
+        if step in result['step_seconds']:
+            print(f"   • {step}: {result['step_seconds'][step]:.1f}s")
     
-    # Step 3: Create traffic-weighted visualization
-    step_start = time.time()
-    print(f"\n📊 Step 3: Creating traffic-weighted network visualization...")
-    
-    try:
-        result = subprocess.run([
-            sys.executable, "data/traffic_weighted_visualizer.py",
-            "--input", str(input_file),
-            "--output", str(results_dir / "traffic_weighted_network.png"),
-            "--title", "Traffic-Weighted Composite Architecture"
-        ], capture_output=True, text=True, check=True, encoding='utf-8', errors='replace')
-        
-        step_time = time.time() - step_start
-        print(f"Traffic-weighted visualization completed! ({step_time:.1f}s)")
-        
-        # Extract network statistics
-        output_lines = result.stdout.split('\n')
-        for line in output_lines:
-            if "Network Statistics:" in line or line.startswith("  "):
-                print(f"    {line}")
-                
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Traffic visualization failed: {e}")
-        print("STDOUT:", e.stdout)
-        print("STDERR:", e.stderr)
-    
-    # Step 4: Generate comprehensive report
-    step_start = time.time()
-    print(f"\n📋 Step 4: Generating comprehensive analysis report...")
-    
-    try:
-        report_content = generate_composite_report(input_file, results_dir)
-        
-        report_file = results_dir / "composite_architecture_report.md"
-        with open(report_file, 'w') as f:
-            f.write(report_content)
-        
-        step_time = time.time() - step_start
-        print(f"Comprehensive report generated! ({step_time:.1f}s)")
-        
-    except Exception as e:
-        print(f"⚠️  Report generation failed: {e}")
-    
-    # Step 5: Create connectivity matrix
-    step_start = time.time()
-    print(f"\n🔗 Step 5: Analyzing connectivity patterns...")
-    
-    try:
-        connectivity_analysis = analyze_connectivity_patterns(input_file)
-        
-        connectivity_file = results_dir / "connectivity_analysis.txt"
-        with open(connectivity_file, 'w') as f:
-            f.write(connectivity_analysis)
-        
-        step_time = time.time() - step_start
-        print(f"Connectivity analysis completed! ({step_time:.1f}s)")
-        print("Key connectivity insights:")
-        
-        # Show first few lines of connectivity analysis
-        lines = connectivity_analysis.split('\n')[:15]
-        for line in lines:
-            if line.strip():
-                print(f"    {line}")
-                
-    except Exception as e:
-        print(f"⚠️  Connectivity analysis failed: {e}")
-    
-    # Step 6: Generate animated flow diagram
-    print(f"\nStep 6: Creating animated flow visualization...")
-    step_start = time.time()
-
-    try:
-        from animated_flow_mapper import AnimatedFlowMapper
-        
-        mapper = AnimatedFlowMapper("complete_composite_analysis")
-        mapper.create_app_flow_diagram(app_name, pd.read_csv(input_file))
-        
-        step_time = time.time() - step_start
-        print(f"Animated flow diagram completed! ({step_time:.1f}s)")
-    except Exception as e:
-        print(f"Animated flow generation failed: {e}")
+    if result['status'] != "SUCCESS":
+        print(f"❌ Workflow {result['status'].lower()}: {result['error'].splitlines()[0]}")
+        return False
     
-    # Summary
-    consolidate_output_files(app_name, results_dir, central_dir, input_file)
     print(f"\n🎉 COMPOSITE ARCHITECTURE ANALYSIS COMPLETED!")
     print("=" * 60)
-    print(f"📁 All results saved to: {results_dir}")
+    print(f"📄 Processed file: {result['processed_file']}")
+    print(f"📁 All results saved to: {output_dir}")
     print(f"📈 Generated files:")
     print(f"   • Composite patterns visualization: composite_patterns.png")
     print(f"   • Traffic-weighted network: traffic_weighted_network.png")
     print(f"   • Comprehensive report: composite_architecture_report.md")
     print(f"   • Connectivity analysis: connectivity_analysis.txt")
-    total_time = time.time() - workflow_start
+    total_time = result['processing_time_seconds']
     print(f"\nTotal processing time: {total_time:.1f} seconds ({total_time/60:.1f} minutes)")
     
     return True
@@ -255,11 +98,12 @@ def consolidate_output_files(app_name, temp_results_dir, central_dir, original_i
     
     print(f"All {app_name} files consolidated in: {central_dir}")
     
-def generate_composite_report(input_file: str, results_dir: Path):
+def generate_composite_report(input_file: str, results_dir: Path, df: pd.DataFrame = None):
     """Generate comprehensive markdown report of composite architecture analysis"""
     
-    # Load and analyze the data
-    df = pd.read_csv(input_file)
+    # Load and analyze the data (batch runs pass the already loaded frame)
+    if df is None:
+        df = pd.read_csv(input_file)
     
     report_lines = [
         "# Composite Architecture Analysis Report",
@@ -450,10 +294,11 @@ def infer_composite_patterns(app_data):
     
     return patterns
 
-def analyze_connectivity_patterns(input_file: str):
+def analyze_connectivity_patterns(input_file: str, df: pd.DataFrame = None):
     """Analyze connectivity patterns and generate detailed report"""
     
-    df = pd.read_csv(input_file)
+    if df is None:
+        df = pd.read_csv(input_file)
     
     analysis_lines = [
         "NETWORK CONNECTIVITY PATTERN ANALYSIS",
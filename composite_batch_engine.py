@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+In-process engine for batch composite architecture analysis
+
+Runs the steps of complete_composite_workflow.py for one App_Code file without
+starting new interpreters. The analyzers are imported once per process, the
+processed network data is loaded once and handed to every step, and the time
+spent in each step is recorded. batch_composite_workflow.py runs files through
+this engine in a pool of worker processes, and complete_composite_workflow.py
+runs its single file through it with the output left on the console.
+"""
+
+import contextlib
+import functools
+import io
+import random
+import signal
+import sys
+import threading
+import time
+import traceback
+from pathlib import Path
+from types import SimpleNamespace
+
+ROOT_DIR = Path(__file__).resolve().parent
+DATA_SCRIPTS_DIR = ROOT_DIR / "data"
+
+# Step names in execution order, used for timings and the batch CSV columns
+WORKFLOW_STEPS = (
+    "prepare_data",
+    "composite_patterns",
+    "traffic_visualization",
+    "report",
+    "connectivity",
+    "animated_flow",
+    "consolidate",
+)
+
+# Same options complete_composite_workflow.py passes to data/generate_file.py
+GENERATE_FILE_OPTIONS = [
+    "--show-archetype-details",
+    "--show-service-stats",
+    "--dns", "socket",
+    "--threads", "100",
+    "--timeout", "0.5",
+]
+
+# Same per-file limit the subprocess engine applies
+FILE_TIMEOUT_SECONDS = 600
+
+_analyzers = None
+
+
+class WorkflowTimeout(Exception):
+    """The file ran past its deadline"""
+
+
+def load_analyzers():
+    """Import the analysis scripts once per process and return them"""
+    global _analyzers
+    if _analyzers is not None:
+        return _analyzers
+
+    import matplotlib
+    matplotlib.use("Agg")
+
+    for path in (str(ROOT_DIR), str(DATA_SCRIPTS_DIR)):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+
+    # The scripts rewrap sys.stdout for Windows consoles at import time; importing
+    # them against a buffer leaves the caller's streams untouched
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        import pandas as pd
+        import numpy as np
+        import matplotlib.pyplot as plt
+        import generate_file
+        import composite_architecture_analyzer
+        import traffic_weighted_visualizer
+        import complete_composite_workflow
+        import animated_flow_mapper
+
+    _analyzers = SimpleNamespace(
+        pd=pd,
+        np=np,
+        plt=plt,
+        generate_file=generate_file,
+        composite=composite_architecture_analyzer,
+        traffic=traffic_weighted_visualizer,
+        workflow=complete_composite_workflow,
+        flow_mapper=animated_flow_mapper,
+    )
+    return _analyzers
+
+
+def prepare_network_data(a, input_path: Path, staging_dir: str, min_rows: int = None) -> Path:
+    """Step 1: normalize the raw App_Code export into data_staging, exactly as generate_file.py main() does"""
+    args = a.generate_file.build_arg_parser().parse_args(
+        ["--input", str(input_path.resolve()), "--staging-dir", staging_dir] + GENERATE_FILE_OPTIONS
+    )
+    if min_rows is not None:
+        args.min_rows = min_rows
+
+    # Each subprocess run started from the module's fixed seed; keep synthesis reproducible per file
+    random.seed(42)
+    a.np.random.seed(42)
+
+    return a.generate_file.prepare_staging_file(args)
+
+
+def _run_step(a, timings, name, func, *args, required=False, deadline=None):
+    """Run one workflow step, recording its duration; optional steps only warn on failure"""
+    if deadline is not None and time.monotonic() >= deadline:
+        raise WorkflowTimeout(f"deadline reached before {name}")
+    started = time.perf_counter()
+    try:
+        return func(*args)
+    except WorkflowTimeout:
+        raise
+    except Exception as e:
+        if required:
+            raise
+        print(f"⚠️  {name} failed: {e}")
+        return None
+    finally:
+        timings[name] = round(time.perf_counter() - started, 3)
+        # The analyzers leave their figures open, which would pile up in a long-lived worker
+        a.plt.close("all")
+
+
+def _composite_patterns(a, df, results_dir):
+    analyzer = a.composite.CompositeArchitectureAnalyzer(df)
+    analyzer.analyze_application_patterns()
+    analyzer.create_composite_visualization(str(results_dir / "composite_patterns.png"))
+    print("\n" + analyzer.generate_composite_summary())
+
+
+def _traffic_visualization(a, df, results_dir):
+    visualizer = a.traffic.TrafficWeightedVisualizer(df)
+    visualizer.build_traffic_graph()
+    visualizer.create_traffic_weighted_visualization(
+        str(results_dir / "traffic_weighted_network.png"), "Traffic-Weighted Composite Architecture"
+    )
+    print(f"Network Statistics: {visualizer.G.number_of_nodes()} nodes, {visualizer.G.number_of_edges()} connections")
+
+
+def _report(a, df, processed_csv, results_dir):
+    report_content = a.workflow.generate_composite_report(processed_csv, results_dir, df=df)
+    with open(results_dir / "composite_architecture_report.md", 'w') as f:
+        f.write(report_content)
+
+
+def _connectivity(a, df, processed_csv, results_dir):
+    connectivity_analysis = a.workflow.analyze_connectivity_patterns(processed_csv, df=df)
+    with open(results_dir / "connectivity_analysis.txt", 'w') as f:
+        f.write(connectivity_analysis)
+
+
+def _animated_flow(a, df, app_name, central_dir):
+    mapper = a.flow_mapper.AnimatedFlowMapper(str(central_dir))
+    mapper.create_app_flow_diagram(app_name, df)
+
+
+@contextlib.contextmanager
+def _file_deadline(seconds):
+    """
+    Interrupt the file with WorkflowTimeout once ``seconds`` have passed.
+
+    Uses SIGALRM, so the limit is enforced mid-step only on POSIX and in the
+    main thread (pool workers run their tasks there). Elsewhere the deadline
+    is only checked between steps, and a step that hangs is not interrupted.
+    A pending alarm is also delayed until a long-running C call returns.
+    """
+    if not seconds or not hasattr(signal, "SIGALRM") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise WorkflowTimeout(f"analysis timed out after {seconds:g}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_composite_analysis(input_file, output_dir, staging_dir="data_staging",
+                           central_dir="complete_composite_analysis", min_rows=None,
+                           timeout=FILE_TIMEOUT_SECONDS, capture_output=True):
+    """
+    Run the complete composite workflow for one file in this process.
+
+    Returns a result dict with status (SUCCESS/FAILED/TIMEOUT), error and
+    per-step timings in seconds. With ``capture_output`` the step output goes
+    to ``<output_dir>/workflow.log`` instead of the console. Data preparation
+    and pattern analysis are required; the remaining steps only warn on
+    failure, as in the workflow script.
+
+    ``timeout`` is the per-file limit in seconds (None or 0 disables it); see
+    ``_file_deadline`` for where it can interrupt a running step.
+    """
+    file_start = time.perf_counter()
+    a = load_analyzers()
+
+    input_path = Path(input_file)
+    app_name = a.workflow.extract_app_name(str(input_path)).strip()
+    results_dir = Path(output_dir)
+    results_dir.mkdir(parents=True, exist_ok=True)
+    central_path = Path(central_dir)
+    central_path.mkdir(exist_ok=True)
+
+    timings = {}
+    status, error = "SUCCESS", ""
+    processed_csv = None
+    log = io.StringIO()
+    deadline = time.monotonic() + timeout if timeout else None
+
+    with contextlib.ExitStack() as stack:
+        if capture_output:
+            stack.enter_context(contextlib.redirect_stdout(log))
+            stack.enter_context(contextlib.redirect_stderr(log))
+        try:
+            with _file_deadline(timeout):
+                step = functools.partial(_run_step, a, timings, deadline=deadline)
+
+                processed_csv = step("prepare_data", prepare_network_data,
+                                     a, input_path, staging_dir, min_rows, required=True)
+                # Loaded once and shared by every following step
+                df = a.pd.read_csv(processed_csv)
+                print(f"📄 Using processed file: {processed_csv}")
+
+                step("composite_patterns", _composite_patterns, a, df, results_dir, required=True)
+                step("traffic_visualization", _traffic_visualization, a, df, results_dir)
+                step("report", _report, a, df, str(processed_csv), results_dir)
+                step("connectivity", _connectivity, a, df, str(processed_csv), results_dir)
+                step("animated_flow", _animated_flow, a, df, app_name, central_path)
+                step("consolidate", a.workflow.consolidate_output_files,
+                     app_name, results_dir, central_path, processed_csv)
+        except WorkflowTimeout as e:
+            status, error = "TIMEOUT", str(e)
+            print(f"❌ {e}")
+        except Exception as e:
+            status, error = "FAILED", f"{type(e).__name__}: {e}"
+            traceback.print_exc()
+
+    output = log.getvalue()
+    if capture_output:
+        try:
+            with open(results_dir / "workflow.log", 'w', encoding='utf-8') as f:
+                f.write(output)
+        except OSError:
+            pass
+
+    return {
+        'app_name': app_name,
+        'status': status,
+        'error': f"{error}\n{output[-500:]}" if error else "",
+        'processed_file': str(processed_csv) if processed_csv else "",
+        'step_seconds': timings,
+        'processing_time_seconds': time.perf_counter() - file_start,
+    }
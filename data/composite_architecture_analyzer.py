@@ -88,6 +88,33 @@ PATTERN_INDICATORS = {
     }
 }
 
+def _ipv4_subnet24(values):
+    """/24 network number of each dotted-quad IPv4 string, -1 where the value is not IPv4"""
+    
+    # Addresses repeat heavily, so parse the distinct values only
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return np.full(len(values), -1, dtype=np.int64)
+    
+    parts = pd.Series(uniques).astype(str).str.split('.', expand=True)
+    extra_parts = parts.iloc[:, 4:].notna().any(axis=1).to_numpy()
+    octets = parts.reindex(columns=range(4)).apply(pd.to_numeric, errors='coerce')
+    valid = (octets.notna() & (octets >= 0) & (octets <= 255)).all(axis=1).to_numpy() & ~extra_parts
+    
+    o = octets.iloc[:, :3].fillna(0).to_numpy(dtype=np.int64)
+    subnet = np.where(valid, (o[:, 0] << 16) | (o[:, 1] << 8) | o[:, 2], -1)
+    return np.where(codes >= 0, subnet[codes], -1)
+
+def _pattern_membership(values, key):
+    """values x patterns matrix: how often each value is listed under PATTERN_INDICATORS[pattern][key]"""
+    
+    membership = np.zeros((len(values), len(PATTERN_INDICATORS)))
+    for j, config in enumerate(PATTERN_INDICATORS.values()):
+        listed = Counter(config[key])
+        for i, value in enumerate(values):
+            membership[i, j] = listed.get(value, 0)
+    return membership
+
 class CompositeArchitectureAnalyzer:
     def __init__(self, df):
         self.df = df
@@ -100,16 +127,16 @@ class CompositeArchitectureAnalyzer:
         
         print("Analyzing composite architectural patterns...")
         
-        for app_name in self.df['application'].unique():
-            app_data = self.df[self.df['application'] == app_name]
-            
+        # Every pattern is scored for every application in one pass over the frame
+        all_scores = self._score_patterns(self.df)
+        
+        for app_name, app_data in self.df.groupby('application', sort=False):
             print(f"\nAnalyzing {app_name} ({len(app_data)} connections):")
             
-            # Detect patterns within this application
-            pattern_scores = self._detect_patterns_in_app(app_data)
+            pattern_scores = all_scores.loc[app_name]
             
             # Store significant patterns (above threshold)
-            significant_patterns = {pattern: score for pattern, score in pattern_scores.items() if score > 0.3}
+            significant_patterns = {pattern: float(score) for pattern, score in pattern_scores.items() if score > 0.3}
             
             if significant_patterns:
                 self.application_patterns[app_name] = significant_patterns
@@ -131,89 +158,73 @@ class CompositeArchitectureAnalyzer:
                 if len(components) > 3:
                     print(f"    ... and {len(components) - 3} more")
     
-    def _detect_patterns_in_app(self, app_data):
-        """Detect architectural patterns within a single application"""
-        
-        pattern_scores = defaultdict(float)
-        
-        # Analyze traffic patterns and protocols
-        protocol_counts = Counter(app_data['protocol'])
-        port_counts = Counter(app_data['port'])
-        
-        # Calculate traffic characteristics
-        total_connections = len(app_data)
-        unique_sources = app_data['source_ip'].nunique() + app_data['source_hostname'].nunique()
-        unique_destinations = app_data['destination_ip'].nunique() + app_data['destination_hostname'].nunique()
-        
-        avg_bytes_in = app_data['bytes_in'].mean()
-        avg_bytes_out = app_data['bytes_out'].mean()
-        
-        # Score each pattern
-        for pattern_name, pattern_config in PATTERN_INDICATORS.items():
-            score = 0.0
-            
-            # Protocol matching
-            protocol_matches = sum(protocol_counts.get(proto, 0) for proto in pattern_config['protocols'])
-            if protocol_matches > 0:
-                score += (protocol_matches / total_connections) * pattern_config['weight']
-            
-            # Port matching
-            port_matches = sum(port_counts.get(port, 0) for port in pattern_config['ports'])
-            if port_matches > 0:
-                score += (port_matches / total_connections) * pattern_config['weight'] * 0.5
-            
-            # Characteristic-based scoring
-            characteristics = pattern_config.get('characteristics', [])
-            
-            if 'high_fanout' in characteristics and unique_destinations > 5:
-                score += 0.3
-            
-            if 'aggregation_point' in characteristics and unique_sources > unique_destinations * 2:
-                score += 0.2
-                
-            if 'east_west_traffic' in characteristics:
-                # Check for internal communication (same subnet)
-                internal_traffic = self._count_internal_traffic(app_data)
-                if internal_traffic > total_connections * 0.3:
-                    score += 0.4
-            
-            if 'async_communication' in characteristics:
-                # Messaging patterns often have lower bytes_in than bytes_out
-                if avg_bytes_out > avg_bytes_in * 0.5 and protocol_matches > 0:
-                    score += 0.3
-            
-            if 'high_read_write' in characteristics:
-                # Database patterns have high byte ratios
-                if (avg_bytes_in + avg_bytes_out) > 5000 and protocol_matches > 0:
-                    score += 0.4
-            
-            if 'pub_sub' in characteristics:
-                # Look for many-to-many communication patterns
-                if unique_sources > 2 and unique_destinations > 2 and protocol_matches > 0:
-                    score += 0.3
-            
-            pattern_scores[pattern_name] = min(score, 2.0)  # Cap at 2.0
-        
-        return pattern_scores
+    def _compute_app_features(self, df):
+        """Per-application traffic features and protocol/port histograms from one groupby pass"""
+        
+        grouped = df.groupby('application', sort=False)
+        
+        features = pd.DataFrame({
+            'connections': grouped.size(),
+            'unique_sources': grouped['source_ip'].nunique() + grouped['source_hostname'].nunique(),
+            'unique_destinations': grouped['destination_ip'].nunique() + grouped['destination_hostname'].nunique(),
+            'avg_bytes_in': grouped['bytes_in'].mean(),
+            'avg_bytes_out': grouped['bytes_out'].mean(),
+        })
+        
+        # Internal (east-west) connections: source and destination in the same /24
+        src_subnet = _ipv4_subnet24(df['source_ip'])
+        dst_subnet = _ipv4_subnet24(df['destination_ip'])
+        internal = pd.Series((src_subnet >= 0) & (src_subnet == dst_subnet), index=df.index)
+        features['internal_connections'] = internal.groupby(df['application'], sort=False).sum()
+        
+        protocol_hist = df.groupby(['application', 'protocol'], sort=False).size().unstack(fill_value=0)
+        port_hist = df.groupby(['application', 'port'], sort=False).size().unstack(fill_value=0)
+        
+        return (features,
+                protocol_hist.reindex(features.index, fill_value=0),
+                port_hist.reindex(features.index, fill_value=0))
     
-    def _count_internal_traffic(self, app_data):
-        """Count connections that appear to be internal (same subnet)"""
-        internal_count = 0
-        
-        for _, row in app_data.iterrows():
-            src_ip = row.get('source_ip', '')
-            dest_ip = row.get('destination_ip', '')
-            
-            if src_ip and dest_ip and '.' in src_ip and '.' in dest_ip:
-                try:
-                    src_parts = src_ip.split('.')[:3]
-                    dest_parts = dest_ip.split('.')[:3]
-                    if src_parts == dest_parts:
-                        internal_count += 1
-                except:
-                    pass
-        
-        return internal_count
+    def _score_patterns(self, df):
+        """Score every pattern in PATTERN_INDICATORS for every application (apps x patterns frame)"""
+        
+        features, protocol_hist, port_hist = self._compute_app_features(df)
+        
+        # Matches per app and pattern: histogram (apps x values) @ membership (values x patterns)
+        protocol_matches = protocol_hist.to_numpy(dtype=float) @ _pattern_membership(protocol_hist.columns, 'protocols')
+        port_matches = port_hist.to_numpy(dtype=float) @ _pattern_membership(port_hist.columns, 'ports')
+        
+        total = features['connections'].to_numpy(dtype=float)[:, None]
+        unique_sources = features['unique_sources'].to_numpy()[:, None]
+        unique_destinations = features['unique_destinations'].to_numpy()[:, None]
+        avg_bytes_in = features['avg_bytes_in'].to_numpy(dtype=float)[:, None]
+        avg_bytes_out = features['avg_bytes_out'].to_numpy(dtype=float)[:, None]
+        internal = features['internal_connections'].to_numpy()[:, None]
+        has_protocol = protocol_matches > 0
+        
+        weights = np.array([config['weight'] for config in PATTERN_INDICATORS.values()])
+        
+        def has(characteristic):
+            return np.array([characteristic in config.get('characteristics', [])
+                             for config in PATTERN_INDICATORS.values()])
+        
+        # Protocol and port matching
+        scores = np.where(has_protocol, (protocol_matches / total) * weights, 0.0)
+        scores = scores + np.where(port_matches > 0, (port_matches / total) * weights * 0.5, 0.0)
+        
+        # Characteristic-based scoring
+        scores += np.where(has('high_fanout') & (unique_destinations > 5), 0.3, 0.0)
+        scores += np.where(has('aggregation_point') & (unique_sources > unique_destinations * 2), 0.2, 0.0)
+        # Internal communication (same subnet)
+        scores += np.where(has('east_west_traffic') & (internal > total * 0.3), 0.4, 0.0)
+        # Messaging patterns often have lower bytes_in than bytes_out
+        scores += np.where(has('async_communication') & (avg_bytes_out > avg_bytes_in * 0.5) & has_protocol, 0.3, 0.0)
+        # Database patterns have high byte ratios
+        scores += np.where(has('high_read_write') & ((avg_bytes_in + avg_bytes_out) > 5000) & has_protocol, 0.4, 0.0)
+        # Many-to-many communication patterns
+        scores += np.where(has('pub_sub') & (unique_sources > 2) & (unique_destinations > 2) & has_protocol, 0.3, 0.0)
+        
+        return pd.DataFrame(np.minimum(scores, 2.0),  # Cap at 2.0
+                            index=features.index, columns=list(PATTERN_INDICATORS))
     
     def _extract_application_components(self, app_data):
         """Extract distinct components within an application"""
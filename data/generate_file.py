@@ -751,7 +751,7 @@ def synthesize_additional_records(df: pd.DataFrame, target_count: int) -> pd.Dat
     synthetic_df = pd.DataFrame(synthetic_records)
     return pd.concat([df, synthetic_df], ignore_index=True)
 
-def main():
+def build_arg_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Complete data preparation pipeline with YAML archetype templates")
     
     # Input/Output arguments
@@ -781,151 +781,164 @@ def main():
     # Debug options
     parser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
     
-    args = parser.parse_args()
+    return parser
+
+def prepare_staging_file(args) -> Path:
+    """
+    Run the complete data preparation for one input file and return the CSV
+    written to the staging directory. Used by main() and by the in-process
+    batch engine, so both apply the same blank-row, category-filter,
+    statistics and synthesis steps.
+    """
+    input_path = Path(args.input)
+    if not input_path.is_absolute():
+        input_path = Path(args.data_dir) / input_path
     
-    try:
-        input_path = Path(args.input)
-        if not input_path.is_absolute():
-            input_path = Path(args.data_dir) / input_path
-        
-        print(f"Loading data from: {input_path}")
-        df_input = load_frame(input_path, args.sheet)
-        print(f"Loaded {len(df_input)} rows, {len(df_input.columns)} columns")
-        
-        # Remove blank rows
-        if not args.keep_blank_rows:
-            initial_rows = len(df_input)
-            df_input = df_input.dropna(how='all')
-            df_input = df_input[df_input.astype(str).ne('').any(axis=1)]
-            df_input = df_input.reset_index(drop=True)
-            
-            rows_removed = initial_rows - len(df_input)
-            if rows_removed > 0:
-                print(f"Removed {rows_removed} blank rows")
-        
-        if args.verbose:
-            print(f"Columns: {list(df_input.columns)}")
-            print(f"Sample data:\n{df_input.head()}")
-        
-        # Complete processing with archetype mapping
-        df_processed = process_network_edges_complete(df_input, args, input_path)
-        print(f"Processed {len(df_processed)} network edge records")
-        
-        # Filter by category if requested
-        if args.category_filter:
-            category_filter = args.category_filter.upper()
-            initial_count = len(df_processed)
-            df_processed = df_processed[df_processed['service_category'] == category_filter]
-            print(f"Filtered to {category_filter} services: {len(df_processed)} records (was {initial_count})")
+    print(f"Loading data from: {input_path}")
+    df_input = load_frame(input_path, args.sheet)
+    print(f"Loaded {len(df_input)} rows, {len(df_input.columns)} columns")
+    
+    # Remove blank rows
+    if not args.keep_blank_rows:
+        initial_rows = len(df_input)
+        df_input = df_input.dropna(how='all')
+        df_input = df_input[df_input.astype(str).ne('').any(axis=1)]
+        df_input = df_input.reset_index(drop=True)
         
-        # Show detailed service statistics
-        if args.show_service_stats and len(df_processed) > 0:
-            print("\n" + "="*60)
-            print("DETAILED SERVICE CLASSIFICATION STATISTICS")
-            print("="*60)
-            
-            for category in sorted(df_processed['service_category'].unique()):
-                category_data = df_processed[df_processed['service_category'] == category]
-                print(f"\n{category} SERVICES ({len(category_data)} records):")
-                
-                service_type_counts = category_data['service_type'].value_counts()
-                for service_type, count in service_type_counts.items():
-                    percentage = (count / len(category_data)) * 100
-                    
-                    # Get description from SERVICE_CATEGORIES
-                    description = "Unknown service type"
-                    if category in SERVICE_CATEGORIES and service_type in SERVICE_CATEGORIES[category]:
-                        description = SERVICE_CATEGORIES[category][service_type]['description']
-                    
-                    print(f"  • {service_type.replace('_', ' ').title()}: {count} ({percentage:.1f}%)")
-                    print(f"    {description}")
-                    
-                    # Show archetype hints
-                    if category in SERVICE_CATEGORIES and service_type in SERVICE_CATEGORIES[category]:
-                        hints = SERVICE_CATEGORIES[category][service_type].get('archetype_hints', [])
-                        if hints:
-                            print(f"    Suggested archetypes: {', '.join(hints[:3])}")
-                    print()
+        rows_removed = initial_rows - len(df_input)
+        if rows_removed > 0:
+            print(f"Removed {rows_removed} blank rows")
+    
+    if args.verbose:
+        print(f"Columns: {list(df_input.columns)}")
+        print(f"Sample data:\n{df_input.head()}")
+    
+    # Complete processing with archetype mapping
+    df_processed = process_network_edges_complete(df_input, args, input_path)
+    print(f"Processed {len(df_processed)} network edge records")
+    
+    # Filter by category if requested
+    if args.category_filter:
+        category_filter = args.category_filter.upper()
+        initial_count = len(df_processed)
+        df_processed = df_processed[df_processed['service_category'] == category_filter]
+        print(f"Filtered to {category_filter} services: {len(df_processed)} records (was {initial_count})")
+    
+    # Show detailed service statistics
+    if args.show_service_stats and len(df_processed) > 0:
+        print("\n" + "="*60)
+        print("DETAILED SERVICE CLASSIFICATION STATISTICS")
+        print("="*60)
         
-        # Show detailed archetype analysis
-        if args.show_archetype_details and len(df_processed) > 0:
-            print("\n" + "="*60)
-            print("DETAILED ARCHETYPE ANALYSIS")
-            print("="*60)
+        for category in sorted(df_processed['service_category'].unique()):
+            category_data = df_processed[df_processed['service_category'] == category]
+            print(f"\n{category} SERVICES ({len(category_data)} records):")
             
-            archetype_counts = df_processed['archetype'].value_counts()
-            for archetype, count in archetype_counts.items():
-                percentage = (count / len(df_processed)) * 100
-                details = get_archetype_details(archetype)
-                
-                print(f"\n{archetype.upper()}: {count} records ({percentage:.1f}%)")
-                print(f"Description: {details.get('description', 'No description available')}")
-                print(f"Traffic Pattern: {details.get('traffic_pattern', 'Unknown')}")
+            service_type_counts = category_data['service_type'].value_counts()
+            for service_type, count in service_type_counts.items():
+                percentage = (count / len(category_data)) * 100
                 
-                indicators = details.get('indicators', [])
-                if indicators:
-                    print(f"Key Indicators: {', '.join(indicators[:5])}")
+                # Get description from SERVICE_CATEGORIES
+                description = "Unknown service type"
+                if category in SERVICE_CATEGORIES and service_type in SERVICE_CATEGORIES[category]:
+                    description = SERVICE_CATEGORIES[category][service_type]['description']
                 
-                typical_ports = details.get('typical_ports', [])
-                if typical_ports:
-                    print(f"Typical Ports: {', '.join(map(str, typical_ports[:10]))}")
+                print(f"  • {service_type.replace('_', ' ').title()}: {count} ({percentage:.1f}%)")
+                print(f"    {description}")
                 
-                # Show applications using this archetype
-                archetype_apps = df_processed[df_processed['archetype'] == archetype]['application'].unique()
-                if len(archetype_apps) <= 5:
-                    print(f"Applications: {', '.join(archetype_apps)}")
-                else:
-                    print(f"Applications: {', '.join(archetype_apps[:5])} ... and {len(archetype_apps)-5} more")
-        
-        # Synthesize additional records if needed
-        if not args.no_synthesize and len(df_processed) < args.min_rows:
-            df_processed = synthesize_additional_records(df_processed, args.min_rows)
-            print(f"Total records after synthesis: {len(df_processed)}")
-        
-        # Save to staging directory
-        input_stem = input_path.stem
-        if input_stem.startswith("App_Code_"):
-            clean_name = input_stem.replace("App_Code_", "", 1)
-            output_filename = f"{clean_name}_complete_archetype"
-        else:
-            output_filename = f"{input_path.stem}_complete_archetype"
-            
-        csv_path = save_to_staging(df_processed, output_filename, args.staging_dir)
-        
-        # Summary
-        print(f"\nSUCCESS: Complete processing with YAML archetype templates completed successfully!")
-        print(f"Output file: {csv_path}")
-        print(f"Total records: {len(df_processed):,}")
-        print(f"Service categories: {df_processed['service_category'].nunique()}")
-        print(f"Service types: {df_processed['service_type'].nunique()}")
-        print(f"Archetype patterns: {df_processed['archetype'].nunique()}")
-        
-        file_size = csv_path.stat().st_size / (1024 * 1024)
-        print(f"File size: {file_size:.2f} MB")
+                # Show archetype hints
+                if category in SERVICE_CATEGORIES and service_type in SERVICE_CATEGORIES[category]:
+                    hints = SERVICE_CATEGORIES[category][service_type].get('archetype_hints', [])
+                    if hints:
+                        print(f"    Suggested archetypes: {', '.join(hints[:3])}")
+                print()
+    
+    # Show detailed archetype analysis
+    if args.show_archetype_details and len(df_processed) > 0:
+        print("\n" + "="*60)
+        print("DETAILED ARCHETYPE ANALYSIS")
+        print("="*60)
         
-        # Final archetype summary
-        print(f"\nFINAL ARCHETYPE DISTRIBUTION:")
         archetype_counts = df_processed['archetype'].value_counts()
         for archetype, count in archetype_counts.items():
             percentage = (count / len(df_processed)) * 100
-            print(f"  {archetype}: {count} records ({percentage:.1f}%)")
-        
-        if args.verbose:
-            print(f"\nSample of complete enhanced data:")
-            sample_cols = ['application', 'service_category', 'service_type', 'archetype', 'source_ip', 'destination_ip', 'protocol', 'port']
-            available_cols = [col for col in sample_cols if col in df_processed.columns]
-            print(df_processed[available_cols].head())
+            details = get_archetype_details(archetype)
+            
+            print(f"\n{archetype.upper()}: {count} records ({percentage:.1f}%)")
+            print(f"Description: {details.get('description', 'No description available')}")
+            print(f"Traffic Pattern: {details.get('traffic_pattern', 'Unknown')}")
+            
+            indicators = details.get('indicators', [])
+            if indicators:
+                print(f"Key Indicators: {', '.join(indicators[:5])}")
             
-        print(f"\nComplete file ready for advanced topology analysis!")
-        print(f"Next steps:")
-        print(f"   1. Service topology: python enhanced_service_classification.py --input {csv_path}")
-        print(f"   2. Advanced clustering: python advanced_topology_with_clustering.py --input {csv_path}")
-        print(f"   3. Complete workflow: python integration_workflow.py --input {csv_path}")
-        print(f"\nAvailable archetype patterns from YAML templates:")
-        for archetype in sorted(ARCHETYPE_TEMPLATES.keys()):
-            if archetype in df_processed['archetype'].values:
-                print(f"   AVAILABLE: {archetype}")
+            typical_ports = details.get('typical_ports', [])
+            if typical_ports:
+                print(f"Typical Ports: {', '.join(map(str, typical_ports[:10]))}")
+            
+            # Show applications using this archetype
+            archetype_apps = df_processed[df_processed['archetype'] == archetype]['application'].unique()
+            if len(archetype_apps) <= 5:
+                print(f"Applications: {', '.join(archetype_apps)}")
+            else:
+                print(f"Applications: {', '.join(archetype_apps[:5])} ... and {len(archetype_apps)-5} more")
+    
+    # Synthesize additional records if needed
+    if not args.no_synthesize and len(df_processed) < args.min_rows:
+        df_processed = synthesize_additional_records(df_processed, args.min_rows)
+        print(f"Total records after synthesis: {len(df_processed)}")
+    
+    # Save to staging directory
+    input_stem = input_path.stem
+    if input_stem.startswith("App_Code_"):
+        clean_name = input_stem.replace("App_Code_", "", 1)
+        output_filename = f"{clean_name}_complete_archetype"
+    else:
+        output_filename = f"{input_path.stem}_complete_archetype"
         
+    csv_path = save_to_staging(df_processed, output_filename, args.staging_dir)
+    
+    # Summary
+    print(f"\nSUCCESS: Complete processing with YAML archetype templates completed successfully!")
+    print(f"Output file: {csv_path}")
+    print(f"Total records: {len(df_processed):,}")
+    print(f"Service categories: {df_processed['service_category'].nunique()}")
+    print(f"Service types: {df_processed['service_type'].nunique()}")
+    print(f"Archetype patterns: {df_processed['archetype'].nunique()}")
+    
+    file_size = csv_path.stat().st_size / (1024 * 1024)
+    print(f"File size: {file_size:.2f} MB")
+    
+    # Final archetype summary
+    print(f"\nFINAL ARCHETYPE DISTRIBUTION:")
+    archetype_counts = df_processed['archetype'].value_counts()
+    for archetype, count in archetype_counts.items():
+        percentage = (count / len(df_processed)) * 100
+        print(f"  {archetype}: {count} records ({percentage:.1f}%)")
+    
+    if args.verbose:
+        print(f"\nSample of complete enhanced data:")
+        sample_cols = ['application', 'service_category', 'service_type', 'archetype', 'source_ip', 'destination_ip', 'protocol', 'port']
+        available_cols = [col for col in sample_cols if col in df_processed.columns]
+        print(df_processed[available_cols].head())
+        
+    print(f"\nComplete file ready for advanced topology analysis!")
+    print(f"Next steps:")
+    print(f"   1. Service topology: python enhanced_service_classification.py --input {csv_path}")
+    print(f"   2. Advanced clustering: python advanced_topology_with_clustering.py --input {csv_path}")
+    print(f"   3. Complete workflow: python integration_workflow.py --input {csv_path}")
+    print(f"\nAvailable archetype patterns from YAML templates:")
+    for archetype in sorted(ARCHETYPE_TEMPLATES.keys()):
+        if archetype in df_processed['archetype'].values:
+            print(f"   AVAILABLE: {archetype}")
+    
+    return csv_path
+
+def main():
+    args = build_arg_parser().parse_args()
+    
+    try:
+        prepare_staging_file(args)
         return 0
         
     except Exception as e:
@@ -20,170 +20,179 @@ from collections import defaultdict, Counter
 import math
 import argparse
 
+# Dominant edge protocol -> edge type
+EDGE_PROTOCOL_TYPES = {
+    'IBMMQ': 'ibm_mq',
+    'IBMMQ-SSL': 'ibm_mq_secure',
+    'AMQP': 'message_broker',
+    'KAFKA': 'event_streaming',
+    'JMS': 'java_messaging',
+    'MQTT': 'iot_messaging',
+    'HTTP': 'web_api',
+    'HTTPS': 'secure_web_api',
+    'GRPC': 'microservice_api',
+    'MYSQL': 'database',
+    'POSTGRESQL': 'database',
+    'ORACLE-TNS': 'enterprise_db',
+    'TDS': 'mssql_db',
+    'REDIS': 'cache',
+    'RDP': 'remote_desktop',
+    'SSH': 'secure_shell',
+    'TELNET': 'terminal'
+}
+
+# Node pattern -> protocols that indicate it
+NODE_PATTERN_PROTOCOLS = {
+    'web_layer': ['HTTP', 'HTTPS'],
+    'data_layer': ['MYSQL', 'POSTGRESQL', 'ORACLE-TNS', 'TDS', 'MONGODB'],
+    'messaging_layer': ['IBMMQ', 'IBMMQ-SSL', 'AMQP', 'KAFKA', 'JMS', 'MQTT'],
+    'microservices': ['GRPC'],
+    'legacy_system': ['RDP', 'TELNET', 'TDS'],
+    'cache_layer': ['REDIS']
+}
+
 class TrafficWeightedVisualizer:
-    def __init__(self, df):
+    def __init__(self, df, keep_flow_details=False):
         self.df = df
         self.G = nx.MultiDiGraph()
         self.traffic_flows = defaultdict(lambda: defaultdict(float))
+        # Per-connection records for each edge; only filled when keep_flow_details is set
+        self.keep_flow_details = keep_flow_details
         self.protocol_flows = defaultdict(lambda: defaultdict(list))
         self.composite_patterns = {}
+    
+    def _endpoint(self, ip_col, hostname_col):
+        """IP address for each row, falling back to the hostname; NaN when neither is known"""
         
+        missing = pd.Series(np.nan, index=self.df.index, dtype=object)
+        ip = self.df[ip_col] if ip_col in self.df.columns else missing
+        hostname = self.df[hostname_col] if hostname_col in self.df.columns else missing
+        
+        ip = ip.where(ip.notna() & (ip.astype(str) != ''))
+        hostname = hostname.where(hostname.notna() & (hostname.astype(str) != ''))
+        return ip.fillna(hostname)
+    
     def build_traffic_graph(self):
         """Build graph with traffic-weighted edges and composite pattern detection"""
         
         print("Building traffic-weighted network graph...")
         
-        # Group connections by source-destination pairs
-        connection_groups = defaultdict(lambda: {
-            'total_bytes': 0,
-            'connections': [],
-            'protocols': Counter(),
-            'applications': set(),
-            'dominant_protocol': '',
-            'avg_bytes_per_conn': 0
-        })
-        
-        for _, row in self.df.iterrows():
-            src = row.get('source_ip') or row.get('source_hostname', 'unknown_src')
-            dst = row.get('destination_ip') or row.get('destination_hostname', 'unknown_dst')
-            
-            if src == 'unknown_src' or dst == 'unknown_dst':
-                continue
-            
-            conn_key = (src, dst)
-            
-            # Aggregate traffic data
-            bytes_in = int(row.get('bytes_in', 0))
-            bytes_out = int(row.get('bytes_out', 0))
-            total_bytes = bytes_in + bytes_out
-            
-            connection_groups[conn_key]['total_bytes'] += total_bytes
-            connection_groups[conn_key]['connections'].append({
-                'protocol': row.get('protocol', ''),
-                'port': row.get('port', ''),
-                'bytes_in': bytes_in,
-                'bytes_out': bytes_out,
-                'service_type': row.get('service_type', ''),
-                'application': row.get('application', '')
-            })
-            connection_groups[conn_key]['protocols'][row.get('protocol', 'Unknown')] += 1
-            connection_groups[conn_key]['applications'].add(row.get('application', ''))
+        df = self.df
+        
+        def column(name, default):
+            return df[name].fillna(default) if name in df.columns else pd.Series(default, index=df.index)
+        
+        bytes_in = pd.to_numeric(column('bytes_in', 0), errors='coerce').fillna(0).astype('int64')
+        bytes_out = pd.to_numeric(column('bytes_out', 0), errors='coerce').fillna(0).astype('int64')
+        
+        flows = pd.DataFrame({
+            'src': self._endpoint('source_ip', 'source_hostname'),
+            'dst': self._endpoint('destination_ip', 'destination_hostname'),
+            'protocol': column('protocol', 'Unknown'),
+            'application': column('application', ''),
+            'bytes': bytes_in + bytes_out
+        }).dropna(subset=['src', 'dst'])
+        
+        # Group connections by source-destination pairs (in order of first appearance)
+        edges = flows.groupby(['src', 'dst'], sort=False)['bytes'].agg(['sum', 'size'])
+        
+        # Protocols per edge in order of first appearance; the dominant one is the most
+        # frequent, ties going to the protocol seen first
+        protocol_counts = flows.groupby(['src', 'dst', 'protocol'], sort=False).size()
+        protocols = defaultdict(list)
+        for src, dst, protocol in protocol_counts.index.tolist():
+            protocols[(src, dst)].append(protocol)
+        dominant = protocol_counts.groupby(level=[0, 1], sort=False).idxmax()
+        
+        applications = defaultdict(list)
+        app_pairs = flows[['src', 'dst', 'application']].drop_duplicates()
+        for src, dst, app in zip(app_pairs['src'].tolist(), app_pairs['dst'].tolist(), app_pairs['application'].tolist()):
+            applications[(src, dst)].append(app)
         
         # Build graph with aggregated data
-        for (src, dst), data in connection_groups.items():
-            data['avg_bytes_per_conn'] = data['total_bytes'] / len(data['connections'])
-            data['dominant_protocol'] = data['protocols'].most_common(1)[0][0] if data['protocols'] else 'Unknown'
-            
-            # Determine edge type based on protocol
-            edge_type = self._classify_edge_type(data['dominant_protocol'], data['connections'])
-            
-            self.G.add_edge(src, dst,
-                          weight=data['total_bytes'],
-                          connection_count=len(data['connections']),
-                          protocols=list(data['protocols'].keys()),
-                          dominant_protocol=data['dominant_protocol'],
-                          applications=list(data['applications']),
-                          edge_type=edge_type,
-                          avg_bytes=data['avg_bytes_per_conn'])
-            
-            # Store detailed flow information
-            self.traffic_flows[src][dst] = data['total_bytes']
-            self.protocol_flows[src][dst] = data['connections']
+        edge_list = []
+        for (src, dst), total_bytes, connection_count, (_, _, dominant_protocol) in zip(
+                edges.index.tolist(), edges['sum'].tolist(), edges['size'].tolist(), dominant.reindex(edges.index).tolist()):
+            edge_list.append((src, dst, {
+                'weight': total_bytes,
+                'connection_count': connection_count,
+                'protocols': protocols[(src, dst)],
+                'dominant_protocol': dominant_protocol,
+                'applications': applications[(src, dst)],
+                'edge_type': self._classify_edge_type(dominant_protocol, connection_count),
+                'avg_bytes': total_bytes / connection_count
+            }))
+            self.traffic_flows[src][dst] = total_bytes
+        
+        self.G.add_edges_from(edge_list)
+        
+        # Detailed flow information is O(connections), so only kept on request
+        if self.keep_flow_details:
+            details = pd.DataFrame({
+                'protocol': column('protocol', ''),
+                'port': column('port', ''),
+                'bytes_in': bytes_in,
+                'bytes_out': bytes_out,
+                'service_type': column('service_type', ''),
+                'application': column('application', '')
+            }).loc[flows.index]
+            for (src, dst), group in details.groupby([flows['src'], flows['dst']], sort=False):
+                self.protocol_flows[src][dst] = group.to_dict('records')
         
-        print(f"Created graph with {self.G.number_of_nodes()} nodes and {self.G.number_of_edges()} edges")
+        print(f"Created graph with {self.G.number_of_nodes()} nodes and {len(edge_list)} edges")
         
         # Detect composite patterns for each node
-        self._detect_composite_node_patterns()
+        self._detect_composite_node_patterns(flows, edges.index)
     
-    def _classify_edge_type(self, protocol, connections):
+    def _classify_edge_type(self, protocol, connection_count):
         """Classify edge type based on protocol and traffic patterns"""
         
-        protocol_types = {
-            'IBMMQ': 'ibm_mq',
-            'IBMMQ-SSL': 'ibm_mq_secure',
-            'AMQP': 'message_broker',
-            'KAFKA': 'event_streaming',
-            'JMS': 'java_messaging',
-            'MQTT': 'iot_messaging',
-            'HTTP': 'web_api',
-            'HTTPS': 'secure_web_api',
-            'GRPC': 'microservice_api',
-            'MYSQL': 'database',
-            'POSTGRESQL': 'database',
-            'ORACLE-TNS': 'enterprise_db',
-            'TDS': 'mssql_db',
-            'REDIS': 'cache',
-            'RDP': 'remote_desktop',
-            'SSH': 'secure_shell',
-            'TELNET': 'terminal'
-        }
-        
-        return protocol_types.get(protocol, 'generic')
+        return EDGE_PROTOCOL_TYPES.get(protocol, 'generic')
     
-    def _detect_composite_node_patterns(self):
+    def _detect_composite_node_patterns(self, flows, edge_pairs):
         """Detect composite architectural patterns for each node"""
         
         print("Detecting composite patterns for nodes...")
         
-        for node in self.G.nodes():
-            patterns = set()
-            
-            # Analyze incoming connections (node as destination)
-            incoming_protocols = []
-            incoming_traffic = 0
-            for pred in self.G.predecessors(node):
-                edge_data = self.G[pred][node][0]  # Get first edge (MultiDiGraph)
-                incoming_protocols.extend(edge_data.get('protocols', []))
-                incoming_traffic += edge_data.get('weight', 0)
-            
-            # Analyze outgoing connections (node as source)
-            outgoing_protocols = []
-            outgoing_traffic = 0
-            for succ in self.G.successors(node):
-                edge_data = self.G[node][succ][0]
-                outgoing_protocols.extend(edge_data.get('protocols', []))
-                outgoing_traffic += edge_data.get('weight', 0)
-            
-            # Determine patterns based on protocol combinations
-            all_protocols = set(incoming_protocols + outgoing_protocols)
-            
-            # Web tier pattern
-            if any(p in all_protocols for p in ['HTTP', 'HTTPS']):
-                patterns.add('web_layer')
-            
-            # Database pattern
-            if any(p in all_protocols for p in ['MYSQL', 'POSTGRESQL', 'ORACLE-TNS', 'TDS', 'MONGODB']):
-                patterns.add('data_layer')
-            
-            # Messaging pattern (including IBM MQ)
-            if any(p in all_protocols for p in ['IBMMQ', 'IBMMQ-SSL', 'AMQP', 'KAFKA', 'JMS', 'MQTT']):
-                patterns.add('messaging_layer')
-                
-                # Specific IBM MQ pattern
-                if any(p.startswith('IBMMQ') for p in all_protocols):
-                    patterns.add('ibm_mq_integration')
-            
-            # API Gateway pattern (high fanout)
-            if len(list(self.G.successors(node))) > 3 and 'HTTP' in all_protocols:
-                patterns.add('api_gateway')
-            
-            # Microservices pattern
-            if 'GRPC' in all_protocols or len([p for p in all_protocols if p == 'HTTP']) > 2:
-                patterns.add('microservices')
-            
-            # Legacy system pattern
-            if any(p in all_protocols for p in ['RDP', 'TELNET', 'TDS']):
-                patterns.add('legacy_system')
-            
-            # Cache pattern
-            if 'REDIS' in all_protocols:
-                patterns.add('cache_layer')
-            
-            # Hub pattern (high connectivity)
-            total_connections = len(list(self.G.predecessors(node))) + len(list(self.G.successors(node)))
-            if total_connections > 5:
-                patterns.add('integration_hub')
-            
+        nodes = list(self.G.nodes())
+        if not nodes:
+            return
+        node_index = pd.Index(nodes)
+        
+        # Degree arrays: one edge per (src, dst) pair, so edge counts are neighbour counts
+        src_codes = node_index.get_indexer(edge_pairs.get_level_values(0))
+        dst_codes = node_index.get_indexer(edge_pairs.get_level_values(1))
+        out_degree = np.bincount(src_codes, minlength=len(nodes))
+        in_degree = np.bincount(dst_codes, minlength=len(nodes))
+        
+        # Node x protocol matrix: protocols seen on any incoming or outgoing edge
+        node_protocols = flows[['src', 'dst', 'protocol']].drop_duplicates()
+        protocol_index = pd.Index(node_protocols['protocol'].unique())
+        protocol_codes = protocol_index.get_indexer(node_protocols['protocol'])
+        seen = np.zeros((len(nodes), len(protocol_index)), dtype=bool)
+        seen[node_index.get_indexer(node_protocols['src']), protocol_codes] = True
+        seen[node_index.get_indexer(node_protocols['dst']), protocol_codes] = True
+        
+        def uses_any(protocol_names):
+            columns = [i for i, p in enumerate(protocol_index) if p in protocol_names]
+            return seen[:, columns].any(axis=1)
+        
+        pattern_masks = {pattern: uses_any(names) for pattern, names in NODE_PATTERN_PROTOCOLS.items()}
+        
+        # Specific IBM MQ pattern
+        ibm_mq_columns = [i for i, p in enumerate(protocol_index) if str(p).startswith('IBMMQ')]
+        pattern_masks['ibm_mq_integration'] = pattern_masks['messaging_layer'] & seen[:, ibm_mq_columns].any(axis=1)
+        
+        # API Gateway pattern (high fanout)
+        pattern_masks['api_gateway'] = (out_degree > 3) & uses_any(['HTTP'])
+        
+        # Hub pattern (high connectivity)
+        pattern_masks['integration_hub'] = (out_degree + in_degree) > 5
+        
+        names = list(pattern_masks)
+        matrix = np.column_stack([pattern_masks[name] for name in names])
+        for node, row in zip(nodes, matrix):
+            patterns = {name for name, present in zip(names, row) if present}
             self.composite_patterns[node] = patterns if patterns else {'simple_service'}
     
     def create_traffic_weighted_visualization(self, output_path=None, title="Traffic-Weighted Network Architecture"):
@@ -35,6 +35,9 @@ logger = logging.getLogger(__name__)
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
+from services.websocket_hub import WebSocketHub, websocket_hub
+from services.job_registry import JobRegistry, job_registry
+
 # Add this near the top of main.py with other imports
 try:
     from routers.archetype_router import safe_filename
@@ -253,73 +256,62 @@ except ImportError as e:
 class WebSocketConnectionManager:
     """Manage WebSocket connections for Excel processing"""
     
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
-        self.processing_jobs: Dict[str, Any] = {}
+    ACTIVE_STATUSES = ["queued", "processing"]
+    
+    def __init__(self, hub: WebSocketHub = websocket_hub, registry: JobRegistry = job_registry):
+        self.hub = hub
+        self.jobs = registry
+    
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return self.hub.active_connections
     
     async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+        await self.hub.connect(websocket)
     
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Remaining connections: {len(self.active_connections)}")
+        self.hub.disconnect(websocket)
+    
+    def subscribe(self, websocket: WebSocket, job_id: str) -> bool:
+        return self.hub.subscribe(websocket, job_id)
+    
+    def unsubscribe(self, websocket: WebSocket, job_id: str) -> bool:
+        return self.hub.unsubscribe(websocket, job_id)
     
     async def send_personal_message(self, message: dict, websocket: WebSocket):
-        try:
-            await websocket.send_json(message)
-        except Exception as e:
-            logger.error(f"Error sending personal WebSocket message: {e}")
-            self.disconnect(websocket)
+        # Queued behind the client's own sender task so replies never block the handler
+        self.hub.send_personal(websocket, message)
     
     async def broadcast(self, message: dict):
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.warning(f"Failed to send message to WebSocket connection: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected connections
-        for conn in disconnected:
-            self.disconnect(conn)
+        self.hub.broadcast(message)
     
     async def send_job_update(self, job_id: str, update_data: dict):
-        """Send job-specific update to all connected clients"""
-        message = {
-            "type": "job_update",
-            "job_id": job_id,
-            **update_data
-        }
-        await self.broadcast(message)
+        """Send job-specific update to the clients subscribed to the job"""
+        self.hub.publish_job_update(job_id, update_data)
     
-    def add_job(self, job_id: str, job_data: dict):
+    async def add_job(self, job_id: str, job_data: dict):
         """Add job to tracking"""
-        self.processing_jobs[job_id] = {
+        await self.jobs.put_job_async(job_id, {
             **job_data,
-            "created_at": datetime.now().isoformat(),
-            "updated_at": datetime.now().isoformat()
-        }
+            "created_at": datetime.now().isoformat()
+        })
     
-    def update_job(self, job_id: str, updates: dict):
+    async def update_job(self, job_id: str, updates: dict):
         """Update job data"""
-        if job_id in self.processing_jobs:
-            self.processing_jobs[job_id].update(updates)
-            self.processing_jobs[job_id]["updated_at"] = datetime.now().isoformat()
+        await self.jobs.update_job_async(job_id, **updates)
     
-    def get_job(self, job_id: str) -> Optional[Dict]:
+    async def get_job(self, job_id: str) -> Optional[Dict]:
         """Get job data"""
-        return self.processing_jobs.get(job_id)
+        return await self.jobs.get_job_async(job_id)
     
-    def list_active_jobs(self) -> Dict[str, Any]:
+    async def list_active_jobs(self) -> Dict[str, Any]:
         """List jobs that are queued or processing"""
         return {
-            job_id: job for job_id, job in self.processing_jobs.items()
-            if job.get("status") in ["queued", "processing"]
+            job["job_id"]: job for job in await self.jobs.list_jobs_async(status=self.ACTIVE_STATUSES)
         }
+    
+    async def count_jobs(self, job_type: Optional[str] = None) -> int:
+        return await self.jobs.count_jobs_async(job_type=job_type)
 
 # =================== CONFIGURATION ===================
 class AppConfig:
@@ -366,27 +358,27 @@ class AppConfig:
 
 # =================== GLOBAL STATE ===================
 class JobManager:
-    """Simple job manager for tracking active jobs"""
-    def __init__(self):
-        self._jobs: Dict[str, Any] = {}
+    """Diagram job tracking on top of the shared, persistent job registry"""
+    def __init__(self, job_type: str, registry: JobRegistry = job_registry):
+        self._job_type = job_type
+        self._registry = registry
     
-    def add_job(self, job_id: str, job_data: Dict[str, Any]):
-        self._jobs[job_id] = job_data
+    async def add_job(self, job_id: str, job_data: Dict[str, Any]):
+        await self._registry.put_job_async(job_id, {**job_data, "job_type": self._job_type})
     
-    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
-        return self._jobs.get(job_id)
+    async def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return await self._registry.get_job_async(job_id)
     
-    def remove_job(self, job_id: str):
-        if job_id in self._jobs:
-            del self._jobs[job_id]
+    async def remove_job(self, job_id: str):
+        await self._registry.delete_job_async(job_id)
     
-    def list_jobs(self) -> Dict[str, Any]:
-        return self._jobs.copy()
+    async def list_jobs(self) -> Dict[str, Any]:
+        return {job["job_id"]: job for job in await self._registry.list_jobs_async(job_type=self._job_type)}
 
 # Global instances
 file_discovery = FileDiscoveryService()
 websocket_manager = WebSocketConnectionManager()
-active_diagram_jobs = JobManager()
+active_diagram_jobs = JobManager("enhanced_diagram")
 
 # Initialize directories
 AppConfig.ensure_directories()
@@ -612,7 +604,9 @@ async def handle_websocket_message(message: dict, websocket: WebSocket):
     elif message_type == "get_job_status":
         job_id = message.get("job_id")
         if job_id:
-            job = websocket_manager.get_job(job_id)
+            job = await websocket_manager.get_job(job_id)
+            if job:
+                websocket_manager.subscribe(websocket, job_id)
             await websocket_manager.send_personal_message({
                 "type": "job_status",
                 "job_id": job_id,
@@ -625,7 +619,7 @@ async def handle_websocket_message(message: dict, websocket: WebSocket):
             }, websocket)
             
     elif message_type == "get_all_jobs":
-        active_jobs = websocket_manager.list_active_jobs()
+        active_jobs = await websocket_manager.list_active_jobs()
         await websocket_manager.send_personal_message({
             "type": "all_jobs",
             "jobs": active_jobs
@@ -633,10 +627,18 @@ async def handle_websocket_message(message: dict, websocket: WebSocket):
         
     elif message_type == "subscribe_job":
         job_id = message.get("job_id")
-        # Could implement job-specific subscriptions here
         await websocket_manager.send_personal_message({
             "type": "subscribed",
-            "job_id": job_id
+            "job_id": job_id,
+            "success": websocket_manager.subscribe(websocket, job_id)
+        }, websocket)
+        
+    elif message_type == "unsubscribe_job":
+        job_id = message.get("job_id")
+        await websocket_manager.send_personal_message({
+            "type": "unsubscribed",
+            "job_id": job_id,
+            "success": websocket_manager.unsubscribe(websocket, job_id)
         }, websocket)
         
     else:
@@ -647,7 +649,7 @@ async def process_excel_background(job_id: str, file_data: dict):
     """Background Excel processing with WebSocket updates"""
     try:
         # Update to processing
-        websocket_manager.update_job(job_id, {
+        await websocket_manager.update_job(job_id, {
             "status": "processing",
             "progress": 10,
             "message": "Processing Excel file..."
@@ -669,7 +671,7 @@ async def process_excel_background(job_id: str, file_data: dict):
             (90, "Generating results...")
         ]:
             await asyncio.sleep(2)  # Simulate work
-            websocket_manager.update_job(job_id, {
+            await websocket_manager.update_job(job_id, {
                 "progress": progress,
                 "message": message
             })
@@ -685,7 +687,7 @@ async def process_excel_background(job_id: str, file_data: dict):
                     logger.warning(f"WebSocket update failed for job {job_id}: {ws_error}")
         
         # Complete
-        websocket_manager.update_job(job_id, {
+        await websocket_manager.update_job(job_id, {
             "status": "completed",
             "progress": 100,
             "message": "Processing completed successfully"
@@ -700,7 +702,7 @@ async def process_excel_background(job_id: str, file_data: dict):
         
     except Exception as e:
         logger.error(f"Excel processing error for job {job_id}: {e}")
-        websocket_manager.update_job(job_id, {
+        await websocket_manager.update_job(job_id, {
             "status": "error",
             "error": str(e)
         })
@@ -836,7 +838,7 @@ def setup_websocket_endpoints(app: FastAPI):
                     await websocket_manager.send_personal_message({
                         "type": "heartbeat",
                         "timestamp": datetime.now().isoformat(),
-                        "active_jobs": len(websocket_manager.list_active_jobs()),
+                        "active_jobs": len(await websocket_manager.list_active_jobs()),
                         "pipeline_health": pipeline_status["pipeline_health"],
                         "current_csv": pipeline_status["current_active_file"]
                     }, websocket)
@@ -873,10 +875,7 @@ def setup_websocket_endpoints(app: FastAPI):
                     await websocket_manager.send_personal_message({
                         "type": "heartbeat",
                         "timestamp": datetime.now().isoformat(),
-                        "active_excel_jobs": len([
-                            j for j in websocket_manager.processing_jobs.values() 
-                            if j.get("job_type") == "excel_processing"
-                        ]),
+                        "active_excel_jobs": await websocket_manager.count_jobs(job_type="excel_processing"),
                         "pipeline_health": pipeline_status["pipeline_health"]
                     }, websocket)
                     
@@ -895,7 +894,9 @@ def setup_websocket_endpoints(app: FastAPI):
         return {
             "status": "healthy",
             "active_connections": len(websocket_manager.active_connections),
-            "active_jobs": len(websocket_manager.processing_jobs),
+            "active_jobs": len(await websocket_manager.list_active_jobs()),
+            "job_registry": await job_registry.get_stats_async(),
+            "delivery": websocket_manager.hub.get_metrics(),
             "pipeline_health": pipeline_status["pipeline_health"],
             "current_csv": pipeline_status["current_active_file"],
             "websocket_endpoints": [
@@ -1364,7 +1365,7 @@ def setup_excel_integration(app: FastAPI):
         job_id = str(uuid.uuid4())
         
         # Add job to WebSocket manager
-        websocket_manager.add_job(job_id, {
+        await websocket_manager.add_job(job_id, {
             "job_id": job_id,
             "job_type": "excel_processing", 
             "status": "queued",
@@ -1394,7 +1395,7 @@ def setup_excel_integration(app: FastAPI):
     @app.get("/api/v1/excel/job/{job_id}")
     async def get_excel_job_status(job_id: str):
         """Get Excel job status"""
-        job = websocket_manager.get_job(job_id)
+        job = await websocket_manager.get_job(job_id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         return job
@@ -1509,8 +1510,12 @@ def setup_diagram_endpoints(app: FastAPI):
     """Setup Enhanced Diagram Service endpoints"""
     
     @app.post("/api/v1/diagram/generate-enhanced-diagram-by-format")
-    async def generate_enhanced_diagram(request: EnhancedDiagramRequest):
-        """Main endpoint for generating enhanced diagrams with dynamic CSV discovery"""
+    async def generate_enhanced_diagram(request: EnhancedDiagramRequest, wait_for_all_formats: bool = True):
+        """
+        Main endpoint for generating enhanced diagrams with dynamic CSV discovery.
+        With ?wait_for_all_formats=false it returns once the first format is
+        ready; job-status reports the remaining formats as they finish.
+        """
         try:
             if not DIAGRAM_SERVICE_AVAILABLE:
                 raise HTTPException(status_code=503, detail="Diagram service not available")
@@ -1561,12 +1566,13 @@ def setup_diagram_endpoints(app: FastAPI):
                 diagram_type=request.diagram_type,
                 data=data,
                 output_format=request.output_format,
-                quality_level=request.quality_level
+                quality_level=request.quality_level,
+                wait_for_all_formats=wait_for_all_formats
             )
             
             if result.get("success"):
                 job_id = result.get("job_id")
-                active_diagram_jobs.add_job(job_id, result)
+                await active_diagram_jobs.add_job(job_id, result)
             
             return result
             
@@ -1614,15 +1620,21 @@ def setup_diagram_endpoints(app: FastAPI):
     async def get_job_status(job_id: str):
         """Get the status of a generation job"""
         try:
-            job = active_diagram_jobs.get_job(job_id)
+            job = await active_diagram_jobs.get_job(job_id)
             if not job:
                 raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
             
+            # Formats still rendering in this process are reported from the live job
+            live = await diagram_service.get_job_status(job_id) if DIAGRAM_SERVICE_AVAILABLE else None
+            if live:
+                job = {**job, "status": live["status"], "files": live["files"], "formats": live["formats"]}
+            
             return {
                 "success": True,
                 "job_id": job_id,
-                "status": "completed" if job.get("success") else "failed",
+                "status": job.get("status") or ("completed" if job.get("success") else "failed"),
                 "files": job.get("files", []),
+                "formats": job.get("formats", {}),
                 "quality_level": job.get("quality_level"),
                 "processing_time": job.get("processing_time"),
                 "csv_source": job.get("csv_source")
@@ -1683,7 +1695,7 @@ def setup_basic_endpoints(app: FastAPI):
                 },
                 "websocket": {
                     "active_connections": len(websocket_manager.active_connections),
-                    "active_jobs": len(websocket_manager.processing_jobs),
+                    "active_jobs": len(await websocket_manager.list_active_jobs()),
                     "endpoints": ["/ws", "/api/v1/excel/ws"]
                 },
                 "directories": {
@@ -1887,6 +1899,12 @@ async def lifespan(app: FastAPI):
     
     # SHUTDOWN
     logger.info("Shutting down Application Auto-Discovery Platform...")
+    if EXCEL_ROUTER_AVAILABLE:
+        from routers.excel_processing_router import excel_job_executor
+        excel_job_executor.shutdown()
+    if DIAGRAM_SERVICE_AVAILABLE:
+        from services.render_pool import render_pool
+        render_pool.shutdown()
 
 # =================== APP FACTORY FUNCTION ===================
 def create_app() -> FastAPI:
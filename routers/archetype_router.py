@@ -4,12 +4,14 @@ Provides REST API endpoints for archetype management and diagram generation
 with proper error handling, security, and modular design
 """
 
+import asyncio
 import logging
 import os
 import re
 import threading
+import time
 import requests
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Callable
 
@@ -25,6 +27,8 @@ import random
 # Configure logging
 logger = logging.getLogger(__name__)
 
+from services.job_registry import JobRegistry, job_registry
+
 # =================== SERVICE IMPORTS WITH ERROR HANDLING ===================
 try:
     from services.archetype_service import ArchetypeService
@@ -51,12 +55,13 @@ except ImportError as e:
     BankingArchetypeEnhancer = None
 
 try:
-    from services.practical_diagram_generators import generate_all_formats
+    from services.practical_diagram_generators import generate_all_formats, generate_portfolio_formats
     DIAGRAM_GENERATORS_AVAILABLE = True
 except ImportError as e:
     logger.warning(f"Diagram generators not available: {e}")
     DIAGRAM_GENERATORS_AVAILABLE = False
     generate_all_formats = None
+    generate_portfolio_formats = None
 
 # =================== CONFIGURATION ===================
 class AppConfig:
@@ -89,10 +94,14 @@ AppConfig.ensure_directories()
 
 # =================== JOB MANAGEMENT ===================
 class JobManager:
-    """Thread-safe job management"""
+    """Archetype job tracking on top of the shared, persistent job registry"""
+    
+    ACTIVE_STATUSES = ["created", "queued", "processing"]
     
-    def __init__(self):
-        self._jobs: Dict[str, Any] = {}
+    def __init__(self, registry: JobRegistry = job_registry, job_types: Optional[List[str]] = None):
+        self._registry = registry
+        # Job types owned by this router; listings and the concurrency limit only see these
+        self._job_types = set(job_types or ["diagram_generation"])
         self._lock = threading.Lock()
         self._max_jobs = AppConfig.MAX_CONCURRENT_JOBS
     
@@ -101,68 +110,74 @@ class JobManager:
         job_id = str(uuid.uuid4())[:8]
         
         with self._lock:
-            if len(self._jobs) >= self._max_jobs:
-                self.cleanup_old_jobs()
-                if len(self._jobs) >= self._max_jobs:
-                    raise HTTPException(
-                        status_code=429, 
-                        detail="Too many concurrent jobs. Please try again later."
-                    )
+            if self.count_active_jobs() >= self._max_jobs:
+                raise HTTPException(
+                    status_code=429, 
+                    detail="Too many concurrent jobs. Please try again later."
+                )
             
-            self._jobs[job_id] = {
-                "job_id": job_id,
-                "job_type": job_type,
-                "status": "created",
-                "created_at": datetime.now().isoformat(),
-                "progress": 0,
-                "message": "Job created",
-                **kwargs
-            }
+            self._job_types.add(job_type)
+            self._registry.create_job(job_type, job_id=job_id, **kwargs)
         
         logger.info(f"Created job {job_id} of type {job_type}")
         return job_id
     
     def update_job(self, job_id: str, **updates):
         """Update job status"""
-        with self._lock:
-            if job_id in self._jobs:
-                self._jobs[job_id].update(updates)
-                self._jobs[job_id]["updated_at"] = datetime.now().isoformat()
+        self._registry.update_job(job_id, **updates)
     
     def get_job(self, job_id: str) -> Optional[Dict]:
         """Get job status"""
-        with self._lock:
-            return self._jobs.get(job_id)
+        return self._registry.get_job(job_id)
+    
+    def put_job(self, job_id: str, job: Dict[str, Any]):
+        """Store a complete job record"""
+        self._registry.put_job(job_id, job)
     
     def delete_job(self, job_id: str):
         """Delete a job"""
-        with self._lock:
-            if job_id in self._jobs:
-                del self._jobs[job_id]
-                logger.info(f"Deleted job {job_id}")
+        self._registry.delete_job(job_id)
+    
+    def list_jobs(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        """List unexpired jobs, newest first"""
+        return self._registry.list_jobs(status=status, job_type=self._job_types)
+    
+    def count_active_jobs(self) -> int:
+        return self._registry.count_jobs(status=self.ACTIVE_STATUSES, job_type=self._job_types)
     
     def cleanup_old_jobs(self, max_age_hours: int = None):
-        """Clean up old jobs"""
-        if max_age_hours is None:
-            max_age_hours = AppConfig.MAX_JOB_AGE_HOURS
-            
-        cutoff = datetime.now() - timedelta(hours=max_age_hours)
-        
-        with self._lock:
-            expired_jobs = []
-            for job_id, job in self._jobs.items():
-                try:
-                    job_time = datetime.fromisoformat(job["created_at"])
-                    if job_time < cutoff:
-                        expired_jobs.append(job_id)
-                except (KeyError, ValueError):
-                    expired_jobs.append(job_id)  # Remove malformed jobs
-            
-            for job_id in expired_jobs:
-                del self._jobs[job_id]
-            
-            if expired_jobs:
-                logger.info(f"Cleaned up {len(expired_jobs)} old jobs")
+        """Clean up old jobs (expiry is handled by the registry TTL)"""
+        now = None
+        if max_age_hours is not None and self._registry.ttl_seconds:
+            # Shift the clock so jobs older than max_age_hours count as expired
+            now = time.time() + self._registry.ttl_seconds - max_age_hours * 3600
+        self._registry.cleanup_expired(now)
+    
+    # Registry calls can wait on another worker's write lock; async handlers
+    # use these variants so that wait happens in a thread, not on the event loop
+    async def create_job_async(self, job_type: str, **kwargs) -> str:
+        return await asyncio.to_thread(self.create_job, job_type, **kwargs)
+    
+    async def update_job_async(self, job_id: str, **updates):
+        await asyncio.to_thread(self.update_job, job_id, **updates)
+    
+    async def get_job_async(self, job_id: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self.get_job, job_id)
+    
+    async def put_job_async(self, job_id: str, job: Dict[str, Any]):
+        await asyncio.to_thread(self.put_job, job_id, job)
+    
+    async def delete_job_async(self, job_id: str):
+        await asyncio.to_thread(self.delete_job, job_id)
+    
+    async def list_jobs_async(self, status: Optional[str] = None) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.list_jobs, status)
+    
+    async def count_active_jobs_async(self) -> int:
+        return await asyncio.to_thread(self.count_active_jobs)
+    
+    async def cleanup_old_jobs_async(self, max_age_hours: int = None):
+        await asyncio.to_thread(self.cleanup_old_jobs, max_age_hours)
 
 # Global job manager
 job_manager = JobManager()
@@ -259,6 +274,16 @@ class PracticalDiagramRequest(BaseModel):
     app_name: str = "TestApp"
     job_id: Optional[str] = None
 
+class PortfolioAppSpec(BaseModel):
+    app_name: str
+    archetype: str = "three_tier"
+    applications: Optional[List[Dict[str, Any]]] = None
+
+class PracticalDiagramBatchRequest(BaseModel):
+    apps: List[PortfolioAppSpec]
+    force: bool = False
+    max_workers: Optional[int] = None
+
 # =================== SERVICE INITIALIZATION ===================
 def initialize_services():
     """Initialize services with error handling"""
@@ -801,7 +826,7 @@ async def generate_practical_diagrams(
         logger.info("DIAGRAM_GENERATORS_AVAILABLE is True")
         
         if not job_id:
-            job_id = job_manager.create_job(
+            job_id = await job_manager.create_job_async(
                 job_type="diagram_generation",
                 archetype=archetype,
                 app_name=clean_app_name
@@ -835,6 +860,86 @@ async def generate_practical_diagrams(
         logger.error(f"Error in generate_practical_diagrams: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/generate-practical-diagrams/batch")
+async def generate_practical_diagrams_batch(
+    request: PracticalDiagramBatchRequest,
+    background_tasks: BackgroundTasks
+):
+    """Generate practical diagrams for a list of apps as one resumable batch job"""
+    if not DIAGRAM_GENERATORS_AVAILABLE:
+        raise HTTPException(
+            status_code=503,
+            detail="Diagram generators not available"
+        )
+    if not request.apps:
+        raise HTTPException(status_code=400, detail="No applications provided")
+    
+    portfolio = [
+        {
+            "app_name": safe_filename(app.app_name),
+            "archetype": app.archetype,
+            "applications": app.applications or _practical_sample_applications(app.app_name)
+        }
+        for app in request.apps
+    ]
+    
+    job_id = await job_manager.create_job_async(
+        job_type="portfolio_diagram_generation",
+        status="queued",
+        total_apps=len(portfolio)
+    )
+    background_tasks.add_task(
+        _generate_practical_diagrams_batch_background,
+        job_id, portfolio, request.force, request.max_workers
+    )
+    
+    return {
+        "success": True,
+        "job_id": job_id,
+        "status": "queued",
+        "total_apps": len(portfolio),
+        "status_url": f"/api/v1/archetype/jobs/{job_id}"
+    }
+
+async def _generate_practical_diagrams_batch_background(
+    job_id: str, portfolio: List[Dict[str, Any]], force: bool, max_workers: Optional[int]
+):
+    """Background task for portfolio diagram generation"""
+    try:
+        await job_manager.update_job_async(job_id, status="processing", progress=5, message="Checking manifest...")
+        
+        def report_progress(done: int, total: int):
+            job_manager.update_job(
+                job_id,
+                progress=5 + int(90 * done / max(total, 1)),
+                message=f"Generated {done}/{total} applications"
+            )
+        
+        # The batch drives its own process pool; keep the blocking wait off the event loop
+        result = await asyncio.to_thread(
+            generate_portfolio_formats, portfolio,
+            max_workers=max_workers, force=force, progress_callback=report_progress
+        )
+        
+        await job_manager.update_job_async(
+            job_id,
+            status="completed",
+            progress=100,
+            message=f"Generated {result['generated']}, skipped {result['skipped']} unchanged, "
+                    f"{result['failed']} failed",
+            result=result,
+            completed_at=datetime.now().isoformat()
+        )
+        
+    except Exception as e:
+        logger.error(f"Portfolio diagram generation failed for job {job_id}: {e}")
+        await job_manager.update_job_async(
+            job_id,
+            status="error",
+            error=str(e),
+            completed_at=datetime.now().isoformat()
+        )
+
 @router.get("/test-generate-formats")
 async def test_generate_formats():
     """Test generate_all_formats function directly"""
@@ -870,17 +975,18 @@ async def test_background_sync():
         job_id = "test_sync_job"
         
         # Create test job
-        job_manager._jobs[job_id] = {
+        await job_manager.put_job_async(job_id, {
             "job_id": job_id,
+            "job_type": "diagram_generation",
             "status": "created",
             "progress": 0
-        }
+        })
         
         # Call background function directly
         await _generate_practical_diagrams_background(job_id, "three_tier", "TestApp")
         
         # Get job status
-        job_status = job_manager.get_job(job_id)
+        job_status = await job_manager.get_job_async(job_id)
         
         return {
             "success": True,
@@ -893,25 +999,29 @@ async def test_background_sync():
             "error": str(e)
         }
         
+def _practical_sample_applications(app_name: str) -> List[Dict[str, Any]]:
+    """Sample component list for practical diagrams of a single app"""
+    return [
+        {"id": "web1", "name": safe_filename(app_name), "type": "web_application"},
+        {"id": "api1", "name": f"{safe_filename(app_name)} API", "type": "api_service"},
+        {"id": "db1", "name": f"{safe_filename(app_name)} DB", "type": "database"}
+    ]
+
 async def _generate_practical_diagrams_background(
     job_id: str, archetype: str, app_name: str
 ):
     """Background task for generating practical diagrams"""
     try:
-        job_manager.update_job(job_id, status="processing", progress=10)
+        await job_manager.update_job_async(job_id, status="processing", progress=10)
         
         # Sample applications
-        test_applications = [
-            {"id": "web1", "name": safe_filename(app_name), "type": "web_application"},
-            {"id": "api1", "name": f"{safe_filename(app_name)} API", "type": "api_service"},
-            {"id": "db1", "name": f"{safe_filename(app_name)} DB", "type": "database"}
-        ]
+        test_applications = _practical_sample_applications(app_name)
         
-        job_manager.update_job(job_id, progress=50, message="Generating diagrams...")
+        await job_manager.update_job_async(job_id, progress=50, message="Generating diagrams...")
         
         result = generate_all_formats(archetype, test_applications, app_name, job_id)
         
-        job_manager.update_job(
+        await job_manager.update_job_async(
             job_id,
             status="completed",
             progress=100,
@@ -921,7 +1031,7 @@ async def _generate_practical_diagrams_background(
         
     except Exception as e:
         logger.error(f"Background diagram generation failed for job {job_id}: {e}")
-        job_manager.update_job(
+        await job_manager.update_job_async(
             job_id,
             status="error",
             error=str(e),
@@ -954,7 +1064,7 @@ async def generate_architecture_diagram(
         raise APIError(f"Error validating archetype: {str(e)}", 400)
     
     # Create job
-    job_id = job_manager.create_job(
+    job_id = await job_manager.create_job_async(
         job_type="diagram_generation",
         archetype=request.archetype,
         output_formats=request.output_formats
@@ -982,7 +1092,7 @@ async def _generate_diagram_background(
 ):
     """Background task for diagram generation"""
     try:
-        job_manager.update_job(
+        await job_manager.update_job_async(
             job_id, 
             status="processing", 
             progress=10,
@@ -993,7 +1103,7 @@ async def _generate_diagram_background(
         output_dir = AppConfig.RESULTS_DIR / "diagrams" / job_id
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        job_manager.update_job(job_id, progress=30, message="Processing archetype data...")
+        await job_manager.update_job_async(job_id, progress=30, message="Processing archetype data...")
         
         # Generate diagram data (simplified version)
         generated_files = []
@@ -1043,7 +1153,7 @@ async def _generate_diagram_background(
                 logger.error(f"Error generating {format_type} format: {format_error}")
         
         # Complete job
-        job_manager.update_job(
+        await job_manager.update_job_async(
             job_id,
             status="completed",
             progress=100,
@@ -1053,7 +1163,7 @@ async def _generate_diagram_background(
         
     except Exception as e:
         logger.error(f"Diagram generation background task failed: {e}")
-        job_manager.update_job(
+        await job_manager.update_job_async(
             job_id,
             status="error",
             error=str(e),
@@ -1079,7 +1189,7 @@ def _create_basic_svg(archetype: str, archetype_details: Dict) -> str:
 @handle_service_error
 async def get_job_status(job_id: str):
     """Get status of a job"""
-    job = job_manager.get_job(job_id)
+    job = await job_manager.get_job_async(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return job
@@ -1088,19 +1198,19 @@ async def get_job_status(job_id: str):
 @handle_service_error
 async def delete_job(job_id: str):
     """Delete a job"""
-    job = job_manager.get_job(job_id)
+    job = await job_manager.get_job_async(job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job_manager.delete_job(job_id)
+    await job_manager.delete_job_async(job_id)
     return {"message": f"Job {job_id} deleted"}
 
 @router.get("/jobs")
 @handle_service_error
 async def list_jobs():
     """List all jobs"""
-    job_manager.cleanup_old_jobs()  # Clean up before listing
-    return {"jobs": list(job_manager._jobs.values())}
+    await job_manager.cleanup_old_jobs_async()  # Clean up before listing
+    return {"jobs": await job_manager.list_jobs_async()}
 
 # =================== FILE DOWNLOAD ENDPOINTS ===================
 @router.get("/download/{filename}")
@@ -1209,7 +1319,7 @@ async def health_check():
             "csv_available": (AppConfig.DATA_STAGING_DIR / "applicationList.csv").exists()
         },
         "jobs": {
-            "active_jobs": len(job_manager._jobs),
+            "active_jobs": await job_manager.count_active_jobs_async(),
             "max_jobs": job_manager._max_jobs
         }
     }
@@ -1225,7 +1335,7 @@ async def health_check():
 @handle_service_error 
 async def get_service_status():
     """Detailed service status"""
-    job_manager.cleanup_old_jobs()  # Clean up old jobs
+    await job_manager.cleanup_old_jobs_async()  # Clean up old jobs
     
     return {
         "archetype_service": {
@@ -1241,7 +1351,7 @@ async def get_service_status():
             "initialized": "banking_enhancer" in services
         },
         "job_management": {
-            "active_jobs": len(job_manager._jobs),
+            "active_jobs": await job_manager.count_active_jobs_async(),
             "max_concurrent": job_manager._max_jobs,
             "cleanup_enabled": True
         },
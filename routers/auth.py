@@ -5,12 +5,17 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List  # ← ADD THIS LINE (was missing)
+from typing import Optional, List  # ← ADD THIS LINE (was missing)
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+import asyncio
 import hashlib
+import os
 import secrets
-import time
 import hmac
 
+from services.token_store import token_store
+
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
 
@@ -18,8 +23,14 @@ security = HTTPBearer(auto_error=False)
 SECRET_KEY = "your-secret-key-change-in-production-2024"
 TOKEN_EXPIRE_MINUTES = 30
 
-# Simple token storage
-ACTIVE_TOKENS: Dict[str, Dict[str, Any]] = {}
+# Tokens live in the shared SQLite token store (services/token_store.py), so
+# every worker accepts them and they survive restarts
+ACTIVE_TOKENS = token_store
+
+# PBKDF2 runs in its own small pool so login bursts neither block the event
+# loop nor take over the default executor used by other background work
+PASSWORD_HASH_WORKERS = int(os.getenv("AUTH_PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="auth-hash")
 
 def secure_hash_password(password: str, salt: str = None) -> str:
     """Secure password hashing using PBKDF2"""
@@ -49,20 +60,23 @@ def verify_password(password: str, stored_hash: str) -> bool:
     except ValueError:
         return False
 
+async def hash_password_async(password: str) -> str:
+    """secure_hash_password in the password hashing pool"""
+    return await asyncio.get_running_loop().run_in_executor(_password_executor, secure_hash_password, password)
+
+async def verify_password_async(password: str, stored_hash: str) -> bool:
+    """verify_password in the password hashing pool"""
+    return await asyncio.get_running_loop().run_in_executor(
+        _password_executor, verify_password, password, stored_hash
+    )
+
 def create_access_token(username: str, roles: List[str]) -> str:
     """Create a secure access token"""
-    token = secrets.token_urlsafe(32)
-    expires_at = time.time() + (TOKEN_EXPIRE_MINUTES * 60)
-    
-    ACTIVE_TOKENS[token] = {
-        "username": username,
-        "roles": roles,
-        "expires_at": expires_at,
-        "created_at": time.time(),
-        "last_used": time.time()
-    }
-    
-    return token
+    return token_store.issue(username, roles, TOKEN_EXPIRE_MINUTES * 60)
+
+async def create_access_token_async(username: str, roles: List[str]) -> str:
+    """Create an access token without blocking the event loop"""
+    return await token_store.issue_async(username, roles, TOKEN_EXPIRE_MINUTES * 60)
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> str:
     """Verify and return username from token"""
@@ -73,26 +87,17 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security))
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    token = credentials.credentials
-    
-    if token not in ACTIVE_TOKENS:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token",
-            headers={"WWW-Authenticate": "Bearer"},
-        )
-    
-    token_data = ACTIVE_TOKENS[token]
+    # Sync dependency, so FastAPI runs it in the threadpool; hot tokens come from the
+    # store's LRU. Expired tokens are rejected (and dropped) like unknown ones
+    token_data = token_store.get(credentials.credentials)
     
-    if time.time() > token_data["expires_at"]:
-        del ACTIVE_TOKENS[token]
+    if token_data is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Token expired",
+            detail="Invalid or expired authentication token",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    token_data["last_used"] = time.time()
     return token_data["username"]
 
 def optional_auth(credentials: HTTPAuthorizationCredentials = Depends(security)) -> Optional[str]:
@@ -141,6 +146,9 @@ USERS_DB = {
     }
 }
 
+# Checked for unknown usernames so they cost the same PBKDF2 work as real ones
+_UNKNOWN_USER_HASH = secure_hash_password(secrets.token_urlsafe(16))
+
 # Pydantic models
 class LoginRequest(BaseModel):
     username: str
@@ -249,15 +257,12 @@ async def login(request: LoginRequest):
     """Authenticate user and return access token"""
     user = USERS_DB.get(request.username)
     
-    if not user:
-        # Prevent username enumeration
-        time.sleep(0.1)  # Small delay
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Incorrect username or password"
-        )
+    # Unknown users go through the same hashing work to prevent username enumeration
+    password_ok = await verify_password_async(
+        request.password, user["hashed_password"] if user else _UNKNOWN_USER_HASH
+    )
     
-    if not verify_password(request.password, user["hashed_password"]):
+    if not user or not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password"
@@ -269,7 +274,7 @@ async def login(request: LoginRequest):
             detail="Account is disabled"
         )
     
-    access_token = create_access_token(user["username"], user["roles"])
+    access_token = await create_access_token_async(user["username"], user["roles"])
     
     return Token(
         access_token=access_token,
@@ -298,14 +303,8 @@ async def get_profile(current_user: str = Depends(verify_token)):
 @router.post("/logout")
 async def logout(current_user: str = Depends(verify_token)):
     """Logout user by invalidating token"""
-    # Find and remove user's tokens
-    tokens_to_remove = []
-    for token, data in ACTIVE_TOKENS.items():
-        if data["username"] == current_user:
-            tokens_to_remove.append(token)
-    
-    for token in tokens_to_remove:
-        del ACTIVE_TOKENS[token]
+    # Remove all of the user's tokens, in every worker
+    await token_store.revoke_user_async(current_user)
     
     return {"message": f"User {current_user} logged out successfully"}
 
@@ -351,7 +350,7 @@ async def create_user(user_data: UserCreate, current_user: str = Depends(verify_
     
     USERS_DB[user_data.username] = {
         "username": user_data.username,
-        "hashed_password": secure_hash_password(user_data.password),
+        "hashed_password": await hash_password_async(user_data.password),
         "email": user_data.email,
         "full_name": user_data.full_name,
         "roles": user_data.roles,
@@ -368,9 +367,9 @@ async def get_active_sessions(current_user: str = Depends(verify_token)):
         raise HTTPException(status_code=403, detail="Admin access required")
     
     sessions = []
-    for token, data in ACTIVE_TOKENS.items():
+    for data in await token_store.sessions_async():
         sessions.append({
-            "token_preview": token[:8] + "...",
+            "token_preview": data["token_preview"] + "...",
             "username": data["username"],
             "created_at": datetime.fromtimestamp(data["created_at"]).isoformat(),
             "last_used": datetime.fromtimestamp(data["last_used"]).isoformat(),
@@ -382,28 +381,25 @@ async def get_active_sessions(current_user: str = Depends(verify_token)):
 @router.post("/cleanup")
 async def cleanup_expired_tokens():
     """Clean up expired tokens"""
-    current_time = time.time()
-    expired_tokens = [
-        token for token, data in ACTIVE_TOKENS.items()
-        if current_time > data["expires_at"]
-    ]
-    
-    for token in expired_tokens:
-        del ACTIVE_TOKENS[token]
+    # The store also sweeps in the background; this forces a sweep now
+    removed = await token_store.sweep_async()
     
     return {
-        "message": f"Cleaned up {len(expired_tokens)} expired tokens",
-        "active_tokens": len(ACTIVE_TOKENS)
+        "message": f"Cleaned up {removed} expired tokens",
+        "active_tokens": await token_store.count_async()
     }
 
 @router.get("/test")
 async def test_auth():
     """Test authentication system"""
+    active_tokens = await token_store.count_async()
+    stats = await token_store.get_stats_async()
     return {
         "message": "Authentication system is working!",
         "hashing_method": "PBKDF2-SHA256",
         "available_users": list(USERS_DB.keys()),
-        "active_tokens": len(ACTIVE_TOKENS),
+        "active_tokens": active_tokens,
+        "token_store": stats,
         "token_expire_minutes": TOKEN_EXPIRE_MINUTES,
         "timestamp": datetime.now().isoformat(),
         "test_credentials": {
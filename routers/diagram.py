@@ -14,6 +14,9 @@ import traceback
 from datetime import datetime
 from pathlib import Path
 
+from services.output_cache import output_cache
+from services.render_pool import render_pool
+
 router = APIRouter()
 
 # Request/Response Models
@@ -41,8 +44,12 @@ except Exception as e:
     print("📝 Will use fallback file creation")
 
 @router.post("/generate-enhanced-diagram-by-format")
-async def generate_enhanced_diagram_by_format(request: DiagramRequest):
-    """Generate enhanced diagrams with comprehensive error handling"""
+async def generate_enhanced_diagram_by_format(request: DiagramRequest, wait_for_all_formats: bool = True):
+    """
+    Generate enhanced diagrams with comprehensive error handling. With
+    ?wait_for_all_formats=false the response is returned once the first format
+    is ready and /job/{job_id}/status reports the remaining formats.
+    """
     
     job_id = str(uuid.uuid4())
     
@@ -74,7 +81,8 @@ async def generate_enhanced_diagram_by_format(request: DiagramRequest):
                     diagram_type=request.diagram_type,
                     data=request.data,
                     output_format=request.output_format,
-                    quality_level=request.quality_level
+                    quality_level=request.quality_level,
+                    wait_for_all_formats=wait_for_all_formats
                 )
                 
                 if result and result.get("success"):
@@ -678,6 +686,10 @@ async def get_templates():
 @router.get("/job/{job_id}/status")
 async def get_job_status(job_id: str):
     """Get job status"""
+    if ENHANCED_GENERATOR_AVAILABLE and enhanced_service:
+        status = await enhanced_service.get_job_status(job_id)
+        if status:
+            return status
     return {
         "job_id": job_id,
         "status": "completed",
@@ -695,6 +707,8 @@ async def router_health():
         "enhanced_generator_available": ENHANCED_GENERATOR_AVAILABLE,
         "timestamp": datetime.now().isoformat(),
         "results_directory_exists": Path("results").exists(),
+        "output_cache": output_cache.get_metrics(),
+        "render_pool": render_pool.get_metrics(),
         "endpoints": [
             "/generate-enhanced-diagram-by-format",
             "/generate-document", 
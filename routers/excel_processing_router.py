@@ -7,7 +7,10 @@ from fastapi import APIRouter, UploadFile, File, HTTPException, BackgroundTasks,
 from fastapi.responses import FileResponse, JSONResponse
 from typing import Dict, Any, List, Optional
 from services.archetype_service import ArchetypeService
+from services.websocket_hub import WebSocketHub, websocket_hub
+from services.job_registry import job_registry
 import pandas as pd
+import numpy as np
 import asyncio
 import uuid
 from datetime import datetime
@@ -15,66 +18,64 @@ from pathlib import Path
 import json
 import tempfile
 import logging
+import multiprocessing
+import os
+import queue
+import time
+from concurrent.futures import ProcessPoolExecutor
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-# Job tracking for Excel processing
-processing_jobs = {}
+# Job tracking for Excel processing (shared, persistent registry)
+EXCEL_JOB_TYPE = "excel_processing"
+ACTIVE_JOB_STATUSES = ["queued", "processing"]
 # WebSocket connection manager
 active_websocket_connections = set()
 
 # Initialize archetype service
 archetype_service = ArchetypeService()
 
+# Excel job execution settings (parsing and analysis run in worker processes)
+EXCEL_JOB_CONFIG = {
+    "max_concurrent_jobs": int(os.getenv("EXCEL_MAX_CONCURRENT_JOBS", "2")),
+    "max_queued_jobs": int(os.getenv("EXCEL_MAX_QUEUED_JOBS", "10")),
+    "progress_poll_interval": 0.25,
+    "results_dir": "results/excel"
+}
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    """Excel job WebSocket connections, backed by the shared pub/sub hub"""
+    def __init__(self, hub: WebSocketHub = websocket_hub):
+        self.hub = hub
+
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return self.hub.active_connections
 
     async def connect(self, websocket: WebSocket):
-        await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"WebSocket connected. Total connections: {len(self.active_connections)}")
+        await self.hub.connect(websocket)
 
     def disconnect(self, websocket: WebSocket):
-        if websocket in self.active_connections:
-            self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Remaining connections: {len(self.active_connections)}")
+        self.hub.disconnect(websocket)
+
+    def subscribe(self, websocket: WebSocket, job_id: str) -> bool:
+        return self.hub.subscribe(websocket, job_id)
+
+    def unsubscribe(self, websocket: WebSocket, job_id: str) -> bool:
+        return self.hub.unsubscribe(websocket, job_id)
+
+    async def send_personal_message(self, message: dict, websocket: WebSocket):
+        self.hub.send_personal(websocket, message)
 
     async def send_job_update(self, job_id: str, data: dict):
-        """Send job update to all connected clients"""
-        message = {
-            "job_id": job_id,
-            "type": "job_update",
-            **data
-        }
-        
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.warning(f"Failed to send WebSocket message: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+        """Queue a job update for the clients subscribed to the job"""
+        self.hub.publish_job_update(job_id, data)
 
     async def broadcast_message(self, message: dict):
-        """Broadcast message to all connected clients"""
-        disconnected = []
-        for connection in self.active_connections:
-            try:
-                await connection.send_json(message)
-            except Exception as e:
-                logger.warning(f"Failed to broadcast WebSocket message: {e}")
-                disconnected.append(connection)
-        
-        # Clean up disconnected clients
-        for conn in disconnected:
-            self.disconnect(conn)
+        """Queue a message for all connected clients"""
+        self.hub.broadcast(message)
 
 # Global connection manager
 manager = ConnectionManager()
@@ -82,10 +83,7 @@ manager = ConnectionManager()
 # Update job with WebSocket notification
 async def update_job_with_websocket(job_id: str, **updates):
     """Update job and send WebSocket notification"""
-    if job_id in processing_jobs:
-        processing_jobs[job_id].update(updates)
-        processing_jobs[job_id]["updated_at"] = datetime.now().isoformat()
-        
+    if await job_registry.update_job_async(job_id, **updates):
         # Send WebSocket update
         await manager.send_job_update(job_id, updates)
 
@@ -98,38 +96,55 @@ async def websocket_endpoint(websocket: WebSocket):
         while True:
             # Keep connection alive and handle any incoming messages
             try:
-                # Wait for messages (can be ping/pong or status requests)
+                # Wait for messages (can be ping/pong, subscriptions or status requests)
                 data = await websocket.receive_text()
                 message = json.loads(data) if data else {}
                 
-                # Handle different message types
+                # Handle different message types; replies go through the client's send queue
                 if message.get("type") == "ping":
-                    await websocket.send_json({"type": "pong", "timestamp": datetime.now().isoformat()})
+                    await manager.send_personal_message({"type": "pong", "timestamp": datetime.now().isoformat()}, websocket)
+                elif message.get("type") == "subscribe_job":
+                    job_id = message.get("job_id")
+                    await manager.send_personal_message({
+                        "type": "subscribed",
+                        "job_id": job_id,
+                        "success": manager.subscribe(websocket, job_id)
+                    }, websocket)
+                elif message.get("type") == "unsubscribe_job":
+                    job_id = message.get("job_id")
+                    await manager.send_personal_message({
+                        "type": "unsubscribed",
+                        "job_id": job_id,
+                        "success": manager.unsubscribe(websocket, job_id)
+                    }, websocket)
                 elif message.get("type") == "get_job_status":
                     job_id = message.get("job_id")
-                    if job_id and job_id in processing_jobs:
-                        await websocket.send_json({
+                    job = await job_registry.get_job_async(job_id, include_result=False) if job_id else None
+                    if job:
+                        # Asking about a job implies interest in its updates
+                        manager.subscribe(websocket, job_id)
+                        await manager.send_personal_message({
                             "type": "job_status",
-                            "job_id": job_id,
-                            **processing_jobs[job_id]
-                        })
+                            **job,
+                            "job_id": job_id
+                        }, websocket)
                 elif message.get("type") == "get_all_jobs":
                     active_jobs = {
-                        job_id: job for job_id, job in processing_jobs.items()
-                        if job.get("status") in ["queued", "processing"]
+                        job["job_id"]: job
+                        for job in await job_registry.list_jobs_async(status=ACTIVE_JOB_STATUSES, job_type=EXCEL_JOB_TYPE)
                     }
-                    await websocket.send_json({
+                    await manager.send_personal_message({
                         "type": "all_jobs",
                         "jobs": active_jobs
-                    })
+                    }, websocket)
                     
             except asyncio.TimeoutError:
                 # Send heartbeat every 30 seconds
-                await websocket.send_json({
+                await manager.send_personal_message({
                     "type": "heartbeat", 
                     "timestamp": datetime.now().isoformat(),
-                    "active_jobs": len([j for j in processing_jobs.values() if j.get("status") in ["queued", "processing"]])
-                })
+                    "active_jobs": await job_registry.count_jobs_async(status=ACTIVE_JOB_STATUSES, job_type=EXCEL_JOB_TYPE)
+                }, websocket)
                 await asyncio.sleep(30)
                 
     except WebSocketDisconnect:
@@ -159,6 +174,13 @@ async def process_excel_file(
     if not file.filename.endswith(('.xlsx', '.xls', '.csv')):
         raise HTTPException(status_code=400, detail="Invalid file type. Only Excel and CSV files are supported.")
     
+    # Reject early when the job queue is full
+    if not excel_job_executor.has_capacity():
+        raise HTTPException(
+            status_code=429,
+            detail=f"Too many Excel jobs in progress ({excel_job_executor.pending_jobs}). Please retry later."
+        )
+    
     # Generate job ID
     job_id = str(uuid.uuid4())
     
@@ -171,35 +193,42 @@ async def process_excel_file(
         temp_file.write(content)
         temp_file.close()
         
+        settings = {
+            "port_column": port_column,
+            "protocol_column": protocol_column,
+            "app_column": app_column,
+            "info_column": info_column,
+            "sheet_name": sheet_name,
+            "fallback_parsing": fallback_parsing
+        }
+        
         # Initialize job
-        processing_jobs[job_id] = {
+        await job_registry.put_job_async(job_id, {
             "job_id": job_id,
+            "job_type": EXCEL_JOB_TYPE,
             "status": "queued",
             "filename": file.filename,
             "total_rows": 0,
             "progress": 0,
-            "message": "File uploaded, starting processing...",
+            "message": "File uploaded, waiting for a processing slot...",
             "started_at": datetime.now().isoformat(),
             "result": None,
             "error": None,
-            "settings": {
-                "port_column": port_column,
-                "protocol_column": protocol_column,
-                "app_column": app_column,
-                "info_column": info_column,
-                "sheet_name": sheet_name,
-                "fallback_parsing": fallback_parsing
-            }
-        }
+            "settings": settings
+        })
+        
+        # Reserve a queue slot before handing the job to the background task
+        excel_job_executor.reserve()
         
         # Send initial WebSocket update
         await manager.send_job_update(job_id, {
             "status": "queued",
             "progress": 0,
-            "message": "Job created, initializing..."
+            "message": "Job created, initializing...",
+            "queue_position": excel_job_executor.queued_jobs
         })
         
-        # Start background processing
+        # Start background processing (the heavy lifting happens in a worker process)
         background_tasks.add_task(
             process_excel_background,
             job_id,
@@ -212,35 +241,23 @@ async def process_excel_file(
             fallback_parsing
         )
         
-        # Get initial row count for response
-        try:
-            if file.filename.endswith('.csv'):
-                df = pd.read_csv(temp_file.name)
-            else:
-                df = pd.read_excel(temp_file.name, sheet_name=sheet_name)
-            
-            processing_jobs[job_id]["total_rows"] = len(df)
-            await manager.send_job_update(job_id, {"total_rows": len(df)})
-        except Exception as e:
-            processing_jobs[job_id]["total_rows"] = 0
-            logger.warning(f"Could not determine row count: {e}")
-        
         return {
             "job_id": job_id,
             "status": "queued",
-            "total_rows": processing_jobs[job_id]["total_rows"],
+            "total_rows": 0,
             "message": "Processing started",
             "websocket_available": True
         }
         
     except Exception as e:
         error_message = f"Error processing file: {str(e)}"
-        processing_jobs[job_id] = {
+        await job_registry.put_job_async(job_id, {
             "job_id": job_id,
+            "job_type": EXCEL_JOB_TYPE,
             "status": "error",
             "error": error_message,
             "started_at": datetime.now().isoformat()
-        }
+        })
         
         # Send error via WebSocket
         await manager.send_job_update(job_id, {
@@ -250,6 +267,266 @@ async def process_excel_file(
         
         raise HTTPException(status_code=500, detail=error_message)
 
+def _report_job_progress(progress_queue, job_id: str, **updates):
+    """Push a progress update from a worker process back to the API process"""
+    if progress_queue is None:
+        return
+    try:
+        progress_queue.put_nowait((job_id, updates))
+    except Exception:
+        # Progress is best-effort; never fail the job because of it
+        pass
+
+def run_excel_processing_job(
+    job_id: str,
+    temp_file_path: str,
+    settings: Dict[str, Any],
+    results_dir: str,
+    progress_queue=None
+) -> Dict[str, Any]:
+    """
+    Read, analyze and classify an uploaded sheet.
+
+    Runs inside a worker process: the full application list is written to
+    ``results_dir`` and only a compact summary is returned to the caller.
+    """
+    started = time.time()
+    
+    _report_job_progress(progress_queue, job_id, progress=10, message="Reading Excel file...")
+    
+    # Read the Excel/CSV file
+    if temp_file_path.endswith('.csv'):
+        df = pd.read_csv(temp_file_path)
+    else:
+        df = pd.read_excel(temp_file_path, sheet_name=settings.get("sheet_name") or 0)
+    
+    _report_job_progress(progress_queue, job_id,
+        total_rows=len(df),
+        progress=30,
+        message=f"Loaded {len(df)} rows, analyzing applications..."
+    )
+    
+    # Analyze applications with enhanced column support
+    applications = analyze_applications_from_excel_enhanced(
+        df,
+        settings["port_column"],
+        settings["protocol_column"],
+        settings["app_column"],
+        settings["info_column"],
+        settings["fallback_parsing"],
+        job_id
+    )
+    
+    _report_job_progress(progress_queue, job_id,
+        progress=60,
+        message=f"Classified {len(applications)} applications, generating summary..."
+    )
+    
+    # Classify archetypes using the archetype service (details are cached per archetype)
+    classified_apps = []
+    total_apps = len(applications)
+    details_cache: Dict[str, Any] = {}
+    
+    for i, app in enumerate(applications):
+        # Update progress every 10 apps
+        if i % 10 == 0 or i == total_apps - 1:
+            progress = 60 + (30 * (i + 1) / total_apps)
+            _report_job_progress(progress_queue, job_id,
+                progress=int(progress),
+                message=f"Classifying application {i+1}/{total_apps}..."
+            )
+        
+        architecture = app.get("architecture", "Unknown")
+        if architecture not in details_cache:
+            details_cache[architecture] = archetype_service.get_archetype_details(architecture)
+        archetype_details = details_cache[architecture]
+        
+        app_with_details = {
+            **app,
+            "archetype_details": archetype_details,
+            "cloud_readiness": archetype_details.get("cloud_readiness", "Unknown") if archetype_details else "Unknown",
+            "modernization_effort": archetype_details.get("modernization_effort", "Unknown") if archetype_details else "Unknown",
+            "aws_services": archetype_details.get("aws_services", []) if archetype_details else []
+        }
+        classified_apps.append(app_with_details)
+    
+    # Generate summary statistics
+    summary = generate_processing_summary(classified_apps)
+    
+    result = {
+        "applications": classified_apps,
+        "summary": summary,
+        "rows_processed": len(df),
+        "applications_identified": len(classified_apps),
+        "processing_time": time.time() - started
+    }
+    
+    # Save processed data for download
+    output_dir = Path(results_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    output_file = output_dir / f"processed_{job_id}.json"
+    with open(output_file, 'w') as f:
+        json.dump(result, f, indent=2, default=str)
+    
+    # Only the lightweight part of the result travels back to the API process
+    return {
+        "summary": summary,
+        "rows_processed": result["rows_processed"],
+        "applications_identified": result["applications_identified"],
+        "output_file": str(output_file)
+    }
+
+class ExcelJobExecutor:
+    """
+    Runs Excel processing jobs in a process pool so the event loop stays free.
+
+    At most ``max_concurrent_jobs`` run at once; up to ``max_queued_jobs`` more
+    wait for a slot and anything beyond that is rejected by the endpoint.
+    Worker progress is relayed through ``update_job_with_websocket``.
+    """
+    
+    TERMINAL_STATUSES = ("completed", "error")
+    
+    def __init__(self, max_concurrent_jobs: int = 2, max_queued_jobs: int = 10,
+                 progress_poll_interval: float = 0.25):
+        self.max_concurrent_jobs = max(1, max_concurrent_jobs)
+        self.max_queued_jobs = max(0, max_queued_jobs)
+        self.progress_poll_interval = progress_poll_interval
+        self.pending_jobs = 0
+        self.running_jobs = 0
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._mp_manager = None
+        self._progress_queue = None
+        self._progress_task: Optional[asyncio.Task] = None
+    
+    @property
+    def queued_jobs(self) -> int:
+        return max(0, self.pending_jobs - self.running_jobs)
+    
+    def has_capacity(self) -> bool:
+        return self.pending_jobs < self.max_concurrent_jobs + self.max_queued_jobs
+    
+    def reserve(self):
+        """Count a job against the queue limit until it finishes"""
+        self.pending_jobs += 1
+    
+    def _ensure_started(self):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent_jobs)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_concurrent_jobs)
+            self._mp_manager = multiprocessing.Manager()
+            self._progress_queue = self._mp_manager.Queue()
+    
+    def _drain_progress(self, timeout: float) -> List[tuple]:
+        """Blocking read of all queued progress messages (runs in a thread)"""
+        messages = []
+        try:
+            messages.append(self._progress_queue.get(timeout=timeout))
+            while True:
+                messages.append(self._progress_queue.get_nowait())
+        except (queue.Empty, EOFError, OSError):
+            pass
+        return messages
+    
+    async def _relay_progress(self):
+        """Forward worker progress to the job store and WebSocket clients"""
+        loop = asyncio.get_running_loop()
+        while self.running_jobs > 0:
+            messages = await loop.run_in_executor(None, self._drain_progress, self.progress_poll_interval)
+            for job_id, updates in messages:
+                job = await job_registry.get_job_async(job_id, include_result=False)
+                # Late progress must not overwrite a finished job
+                if job is None or job.get("status") in self.TERMINAL_STATUSES:
+                    continue
+                await update_job_with_websocket(job_id, **updates)
+    
+    async def run(self, job_id: str, temp_file_path: str, settings: Dict[str, Any]):
+        """Wait for a free slot, then execute the job in the process pool"""
+        self._ensure_started()
+        try:
+            async with self._semaphore:
+                self.running_jobs += 1
+                if self._progress_task is None or self._progress_task.done():
+                    self._progress_task = asyncio.create_task(self._relay_progress())
+                try:
+                    await update_job_with_websocket(job_id,
+                        status="processing",
+                        progress=5,
+                        message="Processing slot acquired..."
+                    )
+                    
+                    loop = asyncio.get_running_loop()
+                    summary = await loop.run_in_executor(
+                        self._pool,
+                        run_excel_processing_job,
+                        job_id,
+                        temp_file_path,
+                        settings,
+                        EXCEL_JOB_CONFIG["results_dir"],
+                        self._progress_queue
+                    )
+                finally:
+                    self.running_jobs -= 1
+            
+            job = await job_registry.get_job_async(job_id, include_result=False) or {}
+            started_at = datetime.fromisoformat(job.get("started_at", datetime.now().isoformat()))
+            result = {
+                **summary,
+                "processing_time": (datetime.now() - started_at).total_seconds(),
+                "result_url": f"/api/v1/excel/api/job/{job_id}/result"
+            }
+            
+            # Update job completion
+            await update_job_with_websocket(job_id,
+                status="completed",
+                progress=100,
+                message="Processing completed successfully",
+                result=result,
+                completed_at=datetime.now().isoformat(),
+                output_file=summary["output_file"]
+            )
+            
+        except Exception as e:
+            error_message = str(e)
+            logger.error(f"Excel processing failed for job {job_id}: {error_message}")
+            
+            await update_job_with_websocket(job_id,
+                status="error",
+                error=error_message,
+                completed_at=datetime.now().isoformat()
+            )
+        
+        finally:
+            self.pending_jobs = max(0, self.pending_jobs - 1)
+    
+    def get_status(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent_jobs": self.max_concurrent_jobs,
+            "max_queued_jobs": self.max_queued_jobs,
+            "running_jobs": self.running_jobs,
+            "queued_jobs": self.queued_jobs
+        }
+    
+    def shutdown(self):
+        """Stop worker processes (called on application shutdown)"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._mp_manager is not None:
+            self._mp_manager.shutdown()
+            self._mp_manager = None
+            self._progress_queue = None
+
+# Global Excel job executor
+excel_job_executor = ExcelJobExecutor(
+    max_concurrent_jobs=EXCEL_JOB_CONFIG["max_concurrent_jobs"],
+    max_queued_jobs=EXCEL_JOB_CONFIG["max_queued_jobs"],
+    progress_poll_interval=EXCEL_JOB_CONFIG["progress_poll_interval"]
+)
+
 async def process_excel_background(
     job_id: str, 
     temp_file_path: str, 
@@ -264,101 +541,17 @@ async def process_excel_background(
     Background task for Excel processing with progress updates via WebSocket
     """
     
-    try:
-        # Update job status
-        await update_job_with_websocket(job_id, 
-            status="processing",
-            progress=10,
-            message="Reading Excel file..."
-        )
-        
-        # Read the Excel/CSV file
-        if temp_file_path.endswith('.csv'):
-            df = pd.read_csv(temp_file_path)
-        else:
-            df = pd.read_excel(temp_file_path, sheet_name=sheet_name)
-        
-        await update_job_with_websocket(job_id,
-            total_rows=len(df),
-            progress=30,
-            message=f"Loaded {len(df)} rows, analyzing applications..."
-        )
-        
-        # Analyze applications with enhanced column support
-        applications = analyze_applications_from_excel_enhanced(
-            df, port_column, protocol_column, app_column, info_column, fallback_parsing, job_id
-        )
-        
-        await update_job_with_websocket(job_id,
-            progress=60,
-            message=f"Classified {len(applications)} applications, generating summary..."
-        )
-        
-        # Classify archetypes using your archetype service
-        classified_apps = []
-        total_apps = len(applications)
-        
-        for i, app in enumerate(applications):
-            # Update progress every 10 apps
-            if i % 10 == 0 or i == total_apps - 1:
-                progress = 60 + (30 * (i + 1) / total_apps)
-                await update_job_with_websocket(job_id,
-                    progress=int(progress),
-                    message=f"Classifying application {i+1}/{total_apps}..."
-                )
-            
-            # Use the archetype service to get details
-            archetype_details = archetype_service.get_archetype_details(app.get("architecture", "Unknown"))
-            
-            app_with_details = {
-                **app,
-                "archetype_details": archetype_details,
-                "cloud_readiness": archetype_details.get("cloud_readiness", "Unknown") if archetype_details else "Unknown",
-                "modernization_effort": archetype_details.get("modernization_effort", "Unknown") if archetype_details else "Unknown",
-                "aws_services": archetype_details.get("aws_services", []) if archetype_details else []
-            }
-            classified_apps.append(app_with_details)
-        
-        # Generate summary statistics
-        summary = generate_processing_summary(classified_apps)
-        
-        # Create result
-        result = {
-            "applications": classified_apps,
-            "summary": summary,
-            "rows_processed": len(df),
-            "applications_identified": len(classified_apps),
-            "processing_time": (datetime.now() - datetime.fromisoformat(processing_jobs[job_id]["started_at"])).total_seconds()
-        }
-        
-        # Save processed data for download
-        results_dir = Path("results/excel")
-        results_dir.mkdir(parents=True, exist_ok=True)
-        
-        output_file = results_dir / f"processed_{job_id}.json"
-        with open(output_file, 'w') as f:
-            json.dump(result, f, indent=2, default=str)
-        
-        # Update job completion
-        await update_job_with_websocket(job_id,
-            status="completed",
-            progress=100,
-            message="Processing completed successfully",
-            result=result,
-            completed_at=datetime.now().isoformat(),
-            output_file=str(output_file)
-        )
-        
-    except Exception as e:
-        error_message = str(e)
-        logger.error(f"Excel processing failed for job {job_id}: {error_message}")
-        
-        await update_job_with_websocket(job_id,
-            status="error",
-            error=error_message,
-            completed_at=datetime.now().isoformat()
-        )
+    settings = {
+        "port_column": port_column,
+        "protocol_column": protocol_column,
+        "app_column": app_column,
+        "info_column": info_column,
+        "sheet_name": sheet_name,
+        "fallback_parsing": fallback_parsing
+    }
     
+    try:
+        await excel_job_executor.run(job_id, temp_file_path, settings)
     finally:
         # Clean up temp file
         try:
@@ -366,6 +559,39 @@ async def process_excel_background(
         except:
             pass
 
+# Patterns for pulling port/protocol/service out of free-text info fields,
+# tried in order; the first valid match wins
+INFO_PORT_PATTERNS = [
+    r'port\s+(\d+)',
+    r':(\d{2,5})\b',
+    r'(\d{2,5})/tcp',
+    r'(\d{2,5})/udp',
+    r'port=(\d+)'
+]
+
+INFO_PROTOCOL_PATTERNS = [
+    r'over\s+([a-zA-Z]+)',
+    r'protocol[:\s]+([a-zA-Z]+)',
+    r'/([a-zA-Z]+)\b',
+    r'\b(tcp|udp|http|https|ftp|ssh|smtp)\b'
+]
+
+INFO_SERVICE_PATTERNS = [
+    r'^([a-zA-Z]+)\s+',
+    r'\b(web|api|database|db|mail|file|auth|admin)\b',
+    r'service[:\s]+([a-zA-Z]+)'
+]
+
+INFO_PROTOCOLS = ['TCP', 'UDP', 'HTTP', 'HTTPS', 'FTP', 'SSH', 'SMTP']
+COLUMN_PROTOCOLS = ['TCP', 'UDP', 'HTTP', 'HTTPS']
+
+SERVICE_ALIASES = {
+    'api': 'web', 'spa': 'web', 'web': 'web',
+    'db': 'database', 'database': 'database', 'sql': 'database',
+    'mail': 'mail', 'smtp': 'mail', 'email': 'mail',
+    'file': 'file', 'ftp': 'file', 'share': 'file'
+}
+
 def analyze_applications_from_excel_enhanced(
     df: pd.DataFrame, 
     port_columns: str, 
@@ -377,6 +603,10 @@ def analyze_applications_from_excel_enhanced(
 ) -> List[Dict[str, Any]]:
     """
     Enhanced analysis with multi-column support and info field parsing
+
+    Port, protocol and service extraction is done once over the whole frame
+    and aggregated per application; classification then runs on the compact
+    per-application summaries.
     """
     
     applications = []
@@ -399,65 +629,120 @@ def analyze_applications_from_excel_enhanced(
     logger.info(f"Job {job_id}: Using columns - Port: {port_col}, Protocol: {protocol_col}, App: {app_col}, Info: {info_col}")
     
     # Group by application
-    if app_col and app_col in df.columns:
-        app_groups = df.groupby(app_col)
+    if app_col:
+        app_keys = df[app_col]
+    elif info_col:
+        # Fallback: synthetic app groups based on info field patterns
+        info_codes, info_uniques = pd.factorize(df[info_col].fillna('unknown'))
+        synthetic_names = np.array(
+            [f"App_{hash(str(x)[:50]) % 1000:03d}" for x in info_uniques], dtype=object
+        )
+        app_keys = pd.Series(synthetic_names[info_codes], index=df.index)
     else:
-        # Fallback: create synthetic app groups based on unique combinations
-        if info_col and info_col in df.columns:
-            # Group by info field patterns
-            df['synthetic_app'] = df[info_col].fillna('unknown').apply(
-                lambda x: f"App_{hash(str(x)[:50]) % 1000:03d}"
-            )
-        else:
-            # Simple row-based grouping
-            df['synthetic_app'] = df.index // 100
-        app_groups = df.groupby('synthetic_app')
-    
-    for app_name, group in app_groups:
-        # Extract ports from dedicated column or info field
-        ports = []
-        protocols = []
-        services = []
-        
-        # Try dedicated port column first
-        if port_col and port_col in group.columns:
-            port_values = group[port_col].dropna()
-            for val in port_values:
-                try:
-                    if isinstance(val, (int, float)) and not pd.isna(val):
-                        ports.append(int(val))
-                    elif isinstance(val, str) and val.isdigit():
-                        ports.append(int(val))
-                except (ValueError, TypeError):
-                    pass
+        # Simple row-based grouping
+        app_keys = pd.Series(df.index // 100, index=df.index)
+    
+    app_groups = df.groupby(app_keys, sort=True)
+    group_codes = app_groups.ngroup().to_numpy()
+    valid_rows = group_codes >= 0
+    
+    # Flow counts and distinct endpoints per application in a single aggregation
+    src_col = 'src_ip' if 'src_ip' in df.columns else ('source_ip' if 'source_ip' in df.columns else None)
+    dst_col = 'dst_ip' if 'dst_ip' in df.columns else ('dest_ip' if 'dest_ip' in df.columns else None)
+    
+    flow_frame = pd.DataFrame({
+        "code": group_codes[valid_rows],
+        "src": df[src_col].to_numpy()[valid_rows] if src_col else 0,
+        "dst": df[dst_col].to_numpy()[valid_rows] if dst_col else 0
+    })
+    app_stats = flow_frame.groupby("code", sort=True).agg(
+        flow_count=("code", "size"),
+        source_ips=("src", "nunique"),
+        dest_ips=("dst", "nunique")
+    )
+    
+    app_names = list(app_groups.groups.keys())
+    n_apps = len(app_names)
+    if n_apps == 0:
+        logger.info(f"Job {job_id}: Analyzed 0 applications")
+        return applications
+    
+    # Ports from the dedicated column
+    port_codes = np.empty(0, dtype=np.int64)
+    port_values = np.empty(0, dtype=np.int64)
+    if port_col:
+        numeric_ports = _numeric_port_values(df[port_col])
+        mask = valid_rows & ~np.isnan(numeric_ports)
+        port_codes = group_codes[mask]
+        port_values = np.trunc(numeric_ports[mask]).astype(np.int64)
+    
+    # Protocols from the dedicated column
+    protocol_codes = np.empty(0, dtype=np.int64)
+    protocol_values = np.empty(0, dtype=object)
+    if protocol_col:
+        codes, uniques = pd.factorize(df[protocol_col])
+        upper = np.array([str(p).upper() for p in uniques], dtype=object)
+        keep = np.isin(upper, COLUMN_PROTOCOLS)
+        mask = valid_rows & (codes >= 0)
+        mask[mask] = keep[codes[mask]]
+        protocol_codes = group_codes[mask]
+        protocol_values = upper[codes[mask]]
+    
+    service_codes = np.empty(0, dtype=np.int64)
+    service_values = np.empty(0, dtype=object)
+    
+    # Fallback parsing from the info field for apps missing ports or protocols
+    if fallback_parsing and info_col:
+        has_ports = np.zeros(n_apps, dtype=bool)
+        has_ports[port_codes] = True
+        has_protocols = np.zeros(n_apps, dtype=bool)
+        has_protocols[protocol_codes] = True
+        needs_fallback = ~(has_ports & has_protocols)
         
-        # Try dedicated protocol column
-        if protocol_col and protocol_col in group.columns:
-            protocol_values = group[protocol_col].dropna().unique()
-            protocols = [str(p).upper() for p in protocol_values if str(p).upper() in ['TCP', 'UDP', 'HTTP', 'HTTPS']]
+        codes, uniques = pd.factorize(df[info_col])
+        mask = valid_rows & (codes >= 0)
+        mask[mask] = needs_fallback[group_codes[mask]]
         
-        # Fallback parsing from info field if enabled and no dedicated columns found
-        if fallback_parsing and (not ports or not protocols) and info_col and info_col in group.columns:
-            for info_text in group[info_col].dropna():
-                if pd.isna(info_text):
-                    continue
-                    
-                parsed = parse_traffic_info(str(info_text))
-                
-                if parsed.get("port") and parsed["port"] not in ports:
-                    ports.append(parsed["port"])
-                if parsed.get("protocol") and parsed["protocol"] not in protocols:
-                    protocols.append(parsed["protocol"])
-                if parsed.get("service") and parsed["service"] not in services:
-                    services.append(parsed["service"])
-        
-        # Remove duplicates and sort
-        ports = sorted(list(set(ports)))
-        protocols = list(set(protocols))
-        services = list(set(services))
+        if mask.any() and len(uniques):
+            parsed = extract_traffic_info_fields(pd.Series(uniques, dtype=object).astype(str))
+            row_codes = group_codes[mask]
+            info_rows = codes[mask]
+            
+            parsed_ports = parsed["port"].to_numpy(dtype=float)[info_rows]
+            has_port = ~np.isnan(parsed_ports)
+            port_codes = np.concatenate([port_codes, row_codes[has_port]])
+            port_values = np.concatenate([port_values, parsed_ports[has_port].astype(np.int64)])
+            
+            parsed_protocols = parsed["protocol"].to_numpy(dtype=object)[info_rows]
+            has_protocol = pd.notna(parsed_protocols)
+            protocol_codes = np.concatenate([protocol_codes, row_codes[has_protocol]])
+            protocol_values = np.concatenate([protocol_values, parsed_protocols[has_protocol]])
+            
+            parsed_services = parsed["service"].to_numpy(dtype=object)[info_rows]
+            has_service = pd.notna(parsed_services)
+            service_codes = row_codes[has_service]
+            service_values = parsed_services[has_service]
+    
+    # Sorted unique values per application
+    app_ports = _sorted_unique_per_group(port_codes, port_values, n_apps)
+    app_protocols = _sorted_unique_per_group(protocol_codes, protocol_values, n_apps)
+    app_services = _sorted_unique_per_group(service_codes, service_values, n_apps)
+    
+    has_ip_pairs = 'src_ip' in df.columns and 'dst_ip' in df.columns
+    parsing_method = "dedicated_columns" if (port_col or protocol_col) else "info_field_fallback"
+    
+    flow_counts = app_stats["flow_count"].to_numpy()
+    source_counts = app_stats["source_ips"].to_numpy() if src_col else np.zeros(n_apps, dtype=np.int64)
+    dest_counts = app_stats["dest_ips"].to_numpy() if dst_col else np.zeros(n_apps, dtype=np.int64)
+    
+    for code, app_name in enumerate(app_names):
+        ports = [int(p) for p in app_ports[code]]
+        protocols = app_protocols[code]
+        services = app_services[code]
+        flow_count = int(flow_counts[code])
         
         # Classify architecture based on enhanced analysis
-        architecture = classify_architecture_from_enhanced_data(group, ports, protocols, services)
+        architecture = classify_architecture_from_enhanced_data(ports, protocols, services)
         
         # Calculate metrics
         app_data = {
@@ -468,12 +753,12 @@ def analyze_applications_from_excel_enhanced(
             "protocols": protocols,
             "services": services,
             "port_count": len(ports),
-            "flow_count": len(group),
-            "risk_level": calculate_risk_level(ports, len(group)),
-            "confidence": calculate_confidence_score_enhanced(group, ports, protocols, services),
-            "source_ips": group.get('src_ip', group.get('source_ip', pd.Series())).nunique() if 'src_ip' in group.columns or 'source_ip' in group.columns else 0,
-            "dest_ips": group.get('dst_ip', group.get('dest_ip', pd.Series())).nunique() if 'dst_ip' in group.columns or 'dest_ip' in group.columns else 0,
-            "parsing_method": "dedicated_columns" if (port_col or protocol_col) else "info_field_fallback"
+            "flow_count": flow_count,
+            "risk_level": calculate_risk_level(ports, flow_count),
+            "confidence": calculate_confidence_score_enhanced(flow_count, ports, protocols, services, has_ip_pairs),
+            "source_ips": int(source_counts[code]),
+            "dest_ips": int(dest_counts[code]),
+            "parsing_method": parsing_method
         }
         
         applications.append(app_data)
@@ -481,6 +766,71 @@ def analyze_applications_from_excel_enhanced(
     logger.info(f"Job {job_id}: Analyzed {len(applications)} applications")
     return applications
 
+def _numeric_port_values(values: pd.Series) -> np.ndarray:
+    """
+    Port number per row (NaN when unusable); numbers count as-is, strings only
+    when they are plain digits. Each distinct cell value is converted once.
+    """
+    codes, uniques = pd.factorize(values)
+    numeric_uniques = pd.to_numeric(pd.Series(uniques, dtype=object), errors='coerce').to_numpy(dtype=float, copy=True)
+    if values.dtype == object:
+        is_text = np.array([isinstance(v, str) for v in uniques], dtype=bool)
+        is_digits = np.array([isinstance(v, str) and v.isdigit() for v in uniques], dtype=bool)
+        numeric_uniques[is_text & ~is_digits] = np.nan
+    
+    ports = np.full(len(codes), np.nan)
+    present = codes >= 0
+    ports[present] = numeric_uniques[codes[present]]
+    return ports
+
+def _sorted_unique_per_group(codes: np.ndarray, values: np.ndarray, n_groups: int) -> List[list]:
+    """Collect sorted unique values for each group code"""
+    result: List[list] = [[] for _ in range(n_groups)]
+    if len(codes) == 0:
+        return result
+    
+    frame = pd.DataFrame({"code": codes, "value": values}).drop_duplicates()
+    for code, group_values in frame.groupby("code", sort=False)["value"].agg(sorted).items():
+        result[int(code)] = group_values
+    return result
+
+def extract_traffic_info_fields(info_text: pd.Series) -> pd.DataFrame:
+    """
+    Vectorized equivalent of parse_traffic_info over a Series of info strings
+    """
+    text = info_text.str.lower()
+    
+    # Port: first pattern whose match is a valid port number
+    port = pd.Series(np.nan, index=text.index)
+    for pattern in INFO_PORT_PATTERNS:
+        pending = port.isna()
+        if not pending.any():
+            break
+        candidate = pd.to_numeric(text[pending].str.extract(pattern, expand=False), errors='coerce')
+        candidate = candidate[(candidate >= 1) & (candidate <= 65535)]
+        port.loc[candidate.index] = candidate
+    
+    # Protocol: first pattern whose match is a known protocol
+    protocol = pd.Series(None, index=text.index, dtype=object)
+    for pattern in INFO_PROTOCOL_PATTERNS:
+        pending = protocol.isna()
+        if not pending.any():
+            break
+        candidate = text[pending].str.extract(pattern, expand=False).str.upper()
+        candidate = candidate[candidate.isin(INFO_PROTOCOLS)]
+        protocol.loc[candidate.index] = candidate
+    
+    # Service: first pattern that matches at all, normalized through the alias table
+    service = pd.Series(None, index=text.index, dtype=object)
+    for pattern in INFO_SERVICE_PATTERNS:
+        pending = service.isna()
+        if not pending.any():
+            break
+        candidate = text[pending].str.extract(pattern, expand=False).dropna().str.lower()
+        service.loc[candidate.index] = candidate.map(SERVICE_ALIASES).fillna(candidate)
+    
+    return pd.DataFrame({"port": port, "protocol": protocol, "service": service})
+
 def parse_traffic_info(info_text):
     """
     Enhanced parser for traffic info string to extract port, protocol, and service information
@@ -492,15 +842,7 @@ def parse_traffic_info(info_text):
     info_lower = info_text.lower()
     
     # Extract port number using multiple patterns
-    port_patterns = [
-        r'port\s+(\d+)',
-        r':(\d{2,5})\b',
-        r'(\d{2,5})/tcp',
-        r'(\d{2,5})/udp',
-        r'port=(\d+)'
-    ]
-    
-    for pattern in port_patterns:
+    for pattern in INFO_PORT_PATTERNS:
         port_match = re.search(pattern, info_lower)
         if port_match:
             try:
@@ -512,47 +854,25 @@ def parse_traffic_info(info_text):
                 continue
     
     # Extract protocol
-    protocol_patterns = [
-        r'over\s+([a-zA-Z]+)',
-        r'protocol[:\s]+([a-zA-Z]+)',
-        r'/([a-zA-Z]+)\b',
-        r'\b(tcp|udp|http|https|ftp|ssh|smtp)\b'
-    ]
-    
-    for pattern in protocol_patterns:
+    for pattern in INFO_PROTOCOL_PATTERNS:
         protocol_match = re.search(pattern, info_lower)
         if protocol_match:
             protocol = protocol_match.group(1).upper()
-            if protocol in ['TCP', 'UDP', 'HTTP', 'HTTPS', 'FTP', 'SSH', 'SMTP']:
+            if protocol in INFO_PROTOCOLS:
                 result["protocol"] = protocol
                 break
     
     # Extract service type
-    service_patterns = [
-        r'^([a-zA-Z]+)\s+',
-        r'\b(web|api|database|db|mail|file|auth|admin)\b',
-        r'service[:\s]+([a-zA-Z]+)'
-    ]
-    
-    for pattern in service_patterns:
+    for pattern in INFO_SERVICE_PATTERNS:
         service_match = re.search(pattern, info_lower)
         if service_match:
             service_type = service_match.group(1).lower()
-            if service_type in ['api', 'spa', 'web']:
-                result["service"] = 'web'
-            elif service_type in ['db', 'database', 'sql']:
-                result["service"] = 'database'
-            elif service_type in ['mail', 'smtp', 'email']:
-                result["service"] = 'mail'
-            elif service_type in ['file', 'ftp', 'share']:
-                result["service"] = 'file'
-            else:
-                result["service"] = service_type
+            result["service"] = SERVICE_ALIASES.get(service_type, service_type)
             break
    
     return result
 
-def classify_architecture_from_enhanced_data(group: pd.DataFrame, ports: List, protocols: List, services: List) -> str:
+def classify_architecture_from_enhanced_data(ports: List, protocols: List, services: List) -> str:
     """
     Enhanced architecture classification using multiple data sources
     """
@@ -616,7 +936,8 @@ def classify_architecture_from_enhanced_data(group: pd.DataFrame, ports: List, p
     else:
         return "Monolithic"
 
-def calculate_confidence_score_enhanced(group: pd.DataFrame, ports: List, protocols: List, services: List) -> float:
+def calculate_confidence_score_enhanced(flow_count: int, ports: List, protocols: List, services: List,
+                                        has_ip_pairs: bool = False) -> float:
     """
     Enhanced confidence calculation using multiple data sources
     """
@@ -640,13 +961,13 @@ def calculate_confidence_score_enhanced(group: pd.DataFrame, ports: List, protoc
         score += 0.1
     
     # Data volume
-    if len(group) > 1000:
+    if flow_count > 1000:
         score += 0.2
-    elif len(group) > 100:
+    elif flow_count > 100:
         score += 0.1
     
     # Data completeness
-    if 'src_ip' in group.columns and 'dst_ip' in group.columns:
+    if has_ip_pairs:
         score += 0.1
     
     return min(1.0, score)
@@ -718,10 +1039,11 @@ async def get_job_status(job_id: str):
     Get the status of a processing job
     """
     
-    if job_id not in processing_jobs:
+    job = await job_registry.get_job_async(job_id)
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return processing_jobs[job_id]
+    return job
 
 @router.get("/api/download/{job_id}")
 async def download_results(job_id: str):
@@ -729,10 +1051,10 @@ async def download_results(job_id: str):
     Download processed results
     """
     
-    if job_id not in processing_jobs:
+    job = await job_registry.get_job_async(job_id, include_result=False)
+    if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job = processing_jobs[job_id]
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed")
     
@@ -746,6 +1068,42 @@ async def download_results(job_id: str):
         media_type="application/json"
     )
 
+@router.get("/api/job/{job_id}/result")
+async def get_job_result(
+    job_id: str,
+    offset: int = Query(0, ge=0),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """
+    Load the applications of a completed job from its result file
+    """
+    
+    job = await job_registry.get_job_async(job_id, include_result=False)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    if job["status"] != "completed":
+        raise HTTPException(status_code=400, detail="Job not completed")
+    
+    output_file = job.get("output_file")
+    if not output_file or not Path(output_file).exists():
+        raise HTTPException(status_code=404, detail="Result file not found")
+    
+    def _load():
+        with open(output_file) as f:
+            return json.load(f)
+    
+    result = await asyncio.get_running_loop().run_in_executor(None, _load)
+    applications = result.get("applications", [])
+    end = offset + limit if limit else None
+    
+    return {
+        **result,
+        "applications": applications[offset:end],
+        "offset": offset,
+        "total_applications": len(applications)
+    }
+
 @router.get("/api/classify/batch")
 async def classify_applications_batch(applications: List[Dict[str, Any]]):
     """
@@ -781,7 +1139,9 @@ async def websocket_health():
     return {
         "status": "healthy",
         "active_connections": len(manager.active_connections),
-        "active_jobs": len([j for j in processing_jobs.values() if j.get("status") in ["queued", "processing"]]),
+        "active_jobs": await job_registry.count_jobs_async(status=ACTIVE_JOB_STATUSES, job_type=EXCEL_JOB_TYPE),
+        "job_executor": excel_job_executor.get_status(),
+        "delivery": manager.hub.get_metrics(),
         "websocket_url": "/api/v1/excel/ws",
         "timestamp": datetime.now().isoformat()
     }
\ No newline at end of file
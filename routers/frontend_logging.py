@@ -4,11 +4,30 @@ Testable frontend logging router
 """
 
 from fastapi import APIRouter, HTTPException
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+import asyncio
 import logging
 
-router = APIRouter()
+from services.frontend_log_store import frontend_log_store
+
+try:
+    from services.comprehensive_logging_system import get_comprehensive_logger
+except ImportError:
+    get_comprehensive_logger = None
+
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app):
+    """Flush buffered frontend logs on a timer while the app runs, and once more at shutdown"""
+    frontend_log_store.start_flusher()
+    yield
+    await asyncio.to_thread(frontend_log_store.close)
+
+# Merged into the lifespan of any app that includes this router
+router = APIRouter(lifespan=lifespan)
 
 router_metadata = {
     "prefix": "/api/v1/logs",
@@ -18,9 +37,16 @@ router_metadata = {
     "enabled": True
 }
 
-# Mock storage for frontend logs
-frontend_logs = []
-session_stats = {}
+# Bounded, indexed storage for frontend logs (services/frontend_log_store.py)
+_flush_tasks = set()
+
+def _schedule_flush():
+    """Write a compressed segment in a worker thread once enough logs have accumulated"""
+    if not frontend_log_store.flush_due():
+        return
+    task = asyncio.get_running_loop().run_in_executor(None, frontend_log_store.flush)
+    _flush_tasks.add(task)
+    task.add_done_callback(_flush_tasks.discard)
 
 @router.post("/frontend")
 async def receive_frontend_logs(
@@ -31,66 +57,33 @@ async def receive_frontend_logs(
     logs = log_batch.get('logs', [])
     batch_id = log_batch.get('batch_id', 'unknown')
     
-    processed_count = 0
-    errors = []
-    
-    for log_entry in logs:
-        try:
-            # Validate log entry
-            if not log_entry.get('message'):
-                errors.append("Missing message field")
-                continue
-            
-            # Process log entry
-            processed_log = {
-                **log_entry,
-                'processed_at': datetime.now().isoformat(),
-                'batch_id': batch_id
-            }
-            
-            frontend_logs.append(processed_log)
-            
-            # Update session stats
-            session_id = log_entry.get('session_id', 'unknown')
-            if session_id not in session_stats:
-                session_stats[session_id] = {
-                    'log_count': 0,
-                    'first_seen': datetime.now().isoformat(),
-                    'last_seen': datetime.now().isoformat()
-                }
-            
-            session_stats[session_id]['log_count'] += 1
-            session_stats[session_id]['last_seen'] = datetime.now().isoformat()
-            
-            processed_count += 1
-            
-        except Exception as e:
-            errors.append(f"Error processing log: {str(e)}")
+    # Validate and store the whole batch in one pass
+    processed_count, errors = frontend_log_store.add_batch(logs, batch_id)
+    frontend_log_store.start_flusher()
+    _schedule_flush()
     
     # Send to comprehensive logging if available
-    try:
-        from services.comprehensive_logging_system import get_comprehensive_logger
-        logger = get_comprehensive_logger()
-        
-        if logger:
-            await logger.log_entry({
+    comprehensive_logger = get_comprehensive_logger() if get_comprehensive_logger else None
+    if comprehensive_logger:
+        try:
+            await comprehensive_logger.log_entry({
                 'level': 'INFO',
                 'source': 'FRONTEND',
                 'log_type': 'BATCH_RECEIVED',
                 'message': f'Frontend batch received: {processed_count} logs',
                 'details': {
                     'batch_id': batch_id,
-                    'total_logs': len(logs),
+                    'total_logs': len(logs) if isinstance(logs, list) else 0,
                     'processed_count': processed_count,
                     'error_count': len(errors)
                 }
             })
-    except Exception:
-        pass  # Ignore if comprehensive logging not available
+        except Exception as e:
+            logger.debug(f"Comprehensive logging unavailable: {e}")
     
     return {
         "status": "success" if not errors else "partial",
-        "received_count": len(logs),
+        "received_count": len(logs) if isinstance(logs, list) else 0,
         "processed_count": processed_count,
         "errors": errors,
         "batch_id": batch_id,
@@ -104,8 +97,9 @@ async def frontend_logging_health():
     return {
         "status": "healthy",
         "component": "frontend_logging",
-        "logs_received": len(frontend_logs),
-        "active_sessions": len(session_stats),
+        "logs_received": frontend_log_store.stats["accepted"],
+        "logs_buffered": len(frontend_log_store),
+        "active_sessions": frontend_log_store.session_count,
         "timestamp": datetime.now().isoformat()
     }
 
@@ -114,26 +108,37 @@ async def get_frontend_statistics():
     """Get frontend logging statistics"""
     
     return {
-        "total_logs": len(frontend_logs),
-        "active_sessions": len(session_stats),
-        "session_stats": session_stats,
+        "total_logs": frontend_log_store.stats["accepted"],
+        "active_sessions": frontend_log_store.session_count,
+        "session_stats": frontend_log_store.session_stats(),
+        "store": frontend_log_store.get_metrics(),
         "timestamp": datetime.now().isoformat()
     }
 
 @router.get("/frontend/session/{session_id}")
-async def get_session_logs(session_id: str):
+async def get_session_logs(session_id: str, limit: Optional[int] = None):
     """Get logs for specific session"""
     
-    session_logs = [
-        log for log in frontend_logs 
-        if log.get('session_id') == session_id
-    ]
+    session_logs = frontend_log_store.session_logs(session_id, limit)
     
     return {
         "session_id": session_id,
         "logs": session_logs,
         "total_count": len(session_logs),
-        "session_stats": session_stats.get(session_id, {}),
+        "session_stats": frontend_log_store.session_stats(session_id),
+        "timestamp": datetime.now().isoformat()
+    }
+
+@router.get("/frontend/level/{level}")
+async def get_level_logs(level: str, limit: Optional[int] = 500):
+    """Get buffered logs at one level (newest ``limit``)"""
+    
+    level_logs = frontend_log_store.level_logs(level, limit)
+    
+    return {
+        "level": level.upper(),
+        "logs": level_logs,
+        "total_count": len(level_logs),
         "timestamp": datetime.now().isoformat()
     }
 
@@ -3,16 +3,28 @@
 Log management and processing router
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, BackgroundTasks
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
 from typing import List, Optional, Dict, Any
 from pydantic import BaseModel
 from datetime import datetime
+from pathlib import Path
+import asyncio
+import logging
 import uuid
 
 from routers.auth import get_current_user, require_admin
+from services.job_registry import job_registry
+from services.log_ingest import (
+    LOG_INGEST_CONFIG, PARSEABLE_SOURCE_TYPES, MultipartUploadWriter, UploadTooLarge, parse_log_files,
+    safe_filename
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+LOG_JOB_TYPE = "log_processing"
+
 class LogSource(BaseModel):
     id: str
     name: str
@@ -74,32 +86,101 @@ async def list_log_sources(
         "retrieved_at": datetime.utcnow().isoformat()
     }
 
-@router.post("/upload")
+def _user_name(current_user) -> str:
+    # get_current_user yields the username; older callers passed a user dict
+    if isinstance(current_user, dict):
+        return current_user.get("user_id") or current_user.get("username", "unknown")
+    return str(current_user)
+
+# The body is parsed by hand below, so describe it for the OpenAPI docs
+UPLOAD_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "multipart/form-data": {
+            "schema": {
+                "type": "object",
+                "properties": {"files": {"type": "array", "items": {"type": "string", "format": "binary"}}},
+                "required": ["files"]
+            }
+        }
+    }
+}
+
+@router.post("/upload", openapi_extra={"requestBody": UPLOAD_REQUEST_BODY})
 async def upload_log_files(
-    background_tasks: BackgroundTasks,  # FIXED: Moved before parameters with defaults
-    files: List[UploadFile] = File(...),
+    request: Request,
+    background_tasks: BackgroundTasks,
     source_type: str = "firewall",
     parse_immediately: bool = True,
+    application: Optional[str] = None,
     current_user: dict = Depends(get_current_user)
 ):
-    """Upload log files for processing"""
+    """
+    Upload log files for processing. The multipart body is parsed as it
+    streams in and each file is written to disk and checksummed on the way,
+    so an upload is never spooled whole and the size limit stops it early.
+    """
     job_id = str(uuid.uuid4())
     
-    # Validate files
-    for file in files:
-        if file.size > 500 * 1024 * 1024:  # 500MB limit
-            raise HTTPException(status_code=413, detail=f"File {file.filename} exceeds size limit")
+    if parse_immediately and source_type not in PARSEABLE_SOURCE_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Parsing supports {', '.join(PARSEABLE_SOURCE_TYPES)} logs, not '{source_type}'"
+        )
     
-    # Save files and queue for processing
-    saved_files = []
-    for file in files:
-        content = await file.read()
-        # In real implementation, save to persistent storage
-        saved_files.append({
-            "filename": file.filename,
-            "size": len(content),
-            "content_type": file.content_type
-        })
+    upload_dir = Path(LOG_INGEST_CONFIG["upload_dir"]) / job_id
+    try:
+        writer = MultipartUploadWriter(request.headers.get("content-type", ""), upload_dir,
+                                       LOG_INGEST_CONFIG["max_upload_bytes"])
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    
+    # Hand the parser about one upload chunk at a time; the disk writes run in a worker thread
+    chunk_bytes = LOG_INGEST_CONFIG["upload_chunk_bytes"]
+    try:
+        buffered, size = [], 0
+        async for chunk in request.stream():
+            buffered.append(chunk)
+            size += len(chunk)
+            if size >= chunk_bytes:
+                await asyncio.to_thread(writer.write, b"".join(buffered))
+                buffered, size = [], 0
+        if buffered:
+            await asyncio.to_thread(writer.write, b"".join(buffered))
+        saved_files = await asyncio.to_thread(writer.finish)
+    except UploadTooLarge as e:
+        await asyncio.to_thread(writer.abort)
+        raise HTTPException(status_code=413, detail=str(e))
+    except ValueError as e:
+        # Malformed multipart body
+        await asyncio.to_thread(writer.abort)
+        raise HTTPException(status_code=400, detail=f"Invalid upload: {e}")
+    except OSError as e:
+        await asyncio.to_thread(writer.abort)
+        logger.error(f"Failed to store uploaded logs for job {job_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to store uploaded files: {e}")
+    except BaseException:
+        # Client disconnects and cancellations leave no partial files behind
+        await asyncio.shield(asyncio.to_thread(writer.abort))
+        raise
+    
+    if not saved_files:
+        await asyncio.to_thread(writer.abort)
+        raise HTTPException(status_code=400, detail="No files in the upload")
+    
+    user_name = _user_name(current_user)
+    await job_registry.create_job_async(
+        LOG_JOB_TYPE,
+        job_id=job_id,
+        status="queued" if parse_immediately else "uploaded",
+        message="Queued for parsing" if parse_immediately else "Uploaded, not parsed",
+        source_files=[f["filename"] for f in saved_files],
+        files=saved_files,
+        source_type=source_type,
+        application=application or "",
+        entries_processed=0,
+        uploaded_by=user_name
+    )
     
     if parse_immediately:
         # Start background processing
@@ -108,24 +189,61 @@ async def upload_log_files(
             job_id,
             saved_files,
             source_type,
-            current_user["user_id"]
+            user_name
         )
     
     return {
-        "message": f"Uploaded {len(files)} log files",
+        "message": f"Uploaded {len(saved_files)} log files",
         "job_id": job_id,
         "files": saved_files,
         "source_type": source_type,
         "parse_immediately": parse_immediately,
         "uploaded_at": datetime.utcnow().isoformat(),
-        "uploaded_by": current_user["display_name"]
+        "uploaded_by": user_name
     }
 
 async def process_log_files_task(job_id: str, files: List[Dict], source_type: str, user_id: str):
-    """Background task to process uploaded log files"""
-    # Mock processing - implement actual log parsing logic
-    import asyncio
-    await asyncio.sleep(2)  # Simulate processing time
+    """Background task to parse uploaded log files into normalized flow records"""
+    job = await job_registry.get_job_async(job_id, include_result=False) or {}
+    prefix = safe_filename(job.get("application") or "logflows")
+    output_path = (Path(LOG_INGEST_CONFIG["output_dir"])
+                   / f"{prefix}_normalized_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{job_id[:8]}.csv")
+    
+    await job_registry.update_job_async(
+        job_id,
+        status="processing",
+        message=f"Parsing {len(files)} {source_type} log files",
+        start_time=datetime.utcnow().isoformat()
+    )
+    
+    def report(update: Dict[str, Any]):
+        # Runs in the parsing thread after every chunk of lines
+        job_registry.update_job(job_id, **update)
+    
+    try:
+        results = await asyncio.get_running_loop().run_in_executor(
+            None, parse_log_files, files, str(output_path), job.get("application", ""), report
+        )
+    except Exception as e:
+        logger.error(f"Log processing job {job_id} failed: {e}")
+        await job_registry.update_job_async(
+            job_id,
+            status="failed",
+            message="Parsing failed",
+            error_message=str(e),
+            completion_time=datetime.utcnow().isoformat()
+        )
+        return
+    
+    await job_registry.update_job_async(
+        job_id,
+        status="completed",
+        progress=100.0,
+        message=f"Extracted {results['traffic_flows_extracted']} flows",
+        entries_processed=results["traffic_flows_extracted"],
+        completion_time=datetime.utcnow().isoformat(),
+        results=results
+    )
 
 @router.get("/jobs")
 async def list_processing_jobs(
@@ -134,25 +252,11 @@ async def list_processing_jobs(
     current_user: dict = Depends(get_current_user)
 ):
     """List log processing jobs"""
-    # Mock data
-    jobs = [
-        {
-            "job_id": "job-001",
-            "source_files": ["firewall_2024_01_15.log"],
-            "status": "completed",
-            "progress": 100.0,
-            "entries_processed": 15420,
-            "start_time": datetime.utcnow().isoformat(),
-            "completion_time": datetime.utcnow().isoformat()
-        }
-    ]
-    
-    if status:
-        jobs = [j for j in jobs if j["status"] == status]
+    jobs = await job_registry.list_jobs_async(status=status, job_type=LOG_JOB_TYPE, limit=limit)
     
     return {
-        "jobs": jobs[:limit],
-        "job_count": len(jobs),
+        "jobs": jobs,
+        "job_count": await job_registry.count_jobs_async(status=status, job_type=LOG_JOB_TYPE),
         "status_filter": status,
         "retrieved_at": datetime.utcnow().isoformat()
     }
@@ -163,23 +267,11 @@ async def get_job_status(
     current_user: dict = Depends(get_current_user)
 ):
     """Get status of a specific processing job"""
-    # Mock job status
-    job = {
-        "job_id": job_id,
-        "status": "completed",
-        "progress": 100.0,
-        "entries_processed": 15420,
-        "start_time": datetime.utcnow().isoformat(),
-        "completion_time": datetime.utcnow().isoformat(),
-        "results": {
-            "unique_sources": 45,
-            "unique_destinations": 123,
-            "protocols_detected": ["TCP", "UDP", "ICMP"],
-            "traffic_flows_extracted": 2341
-        }
-    }
+    job = await job_registry.get_job_async(job_id)
+    if job is None or job.get("job_type") != LOG_JOB_TYPE:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
     
     return {
         "job": job,
         "retrieved_at": datetime.utcnow().isoformat()
-    }
\ No newline at end of file
+    }
@@ -11,6 +11,7 @@ import json
 
 from services.migration_service import MigrationService
 from services.cost_service import CostService
+from services.cost_engine import ScenarioLimitError
 from services.aws_service import AWSService
 
 router = APIRouter()
@@ -43,6 +44,15 @@ class MigrationAnalysis(BaseModel):
     risk_assessment: Dict[str, Any]
     timeline: Dict[str, Any]
 
+class CostScenarioRequest(BaseModel):
+    applications: List[str]
+    # CostScenario fields: name, approach, strategy_mix, contingency_rate, migration_cost_multiplier,
+    # cloud_cost_multiplier, ri_coverage, timeline_years
+    scenarios: Optional[List[Dict[str, Any]]] = None
+    # Axes to sweep: approaches, strategy_mixes, contingency_rates, migration_cost_multipliers,
+    # cloud_cost_multipliers, ri_coverages, timeline_years
+    grid: Optional[Dict[str, List[Any]]] = None
+
 class CostBreakdown(BaseModel):
     migration_costs: Dict[str, float]
     operational_costs: Dict[str, float]
@@ -126,6 +136,26 @@ async def calculate_migration_costs(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating costs: {str(e)}")
 
+@router.post("/costs/scenarios")
+async def compare_cost_scenarios(
+    request: CostScenarioRequest,
+    cost_service: CostService = Depends(CostService)
+):
+    """Evaluate many what-if cost scenarios over the portfolio and compare them"""
+    try:
+        applications = await cost_service.get_applications_for_cost_analysis(request.applications)
+        return await cost_service.compare_scenarios(
+            applications,
+            scenarios=request.scenarios,
+            grid=request.grid
+        )
+    except ScenarioLimitError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid scenario: {str(e)}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error comparing cost scenarios: {str(e)}")
+
 @router.post("/waves")
 async def generate_migration_waves(
     request: MigrationRequest,
@@ -142,10 +172,14 @@ async def generate_migration_waves(
         return {
             "approach": request.approach,
             "total_waves": len(waves),
-            "total_duration_months": sum(wave.duration_months for wave in waves),
-            "waves": waves
+            # Independent waves overlap, so the programme ends with the latest wave
+            "total_duration_months": max((wave.start_month + wave.duration_months - 1 for wave in waves), default=0),
+            "waves": waves,
+            "dependency_plan": migration_service.last_wave_plan
         }
         
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error generating waves: {str(e)}")
 
@@ -5,15 +5,34 @@
 
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
+import asyncio
+import logging
 import uuid
 
-from services.seven_rs_service import SevenRsService
+from services.job_registry import job_registry
+from services.portfolio_store import portfolio_store
+from services.seven_rs_engine import SevenRsAnalyzer, seven_rs_analyzer
 from routers.auth import get_current_user, require_admin
 
+try:
+    from services.seven_rs_service import SevenRsService
+except ImportError:
+    SevenRsService = None
+
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
+SEVEN_RS_BATCH_JOB_TYPE = "seven_rs_batch"
+
+def get_seven_rs_service() -> "SevenRsService":
+    """The per-request 7R's service, or 503 when services.seven_rs_service is not installed"""
+    if SevenRsService is None:
+        raise HTTPException(status_code=503, detail="7R's analysis service is not available")
+    return SevenRsService()
+
 # Pydantic models
 class ApplicationInfo(BaseModel):
     application_id: str
@@ -66,6 +85,116 @@ class SevenRsAnalysisRequest(BaseModel):
     analysis_depth: str = "standard"  # 'basic', 'standard', 'comprehensive'
     custom_criteria: Optional[Dict[str, Any]] = None
 
+class SevenRsBatchRequest(BaseModel):
+    application_ids: Optional[List[str]] = None  # If None, analyze the whole portfolio
+    applications: Optional[List[Dict[str, Any]]] = None  # Explicit records instead of the portfolio
+    criteria_weights: Optional[Dict[str, float]] = None  # 'fit', 'value', 'risk'
+    time_horizon_years: Optional[int] = Field(None, ge=1)  # None uses SEVEN_RS_TIME_HORIZON_YEARS
+    full_rerun: bool = False  # Rescore everything, not just changed applications
+
+@router.post("/batch/analyze")
+async def start_batch_analysis(
+    request: SevenRsBatchRequest,
+    background_tasks: BackgroundTasks,
+    current_user: dict = Depends(require_admin)
+):
+    """Score every application against all seven strategies in one batch job"""
+    try:
+        SevenRsAnalyzer._weights(request.criteria_weights)
+        SevenRsAnalyzer._horizon(request.time_horizon_years)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    job_id = job_registry.create_job(
+        SEVEN_RS_BATCH_JOB_TYPE,
+        status="queued",
+        message="Batch 7R's analysis queued",
+        application_scope=len(request.applications or request.application_ids or []) or "all_applications",
+        started_by=str(current_user)
+    )
+    background_tasks.add_task(run_batch_analysis_task, job_id, request)
+    
+    return {
+        "message": "Batch 7R's analysis started",
+        "job_id": job_id,
+        "full_rerun": request.full_rerun,
+        "started_at": datetime.utcnow().isoformat(),
+        "started_by": str(current_user)
+    }
+
+async def run_batch_analysis_task(job_id: str, request: SevenRsBatchRequest):
+    """Background task: score, persist and summarize in a worker thread"""
+    job_registry.update_job(job_id, status="processing", progress=10, message="Scoring applications")
+    
+    def analyze() -> Dict[str, Any]:
+        if request.applications is not None:
+            applications, whole_portfolio = request.applications, False
+        elif request.application_ids:
+            applications, whole_portfolio = portfolio_store.get_applications(request.application_ids), False
+        else:
+            applications, whole_portfolio = portfolio_store.all_applications(), True
+        # A whole-portfolio run also drops results for applications no longer in it
+        return seven_rs_analyzer.run_batch(
+            applications,
+            criteria_weights=request.criteria_weights,
+            time_horizon_years=request.time_horizon_years,
+            full_rerun=request.full_rerun,
+            prune_missing=whole_portfolio
+        )
+    
+    try:
+        summary = await asyncio.get_running_loop().run_in_executor(None, analyze)
+    except Exception as e:
+        logger.error(f"Batch 7R's analysis {job_id} failed: {e}")
+        job_registry.update_job(job_id, status="failed", message="Batch analysis failed", error=str(e))
+        return
+    
+    job_registry.update_job(
+        job_id,
+        status="completed",
+        progress=100,
+        message=f"Rescored {summary['applications_rescored']} of {summary['applications_submitted']} applications",
+        completed_at=datetime.utcnow().isoformat(),
+        result=summary
+    )
+
+@router.get("/batch/results")
+async def get_batch_recommendations(
+    strategy: Optional[str] = None,
+    priority: Optional[str] = None,
+    limit: int = 100,
+    offset: int = 0,
+    current_user: dict = Depends(require_admin)
+):
+    """Ranked recommendation table from the stored batch results"""
+    table = await asyncio.get_running_loop().run_in_executor(
+        None, seven_rs_analyzer.recommendations, strategy, priority, limit, offset
+    )
+    
+    return {
+        **table,
+        "strategy_filter": strategy,
+        "priority_filter": priority,
+        "limit": limit,
+        "offset": offset,
+        "retrieved_at": datetime.utcnow().isoformat()
+    }
+
+@router.get("/batch/{job_id}")
+async def get_batch_analysis_status(
+    job_id: str,
+    current_user: dict = Depends(require_admin)
+):
+    """Status and summary (business case per strategy) of a batch analysis job"""
+    job = job_registry.get_job(job_id)
+    if job is None or job.get("job_type") != SEVEN_RS_BATCH_JOB_TYPE:
+        raise HTTPException(status_code=404, detail=f"Batch analysis {job_id} not found")
+    
+    return {
+        "job": job,
+        "checked_at": datetime.utcnow().isoformat()
+    }
+
 @router.post("/analyze")
 async def analyze_seven_rs(
     request: SevenRsAnalysisRequest,
@@ -73,8 +202,8 @@ async def analyze_seven_rs(
     current_user: dict = Depends(require_admin)
 ):
     """Generate comprehensive 7R's analysis for banking applications"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         analysis_job_id = await service.start_analysis(request, background_tasks)
         
         return {
@@ -96,8 +225,8 @@ async def get_analysis_status(
     current_user: dict = Depends(require_admin)
 ):
     """Get status of 7R's analysis job"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         status = await service.get_analysis_status(job_id)
         
         return {
@@ -114,8 +243,8 @@ async def get_strategy_distribution(
     current_user: dict = Depends(require_admin)
 ):
     """Get distribution of 7R strategies across applications"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         distribution = await service.get_strategy_distribution(filter_by_archetype)
         
         return {
@@ -136,8 +265,8 @@ async def generate_recommendations(
     current_user: dict = Depends(require_admin)
 ):
     """Generate 7R strategy recommendations for specific applications"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         recommendations = await service.generate_recommendations(applications, criteria_weights)
         
         return {
@@ -158,8 +287,8 @@ async def get_application_recommendation(
     current_user: dict = Depends(require_admin)
 ):
     """Get detailed recommendation for a specific application"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         recommendation = await service.get_application_recommendation(application_id, include_alternatives)
         
         return {
@@ -179,8 +308,8 @@ async def generate_business_case(
     current_user: dict = Depends(require_admin)
 ):
     """Generate detailed business case for selected 7R strategies"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         business_case = await service.generate_business_case(strategies, time_horizon_years, include_risk_analysis)
         
         return {
@@ -202,8 +331,8 @@ async def compare_strategy_business_cases(
     current_user: dict = Depends(require_admin)
 ):
     """Compare business cases between two 7R strategies"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         comparison = await service.compare_strategies(strategy1, strategy2, application_count)
         
         return {
@@ -224,8 +353,8 @@ async def get_migration_roadmap(
     current_user: dict = Depends(require_admin)
 ):
     """Get phased migration roadmap based on 7R strategies"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         roadmap = await service.generate_migration_roadmap(prioritization_method, phase_duration_weeks)
         
         return {
@@ -246,8 +375,8 @@ async def customize_migration_roadmap(
     current_user: dict = Depends(require_admin)
 ):
     """Customize migration roadmap with specific phase configurations"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         custom_roadmap = await service.customize_roadmap(phase_configurations, constraints)
         
         return {
@@ -268,8 +397,8 @@ async def get_cost_analysis(
     current_user: dict = Depends(require_admin)
 ):
     """Get detailed cost analysis for 7R strategies"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         cost_analysis = await service.get_cost_analysis(strategy_filter, include_hidden_costs)
         
         return {
@@ -288,8 +417,8 @@ async def validate_strategy_assignments(
     current_user: dict = Depends(require_admin)
 ):
     """Validate proposed 7R strategy assignments"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         validation_result = await service.validate_assignments(application_strategies)
         
         return {
@@ -310,8 +439,8 @@ async def generate_executive_summary(
     current_user: dict = Depends(require_admin)
 ):
     """Generate executive summary report for 7R's analysis"""
+    service = get_seven_rs_service()
     try:
-        service = SevenRsService()
         summary = await service.generate_executive_summary(include_charts)
         
         return {
@@ -332,11 +461,11 @@ async def export_seven_rs_analysis(
     current_user: dict = Depends(require_admin)
 ):
     """Export complete 7R's analysis in specified format"""
+    if export_format not in ['excel', 'pdf', 'json', 'powerpoint']:
+        raise HTTPException(status_code=400, detail="Unsupported export format")
+    
+    service = get_seven_rs_service()
     try:
-        if export_format not in ['excel', 'pdf', 'json', 'powerpoint']:
-            raise HTTPException(status_code=400, detail="Unsupported export format")
-        
-        service = SevenRsService()
         export_result = await service.export_analysis(job_id, export_format, include_charts)
         
         return {
@@ -354,6 +483,14 @@ async def export_seven_rs_analysis(
 @router.get("/health")
 async def seven_rs_health_check():
     """Health check for 7R's analysis service"""
+    if SevenRsService is None:
+        return {
+            "status": "unavailable",
+            "service": "seven_rs_analysis",
+            "error": "7R's analysis service is not available",
+            "checked_at": datetime.utcnow().isoformat()
+        }
+    
     try:
         service = SevenRsService()
         health_status = await service.health_check()
@@ -13,13 +13,14 @@ from pathlib import Path
 import openpyxl
 import asyncio
 
+from services.portfolio_store import PortfolioStore, portfolio_store
+
 class AppService:
     """Service for managing application portfolio data"""
     
-    def __init__(self):
-        self.data_folder = Path("static/ui/data")
-        self.applications_cache = None
-        self.last_refresh = None
+    def __init__(self, store: Optional[PortfolioStore] = None):
+        # Shared with CostService and MigrationService; reloads when the source files change
+        self.store = store or portfolio_store
         
         # Strategy assignment rules based on archetype
         self.archetype_strategy_mapping = {
@@ -67,12 +68,12 @@ class AppService:
         
         applications = await self.get_all_applications()
         
-        # Calculate distributions
-        strategy_distribution = self._calculate_distribution(applications, "strategy")
-        archetype_distribution = self._calculate_distribution(applications, "archetype")
-        complexity_distribution = self._calculate_distribution(applications, "complexity")
-        risk_distribution = self._calculate_distribution(applications, "risk")
-        criticality_distribution = self._calculate_distribution(applications, "business_criticality")
+        # Distributions come straight from the store's indexes
+        strategy_distribution = self.store.distribution("strategy")
+        archetype_distribution = self.store.distribution("archetype")
+        complexity_distribution = self.store.distribution("complexity")
+        risk_distribution = self.store.distribution("risk")
+        criticality_distribution = self.store.distribution("business_criticality")
         
         # Calculate summary metrics
         total_cost = sum(app.get("estimated_cost", 0) for app in applications)
@@ -97,54 +98,27 @@ class AppService:
     
     async def get_all_applications(self) -> List[Dict]:
         """Get all applications with 7 Rs analysis"""
-        
-        if self.applications_cache is None or self._needs_refresh():
-            await self.refresh_data()
-        
-        return self.applications_cache or []
+        return self.store.all_applications()
     
     async def get_applications(self, app_ids: List[str]) -> List[Dict]:
         """Get applications by IDs - for service integration"""
-        
-        applications = await self.get_all_applications()
-        
-        if "all" in app_ids:
-            return applications
-        
-        return [app for app in applications if app["id"] in app_ids]
+        return self.store.get_applications(app_ids)
     
     async def get_filtered_applications(self, filters) -> List[Dict]:
         """Get filtered applications based on criteria"""
         
-        applications = await self.get_all_applications()
-        
-        # Apply filters
-        if hasattr(filters, 'app_ids') and filters.app_ids:
-            applications = [app for app in applications if app["id"] in filters.app_ids]
-        
-        if hasattr(filters, 'strategies') and filters.strategies:
-            applications = [app for app in applications 
-                          if app["strategy"].lower() in [s.lower() for s in filters.strategies]]
-        
-        if hasattr(filters, 'archetypes') and filters.archetypes:
-            applications = [app for app in applications 
-                          if app["archetype"] in filters.archetypes]
-        
-        if hasattr(filters, 'complexity_levels') and filters.complexity_levels:
-            applications = [app for app in applications 
-                          if app["complexity"] in filters.complexity_levels]
-        
-        if hasattr(filters, 'risk_levels') and filters.risk_levels:
-            applications = [app for app in applications 
-                          if app["risk"] in filters.risk_levels]
-        
-        return applications
+        return self.store.filter_applications(
+            id=getattr(filters, 'app_ids', None),
+            strategy=getattr(filters, 'strategies', None),
+            archetype=getattr(filters, 'archetypes', None),
+            complexity=getattr(filters, 'complexity_levels', None),
+            risk=getattr(filters, 'risk_levels', None),
+            business_criticality=getattr(filters, 'criticality_levels', None)
+        )
     
     async def get_application_by_id(self, app_id: str) -> Optional[Dict]:
         """Get specific application by ID"""
-        
-        applications = await self.get_all_applications()
-        return next((app for app in applications if app["id"] == app_id), None)
+        return self.store.get_application(app_id)
     
     async def get_application(self, app_id: str) -> Optional[Dict]:
         """Alias for get_application_by_id - for service integration"""
@@ -153,105 +127,66 @@ class AppService:
     async def update_strategy(self, app_id: str, strategy: str) -> Optional[Dict]:
         """Update migration strategy for an application"""
         
-        applications = await self.get_all_applications()
+        app = self.store.get_application(app_id)
+        if app is None:
+            return None
         
-        for app in applications:
-            if app["id"] == app_id:
-                app["strategy"] = strategy.title()
-                # Update risk based on new strategy
-                app["risk"] = self.strategy_risk_mapping.get(strategy.title(), "Medium")
-                # Recalculate costs and timeline
-                app["estimated_cost"] = self._calculate_estimated_cost(app)
-                app["timeline_months"] = self._calculate_timeline(app)
-                app["annual_savings"] = self._calculate_annual_savings(app)
-                
-                # Update cache
-                self.applications_cache = applications
-                
-                return app
+        app["strategy"] = strategy.title()
+        # Update risk based on new strategy
+        app["risk"] = self.strategy_risk_mapping.get(strategy.title(), "Medium")
+        # Recalculate costs and timeline
+        app["estimated_cost"] = self._calculate_estimated_cost(app)
+        app["timeline_months"] = self._calculate_timeline(app)
+        app["annual_savings"] = self._calculate_annual_savings(app)
         
-        return None
+        self.store.reindex(app_id)
+        return app
     
     async def update_application(self, app_id: str, updates: Dict[str, Any]) -> Optional[Dict]:
         """Update application with multiple fields"""
         
-        applications = await self.get_all_applications()
+        app = self.store.get_application(app_id)
+        if app is None:
+            return None
         
-        for app in applications:
-            if app["id"] == app_id:
-                # Update provided fields
-                for key, value in updates.items():
-                    if key in app:
-                        app[key] = value
-                
-                # Recalculate derived fields if strategy or complexity changed
-                if "strategy" in updates or "complexity" in updates:
-                    app["estimated_cost"] = self._calculate_estimated_cost(app)
-                    app["timeline_months"] = self._calculate_timeline(app)
-                    app["annual_savings"] = self._calculate_annual_savings(app)
-                    app["risk"] = self.strategy_risk_mapping.get(app["strategy"], "Medium")
-                
-                # Update cache
-                self.applications_cache = applications
-                
-                return app
+        # Update provided fields
+        for key, value in updates.items():
+            if key in app:
+                app[key] = value
+        
+        # Recalculate derived fields if strategy or complexity changed
+        if "strategy" in updates or "complexity" in updates:
+            app["estimated_cost"] = self._calculate_estimated_cost(app)
+            app["timeline_months"] = self._calculate_timeline(app)
+            app["annual_savings"] = self._calculate_annual_savings(app)
+            app["risk"] = self.strategy_risk_mapping.get(app["strategy"], "Medium")
         
-        return None
+        self.store.reindex(app_id)
+        return app
     
     async def refresh_data(self) -> Dict[str, Any]:
-        """Refresh application data from source files"""
+        """Rebuild application data from source files"""
+        return self.store.refresh()
+    
+    def build_applications(self, app_df: Optional[pd.DataFrame], archetype_mapping: Dict[str, str]) -> List[Dict]:
+        """Portfolio store builder: application records from the application list, or mock data without one"""
         
-        try:
-            # Load application list from CSV
-            csv_path = self.data_folder / "applicationList.csv"
-            if not csv_path.exists():
-                # Fallback to mock data if CSV doesn't exist
-                applications = self._generate_mock_applications()
-            else:
-                app_df = pd.read_csv(csv_path)
-                
-                # Load archetype mapping from Excel
-                excel_path = self.data_folder / "synthetic_flows_apps_archetype_mapped.xlsx"
-                archetype_mapping = {}
-                
-                if excel_path.exists():
-                    archetype_mapping = await self._load_archetype_mapping(excel_path)
-                
-                # Process applications
-                applications = []
-                for _, row in app_df.iterrows():
-                    app_id = row.get("app_id", f"APP_{len(applications):03d}")
-                    app_name = row.get("app_name", f"Application {len(applications) + 1}")
-                    
-                    # Get archetype from mapping or assign based on name
-                    archetype = archetype_mapping.get(app_name, self._infer_archetype_from_name(app_name))
-                    
-                    # Create application data
-                    app_data = self._create_application_data(app_id, app_name, archetype)
-                    applications.append(app_data)
-            
-            self.applications_cache = applications
-            self.last_refresh = datetime.now()
-            
-            return {
-                "count": len(applications),
-                "timestamp": self.last_refresh.isoformat(),
-                "status": "success",
-                "source": "csv" if csv_path.exists() else "mock"
-            }
+        if app_df is None:
+            return self._generate_mock_applications()
+        
+        applications = []
+        for row in app_df.to_dict("records"):
+            app_id = row.get("app_id", f"APP_{len(applications):03d}")
+            app_name = row.get("app_name", f"Application {len(applications) + 1}")
             
-        except Exception as e:
-            # Generate mock data on error
-            applications = self._generate_mock_applications()
-            self.applications_cache = applications
-            self.last_refresh = datetime.now()
+            # Get archetype from mapping or assign based on name
+            archetype = archetype_mapping.get(app_name, self._infer_archetype_from_name(app_name))
             
-            return {
-                "count": len(applications),
-                "timestamp": self.last_refresh.isoformat(),
-                "status": "fallback_mock",
-                "error": str(e)
-            }
+            # Create application data
+            app_data = self._create_application_data(app_id, app_name, archetype)
+            applications.append(app_data)
+        
+        return applications
     
     def _generate_mock_applications(self) -> List[Dict]:
         """Generate mock applications for testing"""
@@ -322,25 +257,6 @@ class AppService:
         
         return app_data
     
-    async def _load_archetype_mapping(self, excel_path: Path) -> Dict[str, str]:
-        """Load archetype mapping from Excel file"""
-        
-        try:
-            # Read Excel file
-            df = pd.read_excel(excel_path, sheet_name=0)
-            
-            # Extract unique application-archetype mappings
-            if "application" in df.columns and "archetype" in df.columns:
-                mapping = df.groupby("application")["archetype"].first().to_dict()
-                return mapping
-            else:
-                print(f"Warning: Expected columns not found in {excel_path}")
-                return {}
-                
-        except Exception as e:
-            print(f"Warning: Could not load archetype mapping: {str(e)}")
-            return {}
-    
     def _infer_archetype_from_name(self, app_name: str) -> str:
         """Infer archetype from application name"""
         
@@ -589,25 +505,6 @@ class AppService:
         
         return infra_profiles.get(archetype, {"instances": 2, "cpu_cores": 4, "memory_gb": 8})
     
-    def _calculate_distribution(self, applications: List[Dict], field: str) -> Dict[str, int]:
-        """Calculate distribution of applications by field"""
-        
-        distribution = {}
-        for app in applications:
-            value = app.get(field, "Unknown")
-            distribution[value] = distribution.get(value, 0) + 1
-        
-        return distribution
-    
-    def _needs_refresh(self) -> bool:
-        """Check if data needs refresh (refresh every hour)"""
-        
-        if self.last_refresh is None:
-            return True
-        
-        time_diff = datetime.now() - self.last_refresh
-        return time_diff.total_seconds() > 3600  # 1 hour
-    
     async def export_portfolio(self, format: str = "excel") -> Dict[str, Any]:
         """Export portfolio data to results folder"""
         
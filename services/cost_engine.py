@@ -0,0 +1,432 @@
+"""
+Vectorized portfolio cost engine
+Expresses the CostService cost model (migration cost by strategy and
+complexity, current on-premises run cost, AWS run cost with optimizations,
+ROI) as array operations over a portfolio table. Costs depend only on an
+application's strategy, complexity and archetype class, so the portfolio is
+reduced to counts per (strategy, complexity, archetype class) cell and every
+scenario is evaluated by indexing precomputed unit-cost tables. Many what-if
+scenarios (strategy mixes, approaches, contingency rates, cost multipliers,
+RI coverage) are evaluated together into a comparison matrix.
+"""
+
+import itertools
+import math
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+STRATEGIES = ("rehost", "replatform", "refactor", "retire", "retain", "repurchase", "relocate")
+COMPLEXITIES = ("low", "medium", "high", "very_high")
+# First matching keyword wins, in this order
+ARCHETYPE_CLASSES = ("other", "microservices", "monolithic", "soa", "event-driven")
+
+MIGRATION_CATEGORIES = ("infrastructure_setup", "migration_tools", "professional_services",
+                        "application_migration", "testing_validation", "training")
+CURRENT_CATEGORIES = ("infrastructure", "maintenance", "licenses", "support", "utilities")
+AWS_CATEGORIES = ("compute", "storage", "network", "managed_services", "support")
+
+COMPLEXITY_MULTIPLIERS = (1.0, 1.5, 2.0, 3.0)
+
+COST_ENGINE_CONFIG = {
+    # Scenarios evaluated in one comparison; every scenario adds a [cell, category] slab to each array
+    "max_scenarios": int(os.getenv("COST_ENGINE_MAX_SCENARIOS", "2000"))
+}
+
+# Per strategy: category costs scaled by the complexity multiplier, and fixed category costs (USD)
+MIGRATION_SCALED_COSTS = {
+    "rehost": (5000, 2000, 15000, 8000, 5000, 2000),
+    "replatform": (8000, 4000, 25000, 15000, 10000, 5000),
+    "refactor": (15000, 8000, 50000, 35000, 20000, 10000),
+    "retire": (0, 0, 3000, 2000, 0, 0),
+    "retain": (0, 0, 0, 0, 0, 0),
+    "repurchase": (3000, 0, 20000, 10000, 8000, 8000),
+    "relocate": (3000, 0, 8000, 5000, 3000, 2000)
+}
+MIGRATION_FIXED_COSTS = {
+    "rehost": (0, 0, 0, 0, 0, 0),
+    "replatform": (0, 0, 0, 0, 0, 0),
+    "refactor": (0, 0, 0, 0, 0, 0),
+    "retire": (0, 1000, 0, 0, 1000, 500),
+    "retain": (0, 0, 1000, 0, 500, 0),
+    "repurchase": (0, 2000, 0, 0, 0, 0),
+    "relocate": (0, 1500, 0, 0, 0, 0)
+}
+# Migration category multipliers by archetype class
+MIGRATION_ARCHETYPE_FACTORS = {
+    "microservices": {"infrastructure_setup": 1.2, "testing_validation": 1.3},
+    "monolithic": {"application_migration": 1.4, "testing_validation": 1.2},
+    "soa": {"professional_services": 1.3}
+}
+# Big bang needs more parallel resources and coordination
+APPROACH_FACTORS = {
+    "phased": {},
+    "bigbang": {"professional_services": 1.4, "testing_validation": 1.3, "infrastructure_setup": 1.2}
+}
+CONTINGENCY_RATES = {"phased": 0.15, "bigbang": 0.20}
+
+# Monthly on-premises infrastructure cost by complexity and the other categories as shares of it
+CURRENT_BASE_MONTHLY = (5000, 12000, 25000, 45000)
+CURRENT_CATEGORY_SHARES = (1.0, 0.3, 0.4, 0.2, 0.15)
+CURRENT_ARCHETYPE_FACTORS = {
+    "microservices": {"infrastructure": 1.3},
+    "monolithic": {"licenses": 1.4}
+}
+AWS_ARCHETYPE_FACTORS = {
+    "microservices": {"compute": 1.2, "managed_services": 1.5},
+    "event-driven": {"managed_services": 1.3}
+}
+
+# AWS optimizations: RI discount applies to the covered share of compute
+DEFAULT_RI_COVERAGE = 0.6
+STORAGE_TIERING_FACTOR = 0.85
+NETWORK_OPTIMIZATION_FACTOR = 0.9
+DISCOUNT_RATE = 0.10
+
+
+class ScenarioLimitError(ValueError):
+    """More scenarios requested than COST_ENGINE_CONFIG["max_scenarios"] allows"""
+
+
+def check_scenario_count(count: int, max_scenarios: Optional[int] = None):
+    limit = COST_ENGINE_CONFIG["max_scenarios"] if max_scenarios is None else max_scenarios
+    if count > limit:
+        raise ScenarioLimitError(f"{count} scenarios requested; at most {limit} can be compared at once")
+
+
+@dataclass
+class CostScenario:
+    """
+    One what-if. ``strategy_mix`` re-assigns strategies before costing
+    ({"rehost": "replatform"}, or {"*": "refactor"} for every application).
+    Only AWS prices are modelled; to approximate another cloud, scale the
+    run cost with ``cloud_cost_multiplier``.
+    """
+    name: str
+    approach: str = "phased"
+    strategy_mix: Dict[str, str] = field(default_factory=dict)
+    contingency_rate: Optional[float] = None
+    migration_cost_multiplier: float = 1.0
+    cloud_cost_multiplier: float = 1.0
+    ri_coverage: float = DEFAULT_RI_COVERAGE
+    timeline_years: int = 3
+
+
+def build_scenario_grid(approaches: Sequence[str] = ("phased",),
+                        strategy_mixes: Sequence[Dict[str, str]] = ({},),
+                        contingency_rates: Sequence[Optional[float]] = (None,),
+                        migration_cost_multipliers: Sequence[float] = (1.0,),
+                        cloud_cost_multipliers: Sequence[float] = (1.0,),
+                        ri_coverages: Sequence[float] = (DEFAULT_RI_COVERAGE,),
+                        timeline_years: Sequence[int] = (3,),
+                        max_scenarios: Optional[int] = None) -> List[CostScenario]:
+    """
+    Cartesian product of scenario axes, named after the values that vary.
+    Raises ScenarioLimitError before expanding a product larger than
+    ``max_scenarios`` (default COST_ENGINE_CONFIG["max_scenarios"]).
+    """
+    axes = {
+        "approach": list(approaches),
+        "strategy_mix": list(strategy_mixes),
+        "contingency_rate": list(contingency_rates),
+        "migration_cost_multiplier": list(migration_cost_multipliers),
+        "cloud_cost_multiplier": list(cloud_cost_multipliers),
+        "ri_coverage": list(ri_coverages),
+        "timeline_years": list(timeline_years)
+    }
+    check_scenario_count(math.prod(len(values) for values in axes.values()), max_scenarios)
+    varying = [name for name, values in axes.items() if len(values) > 1]
+    scenarios = []
+    for values in itertools.product(*axes.values()):
+        params = dict(zip(axes, values))
+        label = ", ".join(f"{name}={_describe(params[name])}" for name in varying) or "baseline"
+        scenarios.append(CostScenario(name=label, **params))
+    return scenarios
+
+
+def _describe(value: Any) -> str:
+    if isinstance(value, dict):
+        return "+".join(f"{k}->{v}" for k, v in value.items()) or "current"
+    return str(value)
+
+
+def _archetype_classes(archetypes: pd.Series) -> np.ndarray:
+    lowered = archetypes.fillna("").astype(str).str.lower()
+    conditions = [lowered.str.contains(keyword, regex=False).values for keyword in ARCHETYPE_CLASSES[1:]]
+    return np.select(conditions, list(range(1, len(ARCHETYPE_CLASSES))), default=0)
+
+
+class PortfolioCostTable:
+    """
+    Portfolio reduced to application counts per (strategy, complexity,
+    archetype class) cell. Unknown strategies and complexities are coded -1.
+    """
+
+    def __init__(self, applications: List[Dict[str, Any]]):
+        frame = pd.DataFrame({
+            "strategy": [str(app.get("strategy", "rehost")).lower() for app in applications],
+            "complexity": [str(app.get("complexity", "medium")).lower() for app in applications],
+            "archetype": [app.get("archetype", "") for app in applications]
+        })
+        self.app_count = len(frame)
+        self.strategy = pd.Categorical(frame["strategy"], categories=STRATEGIES).codes.astype(np.int64)
+        self.complexity = pd.Categorical(frame["complexity"], categories=COMPLEXITIES).codes.astype(np.int64)
+        self.archetype = _archetype_classes(frame["archetype"]).astype(np.int64)
+        self.unknown_strategies = sorted(set(frame["strategy"][self.strategy < 0]))
+        self.unknown_complexities = sorted(set(frame["complexity"][self.complexity < 0]))
+
+        # Shift codes to be non-negative for the cell key
+        keys = np.stack([self.strategy + 1, self.complexity + 1, self.archetype], axis=1)
+        cells, counts = np.unique(keys, axis=0, return_counts=True)
+        self.cell_strategy = cells[:, 0] - 1
+        self.cell_complexity = cells[:, 1] - 1
+        self.cell_archetype = cells[:, 2]
+        self.cell_count = counts.astype(float)
+
+
+class PortfolioCostModel:
+    """Unit-cost tables for one set of AWS cost factors and the vectorized evaluation over them"""
+
+    def __init__(self, aws_factors: Any):
+        self.aws_factors = aws_factors
+        self.migration_unit = self._migration_table()
+        self.current_unit = self._current_table()
+        self.aws_unit = self._aws_table(aws_factors)
+
+    # ------------------------------------------------------------ unit tables
+
+    @staticmethod
+    def _category_factors(factors_by_class: Dict[str, Dict[str, float]], categories: Sequence[str]) -> np.ndarray:
+        table = np.ones((len(ARCHETYPE_CLASSES), len(categories)))
+        for archetype, factors in factors_by_class.items():
+            for category, factor in factors.items():
+                table[ARCHETYPE_CLASSES.index(archetype), categories.index(category)] = factor
+        return table
+
+    def _migration_table(self) -> np.ndarray:
+        """[strategy, complexity, archetype class, category] migration cost per application"""
+        scaled = np.array([MIGRATION_SCALED_COSTS[s] for s in STRATEGIES], dtype=float)
+        fixed = np.array([MIGRATION_FIXED_COSTS[s] for s in STRATEGIES], dtype=float)
+        multipliers = np.array(COMPLEXITY_MULTIPLIERS)
+        base = scaled[:, None, :] * multipliers[None, :, None] + fixed[:, None, :]
+        archetype = self._category_factors(MIGRATION_ARCHETYPE_FACTORS, MIGRATION_CATEGORIES)
+        return base[:, :, None, :] * archetype[None, None, :, :]
+
+    def _current_table(self) -> np.ndarray:
+        """[complexity, archetype class, category] annual on-premises cost per application"""
+        monthly = np.array(CURRENT_BASE_MONTHLY, dtype=float)[:, None] * np.array(CURRENT_CATEGORY_SHARES)[None, :]
+        archetype = self._category_factors(CURRENT_ARCHETYPE_FACTORS, CURRENT_CATEGORIES)
+        return monthly[:, None, :] * archetype[None, :, :] * 12
+
+    @staticmethod
+    def _aws_table(f: Any) -> np.ndarray:
+        """[strategy, complexity, archetype class, category] annual AWS cost per application, before optimizations"""
+        compute = np.zeros((len(STRATEGIES), len(COMPLEXITIES)))
+        compute[STRATEGIES.index("rehost")] = (
+            f.ec2_small + f.rds_small, f.ec2_medium + f.rds_medium,
+            (f.ec2_large * 2) + f.rds_large, (f.ec2_xlarge * 3) + (f.rds_large * 2))
+        compute[STRATEGIES.index("replatform")] = (
+            f.ec2_small * 0.8 + f.rds_small, f.ec2_medium * 0.9 + f.rds_medium,
+            (f.ec2_large * 1.5) + f.rds_large, (f.ec2_xlarge * 2) + (f.rds_large * 1.5))
+        compute[STRATEGIES.index("refactor")] = (
+            f.ec2_small * 0.6, f.ec2_medium * 0.7, f.ec2_large * 0.8, (f.ec2_xlarge * 1.2))
+
+        monthly = np.zeros((len(STRATEGIES), len(COMPLEXITIES), len(AWS_CATEGORIES)))
+        monthly[:, :, 0] = compute
+        monthly[:, :, 1] = [200, 500, 500, 500]      # EBS + S3
+        monthly[:, :, 2] = [150, 150, 300, 150]      # Data transfer
+        managed = np.array([400 if s in ("replatform", "refactor") else 100 for s in STRATEGIES], dtype=float)
+        monthly[:, :, 3] = managed[:, None]
+        monthly[:, :, 4] = 200                       # AWS support
+
+        archetype = PortfolioCostModel._category_factors(AWS_ARCHETYPE_FACTORS, AWS_CATEGORIES)
+        return monthly[:, :, None, :] * archetype[None, None, :, :] * 12
+
+    # ------------------------------------------------------------ evaluation
+
+    @staticmethod
+    def _strategy_remap(scenarios: Sequence[CostScenario]) -> np.ndarray:
+        remap = np.tile(np.arange(len(STRATEGIES)), (len(scenarios), 1))
+        for i, scenario in enumerate(scenarios):
+            for source, target in (scenario.strategy_mix or {}).items():
+                target = str(target).lower()
+                if target not in STRATEGIES:
+                    raise ValueError(f"Unknown migration strategy in scenario '{scenario.name}': {target}")
+                if source == "*":
+                    remap[i, :] = STRATEGIES.index(target)
+                elif str(source).lower() in STRATEGIES:
+                    remap[i, STRATEGIES.index(str(source).lower())] = STRATEGIES.index(target)
+                else:
+                    raise ValueError(f"Unknown migration strategy in scenario '{scenario.name}': {source}")
+        return remap
+
+    def evaluate(self, table: PortfolioCostTable, scenarios: Sequence[CostScenario],
+                 include_migration: bool = True) -> Dict[str, np.ndarray]:
+        """
+        Raw per-scenario arrays: migration breakdown [S, category], cost by
+        strategy [S, strategy], current [category] and optimized AWS
+        [S, category] annual costs, and strategy application counts.
+        """
+        n = len(scenarios)
+        counts = table.cell_count
+        cell_complexity = table.cell_complexity
+
+        remap = self._strategy_remap(scenarios)
+        # Unknown strategies stay unknown (-1) unless a "*" mix re-assigns every application
+        star = np.array([remap[i, 0] if "*" in (s.strategy_mix or {}) else -1 for i, s in enumerate(scenarios)])
+        strategy = np.where(table.cell_strategy[None, :] >= 0,
+                            remap[:, np.maximum(table.cell_strategy, 0)], star[:, None])
+        result: Dict[str, np.ndarray] = {}
+
+        if include_migration:
+            if (strategy < 0).any():
+                raise KeyError(table.unknown_strategies[0])
+            if (cell_complexity < 0).any():
+                raise ValueError(f"'{table.unknown_complexities[0]}' is not a valid ApplicationComplexity")
+
+            unit = self.migration_unit[strategy, cell_complexity[None, :], table.cell_archetype[None, :]]
+            multiplier = np.array([s.migration_cost_multiplier for s in scenarios], dtype=float)
+            per_cell = unit * counts[None, :, None] * multiplier[:, None, None]
+
+            approach = np.ones((n, len(MIGRATION_CATEGORIES)))
+            for i, scenario in enumerate(scenarios):
+                for category, factor in APPROACH_FACTORS.get(scenario.approach, {}).items():
+                    approach[i, MIGRATION_CATEGORIES.index(category)] = factor
+            breakdown = per_cell.sum(axis=1) * approach
+
+            rates = np.array([
+                s.contingency_rate if s.contingency_rate is not None
+                else CONTINGENCY_RATES.get(s.approach, CONTINGENCY_RATES["phased"])
+                for s in scenarios
+            ], dtype=float)
+            result["migration_breakdown"] = breakdown
+            result["contingency"] = breakdown.sum(axis=1) * rates
+            result["contingency_rate"] = rates
+
+            # Cost by strategy is taken before approach multipliers and contingency
+            offsets = (np.arange(n) * len(STRATEGIES))[:, None]
+            result["by_strategy"] = np.bincount(
+                (strategy + offsets).ravel(), weights=per_cell.sum(axis=2).ravel(),
+                minlength=n * len(STRATEGIES)).reshape(n, len(STRATEGIES))
+
+        # Run costs: unknown complexities are costed as medium, unknown strategies as no compute
+        complexity = np.where(cell_complexity >= 0, cell_complexity, COMPLEXITIES.index("medium"))
+        result["current"] = (self.current_unit[complexity, table.cell_archetype] * counts[:, None]).sum(axis=0)
+
+        # The retain row is the no-compute, default managed services profile
+        aws_strategy = np.where(strategy >= 0, strategy, STRATEGIES.index("retain"))
+        aws_unit = self.aws_unit[aws_strategy, complexity[None, :], table.cell_archetype[None, :]]
+        aws = (aws_unit * counts[None, :, None]).sum(axis=1)
+        cloud = np.array([s.cloud_cost_multiplier for s in scenarios], dtype=float)[:, None]
+        aws = aws * cloud
+        result["aws_raw"] = aws
+        ri = np.array([s.ri_coverage for s in scenarios], dtype=float)
+        discount = self.aws_factors.reserved_instance_discount
+        optimized = aws.copy()
+        optimized[:, 0] = aws[:, 0] * ri * (1 - discount) + aws[:, 0] * (1 - ri)
+        optimized[:, 1] *= STORAGE_TIERING_FACTOR
+        optimized[:, 2] *= NETWORK_OPTIMIZATION_FACTOR
+        result["aws"] = optimized
+
+        result["strategy_counts"] = np.stack([
+            np.bincount(strategy[i][strategy[i] >= 0], weights=counts[strategy[i] >= 0], minlength=len(STRATEGIES))
+            for i in range(n)
+        ]) if len(counts) else np.zeros((n, len(STRATEGIES)))
+        return result
+
+    def compare(self, table: PortfolioCostTable, scenarios: Sequence[CostScenario]) -> pd.DataFrame:
+        """Comparison matrix: one row per scenario with costs, savings and ROI"""
+        started = time.perf_counter()
+        raw = self.evaluate(table, scenarios)
+
+        migration_cost = raw["migration_breakdown"].sum(axis=1) + raw["contingency"]
+        current_annual = raw["current"].sum()
+        cloud_annual = raw["aws"].sum(axis=1)
+        annual_savings = current_annual - cloud_annual
+        years = np.array([s.timeline_years for s in scenarios], dtype=float)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            payback = np.where(annual_savings > 0, migration_cost / annual_savings * 12, np.inf)
+            annuity = (1 - (1 + DISCOUNT_RATE) ** -years) / DISCOUNT_RATE
+            npv = annual_savings * annuity - migration_cost
+            net_benefit = annual_savings * years - migration_cost
+            roi = np.where(migration_cost > 0, net_benefit / migration_cost * 100, 0.0)
+            savings_percentage = annual_savings / current_annual * 100 if current_annual > 0 else np.zeros(len(scenarios))
+
+        matrix = pd.DataFrame({
+            "scenario": [s.name for s in scenarios],
+            "approach": [s.approach for s in scenarios],
+            "strategy_mix": [_describe(s.strategy_mix) for s in scenarios],
+            "contingency_rate": raw["contingency_rate"],
+            "migration_cost_multiplier": [s.migration_cost_multiplier for s in scenarios],
+            "cloud_cost_multiplier": [s.cloud_cost_multiplier for s in scenarios],
+            "ri_coverage": [s.ri_coverage for s in scenarios],
+            "timeline_years": years.astype(int),
+            "migration_cost": migration_cost,
+            "contingency": raw["contingency"],
+            "current_annual_cost": current_annual,
+            "cloud_annual_cost": cloud_annual,
+            "annual_savings": annual_savings,
+            "savings_percentage": savings_percentage,
+            "payback_period_months": np.minimum(payback, 999),
+            "npv": npv,
+            "roi_percentage": roi,
+            "break_even_achieved": payback <= years * 12
+        })
+        for j, strategy in enumerate(STRATEGIES):
+            matrix[f"apps_{strategy}"] = raw["strategy_counts"][:, j].astype(int)
+        matrix.attrs["evaluation_seconds"] = time.perf_counter() - started
+        return matrix
+
+    # ------------------------------------------------------------ single-scenario views
+
+    def migration_costs(self, table: PortfolioCostTable, approach: str = "phased") -> Dict[str, Any]:
+        """Migration cost totals in the shape CostService.calculate_migration_costs returns"""
+        raw = self.evaluate(table, [CostScenario(name=approach, approach=approach)])
+        breakdown = dict(zip(MIGRATION_CATEGORIES, raw["migration_breakdown"][0].tolist()))
+        breakdown["contingency"] = float(raw["contingency"][0])
+        return {
+            "total": sum(breakdown.values()),
+            "breakdown": breakdown,
+            "by_strategy": dict(zip(STRATEGIES, raw["by_strategy"][0].tolist())),
+            "approach": approach,
+            "contingency_rate": float(raw["contingency_rate"][0]),
+            "currency": "USD"
+        }
+
+    def run_costs(self, table: PortfolioCostTable) -> Dict[str, Dict[str, float]]:
+        """Annual on-premises cost and AWS cost before and after optimizations"""
+        raw = self.evaluate(table, [CostScenario(name="current")], include_migration=False)
+        return {
+            "current": dict(zip(CURRENT_CATEGORIES, raw["current"].tolist())),
+            "aws": dict(zip(AWS_CATEGORIES, raw["aws_raw"][0].tolist())),
+            "aws_optimized": dict(zip(AWS_CATEGORIES, raw["aws"][0].tolist()))
+        }
+
+    def application_migration_costs(self, applications: List[Dict[str, Any]],
+                                    approach: str = "phased") -> pd.DataFrame:
+        """Per-application migration cost breakdown (before approach multipliers and contingency)"""
+        table = PortfolioCostTable(applications)
+        if (table.strategy < 0).any():
+            raise KeyError(table.unknown_strategies[0])
+        if (table.complexity < 0).any():
+            raise ValueError(f"'{table.unknown_complexities[0]}' is not a valid ApplicationComplexity")
+        unit = self.migration_unit[table.strategy, table.complexity, table.archetype]
+        frame = pd.DataFrame(unit, columns=list(MIGRATION_CATEGORIES))
+        frame["total"] = unit.sum(axis=1)
+        return frame
+
+
+def scenarios_from_dicts(items: Iterable[Dict[str, Any]]) -> List[CostScenario]:
+    """Build scenarios from request payloads, naming unnamed ones by position"""
+    scenarios = []
+    for i, item in enumerate(items):
+        params = dict(item)
+        params.setdefault("name", f"scenario_{i + 1}")
+        scenarios.append(CostScenario(**params))
+    return scenarios
+
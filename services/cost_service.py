@@ -11,6 +11,12 @@ from pathlib import Path
 import datetime
 import asyncio
 
+from services.cost_engine import (
+    STRATEGIES, PortfolioCostModel, PortfolioCostTable, build_scenario_grid, check_scenario_count,
+    scenarios_from_dicts
+)
+from services.portfolio_store import PortfolioStore, portfolio_store
+
 class MigrationStrategy(Enum):
     REHOST = "rehost"
     REPLATFORM = "replatform" 
@@ -83,12 +89,17 @@ class CostService:
     
     def __init__(self):
         self.aws_costs = AWSCostFactors()
-        self.migration_complexity_multipliers = {
-            ApplicationComplexity.LOW: 1.0,
-            ApplicationComplexity.MEDIUM: 1.5,
-            ApplicationComplexity.HIGH: 2.0,
-            ApplicationComplexity.VERY_HIGH: 3.0
-        }
+        # Application portfolio shared with AppService and MigrationService
+        self.portfolio = portfolio_store
+        # Unit-cost tables for the vectorized portfolio cost model
+        self.cost_model = PortfolioCostModel(self.aws_costs)
+
+    @classmethod
+    def from_store(cls, store: PortfolioStore) -> "CostService":
+        """Service reading another portfolio store; the constructor stays parameterless for Depends()"""
+        service = cls()
+        service.portfolio = store
+        return service
         
     async def calculate_migration_costs(
         self, 
@@ -97,65 +108,7 @@ class CostService:
         target_cloud: str = "aws"
     ) -> Dict[str, Any]:
         """Calculate comprehensive migration costs"""
-        
-        total_costs = {
-            "rehost": 0,
-            "replatform": 0, 
-            "refactor": 0,
-            "retire": 0,
-            "retain": 0,
-            "repurchase": 0,
-            "relocate": 0
-        }
-        
-        detailed_breakdown = {
-            "infrastructure_setup": 0,
-            "migration_tools": 0,
-            "professional_services": 0,
-            "application_migration": 0,
-            "testing_validation": 0,
-            "training": 0,
-            "contingency": 0
-        }
-        
-        # Calculate per-application costs
-        for app in applications:
-            strategy = app.get("strategy", "rehost").lower()
-            complexity = app.get("complexity", "medium").lower()
-            
-            app_cost = await self._calculate_application_migration_cost(
-                app, strategy, complexity, approach
-            )
-            
-            total_costs[strategy] += app_cost["total"]
-            
-            # Add to detailed breakdown
-            for category, cost in app_cost["breakdown"].items():
-                if category in detailed_breakdown:
-                    detailed_breakdown[category] += cost
-        
-        # Apply approach-specific multipliers
-        if approach == "bigbang":
-            # Big bang requires more parallel resources and coordination
-            detailed_breakdown["professional_services"] *= 1.4
-            detailed_breakdown["testing_validation"] *= 1.3
-            detailed_breakdown["infrastructure_setup"] *= 1.2
-        
-        # Add contingency (15% for phased, 20% for big bang)
-        contingency_rate = 0.20 if approach == "bigbang" else 0.15
-        subtotal = sum(detailed_breakdown.values())
-        detailed_breakdown["contingency"] = subtotal * contingency_rate
-        
-        total_migration_cost = sum(detailed_breakdown.values())
-        
-        return {
-            "total": total_migration_cost,
-            "breakdown": detailed_breakdown,
-            "by_strategy": total_costs,
-            "approach": approach,
-            "contingency_rate": contingency_rate,
-            "currency": "USD"
-        }
+        return self.cost_model.migration_costs(PortfolioCostTable(applications), approach)
     
     async def _calculate_application_migration_cost(
         self, 
@@ -166,89 +119,19 @@ class CostService:
     ) -> Dict[str, Any]:
         """Calculate migration cost for a single application"""
         
-        complexity_enum = ApplicationComplexity(complexity.lower())
-        multiplier = self.migration_complexity_multipliers[complexity_enum]
-        
-        # Base costs by strategy (in USD)
-        base_costs = {
-            "rehost": {
-                "infrastructure_setup": 5000 * multiplier,
-                "migration_tools": 2000 * multiplier,
-                "professional_services": 15000 * multiplier,
-                "application_migration": 8000 * multiplier,
-                "testing_validation": 5000 * multiplier,
-                "training": 2000 * multiplier
-            },
-            "replatform": {
-                "infrastructure_setup": 8000 * multiplier,
-                "migration_tools": 4000 * multiplier,
-                "professional_services": 25000 * multiplier,
-                "application_migration": 15000 * multiplier,
-                "testing_validation": 10000 * multiplier,
-                "training": 5000 * multiplier
-            },
-            "refactor": {
-                "infrastructure_setup": 15000 * multiplier,
-                "migration_tools": 8000 * multiplier,
-                "professional_services": 50000 * multiplier,
-                "application_migration": 35000 * multiplier,
-                "testing_validation": 20000 * multiplier,
-                "training": 10000 * multiplier
-            },
-            "retire": {
-                "infrastructure_setup": 0,
-                "migration_tools": 1000,
-                "professional_services": 3000 * multiplier,
-                "application_migration": 2000 * multiplier,
-                "testing_validation": 1000,
-                "training": 500
-            },
-            "retain": {
-                "infrastructure_setup": 0,
-                "migration_tools": 0,
-                "professional_services": 1000,
-                "application_migration": 0,
-                "testing_validation": 500,
-                "training": 0
-            },
-            "repurchase": {
-                "infrastructure_setup": 3000 * multiplier,
-                "migration_tools": 2000,
-                "professional_services": 20000 * multiplier,
-                "application_migration": 10000 * multiplier,
-                "testing_validation": 8000 * multiplier,
-                "training": 8000 * multiplier
-            },
-            "relocate": {
-                "infrastructure_setup": 3000 * multiplier,
-                "migration_tools": 1500,
-                "professional_services": 8000 * multiplier,
-                "application_migration": 5000 * multiplier,
-                "testing_validation": 3000 * multiplier,
-                "training": 2000 * multiplier
-            }
-        }
-        
-        costs = base_costs.get(strategy, base_costs["rehost"])
-        total = sum(costs.values())
-        
-        # Apply archetype-specific adjustments
-        archetype = app.get("archetype", "").lower()
-        if "microservices" in archetype:
-            costs["infrastructure_setup"] *= 1.2  # More complex infrastructure
-            costs["testing_validation"] *= 1.3   # More integration testing
-        elif "monolithic" in archetype:
-            costs["application_migration"] *= 1.4  # Harder to migrate
-            costs["testing_validation"] *= 1.2
-        elif "soa" in archetype:
-            costs["professional_services"] *= 1.3  # Requires SOA expertise
+        # Unknown strategies are costed as rehost
+        strategy = strategy.lower() if strategy.lower() in STRATEGIES else "rehost"
+        costs = self.cost_model.application_migration_costs(
+            [{"strategy": strategy, "complexity": complexity, "archetype": app.get("archetype", "")}]
+        ).iloc[0].to_dict()
+        total = costs.pop("total")
         
         return {
-            "total": sum(costs.values()),
+            "total": total,
             "breakdown": costs,
             "complexity": complexity,
             "strategy": strategy,
-            "archetype": archetype
+            "archetype": app.get("archetype", "").lower()
         }
     
     async def calculate_operational_costs(
@@ -266,14 +149,6 @@ class CostService:
             "utilities": 0
         }
         
-        aws_costs = {
-            "compute": 0,
-            "storage": 0,
-            "network": 0,
-            "managed_services": 0,
-            "support": 0
-        }
-        
         savings_breakdown = {
             "infrastructure_savings": 0,
             "license_savings": 0,
@@ -282,24 +157,12 @@ class CostService:
             "power_cooling_savings": 0
         }
         
-        for app in applications:
-            # Estimate current on-premises costs
-            app_current = await self._estimate_current_costs(app)
-            app_aws = await self._estimate_aws_costs(app)
-            
-            # Add to totals
-            for category, cost in app_current.items():
-                current_costs[category] += cost
-            
-            for category, cost in app_aws.items():
-                aws_costs[category] += cost
+        # Whole portfolio at once: the model only depends on strategy, complexity and archetype
+        run_costs = self.cost_model.run_costs(PortfolioCostTable(applications))
+        current_costs.update(run_costs["current"])
+        optimized_aws_costs = run_costs["aws_optimized"]
         
-        # Calculate savings
         total_current = sum(current_costs.values())
-        total_aws = sum(aws_costs.values())
-        
-        # Apply AWS cost optimizations
-        optimized_aws_costs = await self._apply_aws_optimizations(aws_costs)
         total_optimized_aws = sum(optimized_aws_costs.values())
         
         annual_savings = total_current - total_optimized_aws
@@ -322,35 +185,7 @@ class CostService:
     
     async def _estimate_current_costs(self, app: Dict) -> Dict[str, float]:
         """Estimate current on-premises costs for an application"""
-        
-        complexity = app.get("complexity", "medium").lower()
-        archetype = app.get("archetype", "").lower()
-        
-        # Base monthly costs (USD)
-        base_infrastructure = {
-            "low": 5000,
-            "medium": 12000,
-            "high": 25000,
-            "very_high": 45000
-        }
-        
-        monthly_costs = {
-            "infrastructure": base_infrastructure.get(complexity, 12000),
-            "maintenance": base_infrastructure.get(complexity, 12000) * 0.3,
-            "licenses": base_infrastructure.get(complexity, 12000) * 0.4,
-            "support": base_infrastructure.get(complexity, 12000) * 0.2,
-            "utilities": base_infrastructure.get(complexity, 12000) * 0.15
-        }
-        
-        # Apply archetype adjustments
-        if "microservices" in archetype:
-            monthly_costs["infrastructure"] *= 1.3  # More instances
-        elif "monolithic" in archetype:
-            monthly_costs["licenses"] *= 1.4  # Expensive enterprise licenses
-        
-        # Convert to annual
-        annual_costs = {k: v * 12 for k, v in monthly_costs.items()}
-        return annual_costs
+        return self.cost_model.run_costs(PortfolioCostTable([app]))["current"]
         
     async def export_cost_analysis(self, applications: List[Dict], format: str = "excel") -> Dict[str, Any]:
         """Export cost analysis to results folder structure"""
@@ -421,58 +256,7 @@ class CostService:
     
     async def _estimate_aws_costs(self, app: Dict) -> Dict[str, float]:
         """Estimate AWS costs for an application"""
-        
-        complexity = app.get("complexity", "medium").lower()
-        strategy = app.get("strategy", "rehost").lower()
-        archetype = app.get("archetype", "").lower()
-        
-        # Base monthly AWS costs by complexity
-        if strategy == "rehost":
-            # Lift and shift - similar resource requirements
-            compute_monthly = {
-                "low": self.aws_costs.ec2_small + self.aws_costs.rds_small,
-                "medium": self.aws_costs.ec2_medium + self.aws_costs.rds_medium,
-                "high": (self.aws_costs.ec2_large * 2) + self.aws_costs.rds_large,
-                "very_high": (self.aws_costs.ec2_xlarge * 3) + (self.aws_costs.rds_large * 2)
-            }
-        elif strategy == "replatform":
-            # Some optimization possible
-            compute_monthly = {
-                "low": self.aws_costs.ec2_small * 0.8 + self.aws_costs.rds_small,
-                "medium": self.aws_costs.ec2_medium * 0.9 + self.aws_costs.rds_medium,
-                "high": (self.aws_costs.ec2_large * 1.5) + self.aws_costs.rds_large,
-                "very_high": (self.aws_costs.ec2_xlarge * 2) + (self.aws_costs.rds_large * 1.5)
-            }
-        elif strategy == "refactor":
-            # Cloud-native, more efficient
-            compute_monthly = {
-                "low": self.aws_costs.ec2_small * 0.6,
-                "medium": self.aws_costs.ec2_medium * 0.7,
-                "high": self.aws_costs.ec2_large * 0.8,
-                "very_high": (self.aws_costs.ec2_xlarge * 1.2)
-            }
-        else:
-            compute_monthly = {"low": 0, "medium": 0, "high": 0, "very_high": 0}
-        
-        monthly_costs = {
-            "compute": compute_monthly.get(complexity, compute_monthly["medium"]),
-            "storage": 500 if complexity != "low" else 200,  # EBS + S3
-            "network": 300 if complexity == "high" else 150,  # Data transfer
-            "managed_services": 400 if strategy in ["replatform", "refactor"] else 100,
-            "support": 200  # AWS support
-        }
-        
-        # Apply archetype adjustments
-        if "microservices" in archetype:
-            monthly_costs["compute"] *= 1.2
-            monthly_costs["managed_services"] *= 1.5  # More managed services
-        elif "event-driven" in archetype:
-            monthly_costs["managed_services"] *= 1.3  # SQS, SNS, Lambda
-        
-        # Convert to annual
-        annual_costs = {k: v * 12 for k, v in monthly_costs.items()}
-        
-        return annual_costs
+        return self.cost_model.run_costs(PortfolioCostTable([app]))["aws"]
     
     async def _apply_aws_optimizations(self, aws_costs: Dict[str, float]) -> Dict[str, float]:
         """Apply AWS cost optimization strategies"""
@@ -533,35 +317,52 @@ class CostService:
             "currency": "USD"
         }
     
+    async def compare_scenarios(
+        self,
+        applications: List[Dict],
+        scenarios: Optional[List[Dict[str, Any]]] = None,
+        grid: Optional[Dict[str, List[Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Evaluate what-if scenarios over the portfolio in one pass.
+        
+        ``scenarios`` are CostScenario fields as dicts; ``grid`` maps
+        build_scenario_grid axes (approaches, strategy_mixes, contingency_rates,
+        ...) to the values to sweep. Returns one comparison row per scenario.
+        More scenarios in total than the cost engine's ``max_scenarios`` raise
+        ScenarioLimitError.
+        """
+        check_scenario_count(len(scenarios or []))
+        scenario_list = scenarios_from_dicts(scenarios or [])
+        if grid:
+            scenario_list.extend(build_scenario_grid(**grid))
+            check_scenario_count(len(scenario_list))
+        if not scenario_list:
+            scenario_list = build_scenario_grid()
+        
+        table = PortfolioCostTable(applications)
+        matrix = self.cost_model.compare(table, scenario_list)
+        comparison = matrix.to_dict(orient="records")
+        ranking = matrix["npv"].to_numpy().argsort(kind="stable")[::-1]
+        
+        return {
+            "applications": table.app_count,
+            "scenario_count": len(scenario_list),
+            "comparison": comparison,
+            "ranked_by_npv": [comparison[i]["scenario"] for i in ranking],
+            "best_scenario": comparison[ranking[0]],
+            "evaluation_seconds": round(matrix.attrs["evaluation_seconds"], 4),
+            "currency": "USD"
+        }
+    
     async def get_applications_for_cost_analysis(self, app_ids: List[str]) -> List[Dict]:
         """Get application data needed for cost analysis"""
-        # This would typically fetch from database
-        # For now, return mock data based on your application list
-        
-        applications = []
-        for app_id in app_ids:
-            if app_id == "all":
-                # Return all applications
-                applications.extend(await self._get_all_applications())
-            else:
-                app_data = await self._get_application_data(app_id)
-                if app_data:
-                    applications.append(app_data)
-        
-        return applications
+        return self.portfolio.get_applications(app_ids)
     
     async def _get_all_applications(self) -> List[Dict]:
         """Get all applications with their characteristics"""
-        # Mock data - in production, this would come from your data sources
-        return [
-            {"id": "ACDA", "name": "ATM Check Card Disputes API", "archetype": "Microservices", 
-             "strategy": "Replatform", "complexity": "Medium", "risk": "Medium"},
-            {"id": "ALE", "name": "Advisor Locator Engine", "archetype": "Web + API Headless", 
-             "strategy": "Rehost", "complexity": "Low", "risk": "Low"},
-            # Add more applications...
-        ]
+        return self.portfolio.all_applications()
     
     async def _get_application_data(self, app_id: str) -> Optional[Dict]:
         """Get specific application data"""
-        apps = await self._get_all_applications()
-        return next((app for app in apps if app["id"] == app_id), None)
\ No newline at end of file
+        return self.portfolio.get_application(app_id)
@@ -1,28 +1,87 @@
 """
 Draw.io to PDF Converter using Playwright
 High-quality PDF generation from Draw.io files
+
+Conversions share one browser and a warm pool of pages, each in its own
+browser context. Diagrams are loaded in memory with ``set_content`` and
+printed as soon as the viewer signals that rendering finished, so a
+portfolio of diagrams converts concurrently instead of one fixed wait at
+a time.
 """
 
 import asyncio
+import concurrent.futures
+import json
 import logging
-import tempfile
+import math
+import os
+import threading
 import time
+import uuid
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 logger = logging.getLogger(__name__)
 
+DRAWIO_PDF_CONFIG = {
+    "pool_size": int(os.getenv("DRAWIO_PDF_POOL_SIZE", "4")),
+    "render_timeout_ms": int(os.getenv("DRAWIO_PDF_RENDER_TIMEOUT_MS", "15000")),
+    # Longest a synchronous caller waits for one conversion (a batch gets this per pool round)
+    "sync_timeout_seconds": float(os.getenv("DRAWIO_PDF_SYNC_TIMEOUT_SECONDS", "120")),
+    "viewer_script_url": "https://viewer.diagrams.net/js/viewer-static.min.js"
+}
+
+PDF_OPTIONS = {
+    'format': 'A4',
+    'print_background': True,
+    'margin': {
+        'top': '0.5in',
+        'right': '0.5in',
+        'bottom': '0.5in',
+        'left': '0.5in'
+    },
+    'prefer_css_page_size': True
+}
+
 class DrawioPDFConverter:
     """Convert Draw.io files to PDF using headless browser"""
     
-    def __init__(self):
+    def __init__(self, pool_size: Optional[int] = None, render_timeout_ms: Optional[int] = None):
+        self.pool_size = max(1, pool_size or DRAWIO_PDF_CONFIG["pool_size"])
+        self.render_timeout_ms = render_timeout_ms or DRAWIO_PDF_CONFIG["render_timeout_ms"]
         self.playwright = None
         self.browser = None
         self._initialized = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock: Optional[asyncio.Lock] = None
+        # One slot per page the pool may hold; idle pages wait in the queue for reuse
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle_pages: Optional[asyncio.Queue] = None
+        self._page_count = 0
+        # The viewer script is fetched once and served from memory to every page
+        self._viewer_script: Optional[bytes] = None
+        self.stats = {"converted": 0, "failed": 0, "pages_created": 0, "pages_discarded": 0,
+                      "render_seconds": 0.0, "max_render_seconds": 0.0}
+    
+    def _bind_loop(self):
+        """Playwright objects belong to the event loop that created them"""
+        loop = asyncio.get_running_loop()
+        if self._loop is loop:
+            return
+        if self._loop is not None:
+            logger.warning("DrawIO PDF converter used from a new event loop; starting a fresh browser")
+        self._loop = loop
         self._lock = asyncio.Lock()
+        self._slots = asyncio.Semaphore(self.pool_size)
+        self._idle_pages = asyncio.Queue()
+        self._page_count = 0
+        self.playwright = None
+        self.browser = None
+        self._initialized = False
     
     async def initialize(self):
         """Initialize Playwright browser (thread-safe)"""
+        self._bind_loop()
         async with self._lock:
             if self._initialized:
                 return
@@ -51,74 +110,169 @@ class DrawioPDFConverter:
                 logger.error(f"Failed to initialize Playwright: {e}")
                 raise
     
-    async def convert_to_pdf_direct(self, drawio_file_path: str, output_pdf_path: str = None) -> Optional[str]:
-        """Convert Draw.io file directly to PDF using embedded viewer"""
+    # ------------------------------------------------------------ page pool
+    
+    async def _serve_viewer_script(self, route):
+        """Fetch the viewer script once, then fulfil every request from memory"""
+        if self._viewer_script is not None:
+            await route.fulfill(status=200, body=self._viewer_script,
+                                headers={"content-type": "application/javascript"})
+            return
+        response = await route.fetch()
+        if response.ok:
+            self._viewer_script = await response.body()
+        await route.fulfill(response=response)
+    
+    async def _new_page(self):
+        """A page in its own browser context, so conversions never share state"""
+        context = await self.browser.new_context(viewport={"width": 1200, "height": 900})
         try:
-            await self.initialize()
-            
-            drawio_path = Path(drawio_file_path)
-            if not drawio_path.exists():
-                raise FileNotFoundError(f"Draw.io file not found: {drawio_file_path}")
-            
-            if not output_pdf_path:
-                output_pdf_path = str(drawio_path.with_suffix('.pdf'))
-            
-            # Read the Draw.io content
-            drawio_content = drawio_path.read_text(encoding='utf-8')
-            
-            # Create HTML with embedded Draw.io viewer
-            html_content = self._create_viewer_html(drawio_content, drawio_path.stem)
+            await context.route(DRAWIO_PDF_CONFIG["viewer_script_url"], self._serve_viewer_script)
+            page = await context.new_page()
+        except Exception:
+            await context.close()
+            raise
+        self.stats["pages_created"] += 1
+        return page
+    
+    async def _acquire_page(self):
+        """Wait for a free slot, then reuse an idle page or open a new one"""
+        await self._slots.acquire()
+        try:
+            return self._idle_pages.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+        try:
+            page = await self._new_page()
+        except Exception:
+            self._slots.release()
+            raise
+        self._page_count += 1
+        return page
+    
+    async def _release_page(self, page, healthy: bool):
+        """Return a page to the pool; pages that failed are replaced rather than reused"""
+        try:
+            if healthy and not page.is_closed():
+                self._idle_pages.put_nowait(page)
+                return
+            self._page_count -= 1
+            self.stats["pages_discarded"] += 1
+            try:
+                await page.context.close()
+            except Exception as e:
+                logger.debug(f"Error closing discarded page: {e}")
+        finally:
+            self._slots.release()
+    
+    async def _convert(self, drawio_file_path: str, output_pdf_path: Optional[str] = None) -> Dict[str, Any]:
+        """Convert one file on a pooled page; raises on failure"""
+        drawio_path = Path(drawio_file_path)
+        if not drawio_path.exists():
+            raise FileNotFoundError(f"Draw.io file not found: {drawio_file_path}")
+        
+        await self.initialize()
+        
+        if not output_pdf_path:
+            output_pdf_path = str(drawio_path.with_suffix('.pdf'))
+        
+        # Read the Draw.io content and embed it with a token the page echoes back when rendered
+        drawio_content = drawio_path.read_text(encoding='utf-8')
+        render_token = uuid.uuid4().hex
+        html_content = self._create_viewer_html(drawio_content, drawio_path.stem, render_token)
+        
+        queued = time.perf_counter()
+        page = await self._acquire_page()
+        started = time.perf_counter()
+        healthy = False
+        try:
+            # Load in memory: no temp file, no file:// navigation
+            await page.set_content(html_content, wait_until="load", timeout=self.render_timeout_ms)
             
-            # Create temporary HTML file
-            with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False, encoding='utf-8') as temp_html:
-                temp_html.write(html_content)
-                temp_html_path = temp_html.name
+            # Wait for the render-complete signal instead of a fixed delay
+            handle = await page.wait_for_function(
+                "token => window.__drawioRender && window.__drawioRender.token === token",
+                arg=render_token, timeout=self.render_timeout_ms
+            )
+            await handle.dispose()
+            render_error = await page.evaluate("() => window.__drawioRender.error")
+            if render_error:
+                raise RuntimeError(f"Diagram failed to render: {render_error}")
             
-            try:
-                page = await self.browser.new_page()
-                
-                # Set a larger viewport for better diagram rendering
-                await page.set_viewport_size({"width": 1200, "height": 900})
-                
-                # Navigate to the HTML file
-                await page.goto(f'file://{Path(temp_html_path).absolute().as_uri()}')
-                
-                # Wait for diagram to render completely
-                await page.wait_for_timeout(5000)  # 5 seconds for complex diagrams
-                
-                # Wait for the viewer to be loaded
-                try:
-                    await page.wait_for_selector('#diagram-container', timeout=10000)
-                except:
-                    logger.warning("Diagram container not found, continuing anyway...")
-                
-                # Generate PDF with optimized settings
-                pdf_options = {
-                    'path': output_pdf_path,
-                    'format': 'A4',
-                    'print_background': True,
-                    'margin': {
-                        'top': '0.5in',
-                        'right': '0.5in',
-                        'bottom': '0.5in',
-                        'left': '0.5in'
-                    },
-                    'prefer_css_page_size': True
-                }
-                
-                await page.pdf(**pdf_options)
-                
-                logger.info(f"Successfully created PDF: {output_pdf_path}")
-                return output_pdf_path
-                
-            finally:
-                await page.close()
-                Path(temp_html_path).unlink(missing_ok=True)
-                
+            await page.pdf(path=output_pdf_path, **PDF_OPTIONS)
+            healthy = True
+        finally:
+            await self._release_page(page, healthy)
+        
+        elapsed = time.perf_counter() - started
+        self.stats["render_seconds"] += elapsed
+        self.stats["max_render_seconds"] = max(self.stats["max_render_seconds"], elapsed)
+        logger.info(f"Successfully created PDF: {output_pdf_path}")
+        return {
+            "pdf_path": output_pdf_path,
+            "wait_seconds": round(started - queued, 3),
+            "render_seconds": round(elapsed, 3)
+        }
+    
+    async def convert_to_pdf_direct(self, drawio_file_path: str, output_pdf_path: str = None) -> Optional[str]:
+        """Convert Draw.io file directly to PDF using embedded viewer"""
+        try:
+            result = await self._convert(drawio_file_path, output_pdf_path)
+            self.stats["converted"] += 1
+            return result["pdf_path"]
         except Exception as e:
+            self.stats["failed"] += 1
             logger.error(f"Error in direct PDF conversion: {e}")
             return None
     
+    async def convert_batch(self, drawio_file_paths: Iterable[str],
+                            output_dir: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Convert many Draw.io files concurrently on the page pool. Each file
+        reports its PDF path (or error), time waiting for a page and time
+        rendering; one failure does not stop the others.
+        """
+        paths = [str(p) for p in drawio_file_paths]
+        if output_dir:
+            Path(output_dir).mkdir(parents=True, exist_ok=True)
+        started = time.perf_counter()
+        
+        async def convert_one(path: str) -> Dict[str, Any]:
+            output = str(Path(output_dir) / f"{Path(path).stem}.pdf") if output_dir else None
+            file_started = time.perf_counter()
+            try:
+                result = await self._convert(path, output)
+                self.stats["converted"] += 1
+                return {"drawio_path": path, "success": True, **result,
+                        "seconds": round(time.perf_counter() - file_started, 3)}
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Batch PDF conversion failed for {path}: {e}")
+                return {"drawio_path": path, "success": False, "pdf_path": None, "error": str(e),
+                        "seconds": round(time.perf_counter() - file_started, 3)}
+        
+        results = await asyncio.gather(*(convert_one(path) for path in paths))
+        converted = sum(1 for r in results if r["success"])
+        return {
+            "results": results,
+            "total": len(results),
+            "converted": converted,
+            "failed": len(results) - converted,
+            "total_seconds": round(time.perf_counter() - started, 3),
+            "pool_size": self.pool_size
+        }
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        converted = self.stats["converted"]
+        return {
+            **self.stats,
+            "pool_size": self.pool_size,
+            "pages_open": self._page_count,
+            "pages_idle": self._idle_pages.qsize() if self._idle_pages else 0,
+            "avg_render_seconds": round(self.stats["render_seconds"] / converted, 3) if converted else 0.0,
+            "viewer_script_cached": self._viewer_script is not None
+        }
+    
     async def convert_to_pdf_web(self, drawio_file_path: str, output_pdf_path: str = None) -> Optional[str]:
         """Convert using draw.io web app (alternative method)"""
         try:
@@ -181,10 +335,10 @@ class DrawioPDFConverter:
             logger.error(f"Error in web-based PDF conversion: {e}")
             return None
     
-    def _create_viewer_html(self, drawio_content: str, diagram_name: str) -> str:
+    def _create_viewer_html(self, drawio_content: str, diagram_name: str, render_token: str = "") -> str:
         """Create HTML with embedded Draw.io viewer"""
-        # Escape the XML content for embedding in JavaScript
-        escaped_content = drawio_content.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n').replace('\r', '\\r')
+        # Embed the XML as a JSON string literal; "</" is escaped so the content cannot close the script tag
+        escaped_content = json.dumps(drawio_content).replace('</', '<\\/')
         
         return f"""
 <!DOCTYPE html>
@@ -263,11 +417,16 @@ class DrawioPDFConverter:
         <div class="loading">Loading diagram...</div>
     </div>
     
-    <script src="https://viewer.diagrams.net/js/viewer-static.min.js"></script>
+    <script src="{DRAWIO_PDF_CONFIG['viewer_script_url']}"></script>
     <script>
+        // Render-complete signal for the converter, tagged with this render's token
+        function signalRendered(error) {{
+            window.__drawioRender = {{ token: {json.dumps(render_token)}, error: error || null }};
+        }}
+        
         document.addEventListener('DOMContentLoaded', function() {{
             try {{
-                const diagramData = `{escaped_content}`;
+                const diagramData = {escaped_content};
                 const container = document.getElementById('diagram-container');
                 
                 // Clear loading message
@@ -284,20 +443,22 @@ class DrawioPDFConverter:
                 // Load the diagram
                 viewer.init();
                 
+                // Auto-fit the diagram
+                if (viewer.graph && viewer.graph.fit) {{
+                    viewer.graph.fit();
+                    viewer.graph.center();
+                }}
+                
                 console.log('Diagram viewer initialized successfully');
                 
-                // Optional: Auto-fit the diagram
-                setTimeout(() => {{
-                    if (viewer.graph && viewer.graph.fit) {{
-                        viewer.graph.fit();
-                        viewer.graph.center();
-                    }}
-                }}, 1000);
+                // Signal once the fitted diagram has been laid out and painted
+                requestAnimationFrame(() => requestAnimationFrame(() => signalRendered()));
                 
             }} catch (error) {{
                 console.error('Error loading diagram:', error);
                 document.getElementById('diagram-container').innerHTML = 
                     '<div class="loading" style="color: #e74c3c;">Error loading diagram: ' + error.message + '</div>';
+                signalRendered(error.message || String(error));
             }}
         }});
         
@@ -312,12 +473,21 @@ class DrawioPDFConverter:
     
     async def cleanup(self):
         """Clean up browser resources"""
+        if self._loop is not asyncio.get_running_loop():
+            # Nothing was started on this loop
+            return
         async with self._lock:
             try:
+                # Closing the browser closes every pooled context and page
+                while not self._idle_pages.empty():
+                    self._idle_pages.get_nowait()
+                self._page_count = 0
                 if self.browser:
                     await self.browser.close()
                 if self.playwright:
                     await self.playwright.stop()
+                self.browser = None
+                self.playwright = None
                 self._initialized = False
                 logger.info("DrawIO PDF converter cleaned up")
             except Exception as e:
@@ -339,7 +509,7 @@ async def convert_drawio_to_pdf_background(drawio_file_path: str, job_id: str):
             job_manager = None
         
         if job_manager:
-            job_manager.update_job(job_id, status="processing", progress=30, message="Converting Draw.io to PDF...")
+            await job_manager.update_job_async(job_id, status="processing", progress=30, message="Converting Draw.io to PDF...")
         
         # Try direct conversion first (usually better quality)
         output_pdf_path = await pdf_converter.convert_to_pdf_direct(drawio_file_path)
@@ -352,7 +522,7 @@ async def convert_drawio_to_pdf_background(drawio_file_path: str, job_id: str):
         if output_pdf_path and Path(output_pdf_path).exists():
             file_size = Path(output_pdf_path).stat().st_size
             if job_manager:
-                job_manager.update_job(
+                await job_manager.update_job_async(
                     job_id,
                     status="completed",
                     progress=100,
@@ -370,22 +540,66 @@ async def convert_drawio_to_pdf_background(drawio_file_path: str, job_id: str):
     except Exception as e:
         logger.error(f"Background PDF conversion failed: {e}")
         if job_manager:
-            job_manager.update_job(
+            await job_manager.update_job_async(
                 job_id,
                 status="error",
                 error=str(e),
                 message="PDF conversion failed"
             )
 
-# Utility function for synchronous usage (for testing)
+# Synchronous callers share one converter on a long-lived event loop thread,
+# so the browser and its page pool stay warm between calls
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_converter: Optional[DrawioPDFConverter] = None
+_sync_lock = threading.Lock()
+
+def _reset_sync_converter():
+    """
+    Forget the parent's loop after a fork: its thread does not exist in the
+    child, so waiting on it would block forever (e.g. in a ProcessPoolExecutor
+    worker). The child builds its own loop and browser on first use.
+    """
+    global _sync_loop, _sync_converter, _sync_lock
+    _sync_loop = None
+    _sync_converter = None
+    # The lock may have been held by another thread at the moment of the fork
+    _sync_lock = threading.Lock()
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_sync_converter)
+
+def _run_sync(operation, timeout: Optional[float] = None):
+    """Run ``operation(converter)`` on the synchronous converter's loop and wait up to ``timeout`` seconds"""
+    global _sync_loop, _sync_converter
+    with _sync_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(target=_sync_loop.run_forever, name="drawio-pdf", daemon=True).start()
+            _sync_converter = DrawioPDFConverter()
+    future = asyncio.run_coroutine_threadsafe(operation(_sync_converter), _sync_loop)
+    try:
+        return future.result(timeout or DRAWIO_PDF_CONFIG["sync_timeout_seconds"])
+    except concurrent.futures.TimeoutError:
+        # Cancels the coroutine on the loop so its page goes back to the pool
+        future.cancel()
+        raise
+
+# Utility functions for synchronous usage
 def convert_drawio_to_pdf_sync(drawio_file_path: str, output_pdf_path: str = None) -> Optional[str]:
-    """Synchronous wrapper for testing"""
-    async def _convert():
-        return await pdf_converter.convert_to_pdf_direct(drawio_file_path, output_pdf_path)
-    
-    return asyncio.run(_convert())
+    """Synchronous wrapper around convert_to_pdf_direct"""
+    return _run_sync(lambda converter: converter.convert_to_pdf_direct(drawio_file_path, output_pdf_path))
+
+def convert_drawio_batch_sync(drawio_file_paths: List[str], output_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Synchronous wrapper around convert_batch"""
+    drawio_file_paths = list(drawio_file_paths)
+    rounds = max(1, math.ceil(len(drawio_file_paths) / DRAWIO_PDF_CONFIG["pool_size"]))
+    return _run_sync(lambda converter: converter.convert_batch(drawio_file_paths, output_dir),
+                     timeout=rounds * DRAWIO_PDF_CONFIG["sync_timeout_seconds"])
 
 # Cleanup function for graceful shutdown
 async def cleanup_converter():
-    """Cleanup the global converter"""
-    await pdf_converter.cleanup()
\ No newline at end of file
+    """Cleanup the global converter and the synchronous one, if started"""
+    await pdf_converter.cleanup()
+    if _sync_loop is not None and _sync_loop.is_running():
+        future = asyncio.run_coroutine_threadsafe(_sync_converter.cleanup(), _sync_loop)
+        await asyncio.wrap_future(future)
\ No newline at end of file
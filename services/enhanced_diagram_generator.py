@@ -8,6 +8,7 @@ import json
 import uuid
 import logging
 import math
+import time
 import zipfile
 import re
 from typing import Dict, Any, List, Optional, Tuple
@@ -18,8 +19,14 @@ from xml.dom import minidom
 from dataclasses import dataclass
 from enum import Enum
 
+from .output_cache import make_cache_key, output_cache
+from .render_pool import render_pool
+
 logger = logging.getLogger(__name__)
 
+# Bump when renderer output changes so cached artifacts are not reused
+GENERATOR_VERSION = "2.0.0"
+
 class ProfessionalQualityLevel(Enum):
     EXECUTIVE = "executive"           # 98%+ quality for C-suite presentations
     PROFESSIONAL = "professional"    # 95%+ quality for business stakeholders  
@@ -365,6 +372,7 @@ class ProfessionalDiagramService:
         self.design_system = ProfessionalDesignSystem()
         self.layout_engine = ProfessionalLayoutEngine(self.design_system)
         self.active_jobs = {}
+        self._export_tasks = set()
         
         # Quality-specific configurations
         self.quality_configs = {
@@ -392,7 +400,8 @@ class ProfessionalDiagramService:
         }
     
     async def generate_professional_diagram(self, diagram_type: str, data: Dict[str, Any], 
-                                          quality_level: Optional[str] = None) -> Dict[str, Any]:
+                                          quality_level: Optional[str] = None,
+                                          wait_for_all_formats: bool = True) -> Dict[str, Any]:
         """Generate professional-grade diagram with executive presentation quality"""
         
         job_id = str(uuid.uuid4())
@@ -458,24 +467,22 @@ class ProfessionalDiagramService:
             # Phase 5: Multi-format professional export
             job["progress"] = 90
             job["current_phase"] = "Professional Export Generation"
-            outputs = await self._generate_professional_outputs(final_diagram, job_id, config)
+            first_ready = asyncio.Event()
+            export = asyncio.create_task(self._generate_professional_outputs(final_diagram, job_id, config, first_ready))
             
-            # Complete
-            job["status"] = "completed"
-            job["progress"] = 100
-            job["current_phase"] = "Complete"
-            job["completed_at"] = datetime.now()
+            if not wait_for_all_formats:
+                # Return once the first format is ready; the rest finish in the background
+                first_wait = asyncio.create_task(first_ready.wait())
+                await asyncio.wait({export, first_wait}, return_when=asyncio.FIRST_COMPLETED)
+                first_wait.cancel()
+                if not export.done():
+                    self._export_tasks.add(export)
+                    export.add_done_callback(lambda task: self._finish_background_export(job, task))
+                    return self._build_job_result(job, list(job["files"]))
             
-            return {
-                "success": True,
-                "job_id": job_id,
-                "quality_level": f"{self.quality_level.value.title()} Grade",
-                "quality_percentage": "98%" if self.quality_level == ProfessionalQualityLevel.EXECUTIVE else "95%",
-                "files": outputs,
-                "professional_features": job["professional_features"],
-                "executive_ready": self.quality_level == ProfessionalQualityLevel.EXECUTIVE,
-                "processing_time": (job["completed_at"] - job["started_at"]).total_seconds()
-            }
+            outputs = await export
+            self._complete_job(job)
+            return self._build_job_result(job, outputs)
             
         except Exception as e:
             job["status"] = "failed"
@@ -488,6 +495,37 @@ class ProfessionalDiagramService:
                 "error": str(e)
             }
     
+    def _complete_job(self, job: Dict[str, Any]):
+        job["status"] = "completed"
+        job["progress"] = 100
+        job["current_phase"] = "Complete"
+        job["completed_at"] = datetime.now()
+    
+    def _finish_background_export(self, job: Dict[str, Any], task: asyncio.Task):
+        """Mark a job finished once its background format renders are done"""
+        self._export_tasks.discard(task)
+        if task.cancelled() or task.exception() is not None:
+            job["status"] = "failed"
+            job["error"] = "Export cancelled" if task.cancelled() else str(task.exception())
+            job["completed_at"] = datetime.now()
+            logger.error(f"Professional export failed for job {job['job_id']}: {job['error']}")
+        else:
+            self._complete_job(job)
+    
+    def _build_job_result(self, job: Dict[str, Any], outputs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "success": True,
+            "job_id": job["job_id"],
+            "status": job["status"],
+            "quality_level": f"{self.quality_level.value.title()} Grade",
+            "quality_percentage": "98%" if self.quality_level == ProfessionalQualityLevel.EXECUTIVE else "95%",
+            "files": outputs,
+            "formats": job.get("formats", {}),
+            "professional_features": job["professional_features"],
+            "executive_ready": self.quality_level == ProfessionalQualityLevel.EXECUTIVE,
+            "processing_time": self._calculate_processing_time(job)
+        }
+    
     async def _enrich_data_professionally(self, data: Dict[str, Any]) -> Dict[str, Any]:
         """Enrich data with professional banking context and metadata"""
         
@@ -744,11 +782,10 @@ class ProfessionalDiagramService:
         
         return enhanced
     
-    async def _generate_professional_outputs(self, diagram: Dict[str, Any], job_id: str, config: Dict[str, Any]) -> List[Dict[str, Any]]:
+    async def _generate_professional_outputs(self, diagram: Dict[str, Any], job_id: str, config: Dict[str, Any],
+                                             first_ready: Optional[asyncio.Event] = None) -> List[Dict[str, Any]]:
         """Generate professional-grade outputs in your specified folder structure"""
         
-        outputs = []
-        
         # Create organized folder structure: results/{format}/
         base_dir = Path("results")
         # visio_dir = base_dir / "visio"
@@ -803,14 +840,91 @@ class ProfessionalDiagramService:
        # else:
        #     logger.error(f"Failed to create working VSDX file: {visio_file}")
 
-        # 2. Professional Lucid Chart XML
-        lucid_xml = await self._create_professional_lucid_xml(diagram, job_id, config)
-        lucid_file = lucid_dir / f"{app_id}.lucid"
+        renderers = [
+            ("lucid", "_render_lucid_output"),
+            ("document", "_render_word_output"),
+            ("excel", "_render_excel_output"),
+            ("pdf", "_render_pdf_output")
+        ]
+        
+        # Formats render concurrently in the render pool; the job records each
+        # format's status and timing as it finishes so callers can poll them
+        job = self.active_jobs.get(job_id, {})
+        job["files"] = []
+        job["formats"] = {output_format: {"status": "pending"} for output_format, _ in renderers}
+        
+        results = await asyncio.gather(*(
+            self._render_tracked(job, output_format, method_name, diagram, job_id, config, app_id, base_dir, first_ready)
+            for output_format, method_name in renderers
+        ))
+        outputs = [output for output in results if output is not None]
+        
+        # Create master index in results folder
+        await self._create_results_index(diagram, outputs, base_dir, app_id)
+        
+        return outputs
+    
+    async def _render_tracked(self, job: Dict[str, Any], output_format: str, method_name: str,
+                              diagram: Dict[str, Any], job_id: str, config: Dict[str, Any], app_id: str,
+                              base_dir: Path, first_ready: Optional[asyncio.Event] = None) -> Optional[Dict[str, Any]]:
+        """Render one format and record its status and timing on the job"""
+        
+        status = job["formats"][output_format]
+        status["status"] = "rendering"
+        started = time.perf_counter()
+        output = None
+        
+        try:
+            output = await self._cached_render(output_format, method_name, diagram, job_id, config, app_id, base_dir)
+            status["status"] = "completed" if output is not None else "failed"
+            status["cache_hit"] = bool(output and output.get("cache_hit"))
+        except asyncio.TimeoutError:
+            status["status"] = "timeout"
+            status["error"] = f"Rendering exceeded {render_pool.format_timeout}s"
+        except Exception as e:
+            logger.error(f"Error rendering {output_format} output: {e}")
+            status["status"] = "failed"
+            status["error"] = str(e)
+        
+        status["seconds"] = round(time.perf_counter() - started, 3)
+        if output is not None:
+            job["files"].append(output)
+        if first_ready is not None:
+            first_ready.set()
+        return output
+    
+    async def _cached_render(self, output_format: str, method_name: str, diagram: Dict[str, Any], job_id: str,
+                             config: Dict[str, Any], app_id: str, base_dir: Path) -> Optional[Dict[str, Any]]:
+        """Return the cached output for this diagram and format, rendering it only on a miss"""
+        
+        key = make_cache_key(
+            diagram, self.quality_level.value, output_format, GENERATOR_VERSION,
+            generator=__name__, app_id=app_id
+        )
+        
+        cached = await asyncio.to_thread(output_cache.get, key)
+        if cached is not None:
+            logger.info(f"Output cache hit for {app_id} ({output_format})")
+            return {**cached, "cache_hit": True}
         
+        output = await render_pool.render(
+            __name__, self.quality_level.value, output_format, method_name,
+            diagram, job_id, config, app_id, base_dir
+        )
+        if output is not None:
+            await asyncio.to_thread(output_cache.put, key, output)
+        return output
+    
+    async def _render_lucid_output(self, diagram: Dict[str, Any], job_id: str, config: Dict[str, Any], app_id: str, base_dir: Path) -> Dict[str, Any]:
+        """Professional Lucid Chart XML"""
+        
+        lucid_xml = await self._create_professional_lucid_xml(diagram, job_id, config)
+        lucid_file = base_dir / "lucid" / f"{app_id}.lucid"
+    
         with open(lucid_file, 'w', encoding='utf-8') as f:
             f.write(lucid_xml)
-        
-        outputs.append({
+    
+        return {
             "format": "lucid",
             "app_id": app_id,
             "filename": f"{app_id}.lucid",
@@ -828,16 +942,18 @@ class ProfessionalDiagramService:
             ],
             "target_audience": "Business Stakeholders",
             "collaboration_ready": True
-        })
+        }
+    
+    async def _render_word_output(self, diagram: Dict[str, Any], job_id: str, config: Dict[str, Any], app_id: str, base_dir: Path) -> Dict[str, Any]:
+        """Professional Word Document"""
         
-        # 3. Professional Word Document
         word_content = await self._create_professional_word_document(diagram, job_id, config)
-        word_file = document_dir / f"{app_id}.docx"
-        
+        word_file = base_dir / "document" / f"{app_id}.docx"
+    
         with open(word_file, 'w', encoding='utf-8') as f:
             f.write(word_content)
-        
-        outputs.append({
+    
+        return {
             "format": "document",
             "app_id": app_id,
             "filename": f"{app_id}.docx",
@@ -854,16 +970,18 @@ class ProfessionalDiagramService:
             ],
             "target_audience": "Business Documentation",
             "document_ready": True
-        })
+        }
+    
+    async def _render_excel_output(self, diagram: Dict[str, Any], job_id: str, config: Dict[str, Any], app_id: str, base_dir: Path) -> Dict[str, Any]:
+        """Professional Excel Spreadsheet"""
         
-        # 4. Professional Excel Spreadsheet
         excel_content = await self._create_professional_excel_document(diagram, job_id, config)
-        excel_file = excel_dir / f"{app_id}.xlsx"
-        
+        excel_file = base_dir / "excel" / f"{app_id}.xlsx"
+    
         with open(excel_file, 'w', encoding='utf-8') as f:
             f.write(excel_content)
-        
-        outputs.append({
+    
+        return {
             "format": "excel",
             "app_id": app_id,
             "filename": f"{app_id}.xlsx",
@@ -880,16 +998,18 @@ class ProfessionalDiagramService:
             ],
             "target_audience": "Operational Analysis",
             "analysis_ready": True
-        })
+        }
+    
+    async def _render_pdf_output(self, diagram: Dict[str, Any], job_id: str, config: Dict[str, Any], app_id: str, base_dir: Path) -> Dict[str, Any]:
+        """Executive PDF Report"""
         
-        # 5. Executive PDF Report
         pdf_content = await self._create_professional_pdf_report(diagram, job_id, config)
-        pdf_file = pdf_dir / f"{app_id}.pdf"
+        pdf_file = base_dir / "pdf" / f"{app_id}.pdf"
         
         with open(pdf_file, 'w', encoding='utf-8') as f:
             f.write(pdf_content)
-        
-        outputs.append({
+    
+        return {
             "format": "pdf",
             "app_id": app_id,
             "filename": f"{app_id}.pdf",
@@ -906,12 +1026,7 @@ class ProfessionalDiagramService:
             ],
             "target_audience": "Executive Presentations",
             "presentation_ready": True
-        })
-        
-        # Create master index in results folder
-        await self._create_results_index(diagram, outputs, base_dir, app_id)
-        
-        return outputs
+        }
     
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename for safe file system usage"""
@@ -1906,6 +2021,8 @@ startxref
             "started_at": job.get("started_at"),
             "completed_at": job.get("completed_at"),
             "processing_time": self._calculate_processing_time(job),
+            "formats": job.get("formats", {}),
+            "files": job.get("files", []),
             "error_message": job.get("error")
         }
     
@@ -1940,7 +2057,8 @@ class EnhancedDiagramService:
         logger.info("Enhanced Diagram Service initialized with professional-grade capabilities")
     
     async def generate_enhanced_diagram(self, diagram_type: str, data: Dict[str, Any], 
-                                      quality_level: str = "professional") -> Dict[str, Any]:
+                                      quality_level: str = "professional",
+                                      wait_for_all_formats: bool = True) -> Dict[str, Any]:
         """Generate enhanced diagram with specified quality level"""
         
         # Select appropriate service based on quality level
@@ -1956,7 +2074,8 @@ class EnhancedDiagramService:
         result = await service.generate_professional_diagram(
             diagram_type=diagram_type,
             data=data,
-            quality_level=quality_level
+            quality_level=quality_level,
+            wait_for_all_formats=wait_for_all_formats
         )
         
         # Add service-level metadata
@@ -1977,8 +2096,21 @@ class EnhancedDiagramService:
     
     async def generate_enhanced_diagram_by_format(self, diagram_type: str, data: Dict[str, Any], 
                                                  output_format: str = "both",
-                                                 quality_level: str = "professional") -> Dict[str, Any]:
-        """Generate enhanced diagram with specific format selection"""
+                                                 quality_level: str = "professional",
+                                                 wait_for_all_formats: bool = True) -> Dict[str, Any]:
+        """
+        Generate enhanced diagram with specific format selection. With
+        wait_for_all_formats=False the pool formats are rendered instead and the
+        call returns once the first is ready; get_job_status reports the rest.
+        """
+        
+        if not wait_for_all_formats:
+            result = await self.generate_enhanced_diagram(
+                diagram_type, data, quality_level=quality_level, wait_for_all_formats=False
+            )
+            if result.get("success"):
+                result.update({"output_format": output_format, "formats_generated": list(result.get("formats", {}))})
+            return result
         
         # Select appropriate service based on quality level
         if quality_level.lower() == "executive":
@@ -0,0 +1,284 @@
+"""
+Frontend log store
+Browser log entries posted by the dashboards are kept in a fixed-size ring
+buffer with per-session and per-level indexes, so memory stays bounded no
+matter how many dashboards are open and session/level lookups do not scan
+every entry. Accepted entries are also queued for disk and written as
+gzip-compressed JSONL segments by a background flusher thread every flush
+interval, and once more when the store is closed at shutdown.
+"""
+
+import gzip
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_LOG_STORE_CONFIG = {
+    "capacity": int(os.getenv("FRONTEND_LOG_CAPACITY", "50000")),
+    "max_sessions": int(os.getenv("FRONTEND_LOG_MAX_SESSIONS", "5000")),
+    "max_message_length": int(os.getenv("FRONTEND_LOG_MAX_MESSAGE_LENGTH", "4000")),
+    "flush_dir": os.getenv("FRONTEND_LOG_FLUSH_DIR", "logs/frontend"),
+    "flush_interval_seconds": float(os.getenv("FRONTEND_LOG_FLUSH_INTERVAL_SECONDS", "30")),
+    "flush_batch_size": int(os.getenv("FRONTEND_LOG_FLUSH_BATCH_SIZE", "1000")),
+    "max_segments": int(os.getenv("FRONTEND_LOG_MAX_SEGMENTS", "200"))
+}
+
+SEGMENT_PREFIX = "frontend_"
+SEGMENT_SUFFIX = ".jsonl.gz"
+
+
+class FrontendLogStore:
+    """Ring buffer of frontend log entries indexed by session and level"""
+
+    def __init__(self, capacity: Optional[int] = None, max_sessions: Optional[int] = None,
+                 flush_dir: Optional[str] = None, flush_interval: Optional[float] = None,
+                 flush_batch_size: Optional[int] = None):
+        config = FRONTEND_LOG_STORE_CONFIG
+        self.capacity = max(1, capacity or config["capacity"])
+        self.max_sessions = max(1, max_sessions or config["max_sessions"])
+        self.max_message_length = config["max_message_length"]
+        flush_dir = config["flush_dir"] if flush_dir is None else flush_dir
+        # An empty flush directory keeps the store memory-only
+        self.flush_dir = Path(flush_dir) if flush_dir else None
+        self.flush_interval = config["flush_interval_seconds"] if flush_interval is None else flush_interval
+        self.flush_batch_size = flush_batch_size or config["flush_batch_size"]
+        self.max_segments = config["max_segments"]
+
+        # Entry with sequence number s lives in slot s % capacity while s >= next_seq - capacity
+        self._slots: List[Optional[Dict[str, Any]]] = [None] * self.capacity
+        self._next_seq = 0
+        # Sequence numbers per session and level, oldest first, so eviction pops from the left
+        self._by_session: Dict[str, Deque[int]] = {}
+        self._by_level: Dict[str, Deque[int]] = {}
+        # Least recently seen session first
+        self._session_stats: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Entries not yet written to disk; bounded like the ring itself
+        self._pending: Deque[Dict[str, Any]] = deque(maxlen=self.capacity)
+        self._last_flush = time.monotonic()
+        self._flushing = False
+        self._lock = threading.Lock()
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"received": 0, "accepted": 0, "rejected": 0, "evicted": 0,
+                      "sessions_evicted": 0, "segments_written": 0, "flush_errors": 0, "unflushed_dropped": 0}
+
+    # ------------------------------------------------------------ ingestion
+
+    def add_batch(self, logs: Any, batch_id: str) -> Tuple[int, List[str]]:
+        """
+        Validate and store a batch in one pass. Returns the number of entries
+        accepted and one error message per rejected entry.
+        """
+        if not isinstance(logs, list):
+            return 0, ["Logs must be a list"]
+
+        processed_at = datetime.now().isoformat()
+        errors: List[str] = []
+        accepted = 0
+        with self._lock:
+            for log_entry in logs:
+                if not isinstance(log_entry, dict):
+                    errors.append("Log entry must be an object")
+                    continue
+                message = log_entry.get('message')
+                if not message:
+                    errors.append("Missing message field")
+                    continue
+                if isinstance(message, str) and len(message) > self.max_message_length:
+                    message = message[:self.max_message_length]
+
+                processed_log = {**log_entry, 'message': message, 'processed_at': processed_at, 'batch_id': batch_id}
+                self._append(processed_log, processed_at)
+                accepted += 1
+
+            self.stats["received"] += len(logs)
+            self.stats["accepted"] += accepted
+            self.stats["rejected"] += len(errors)
+        return accepted, errors
+
+    def _append(self, entry: Dict[str, Any], seen_at: str):
+        seq = self._next_seq
+        slot = seq % self.capacity
+        evicted = self._slots[slot]
+        if evicted is not None:
+            evicted_seq = seq - self.capacity
+            self._drop_index(self._by_session, str(evicted.get('session_id', 'unknown')), evicted_seq)
+            self._drop_index(self._by_level, str(evicted.get('level', 'INFO')).upper(), evicted_seq)
+            self.stats["evicted"] += 1
+
+        self._slots[slot] = entry
+        self._next_seq += 1
+
+        session_id = str(entry.get('session_id', 'unknown'))
+        level = str(entry.get('level', 'INFO')).upper()
+        self._by_session.setdefault(session_id, deque()).append(seq)
+        self._by_level.setdefault(level, deque()).append(seq)
+
+        session = self._session_stats.get(session_id)
+        if session is None:
+            session = self._session_stats[session_id] = {'log_count': 0, 'first_seen': seen_at, 'last_seen': seen_at}
+            if len(self._session_stats) > self.max_sessions:
+                self._evict_session()
+        else:
+            self._session_stats.move_to_end(session_id)
+        session['log_count'] += 1
+        session['last_seen'] = seen_at
+
+        # Memory-only stores never write segments, so nothing is queued for disk
+        if self.flush_dir is None:
+            return
+        if len(self._pending) == self._pending.maxlen:
+            self.stats["unflushed_dropped"] += 1
+        self._pending.append(entry)
+
+    @staticmethod
+    def _drop_index(index: Dict[str, Deque[int]], key: str, seq: int):
+        # The evicted entry is the oldest one in its session/level, unless that index was reset since
+        seqs = index.get(key)
+        if seqs and seqs[0] == seq:
+            seqs.popleft()
+            if not seqs:
+                del index[key]
+
+    def _evict_session(self):
+        """Forget the least recently seen session; its entries stay in the ring until overwritten"""
+        session_id, _ = self._session_stats.popitem(last=False)
+        self._by_session.pop(session_id, None)
+        self.stats["sessions_evicted"] += 1
+
+    # ------------------------------------------------------------ queries
+
+    def _entries(self, seqs, limit: Optional[int]) -> List[Dict[str, Any]]:
+        if limit is None:
+            selected = list(seqs)
+        else:
+            # Newest ``limit`` only, read from the right end of the index
+            selected = list(itertools.islice(reversed(seqs), max(limit, 0)))[::-1]
+        return [self._slots[seq % self.capacity] for seq in selected]
+
+    def session_logs(self, session_id: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Buffered entries of one session, oldest first (the newest ``limit`` if given)"""
+        with self._lock:
+            return self._entries(self._by_session.get(session_id, ()), limit)
+
+    def level_logs(self, level: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Buffered entries at one level, oldest first (the newest ``limit`` if given)"""
+        with self._lock:
+            return self._entries(self._by_level.get(level.upper(), ()), limit)
+
+    def recent(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent buffered entries, oldest first"""
+        with self._lock:
+            first = max(self._next_seq - self.capacity, self._next_seq - max(limit, 0), 0)
+            return self._entries(range(first, self._next_seq), None)
+
+    def session_stats(self, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Counters of one session, or of every tracked session"""
+        with self._lock:
+            if session_id is not None:
+                return dict(self._session_stats.get(session_id, {}))
+            return {sid: dict(stats) for sid, stats in self._session_stats.items()}
+
+    def __len__(self) -> int:
+        return min(self._next_seq, self.capacity)
+
+    @property
+    def session_count(self) -> int:
+        return len(self._session_stats)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                **self.stats,
+                "buffered": len(self),
+                "capacity": self.capacity,
+                "active_sessions": len(self._session_stats),
+                "max_sessions": self.max_sessions,
+                "levels": {level: len(seqs) for level, seqs in self._by_level.items()},
+                "pending_flush": len(self._pending),
+                "flush_dir": str(self.flush_dir) if self.flush_dir else None
+            }
+
+    # ------------------------------------------------------------ disk segments
+
+    def flush_due(self) -> bool:
+        """Whether enough entries or time have accumulated for a segment"""
+        if self.flush_dir is None or self._flushing or not self._pending:
+            return False
+        return (len(self._pending) >= self.flush_batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval)
+
+    def flush(self) -> Optional[Path]:
+        """Write pending entries as one compressed JSONL segment; safe to call from a worker thread"""
+        if self.flush_dir is None:
+            return None
+        with self._lock:
+            if self._flushing or not self._pending:
+                return None
+            self._flushing = True
+            batch = list(self._pending)
+            self._pending.clear()
+            first_seq = self._next_seq - len(batch)
+            self._last_flush = time.monotonic()
+
+        try:
+            self.flush_dir.mkdir(parents=True, exist_ok=True)
+            name = f"{SEGMENT_PREFIX}{datetime.now().strftime('%Y%m%d_%H%M%S')}_{first_seq:012d}{SEGMENT_SUFFIX}"
+            path = self.flush_dir / name
+            tmp_path = path.with_name(name + ".tmp")
+            with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+                f.writelines(json.dumps(entry, default=str) + "\n" for entry in batch)
+            os.replace(tmp_path, path)
+            self.stats["segments_written"] += 1
+            self._prune_segments()
+            return path
+        except Exception as e:
+            self.stats["flush_errors"] += 1
+            logger.error(f"Failed to write frontend log segment ({len(batch)} entries): {e}")
+            return None
+        finally:
+            self._flushing = False
+
+    def start_flusher(self):
+        """Start the timed flush thread once; memory-only stores and a zero interval leave flushing to callers"""
+        if self.flush_dir is None or self.flush_interval <= 0 or self._flusher is not None:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="frontend-log-flusher", daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        # Pending entries reach disk within one interval even when no new batch arrives
+        while not self._stop.wait(self.flush_interval):
+            if self.flush_due():
+                self.flush()
+
+    def close(self) -> Optional[Path]:
+        """Stop the flusher and write whatever is still pending"""
+        self._stop.set()
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            flusher.join(timeout=10)
+        return self.flush()
+
+    def _prune_segments(self):
+        segments = sorted(self.flush_dir.glob(f"{SEGMENT_PREFIX}*{SEGMENT_SUFFIX}"))
+        for old in segments[:max(0, len(segments) - self.max_segments)]:
+            old.unlink(missing_ok=True)
+
+
+# Shared store for the frontend logging router
+frontend_log_store = FrontendLogStore()
@@ -0,0 +1,365 @@
+"""
+Shared job registry
+One SQLite-backed store for the background jobs started by main.py and the
+routers (Excel processing, archetype diagrams, enhanced diagrams). Jobs survive
+restarts and are visible to every uvicorn worker using the same database file,
+so status polling can hit any worker. Large result payloads are written to disk
+next to the database, and jobs expire after a TTL measured from their last update.
+The database is opened on first use, and async handlers go through the
+``*_async`` methods so a write waiting on another worker's lock never blocks
+the event loop.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+JOB_REGISTRY_CONFIG = {
+    "db_path": os.getenv("JOB_REGISTRY_PATH", "data_staging/job_registry.sqlite"),
+    "payload_dir": os.getenv("JOB_REGISTRY_PAYLOAD_DIR", "results/jobs"),
+    "ttl_hours": float(os.getenv("JOB_REGISTRY_TTL_HOURS", "24")),
+    "max_jobs": int(os.getenv("JOB_REGISTRY_MAX_JOBS", "5000")),
+    "inline_result_bytes": 64 * 1024,
+    "cleanup_interval_seconds": 60
+}
+
+ACTIVE_STATUSES = ("created", "queued", "processing")
+
+
+class JobRegistry:
+    """
+    SQLite-backed job store with TTL eviction and on-disk result payloads.
+
+    A job is a JSON document keyed by ``job_id``; ``job_type`` and ``status``
+    are also kept in indexed columns for filtered listing and counting. A
+    ``result`` larger than ``inline_result_bytes`` is written to
+    ``payload_dir`` and loaded back only when the job is read with results.
+    """
+
+    def __init__(self, db_path: str = ':memory:', payload_dir: str = "results/jobs",
+                 ttl_hours: Optional[float] = 24, max_jobs: Optional[int] = None,
+                 inline_result_bytes: int = 64 * 1024, cleanup_interval_seconds: float = 60):
+        self.db_path = db_path
+        self.payload_dir = Path(payload_dir)
+        self.ttl_seconds = ttl_hours * 3600 if ttl_hours else None
+        self.max_jobs = max_jobs
+        self.inline_result_bytes = inline_result_bytes
+        self.cleanup_interval_seconds = cleanup_interval_seconds
+        self._last_cleanup = 0.0
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The database connection, opened on first use (callers hold the lock)"""
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+
+    def _open(self) -> sqlite3.Connection:
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; writes use explicit BEGIN IMMEDIATE so concurrent
+        # workers serialise their read-modify-write cycles
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                job_type TEXT,
+                status TEXT,
+                data TEXT NOT NULL,
+                result_path TEXT,
+                created_epoch REAL NOT NULL,
+                updated_epoch REAL NOT NULL,
+                expires_epoch REAL
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_type_status ON jobs(job_type, status)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_expires ON jobs(expires_epoch)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_epoch)')
+        return conn
+
+    # ------------------------------------------------------------------ writes
+    def create_job(self, job_type: str, job_id: Optional[str] = None, **fields) -> str:
+        """Register a new job and return its id"""
+        if job_id is None:
+            job_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        self.put_job(job_id, {
+            "job_id": job_id,
+            "job_type": job_type,
+            "status": "created",
+            "created_at": now,
+            "progress": 0,
+            "message": "Job created",
+            **fields
+        })
+        return job_id
+
+    def put_job(self, job_id: str, job: Dict[str, Any]):
+        """Insert or replace a whole job document"""
+        job = {**job, "job_id": job_id}
+        job.setdefault("created_at", datetime.now().isoformat())
+        job["updated_at"] = datetime.now().isoformat()
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT created_epoch, result_path FROM jobs WHERE job_id = ?', (job_id,)
+                ).fetchone()
+                created_epoch = row[0] if row else now
+                self._write(job_id, job, row[1] if row else None, created_epoch, now)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        self._maybe_cleanup()
+
+    def update_job(self, job_id: str, **updates) -> bool:
+        """Merge updates into an existing job; returns False if the job is unknown"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                row = self._conn.execute(
+                    'SELECT data, result_path, created_epoch FROM jobs WHERE job_id = ?', (job_id,)
+                ).fetchone()
+                if row is None:
+                    self._conn.execute('ROLLBACK')
+                    return False
+                job = json.loads(row[0])
+                job.update(updates)
+                job["updated_at"] = datetime.now().isoformat()
+                self._write(job_id, job, row[1], row[2], now, result_updated="result" in updates)
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        self._maybe_cleanup()
+        return True
+
+    def _write(self, job_id: str, job: Dict[str, Any], result_path: Optional[str],
+               created_epoch: float, now: float, result_updated: bool = True):
+        """Store the job row, spilling a large result to disk (caller holds the transaction)"""
+        if result_updated:
+            had_result = "result" in job
+            result = job.pop("result", None)
+            job.pop("result_spilled", None)
+            payload = json.dumps(result, default=str) if result is not None else None
+
+            if payload is not None and len(payload) > self.inline_result_bytes:
+                self.payload_dir.mkdir(parents=True, exist_ok=True)
+                path = self.payload_dir / f"{job_id}.result.json"
+                tmp_path = path.with_suffix('.tmp')
+                tmp_path.write_text(payload)
+                tmp_path.replace(path)
+                result_path = str(path)
+                job["result"] = None
+                job["result_spilled"] = True
+            else:
+                self._remove_payload(result_path)
+                result_path = None
+                if had_result:
+                    job["result"] = result
+
+        expires = now + self.ttl_seconds if self.ttl_seconds else None
+        self._conn.execute(
+            'INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            (job_id, job.get("job_type"), job.get("status"), json.dumps(job, default=str),
+             result_path, created_epoch, now, expires)
+        )
+
+    def delete_job(self, job_id: str) -> bool:
+        with self._lock:
+            row = self._conn.execute('SELECT result_path FROM jobs WHERE job_id = ?', (job_id,)).fetchone()
+            if row is None:
+                return False
+            self._conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+        self._remove_payload(row[0])
+        logger.info(f"Deleted job {job_id}")
+        return True
+
+    # ------------------------------------------------------------------- reads
+    def get_job(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data, result_path, expires_epoch FROM jobs WHERE job_id = ?', (job_id,)
+            ).fetchone()
+        if row is None or (row[2] is not None and row[2] < time.time()):
+            return None
+        return self._row_to_job(row[0], row[1], include_result)
+
+    def __contains__(self, job_id: str) -> bool:
+        return self.get_job(job_id, include_result=False) is not None
+
+    def list_jobs(self, status: Union[str, Iterable[str], None] = None,
+                  job_type: Union[str, Iterable[str], None] = None,
+                  limit: Optional[int] = None, include_result: bool = False) -> List[Dict[str, Any]]:
+        """Unexpired jobs, newest first, filtered through the status/type indexes"""
+        where, params = self._filters(status, job_type)
+        sql = f'SELECT data, result_path FROM jobs WHERE {where} ORDER BY created_epoch DESC'
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [self._row_to_job(data, path, include_result) for data, path in rows]
+
+    def count_jobs(self, status: Union[str, Iterable[str], None] = None,
+                   job_type: Union[str, Iterable[str], None] = None) -> int:
+        where, params = self._filters(status, job_type)
+        with self._lock:
+            return self._conn.execute(f'SELECT COUNT(*) FROM jobs WHERE {where}', params).fetchone()[0]
+
+    def _filters(self, status, job_type) -> tuple:
+        clauses = ['(expires_epoch IS NULL OR expires_epoch >= ?)']
+        params: List[Any] = [time.time()]
+        for column, value in (("status", status), ("job_type", job_type)):
+            if value is None:
+                continue
+            values = [value] if isinstance(value, str) else list(value)
+            clauses.append(f"{column} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        return ' AND '.join(clauses), params
+
+    def _row_to_job(self, data: str, result_path: Optional[str], include_result: bool) -> Dict[str, Any]:
+        job = json.loads(data)
+        if result_path:
+            job["result_path"] = result_path
+            if include_result:
+                try:
+                    job["result"] = json.loads(Path(result_path).read_text())
+                except (OSError, ValueError) as e:
+                    logger.warning(f"Could not load result payload {result_path}: {e}")
+        return job
+
+    # ---------------------------------------------------------------- eviction
+    def cleanup_expired(self, now: Optional[float] = None) -> int:
+        """Drop expired jobs, then the oldest finished jobs beyond max_jobs"""
+        now = now or time.time()
+        if self._connection is None and self.db_path != ':memory:' and not Path(self.db_path).exists():
+            # Nothing stored yet; do not create the database just to clean it
+            return 0
+        with self._lock:
+            expired = self._conn.execute(
+                'SELECT job_id, result_path FROM jobs WHERE expires_epoch < ?', (now,)
+            ).fetchall()
+            if self.max_jobs:
+                total = self._conn.execute('SELECT COUNT(*) FROM jobs').fetchone()[0] - len(expired)
+                if total > self.max_jobs:
+                    placeholders = ','.join('?' * len(ACTIVE_STATUSES))
+                    expired += self._conn.execute(
+                        f'SELECT job_id, result_path FROM jobs WHERE expires_epoch >= ? '
+                        f'AND status NOT IN ({placeholders}) ORDER BY updated_epoch LIMIT ?',
+                        (now, *ACTIVE_STATUSES, total - self.max_jobs)
+                    ).fetchall()
+            if expired:
+                self._conn.executemany('DELETE FROM jobs WHERE job_id = ?', [(job_id,) for job_id, _ in expired])
+            self._last_cleanup = now
+
+        for _, result_path in expired:
+            self._remove_payload(result_path)
+        if expired:
+            logger.info(f"Cleaned up {len(expired)} old jobs")
+        return len(expired)
+
+    def _maybe_cleanup(self):
+        if time.time() - self._last_cleanup >= self.cleanup_interval_seconds:
+            try:
+                self.cleanup_expired()
+            except sqlite3.OperationalError as e:
+                # Another worker holds the write lock; try again on a later write
+                logger.debug(f"Job cleanup skipped: {e}")
+
+    @staticmethod
+    def _remove_payload(result_path: Optional[str]):
+        if result_path:
+            try:
+                Path(result_path).unlink()
+            except OSError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_type, status, COUNT(*) FROM jobs WHERE expires_epoch IS NULL OR expires_epoch >= ? '
+                'GROUP BY job_type, status', (time.time(),)
+            ).fetchall()
+        by_status: Dict[str, int] = {}
+        by_type: Dict[str, int] = {}
+        for job_type, status, count in rows:
+            by_status[status] = by_status.get(status, 0) + count
+            by_type[job_type or "unknown"] = by_type.get(job_type or "unknown", 0) + count
+        return {
+            "total_jobs": sum(by_status.values()),
+            "by_status": by_status,
+            "by_type": by_type,
+            "db_path": self.db_path,
+            "ttl_hours": self.ttl_seconds / 3600 if self.ttl_seconds else None,
+            "max_jobs": self.max_jobs
+        }
+
+    # ------------------------------------------------------------ async access
+    # Writes can wait up to the 30 s busy timeout for another worker, and reads
+    # share the lock with them, so async code runs every call in a thread
+    async def create_job_async(self, job_type: str, job_id: Optional[str] = None, **fields) -> str:
+        return await asyncio.to_thread(self.create_job, job_type, job_id, **fields)
+
+    async def put_job_async(self, job_id: str, job: Dict[str, Any]):
+        await asyncio.to_thread(self.put_job, job_id, job)
+
+    async def update_job_async(self, job_id: str, **updates) -> bool:
+        return await asyncio.to_thread(self.update_job, job_id, **updates)
+
+    async def delete_job_async(self, job_id: str) -> bool:
+        return await asyncio.to_thread(self.delete_job, job_id)
+
+    async def get_job_async(self, job_id: str, include_result: bool = True) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get_job, job_id, include_result)
+
+    async def list_jobs_async(self, status: Union[str, Iterable[str], None] = None,
+                              job_type: Union[str, Iterable[str], None] = None,
+                              limit: Optional[int] = None, include_result: bool = False) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.list_jobs, status, job_type, limit, include_result)
+
+    async def count_jobs_async(self, status: Union[str, Iterable[str], None] = None,
+                               job_type: Union[str, Iterable[str], None] = None) -> int:
+        return await asyncio.to_thread(self.count_jobs, status, job_type)
+
+    async def cleanup_expired_async(self, now: Optional[float] = None) -> int:
+        return await asyncio.to_thread(self.cleanup_expired, now)
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_stats)
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Shared registry for main.py and the routers
+job_registry = JobRegistry(
+    db_path=JOB_REGISTRY_CONFIG["db_path"],
+    payload_dir=JOB_REGISTRY_CONFIG["payload_dir"],
+    ttl_hours=JOB_REGISTRY_CONFIG["ttl_hours"],
+    max_jobs=JOB_REGISTRY_CONFIG["max_jobs"],
+    inline_result_bytes=JOB_REGISTRY_CONFIG["inline_result_bytes"],
+    cleanup_interval_seconds=JOB_REGISTRY_CONFIG["cleanup_interval_seconds"]
+)
@@ -8,7 +8,7 @@ from pathlib import Path
 from fastapi import UploadFile
 from models.topology_models import (
     LogSource, AnalysisProgress, AnalysisStatus,
-    TopologyNode, TopologyEdge, NetworkTopology
+    TopologyNode, TopologyEdge, NetworkTopology, NodeType
 )
 from utils.file_utils import FileUtils
 from utils.network_utils import NetworkUtils
@@ -225,10 +225,10 @@ class LogAnalysisService:
         
         # Create topology nodes
         nodes = []
-        for ip in unique_ips:
-            # Determine node type based on IP patterns or application data
-            node_type = self.network_utils.determine_node_type_from_ip(ip)
-            
+        # Determine node types based on IP patterns, all addresses in one pass
+        unique_ips = list(unique_ips)
+        node_types = self.network_utils.classify_ips(unique_ips)["node_type"].tolist()
+        for ip, node_type in zip(unique_ips, node_types):
             # Extract services for this node
             services = list(set([
                 conn["application"] for conn in connections 
@@ -238,7 +238,7 @@ class LogAnalysisService:
             node = TopologyNode(
                 id=str(uuid.uuid4()),
                 ip_address=ip,
-                node_type=node_type,
+                node_type=NodeType(node_type),
                 services=services,
                 discovered_at=datetime.now()
             )
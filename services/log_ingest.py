@@ -0,0 +1,455 @@
+"""
+Log ingestion
+Uploaded log files are streamed to disk in fixed-size chunks with a running
+SHA-256 (multipart request bodies are push-parsed as they arrive, so nothing
+is spooled first), then parsed line by line into the normalized flow CSV layout used in
+data_staging (application, source_ip, destination_ip, port, protocol, bytes...).
+Parsing reads and writes one chunk of lines at a time, so memory stays bounded
+for multi-gigabyte uploads, and reports progress after every chunk.
+
+Recognised lines, with or without an RFC 3164 / RFC 5424 syslog header:
+- key=value firewall records (iptables SRC=/DST=, FortiGate srcip=/dstip=,
+  Juniper SRX source-address=/destination-address= and similar)
+- Cisco ASA/FTD "Built inbound|outbound TCP|UDP connection" events
+"""
+
+import csv
+import gzip
+import hashlib
+import logging
+import os
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart before 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+logger = logging.getLogger(__name__)
+
+LOG_INGEST_CONFIG = {
+    "upload_dir": os.getenv("LOG_INGEST_UPLOAD_DIR", "data_staging/uploads"),
+    "output_dir": os.getenv("LOG_INGEST_OUTPUT_DIR", "data_staging/log_flows"),
+    "max_upload_bytes": int(os.getenv("LOG_INGEST_MAX_UPLOAD_BYTES", str(20 * 1024 ** 3))),
+    "upload_chunk_bytes": int(os.getenv("LOG_INGEST_UPLOAD_CHUNK_BYTES", str(1024 * 1024))),
+    "parse_chunk_lines": int(os.getenv("LOG_INGEST_PARSE_CHUNK_LINES", "50000")),
+    # Distinct addresses remembered for the job summary; counting stops growing past this
+    "max_tracked_addresses": int(os.getenv("LOG_INGEST_MAX_TRACKED_ADDRESSES", "1000000"))
+}
+
+PARSEABLE_SOURCE_TYPES = ("firewall", "syslog")
+
+# Same column order as the *_normalized_*.csv files in data_staging
+NORMALIZED_FLOW_COLUMNS = ["application", "source_ip", "source_hostname", "destination_ip",
+                           "destination_hostname", "port", "protocol", "bytes_in", "bytes_out",
+                           "timestamp", "behavior", "info", "archetype"]
+
+
+class UploadTooLarge(ValueError):
+    """An upload grew past the configured size limit while streaming"""
+
+
+def store_upload(source: BinaryIO, destination: Path, max_bytes: Optional[int] = None,
+                 chunk_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Copy a file object to ``destination`` chunk by chunk, hashing as it goes.
+
+    The data is written to a ``.part`` file that is renamed on success and
+    removed on failure. Raises ``UploadTooLarge`` once more than ``max_bytes``
+    have been read.
+    """
+    max_bytes = LOG_INGEST_CONFIG["max_upload_bytes"] if max_bytes is None else max_bytes
+    chunk_size = chunk_size or LOG_INGEST_CONFIG["upload_chunk_bytes"]
+    destination = Path(destination)
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    partial = destination.with_name(destination.name + ".part")
+
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(partial, "wb") as out:
+            while True:
+                chunk = source.read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes and size > max_bytes:
+                    raise UploadTooLarge(f"{destination.name} exceeds the {max_bytes} byte upload limit")
+                digest.update(chunk)
+                out.write(chunk)
+        os.replace(partial, destination)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    return {"path": str(destination), "size": size, "sha256": digest.hexdigest()}
+
+
+def safe_filename(filename: Optional[str], fallback: str = "upload.log") -> str:
+    """Base name of a client-supplied filename, limited to safe characters"""
+    name = re.sub(r"[^\w.-]", "_", Path(filename or "").name).lstrip(".")
+    return name or fallback
+
+
+class MultipartUploadWriter:
+    """
+    Push parser for a multipart/form-data body that writes every file part
+    straight to ``upload_dir`` as its bytes arrive.
+
+    Each file is stored like ``store_upload`` does: a ``.part`` file renamed
+    on success, a running SHA-256 and ``UploadTooLarge`` as soon as one file
+    passes ``max_bytes``. Feed body chunks in order with ``write`` and call
+    ``finish`` at the end; ``abort`` removes everything written. Parts
+    without a filename (plain form fields) are ignored. Raises ValueError
+    for a body that is not multipart/form-data.
+    """
+
+    def __init__(self, content_type: str, upload_dir: Path, max_bytes: Optional[int] = None):
+        media_type, options = parse_options_header(content_type or "")
+        boundary = options.get(b"boundary")
+        if media_type != b"multipart/form-data" or not boundary:
+            raise ValueError("Expected a multipart/form-data body with a boundary")
+
+        self.upload_dir = Path(upload_dir)
+        self.max_bytes = LOG_INGEST_CONFIG["max_upload_bytes"] if max_bytes is None else max_bytes
+        self.files: List[Dict[str, Any]] = []
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+        self._part: Optional[Dict[str, Any]] = None
+        self._finished = False
+        self._parser = MultipartParser(boundary, {
+            "on_part_begin": self._on_part_begin,
+            "on_header_field": self._on_header_field,
+            "on_header_value": self._on_header_value,
+            "on_header_end": self._on_header_end,
+            "on_headers_finished": self._on_headers_finished,
+            "on_part_data": self._on_part_data,
+            "on_part_end": self._on_part_end,
+            "on_end": self._on_end,
+        })
+
+    def write(self, data: bytes):
+        self._parser.write(data)
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """Stored files in upload order; raises ValueError if the body ended early"""
+        self._parser.finalize()
+        if not self._finished:
+            raise ValueError("Multipart body ended before its closing boundary")
+        return self.files
+
+    def abort(self):
+        part, self._part = self._part, None
+        if part is not None:
+            part["out"].close()
+            part["partial"].unlink(missing_ok=True)
+        for stored in self.files:
+            Path(stored["path"]).unlink(missing_ok=True)
+        try:
+            self.upload_dir.rmdir()
+        except OSError:
+            pass
+
+    # ------------------------------------------------------------ parser callbacks
+
+    def _on_part_begin(self):
+        self._headers = {}
+
+    def _on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def _on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def _on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = self._header_value = b""
+
+    def _on_headers_finished(self):
+        _, disposition = parse_options_header(self._headers.get(b"content-disposition", b""))
+        filename = disposition.get(b"filename")
+        if filename is None:
+            return
+        filename = filename.decode("utf-8", "replace")
+        destination = self.upload_dir / f"{len(self.files):03d}_{safe_filename(filename)}"
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        partial = destination.with_name(destination.name + ".part")
+        self._part = {
+            "filename": filename,
+            "content_type": self._headers.get(b"content-type", b"").decode("latin-1") or None,
+            "destination": destination,
+            "partial": partial,
+            "out": open(partial, "wb"),
+            "digest": hashlib.sha256(),
+            "size": 0,
+        }
+
+    def _on_part_data(self, data: bytes, start: int, end: int):
+        part = self._part
+        if part is None:
+            return
+        part["size"] += end - start
+        if self.max_bytes and part["size"] > self.max_bytes:
+            raise UploadTooLarge(f"{part['destination'].name} exceeds the {self.max_bytes} byte upload limit")
+        chunk = data[start:end]
+        part["digest"].update(chunk)
+        part["out"].write(chunk)
+
+    def _on_part_end(self):
+        part, self._part = self._part, None
+        if part is None:
+            return
+        part["out"].close()
+        os.replace(part["partial"], part["destination"])
+        self.files.append({
+            "filename": part["filename"],
+            "content_type": part["content_type"],
+            "path": str(part["destination"]),
+            "size": part["size"],
+            "sha256": part["digest"].hexdigest()
+        })
+
+    def _on_end(self):
+        self._finished = True
+
+
+# ---------------------------------------------------------------- parsing
+
+_SYSLOG_HEADERS = (
+    # RFC 5424 / ISO timestamps: "<134>1 2024-01-15T10:00:00Z host app - - - msg"
+    re.compile(r"^(?:<\d{1,3}>)?(?:1 )?(\d{4}-\d{2}-\d{2}[T ][\d:.]+(?:Z|[+-]\d{2}:?\d{2})?)\s+(\S+)\s+(.*)$"),
+    # RFC 3164: "<134>Jan 15 10:00:00 host prog[123]: msg"
+    re.compile(r"^(?:<\d{1,3}>)?([A-Z][a-z]{2} [ \d]\d \d{2}:\d{2}:\d{2})\s+(\S+)\s+(.*)$"),
+)
+_KEY_VALUE = re.compile(r'([A-Za-z][\w.-]*)=("[^"]*"|\S*)')
+_ASA_BUILT = re.compile(
+    r"%(?:ASA|FTD)-\d-30201[35]: Built (inbound|outbound) (TCP|UDP) connection \d+ "
+    r"for [^:\s]+:([0-9A-Fa-f.:]+)/(\d+).*? to [^:\s]+:([0-9A-Fa-f.:]+)/(\d+)")
+_IP_ADDRESS = re.compile(r"(?:\d{1,3}\.){3}\d{1,3}|[0-9A-Fa-f]{0,4}(?::[0-9A-Fa-f]{0,4}){2,7}")
+
+# Field names used by the supported firewall formats, mapped to one canonical name
+_FIELD_ALIASES = {
+    **dict.fromkeys(("src", "srcip", "src_ip", "source_ip", "source-address", "sip"), "source_ip"),
+    **dict.fromkeys(("dst", "dstip", "dst_ip", "destination_ip", "destination-address", "dip"), "destination_ip"),
+    **dict.fromkeys(("dpt", "dstport", "dst_port", "destination_port", "destination-port", "dport"), "port"),
+    **dict.fromkeys(("proto", "protocol", "protocol-id"), "protocol"),
+    **dict.fromkeys(("sentbyte", "bytes_sent", "sent_bytes", "bytes-from-client", "len"), "bytes_out"),
+    **dict.fromkeys(("rcvdbyte", "bytes_received", "rcvd_bytes", "bytes-from-server"), "bytes_in"),
+    **dict.fromkeys(("action", "act"), "action"),
+    **dict.fromkeys(("srcname", "src_host", "source_hostname"), "source_hostname"),
+    **dict.fromkeys(("dstname", "dst_host", "destination_hostname", "hostname"), "destination_hostname"),
+    "date": "date",
+    "time": "time"
+}
+
+_IP_PROTOCOLS = {"1": "ICMP", "6": "TCP", "17": "UDP", "47": "GRE", "50": "ESP", "58": "ICMPV6"}
+
+
+def _count(value: str) -> int:
+    return int(value) if value.isdigit() else 0
+
+
+class FlowLogParser:
+    """
+    Turns firewall and syslog lines into normalized flow rows.
+
+    One parser is used per job: it keeps the running counters and the
+    distinct addresses and protocols seen, which make up the job summary.
+    """
+
+    def __init__(self, application: str = "", chunk_lines: Optional[int] = None,
+                 max_tracked_addresses: Optional[int] = None):
+        self.application = application
+        self.chunk_lines = chunk_lines or LOG_INGEST_CONFIG["parse_chunk_lines"]
+        self.max_tracked_addresses = max_tracked_addresses or LOG_INGEST_CONFIG["max_tracked_addresses"]
+        self.year = datetime.now().year
+        self.sources = set()
+        self.destinations = set()
+        self.protocols = set()
+        self.stats = {"lines_read": 0, "lines_skipped": 0, "flows_extracted": 0}
+        # Syslog timestamps repeat heavily; cache their normalized form per chunk
+        self._timestamps: Dict[str, str] = {}
+
+    # ------------------------------------------------------------ single line
+
+    def parse_line(self, line: str) -> Optional[List[Any]]:
+        """Normalized row for one log line, or None if it holds no flow"""
+        timestamp = ""
+        host = ""
+        message = line
+        for header in _SYSLOG_HEADERS:
+            match = header.match(line)
+            if match:
+                timestamp, host, message = match.groups()
+                break
+
+        if "%ASA-" in message or "%FTD-" in message:
+            row = self._parse_asa(message)
+        else:
+            row = self._parse_key_value(message)
+        if row is None:
+            return None
+
+        if not row[9]:
+            row[9] = self._normalize_timestamp(timestamp)
+        if host:
+            row[11] = f"{row[11]} via {host}"
+        return row
+
+    def _parse_key_value(self, message: str) -> Optional[List[Any]]:
+        if "=" not in message:
+            return None
+        fields: Dict[str, str] = {}
+        for key, value in _KEY_VALUE.findall(message):
+            field = _FIELD_ALIASES.get(key.lower())
+            # The first alias present wins, e.g. SRC= before a later src_host=
+            if field and value and field not in fields:
+                fields[field] = value.strip('"')
+        source_ip = fields.get("source_ip", "")
+        destination_ip = fields.get("destination_ip", "")
+        if not (_IP_ADDRESS.fullmatch(source_ip) and _IP_ADDRESS.fullmatch(destination_ip)):
+            return None
+
+        protocol = fields.get("protocol", "").upper()
+        protocol = _IP_PROTOCOLS.get(protocol, protocol)
+        action = fields.get("action", "").lower()
+        timestamp = ""
+        if "date" in fields and "time" in fields:
+            timestamp = f"{fields['date']}T{fields['time']}"
+
+        return [self.application, source_ip, fields.get("source_hostname", ""), destination_ip,
+                fields.get("destination_hostname", ""), _count(fields.get("port", "")) or "", protocol,
+                _count(fields.get("bytes_in", "")), _count(fields.get("bytes_out", "")),
+                timestamp, "Network", f"firewall:{action}" if action else "firewall", ""]
+
+    def _parse_asa(self, message: str) -> Optional[List[Any]]:
+        match = _ASA_BUILT.search(message)
+        if match is None:
+            return None
+        direction, protocol, for_ip, for_port, to_ip, to_port = match.groups()
+        # Inbound: the "for" side initiated; outbound: the "to" side did
+        if direction == "inbound":
+            source_ip, destination_ip, port = for_ip, to_ip, to_port
+        else:
+            source_ip, destination_ip, port = to_ip, for_ip, for_port
+        return [self.application, source_ip, "", destination_ip, "", int(port), protocol,
+                0, 0, "", "Network", f"asa:built_{direction}", ""]
+
+    def _normalize_timestamp(self, raw: str) -> str:
+        if not raw:
+            return ""
+        normalized = self._timestamps.get(raw)
+        if normalized is None:
+            if raw[0].isdigit():
+                normalized = raw.replace(" ", "T", 1)
+            else:
+                try:
+                    # RFC 3164 has no year; assume the current one
+                    normalized = datetime.strptime(f"{self.year} {raw}", "%Y %b %d %H:%M:%S").isoformat()
+                except ValueError:
+                    normalized = raw
+            self._timestamps[raw] = normalized
+        return normalized
+
+    # ------------------------------------------------------------ files
+
+    def _track(self, rows: List[List[Any]]):
+        if len(self.sources) + len(self.destinations) < self.max_tracked_addresses:
+            self.sources.update(row[1] for row in rows)
+            self.destinations.update(row[3] for row in rows)
+        self.protocols.update(row[6] for row in rows if row[6])
+
+    def parse_file(self, path: str, writer, on_chunk: Optional[Callable[[int], None]] = None) -> Dict[str, int]:
+        """
+        Parse one log file (plain or .gz) and write its flow rows with ``writer``.
+
+        ``on_chunk`` is called after every chunk of lines with the number of
+        bytes of the file consumed so far (compressed bytes for .gz files).
+        Returns the counters for this file.
+        """
+        file_stats = {"lines_read": 0, "lines_skipped": 0, "flows_extracted": 0}
+        with open(path, "rb") as raw:
+            stream = gzip.GzipFile(fileobj=raw) if str(path).endswith(".gz") else raw
+            rows: List[List[Any]] = []
+            lines = 0
+            for line in stream:
+                lines += 1
+                row = self.parse_line(line.decode("utf-8", "replace").rstrip("\r\n"))
+                if row is not None:
+                    rows.append(row)
+                if lines == self.chunk_lines:
+                    self._write_chunk(writer, rows, lines, file_stats)
+                    rows, lines = [], 0
+                    if on_chunk:
+                        on_chunk(raw.tell())
+            self._write_chunk(writer, rows, lines, file_stats)
+            if on_chunk:
+                on_chunk(raw.tell())
+        return file_stats
+
+    def _write_chunk(self, writer, rows: List[List[Any]], lines: int, file_stats: Dict[str, int]):
+        if rows:
+            writer.writerows(rows)
+            self._track(rows)
+        for counters in (file_stats, self.stats):
+            counters["lines_read"] += lines
+            counters["lines_skipped"] += lines - len(rows)
+            counters["flows_extracted"] += len(rows)
+        self._timestamps.clear()
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "unique_sources": len(self.sources),
+            "unique_destinations": len(self.destinations),
+            "unique_counts_truncated": len(self.sources) + len(self.destinations) >= self.max_tracked_addresses,
+            "protocols_detected": sorted(self.protocols),
+            "traffic_flows_extracted": self.stats["flows_extracted"],
+            "lines_read": self.stats["lines_read"],
+            "lines_skipped": self.stats["lines_skipped"]
+        }
+
+
+def parse_log_files(files: List[Dict[str, Any]], output_path: str, application: str = "",
+                    progress: Optional[Callable[[Dict[str, Any]], None]] = None,
+                    chunk_lines: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Parse stored uploads (``store_upload`` results) into one normalized flow CSV.
+
+    ``progress`` receives ``{"progress", "entries_processed", "current_file"}``
+    after every chunk; progress is the share of input bytes consumed, 0-100.
+    Returns the job summary including per-file counters.
+    """
+    parser = FlowLogParser(application=application, chunk_lines=chunk_lines)
+    total_bytes = sum(f.get("size", 0) for f in files) or 1
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    partial = output_path.with_name(output_path.name + ".part")
+
+    per_file = []
+    done_bytes = 0
+    try:
+        with open(partial, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(NORMALIZED_FLOW_COLUMNS)
+            for stored in files:
+                def on_chunk(position: int, offset: int = done_bytes, name: str = stored.get("filename", "")):
+                    if progress:
+                        progress({
+                            "progress": round(min(offset + position, total_bytes) * 100.0 / total_bytes, 1),
+                            "entries_processed": parser.stats["flows_extracted"],
+                            "current_file": name
+                        })
+
+                file_stats = parser.parse_file(stored["path"], writer, on_chunk)
+                per_file.append({"filename": stored.get("filename"), "sha256": stored.get("sha256"), **file_stats})
+                done_bytes += stored.get("size", 0)
+        os.replace(partial, output_path)
+    except BaseException:
+        partial.unlink(missing_ok=True)
+        raise
+
+    return {**parser.summary(), "output_file": str(output_path), "files": per_file}
@@ -105,6 +105,7 @@ class FilterRequest(BaseModel):
     archetypes: Optional[List[str]] = None
     complexity_levels: Optional[List[str]] = None
     risk_levels: Optional[List[str]] = None
+    criticality_levels: Optional[List[str]] = None
 
 class StrategyUpdateRequest(BaseModel):
     strategy: str
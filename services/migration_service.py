@@ -15,6 +15,26 @@ from datetime import datetime
 
 from services.cost_service import CostService
 from services.app_service import AppService
+from services.portfolio_store import PortfolioStore, portfolio_store
+from services.wave_planner import wave_planner
+
+# Title, focus and AWS services of a phased wave, by the dominant strategy of its applications
+PHASED_WAVE_PROFILES = {
+    "rehost": ("Foundation & Quick Wins", "Migrate low-risk applications with minimal change",
+               ["EC2", "RDS", "S3", "VPC", "IAM", "CloudWatch"]),
+    "retire": ("Foundation & Quick Wins", "Decommission legacy systems and migrate quick wins",
+               ["EC2", "RDS", "S3", "VPC", "IAM", "CloudWatch"]),
+    "relocate": ("Advanced Migration", "Relocate hosted workloads to AWS",
+                 ["EC2", "RDS", "ECS", "Lambda", "CloudFormation"]),
+    "replatform": ("Core Services", "Migrate core banking applications with replatforming",
+                   ["ECS", "EKS", "Lambda", "API Gateway", "DynamoDB", "ElastiCache"]),
+    "repurchase": ("SaaS Replacement", "Replace applications with SaaS offerings",
+                   ["AWS Marketplace", "IAM Identity Center", "AppFlow"]),
+    "refactor": ("Transformation", "Refactor complex applications into cloud-native services",
+                 ["Lambda", "API Gateway", "DynamoDB", "SQS", "SNS", "Step Functions"]),
+    "default": ("Advanced Migration", "Complete remaining applications",
+                ["EC2", "RDS", "ECS", "Lambda", "CloudFormation"])
+}
 
 class MigrationApproach(Enum):
     PHASED = "phased"
@@ -37,8 +57,12 @@ class MigrationService:
     """Service for migration analysis and planning"""
     
     def __init__(self):
+        # All three services read the same application portfolio
+        self.portfolio = portfolio_store
         self.cost_service = CostService()
         self.app_service = AppService()
+        # Dependency and cross-wave traffic report of the last phased plan
+        self.last_wave_plan: Optional[Dict[str, Any]] = None
         
         # Migration strategy priorities (lower = higher priority)
         self.strategy_priority = {
@@ -57,6 +81,15 @@ class MigrationService:
             "dependencies": {"many": 0.8, "some": 0.5, "few": 0.2, "none": 0.0}
         }
     
+    @classmethod
+    def from_store(cls, store: PortfolioStore) -> "MigrationService":
+        """Service whose cost and application services all read ``store`` instead of the shared portfolio"""
+        service = cls()
+        service.portfolio = store
+        service.cost_service = CostService.from_store(store)
+        service.app_service = AppService(store=store)
+        return service
+
     async def analyze_migration(
         self, 
         app_ids: List[str], 
@@ -122,6 +155,7 @@ class MigrationService:
             "recommendations": recommendations,
             "risk_assessment": risk_assessment,
             "timeline": timeline,
+            "dependency_plan": self.last_wave_plan,
             "applications": filtered_apps
         }
     
@@ -131,89 +165,82 @@ class MigrationService:
         approach: str = "phased",
         timeline_constraint: Optional[int] = None
     ) -> List[MigrationWave]:
-        """Generate migration waves based on dependencies and risk"""
+        """
+        Generate migration waves based on dependencies and risk.
+        
+        ``timeline_constraint`` is the number of months the programme must fit
+        in; a ValueError is raised when it is not positive or the planned
+        waves end after it.
+        """
+        if timeline_constraint is not None and timeline_constraint <= 0:
+            raise ValueError("timeline_constraint must be a positive number of months")
         
         applications = await self._get_applications(app_ids)
         
         if approach == "bigbang":
-            return await self._generate_bigbang_phases(applications)
+            waves = await self._generate_bigbang_phases(applications)
         else:
-            return await self._generate_phased_waves(applications, timeline_constraint)
+            waves = await self._generate_phased_waves(applications)
+        
+        if timeline_constraint is not None and waves:
+            total_months = max(wave.start_month + wave.duration_months - 1 for wave in waves)
+            if total_months > timeline_constraint:
+                raise ValueError(
+                    f"The {approach} plan needs {total_months} months, which exceeds the "
+                    f"{timeline_constraint}-month timeline constraint"
+                )
+        return waves
     
-    async def _generate_phased_waves(
-        self, 
-        applications: List[Dict], 
-        timeline_constraint: Optional[int] = None
-    ) -> List[MigrationWave]:
-        """Generate phased migration waves"""
-        
-        # Sort applications by risk and priority
-        sorted_apps = self._sort_applications_by_priority(applications)
+    async def _generate_phased_waves(self, applications: List[Dict]) -> List[MigrationWave]:
+        """
+        Generate phased migration waves from the application dependency graph.
+        
+        A wave starts the month after the last of the waves it depends on
+        ends, so independent waves run in parallel.
+        """
+        
+        # Retained applications stay where they are
+        movable = [app for app in applications if app.get("strategy", "").lower() != "retain"]
+        
+        # Reading and aggregating the flow files is blocking work
+        plan = await asyncio.to_thread(
+            wave_planner.plan,
+            movable,
+            risk_score=self._calculate_app_risk_score,
+            priority=self._priority_score
+        )
+        self.last_wave_plan = plan.summary()
         
+        apps_by_id = {app["id"]: app for app in movable}
         waves = []
+        # Month after each planned wave ends
+        next_months: List[int] = []
         
-        # Wave 1: Foundation & Quick Wins (Low risk, Rehost/Retire)
-        wave1_apps = [app for app in sorted_apps 
-                     if app.get("strategy", "").lower() in ["rehost", "retire"] 
-                     and app.get("risk", "").lower() == "low"][:8]
-        
-        if wave1_apps:
-            wave1 = await self._create_wave(
-                name="Wave 1: Foundation & Quick Wins",
-                apps=wave1_apps,
-                start_month=1,
-                duration=6,
-                focus="Establish AWS landing zone and migrate low-risk applications",
-                aws_services=["EC2", "RDS", "S3", "VPC", "IAM", "CloudWatch"]
-            )
-            waves.append(wave1)
-        
-        # Wave 2: Core Services (Medium risk, Replatform)
-        wave2_apps = [app for app in sorted_apps 
-                     if app.get("strategy", "").lower() == "replatform" 
-                     and app.get("risk", "").lower() in ["medium", "high"]][:7]
-        
-        if wave2_apps:
-            wave2 = await self._create_wave(
-                name="Wave 2: Core Services",
-                apps=wave2_apps,
-                start_month=7,
-                duration=6,
-                focus="Migrate core banking applications with replatforming",
-                aws_services=["ECS", "EKS", "Lambda", "API Gateway", "DynamoDB", "ElastiCache"]
-            )
-            waves.append(wave2)
-        
-        # Wave 3: Advanced Migration (Remaining Rehost/Replatform)
-        remaining_apps = [app for app in sorted_apps 
-                         if app not in wave1_apps + wave2_apps 
-                         and app.get("strategy", "").lower() in ["rehost", "replatform"]]
-        
-        if remaining_apps:
-            wave3 = await self._create_wave(
-                name="Wave 3: Advanced Migration",
-                apps=remaining_apps,
-                start_month=13,
-                duration=6,
-                focus="Complete remaining rehost and replatform applications",
-                aws_services=["EC2", "RDS", "ECS", "Lambda", "CloudFormation"]
-            )
-            waves.append(wave3)
-        
-        # Wave 4: Transformation (Refactor applications)
-        refactor_apps = [app for app in sorted_apps 
-                        if app.get("strategy", "").lower() in ["refactor"]]
-        
-        if refactor_apps:
-            wave4 = await self._create_wave(
-                name="Wave 4: Transformation",
-                apps=refactor_apps,
-                start_month=19,
-                duration=6,
-                focus="Refactor complex applications and retire legacy systems",
-                aws_services=["Lambda", "API Gateway", "DynamoDB", "SQS", "SNS", "Step Functions"]
+        for number, app_ids in enumerate(plan.waves, start=1):
+            wave_apps = [apps_by_id[app_id] for app_id in app_ids]
+            
+            # The wave is named after the strategy most of its applications follow
+            strategies = self._calculate_strategy_distribution(wave_apps)
+            dominant = max(strategies, key=strategies.get)
+            title, focus, aws_services = PHASED_WAVE_PROFILES.get(dominant, PHASED_WAVE_PROFILES["default"])
+            if number == 1:
+                focus = f"Establish AWS landing zone; {focus[0].lower()}{focus[1:]}"
+            
+            duration = max((app.get("timeline_months") or 6) for app in wave_apps)
+            depends_on = plan.wave_dependencies[number - 1]
+            start_month = max((next_months[w] for w in depends_on), default=1)
+            
+            wave = await self._create_wave(
+                name=f"Wave {number}: {title}",
+                apps=wave_apps,
+                start_month=start_month,
+                duration=duration,
+                focus=focus,
+                aws_services=aws_services
             )
-            waves.append(wave4)
+            wave.dependencies = [f"Wave {w + 1}" for w in depends_on]
+            waves.append(wave)
+            next_months.append(start_month + duration)
         
         return waves
     
@@ -281,7 +308,7 @@ class MigrationService:
         """Create a migration wave with cost calculations"""
         
         # Calculate wave costs
-        migration_cost = sum(await self._estimate_app_migration_cost(app) for app in apps)
+        migration_cost = sum([await self._estimate_app_migration_cost(app) for app in apps])
         annual_savings = sum(app.get("annual_savings", 0) for app in apps)
         
         # Determine risk level
@@ -302,32 +329,33 @@ class MigrationService:
             risk_level=risk_level
         )
         
-    def _sort_applications_by_priority(self, applications: List[Dict]) -> List[Dict]:
-        """Sort applications by migration priority"""
+    def _priority_score(self, app: Dict) -> float:
+        """Migration priority of an application (lower = earlier)"""
         
-        def priority_score(app):
-            strategy = app.get("strategy", "rehost").lower()
-            risk = app.get("risk", "medium").lower()
-            complexity = app.get("complexity", "medium").lower()
-            
-            # Lower score = higher priority
-            score = self.strategy_priority.get(strategy, 5)
-            
-            # Adjust for risk (prefer lower risk first)
-            if risk == "low":
-                score -= 1
-            elif risk == "high":
-                score += 1
-            
-            # Adjust for complexity
-            if complexity == "low":
-                score -= 0.5
-            elif complexity in ["high", "very_high"]:
-                score += 0.5
-            
-            return score
+        strategy = app.get("strategy", "rehost").lower()
+        risk = app.get("risk", "medium").lower()
+        complexity = app.get("complexity", "medium").lower()
+        
+        # Lower score = higher priority
+        score = self.strategy_priority.get(strategy, 5)
+        
+        # Adjust for risk (prefer lower risk first)
+        if risk == "low":
+            score -= 1
+        elif risk == "high":
+            score += 1
         
-        return sorted(applications, key=priority_score)
+        # Adjust for complexity
+        if complexity == "low":
+            score -= 0.5
+        elif complexity in ["high", "very_high"]:
+            score += 0.5
+        
+        return score
+    
+    def _sort_applications_by_priority(self, applications: List[Dict]) -> List[Dict]:
+        """Sort applications by migration priority"""
+        return sorted(applications, key=self._priority_score)
     
     def _calculate_strategy_distribution(self, applications: List[Dict]) -> Dict[str, int]:
         """Calculate distribution of applications by strategy"""
@@ -565,59 +593,11 @@ class MigrationService:
     
     async def _get_applications(self, app_ids: List[str]) -> List[Dict]:
         """Get application data for analysis"""
-        # This would typically fetch from database/service
-        # For now, return mock data based on your structure
-        
-        if "all" in app_ids:
-            return await self._get_all_applications()
-        else:
-            all_apps = await self._get_all_applications()
-            return [app for app in all_apps if app["id"] in app_ids]
+        return self.portfolio.get_applications(app_ids)
     
     async def _get_all_applications(self) -> List[Dict]:
         """Get all applications with calculated savings"""
-        
-        # Base application data with estimated annual savings
-        applications = [
-            {
-                "id": "ACDA", "name": "ATM Check Card Disputes API", 
-                "archetype": "Microservices", "strategy": "Replatform", 
-                "complexity": "Medium", "risk": "Medium", "annual_savings": 85000
-            },
-            {
-                "id": "ALE", "name": "Advisor Locator Engine", 
-                "archetype": "Web + API Headless", "strategy": "Rehost", 
-                "complexity": "Low", "risk": "Low", "annual_savings": 45000
-            },
-            {
-                "id": "AODSVY", "name": "AOD Survey", 
-                "archetype": "3-Tier", "strategy": "Replatform", 
-                "complexity": "Medium", "risk": "Medium", "annual_savings": 75000
-            },
-            {
-                "id": "APSE", "name": "Appointment Setting (Timetrade)", 
-                "archetype": "SOA", "strategy": "Refactor", 
-                "complexity": "High", "risk": "High", "annual_savings": 120000
-            },
-            {
-                "id": "BKO", "name": "Banko POC", 
-                "archetype": "Client-Server", "strategy": "Retire", 
-                "complexity": "Low", "risk": "Low", "annual_savings": 25000
-            },
-            {
-                "id": "BLZD", "name": "FICO/Blaze Decisioning", 
-                "archetype": "SOA", "strategy": "Refactor", 
-                "complexity": "High", "risk": "High", "annual_savings": 140000
-            },
-            {
-                "id": "BLND", "name": "BLEND SSI", 
-                "archetype": "Monolithic", "strategy": "Refactor", 
-                "complexity": "High", "risk": "High", "annual_savings": 110000
-            }
-            # Add more applications as needed...
-        ]
-        
-        return applications
+        return self.portfolio.all_applications()
     
     async def generate_executive_summary(
         self, 
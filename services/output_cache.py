@@ -0,0 +1,236 @@
+"""
+Content-addressed output cache
+Rendered diagram and document artifacts (Visio, Lucid, Word, Excel, PDF) are
+stored under results/cache/<key>/, where the key is a hash of the canonical
+diagram input, quality level, output format and generator version. Repeated
+requests for an unchanged application package are served from the cache
+instead of being rendered again. Entries are evicted least-recently-used once
+the entry count or total size limit is exceeded. The cache directory is
+created and indexed on first use, so importing this module touches no files.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from enum import Enum
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+OUTPUT_CACHE_CONFIG = {
+    "enabled": os.getenv("OUTPUT_CACHE_ENABLED", "true").lower() == "true",
+    "cache_dir": os.getenv("OUTPUT_CACHE_DIR", "results/cache"),
+    "max_entries": int(os.getenv("OUTPUT_CACHE_MAX_ENTRIES", "500")),
+    "max_size_mb": float(os.getenv("OUTPUT_CACHE_MAX_SIZE_MB", "512"))
+}
+
+# Per-request timestamps that change on every run without changing the rendered
+# content meaningfully; they are left out of the key so identical packages hit
+VOLATILE_KEYS = frozenset({"last_updated", "generated_at", "created_at", "started_at", "completed_at"})
+
+MANIFEST_FILE = "manifest.json"
+
+
+def _canonicalize(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {str(k): _canonicalize(v) for k, v in value.items() if k not in VOLATILE_KEYS}
+    if isinstance(value, (list, tuple)):
+        return [_canonicalize(v) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(_canonicalize(v) for v in value)
+    if isinstance(value, Enum):
+        return _canonicalize(value.value)
+    return value
+
+
+def make_cache_key(diagram: Dict[str, Any], quality_level: str, output_format: str,
+                   generator_version: str, **extra: Any) -> str:
+    """SHA-256 over the canonical JSON form of the inputs that determine an artifact"""
+    payload = {
+        "diagram": _canonicalize(diagram),
+        "quality_level": quality_level,
+        "format": output_format,
+        "generator_version": generator_version,
+        "extra": _canonicalize(extra)
+    }
+    canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class OutputCache:
+    """
+    On-disk LRU cache of rendered artifacts.
+
+    Each entry is a directory holding the artifact file and a manifest with the
+    output description returned to callers. The LRU order lives in memory and
+    is rebuilt from manifest modification times on first use; a hit touches the
+    manifest so the order survives restarts.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, max_entries: Optional[int] = None,
+                 max_size_mb: Optional[float] = None, enabled: Optional[bool] = None):
+        self.cache_dir = Path(cache_dir or OUTPUT_CACHE_CONFIG["cache_dir"])
+        self.max_entries = max_entries if max_entries is not None else OUTPUT_CACHE_CONFIG["max_entries"]
+        max_size_mb = max_size_mb if max_size_mb is not None else OUTPUT_CACHE_CONFIG["max_size_mb"]
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.enabled = OUTPUT_CACHE_CONFIG["enabled"] if enabled is None else enabled
+
+        self._lock = threading.Lock()
+        # key -> entry size in bytes, least recently used first
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self.stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "errors": 0}
+        self._index_loaded = False
+
+    def _ensure_index(self):
+        """Create the cache directory and index existing entries on first use"""
+        with self._lock:
+            if not self._index_loaded:
+                self._load_index()
+                self._index_loaded = True
+
+    def _load_index(self):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        found = []
+        for manifest in self.cache_dir.glob(f"*/{MANIFEST_FILE}"):
+            entry_dir = manifest.parent
+            size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+            found.append((manifest.stat().st_mtime, entry_dir.name, size))
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._total_bytes += size
+        if found:
+            logger.info(f"Output cache loaded {len(found)} entries ({self._total_bytes / 1024:.1f} KB)")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Restore a cached artifact to the ``file_path`` recorded in its output
+        description and return that description, or None on a miss.
+        """
+        if not self.enabled:
+            return None
+
+        self._ensure_index()
+        entry_dir = self.cache_dir / key
+        with self._lock:
+            known = key in self._entries
+        if not known and not (entry_dir / MANIFEST_FILE).exists():
+            self.stats["misses"] += 1
+            return None
+
+        try:
+            with open(entry_dir / MANIFEST_FILE, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            destination = Path(manifest["output"]["file_path"])
+            destination.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(entry_dir / manifest["artifact"], destination)
+            os.utime(entry_dir / MANIFEST_FILE)
+        except (OSError, ValueError, KeyError) as e:
+            # Entry removed by another worker or damaged: drop it and render again
+            logger.warning(f"Output cache entry {key[:12]} unreadable: {e}")
+            self.stats["errors"] += 1
+            self.stats["misses"] += 1
+            self._remove(key)
+            return None
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                # Stored by another worker sharing the cache directory
+                size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+                self._entries[key] = size
+                self._total_bytes += size
+        self.stats["hits"] += 1
+        return manifest["output"]
+
+    def put(self, key: str, output: Dict[str, Any]) -> bool:
+        """Store the artifact at ``output["file_path"]`` and its description under ``key``"""
+        artifact = Path(output.get("file_path", ""))
+        if not self.enabled or not artifact.is_file():
+            return False
+
+        self._ensure_index()
+        entry_dir = self.cache_dir / key
+        tmp_dir = self.cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            tmp_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(artifact, tmp_dir / artifact.name)
+            with open(tmp_dir / MANIFEST_FILE, "w", encoding="utf-8") as f:
+                json.dump({
+                    "key": key,
+                    "artifact": artifact.name,
+                    "stored_at": time.time(),
+                    "output": output
+                }, f, indent=2, default=str)
+            if entry_dir.exists():
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            tmp_dir.rename(entry_dir)
+        except OSError as e:
+            logger.warning(f"Failed to store output cache entry {key[:12]}: {e}")
+            self.stats["errors"] += 1
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return False
+
+        size = sum(f.stat().st_size for f in entry_dir.iterdir() if f.is_file())
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+        self.stats["stores"] += 1
+        self._evict()
+        return True
+
+    def _evict(self):
+        victims = []
+        with self._lock:
+            while self._entries and (len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes):
+                key, size = self._entries.popitem(last=False)
+                self._total_bytes -= size
+                victims.append(key)
+        for key in victims:
+            shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+        if victims:
+            self.stats["evictions"] += len(victims)
+            logger.info(f"Output cache evicted {len(victims)} entries")
+
+    def _remove(self, key: str):
+        with self._lock:
+            self._total_bytes -= self._entries.pop(key, 0)
+        shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+
+    def clear(self):
+        if self.enabled:
+            self._ensure_index()
+        with self._lock:
+            keys = list(self._entries)
+            self._entries.clear()
+            self._total_bytes = 0
+        for key in keys:
+            shutil.rmtree(self.cache_dir / key, ignore_errors=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        if self.enabled:
+            self._ensure_index()
+        lookups = self.stats["hits"] + self.stats["misses"]
+        with self._lock:
+            entries, total_bytes = len(self._entries), self._total_bytes
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": entries,
+            "size_mb": round(total_bytes / (1024 * 1024), 2),
+            "max_entries": self.max_entries,
+            "max_size_mb": round(self.max_bytes / (1024 * 1024), 2),
+            "cache_dir": str(self.cache_dir)
+        }
+
+
+# Shared cache for the document generators
+output_cache = OutputCache()
@@ -0,0 +1,324 @@
+"""
+Shared application portfolio store
+One in-process copy of the application portfolio for AppService, CostService
+and MigrationService. The portfolio is rebuilt only when the content of its
+source files (applicationList.csv and the archetype mapping workbook)
+changes: file stats are checked at most every few seconds, and a changed
+stat is confirmed with a content hash so a touched but unchanged file does
+not rebuild (and re-randomize) the portfolio. Records are indexed by id,
+archetype, strategy, complexity, risk and business criticality so filtered
+queries intersect small position sets instead of scanning the list.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Set
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PORTFOLIO_STORE_CONFIG = {
+    "data_folder": os.getenv("PORTFOLIO_DATA_FOLDER", "static/ui/data"),
+    "application_list": os.getenv("PORTFOLIO_APPLICATION_LIST", "applicationList.csv"),
+    "archetype_mapping": os.getenv("PORTFOLIO_ARCHETYPE_MAPPING", "synthetic_flows_apps_archetype_mapped.xlsx"),
+    "check_interval_seconds": float(os.getenv("PORTFOLIO_CHECK_INTERVAL_SECONDS", "2"))
+}
+
+INDEXED_FIELDS = ("id", "archetype", "strategy", "complexity", "risk", "business_criticality")
+
+# Fields whose filter values match regardless of case (strategies arrive as "rehost" or "Rehost")
+CASE_INSENSITIVE_FIELDS = frozenset({"strategy"})
+
+# Builds application records from the application list (None when missing) and archetype mapping
+PortfolioBuilder = Callable[[Optional[pd.DataFrame], Dict[str, str]], List[Dict[str, Any]]]
+
+
+def build_portfolio_records(app_df: Optional[pd.DataFrame], archetype_mapping: Dict[str, str]) -> List[Dict[str, Any]]:
+    """Default builder: AppService's archetype, strategy and criticality rules"""
+    # Imported here because services.app_service imports this module
+    from services.app_service import AppService
+    return AppService().build_applications(app_df, archetype_mapping)
+
+
+class PortfolioState(NamedTuple):
+    """One indexed portfolio; replaced as a whole so readers never see a half-built index"""
+    records: List[Dict[str, Any]]
+    positions: Dict[str, int]
+    # field -> value -> positions of the records holding that value
+    indexes: Dict[str, Dict[Any, Set[int]]]
+    # position -> indexed values at the last (re)index, to move it between index buckets
+    indexed_values: List[tuple]
+
+
+class SourceFile:
+    """Change detection for one source file: stat first, content hash to confirm"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.stat_signature = None
+        self.digest = None
+
+    def _stat(self):
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _hash(self) -> Optional[str]:
+        sha = hashlib.sha256()
+        try:
+            with open(self.path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    sha.update(block)
+        except OSError:
+            return None
+        return sha.hexdigest()
+
+    def changed(self) -> bool:
+        """Return True when the content differs from the last check"""
+        signature = self._stat()
+        if signature == self.stat_signature:
+            return False
+        self.stat_signature = signature
+        digest = self._hash() if signature is not None else None
+        if digest == self.digest:
+            return False
+        self.digest = digest
+        return True
+
+    @property
+    def exists(self) -> bool:
+        return self.stat_signature is not None
+
+
+class PortfolioStore:
+    """
+    Indexed, change-aware application portfolio.
+
+    Records are plain dicts shared with callers, as the AppService cache was;
+    callers that change an indexed field in place call ``reindex`` afterwards.
+    """
+
+    def __init__(self, data_folder: Optional[str] = None, builder: Optional[PortfolioBuilder] = None,
+                 check_interval: Optional[float] = None):
+        folder = Path(data_folder or PORTFOLIO_STORE_CONFIG["data_folder"])
+        self.application_list = SourceFile(folder / PORTFOLIO_STORE_CONFIG["application_list"])
+        self.archetype_mapping = SourceFile(folder / PORTFOLIO_STORE_CONFIG["archetype_mapping"])
+        self.check_interval = (PORTFOLIO_STORE_CONFIG["check_interval_seconds"]
+                               if check_interval is None else check_interval)
+        self._builder = builder or build_portfolio_records
+
+        self._lock = threading.RLock()
+        # Written only under the lock; readers take one snapshot of it per query
+        self._state = PortfolioState([], {}, {field: {} for field in INDEXED_FIELDS}, [])
+        self._mapping: Dict[str, str] = {}
+        self._last_check = 0.0
+        self.loaded = False
+        self.version = 0
+        self.load_info: Dict[str, Any] = {}
+        self.stats = {"loads": 0, "source_checks": 0, "queries": 0, "load_seconds": 0.0}
+
+    # ------------------------------------------------------------ loading
+
+    def ensure_current(self):
+        """Rebuild the portfolio if it was never loaded or a source file changed"""
+        now = time.monotonic()
+        if self.loaded and now - self._last_check < self.check_interval:
+            return
+        with self._lock:
+            if self.loaded and now - self._last_check < self.check_interval:
+                return
+            self._last_check = now
+            self.stats["source_checks"] += 1
+            # Check both files every time so each one's signature stays current
+            list_changed = self.application_list.changed()
+            mapping_changed = self.archetype_mapping.changed()
+            if mapping_changed:
+                self._mapping = self._read_archetype_mapping()
+            if not self.loaded or list_changed or mapping_changed:
+                self._load()
+
+    def refresh(self) -> Dict[str, Any]:
+        """Rebuild from the source files now, even if they are unchanged"""
+        with self._lock:
+            self.application_list.changed()
+            if self.archetype_mapping.changed() or not self.loaded:
+                self._mapping = self._read_archetype_mapping()
+            self._last_check = time.monotonic()
+            self._load()
+            return dict(self.load_info)
+
+    def _read_archetype_mapping(self) -> Dict[str, str]:
+        if not self.archetype_mapping.exists:
+            return {}
+        try:
+            df = pd.read_excel(self.archetype_mapping.path, sheet_name=0)
+            if "application" in df.columns and "archetype" in df.columns:
+                return df.groupby("application")["archetype"].first().to_dict()
+            print(f"Warning: Expected columns not found in {self.archetype_mapping.path}")
+        except Exception as e:
+            print(f"Warning: Could not load archetype mapping: {str(e)}")
+        return {}
+
+    def _load(self):
+        started = time.perf_counter()
+        builder = self._builder
+        source = "csv" if self.application_list.exists else "mock"
+        try:
+            app_df = pd.read_csv(self.application_list.path) if self.application_list.exists else None
+            records = builder(app_df, self._mapping)
+            status, error = "success", None
+        except Exception as e:
+            records = builder(None, {})
+            status, error = "fallback_mock", str(e)
+
+        self._index(records)
+        self.loaded = True
+        self.version += 1
+        elapsed = time.perf_counter() - started
+        self.stats["loads"] += 1
+        self.stats["load_seconds"] = round(elapsed, 4)
+
+        self.load_info = {
+            "count": len(records),
+            "timestamp": datetime.now().isoformat(),
+            "status": status
+        }
+        if error is None:
+            self.load_info["source"] = source
+        else:
+            self.load_info["error"] = error
+        logger.info(f"Portfolio store loaded {len(records)} applications from {source} in {elapsed:.3f}s")
+
+    # ------------------------------------------------------------ indexing
+
+    def _index(self, records: List[Dict[str, Any]]):
+        indexes: Dict[str, Dict[Any, Set[int]]] = {field: {} for field in INDEXED_FIELDS}
+        positions: Dict[str, int] = {}
+        indexed_values = []
+        for position, record in enumerate(records):
+            values = tuple(record.get(field) for field in INDEXED_FIELDS)
+            for field, value in zip(INDEXED_FIELDS, values):
+                indexes[field].setdefault(value, set()).add(position)
+            # The first record wins for duplicate ids, as the linear lookup did
+            positions.setdefault(record.get("id"), position)
+            indexed_values.append(values)
+
+        with self._lock:
+            self._state = PortfolioState(records, positions, indexes, indexed_values)
+
+    def reindex(self, app_id: str):
+        """Move a record to its new index buckets after its fields were changed in place"""
+        with self._lock:
+            state = self._state
+            position = state.positions.get(app_id)
+            if position is None:
+                return
+            old_values = state.indexed_values[position]
+            new_values = tuple(state.records[position].get(field) for field in INDEXED_FIELDS)
+            # Copy-on-write: changed field indexes and buckets are rebuilt, never mutated under a reader
+            indexes = dict(state.indexes)
+            for field, old, new in zip(INDEXED_FIELDS, old_values, new_values):
+                if old == new:
+                    continue
+                index = dict(indexes[field])
+                if old in index:
+                    remaining = index[old] - {position}
+                    if remaining:
+                        index[old] = remaining
+                    else:
+                        del index[old]
+                index[new] = index.get(new, set()) | {position}
+                indexes[field] = index
+            indexed_values = list(state.indexed_values)
+            indexed_values[position] = new_values
+            self._state = state._replace(indexes=indexes, indexed_values=indexed_values)
+
+    @staticmethod
+    def _matching_positions(index: Dict[Any, Set[int]], field: str, values: Iterable[Any]) -> Set[int]:
+        if field in CASE_INSENSITIVE_FIELDS:
+            wanted = {str(v).lower() for v in values}
+            buckets = [positions for key, positions in index.items() if str(key).lower() in wanted]
+        else:
+            buckets = [index[v] for v in set(values) if v in index]
+        if len(buckets) == 1:
+            return buckets[0]
+        return set().union(*buckets)
+
+    # ------------------------------------------------------------ queries
+
+    def all_applications(self) -> List[Dict[str, Any]]:
+        self.ensure_current()
+        return self._state.records
+
+    def get_application(self, app_id: str) -> Optional[Dict[str, Any]]:
+        self.ensure_current()
+        state = self._state
+        position = state.positions.get(app_id)
+        return state.records[position] if position is not None else None
+
+    def get_applications(self, app_ids: Iterable[str]) -> List[Dict[str, Any]]:
+        """Applications with the given ids in portfolio order; "all" selects every application"""
+        app_ids = list(app_ids)
+        if "all" in app_ids:
+            return self.all_applications()
+        return self.filter_applications(id=app_ids)
+
+    def filter_applications(self, **filters: Optional[Iterable[Any]]) -> List[Dict[str, Any]]:
+        """
+        Applications matching every given field filter, in portfolio order.
+
+        Each keyword is an indexed field mapped to the accepted values; a record
+        matches a field when its value is any of them. None or empty filters
+        are ignored.
+        """
+        self.ensure_current()
+        self.stats["queries"] += 1
+        state = self._state
+        candidate_sets = []
+        for field, values in filters.items():
+            if field not in state.indexes:
+                raise ValueError(f"Unknown portfolio field: {field}")
+            if values:
+                candidate_sets.append(self._matching_positions(state.indexes[field], field, values))
+        if not candidate_sets:
+            return list(state.records)
+
+        candidate_sets.sort(key=len)
+        matches = candidate_sets[0]
+        for positions in candidate_sets[1:]:
+            if not matches:
+                break
+            matches = matches & positions
+        records = state.records
+        return [records[position] for position in sorted(matches)]
+
+    def distribution(self, field: str) -> Dict[Any, int]:
+        """Application count per value of an indexed field"""
+        self.ensure_current()
+        return {value: len(positions) for value, positions in self._state.indexes[field].items() if positions}
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "applications": len(self._state.records),
+            "version": self.version,
+            "loaded_at": self.load_info.get("timestamp"),
+            "source": self.load_info.get("source", self.load_info.get("status")),
+            "check_interval_seconds": self.check_interval,
+            "sources": {
+                "application_list": str(self.application_list.path),
+                "archetype_mapping": str(self.archetype_mapping.path)
+            }
+        }
+
+
+# Shared portfolio for the application, cost and migration services
+portfolio_store = PortfolioStore()
@@ -4,11 +4,16 @@ Integrates YAML templates for professional diagrams like the banking example
 """
 
 import csv
+import importlib.util
 import json
+import os
+import time
 import xml.etree.ElementTree as ET
 from xml.dom import minidom
 from pathlib import Path
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Callable
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
 import uuid
 from datetime import datetime
 import base64
@@ -19,6 +24,8 @@ import asyncio
 
 logger = logging.getLogger(__name__)
 
+from .output_cache import make_cache_key
+
 # Import the new template processor
 try:
     from .template_driven_generator import create_template_driven_generator, generate_from_template
@@ -28,11 +35,15 @@ except ImportError as e:
     logger.warning(f"Template processor not available: {e}")
     TEMPLATE_PROCESSOR_AVAILABLE = False
 
-# Import the Playwright-based PDF converter
+# Import the Playwright-based PDF converter; it imports Playwright itself only when
+# the browser starts, so check that the package is installed
 try:
-    from .drawio_converter import pdf_converter, convert_drawio_to_pdf_background
-    PLAYWRIGHT_AVAILABLE = True
-    logger.info("Playwright PDF converter available")
+    from .drawio_converter import pdf_converter, convert_drawio_to_pdf_background, convert_drawio_to_pdf_sync
+    PLAYWRIGHT_AVAILABLE = importlib.util.find_spec("playwright") is not None
+    if PLAYWRIGHT_AVAILABLE:
+        logger.info("Playwright PDF converter available")
+    else:
+        logger.warning("Playwright not installed; PDFs use the fallback generator")
 except ImportError as e:
     logger.warning(f"Playwright PDF converter not available: {e}")
     PLAYWRIGHT_AVAILABLE = False
@@ -63,14 +74,14 @@ class EnhancedDrawIOGenerator:
         }
     
     def generate_drawio_file(self, archetype: str, applications: List[Dict[str, Any]], 
-                           app_name: str, job_id: str) -> Path:
+                           app_name: str, job_id: str, layout: Optional[Dict[str, Any]] = None) -> Path:
         """Generate Draw.io XML file with template support"""
         
         # Try template-driven generation first
         if self.template_processor and self._should_use_template(archetype, app_name):
-            return self._generate_template_driven_drawio(archetype, applications, app_name, job_id)
+            return self._generate_template_driven_drawio(archetype, applications, app_name, job_id, layout)
         else:
-            return self._generate_fallback_drawio(archetype, applications, app_name, job_id)
+            return self._generate_fallback_drawio(archetype, applications, app_name, job_id, layout)
     
     def _should_use_template(self, archetype: str, app_name: str) -> bool:
         """Determine if we should use template-driven generation"""
@@ -82,7 +93,7 @@ class EnhancedDrawIOGenerator:
                 any(keyword in app_name.lower() for keyword in banking_keywords))
     
     def _generate_template_driven_drawio(self, archetype: str, applications: List[Dict[str, Any]], 
-                                       app_name: str, job_id: str) -> Path:
+                                       app_name: str, job_id: str, layout: Optional[Dict[str, Any]] = None) -> Path:
         """Generate Draw.io file using template system"""
         try:
             logger.info(f"Generating template-driven Draw.io for {archetype}")
@@ -110,15 +121,16 @@ class EnhancedDrawIOGenerator:
             
         except Exception as e:
             logger.error(f"Template-driven generation failed: {e}")
-            return self._generate_fallback_drawio(archetype, applications, app_name, job_id)
+            return self._generate_fallback_drawio(archetype, applications, app_name, job_id, layout)
     
     def _generate_fallback_drawio(self, archetype: str, applications: List[Dict[str, Any]], 
-                                app_name: str, job_id: str) -> Path:
+                                app_name: str, job_id: str, layout: Optional[Dict[str, Any]] = None) -> Path:
         """Generate Draw.io file using fallback method"""
         logger.info(f"Using fallback Draw.io generation for {archetype}")
         
-        # Create layout
-        layout = self._generate_layout_for_archetype(archetype, applications)
+        # Create layout unless the caller already computed it
+        if layout is None:
+            layout = self._generate_layout_for_archetype(archetype, applications)
         
         # Create Draw.io XML
         xml_content = self._create_drawio_xml(layout, archetype)
@@ -1175,8 +1187,16 @@ async def generate_high_quality_pdf(drawio_file_path: Path, output_dir: Path, jo
 
 
 def generate_all_formats(archetype: str, applications: List[Dict[str, Any]], 
-                        app_name: str, job_id: str = None) -> Dict[str, Any]:
-    """Enhanced generate_all_formats with template support and professional PDF"""
+                        app_name: str, job_id: str = None,
+                        drawio_gen: Optional[EnhancedDrawIOGenerator] = None,
+                        layout: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Enhanced generate_all_formats with template support and professional PDF
+    
+    Batch callers pass a shared ``drawio_gen`` (templates already loaded) and
+    may pass a precomputed ``layout``; otherwise both are created here and the
+    layout is computed once for all formats.
+    """
     
     try:
         if not job_id:
@@ -1191,6 +1211,7 @@ def generate_all_formats(archetype: str, applications: List[Dict[str, Any]],
         base_results_dir = Path("results")
         lucid_dir = base_results_dir / "lucid"
         pdf_dir = base_results_dir / "pdf"
+        document_dir = base_results_dir / "document"
         
         lucid_dir.mkdir(parents=True, exist_ok=True)
         pdf_dir.mkdir(parents=True, exist_ok=True)
@@ -1198,10 +1219,14 @@ def generate_all_formats(archetype: str, applications: List[Dict[str, Any]],
         generated_files = []
         drawio_file = None
         
+        if drawio_gen is None:
+            drawio_gen = EnhancedDrawIOGenerator()
+        if layout is None:
+            layout = drawio_gen._generate_layout_for_archetype(archetype, applications)
+        
         # Generate Draw.io file using enhanced generator
         try:
-            drawio_gen = EnhancedDrawIOGenerator()
-            drawio_file = drawio_gen.generate_drawio_file(archetype, applications, clean_app_name, job_id)
+            drawio_file = drawio_gen.generate_drawio_file(archetype, applications, clean_app_name, job_id, layout)
             generated_files.append({
                 "format": "drawio",
                 "path": str(drawio_file),
@@ -1216,8 +1241,6 @@ def generate_all_formats(archetype: str, applications: List[Dict[str, Any]],
         
         # Generate LucidChart CSV files
         try:
-            # Use basic layout for CSV generation
-            layout = drawio_gen._generate_layout_for_archetype(archetype, applications)
             csv_gen = LucidChartCSVGenerator()
             csv_files = csv_gen.generate_csv_files(layout, clean_app_name, job_id, lucid_dir)
             
@@ -1237,14 +1260,13 @@ def generate_all_formats(archetype: str, applications: List[Dict[str, Any]],
         high_quality_pdf = None
         if drawio_file and PLAYWRIGHT_AVAILABLE:
             try:
-                # Run the async PDF generation
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
+                try:
+                    asyncio.get_running_loop()
                     logger.info("Scheduling high-quality PDF generation...")
-                else:
-                    high_quality_pdf = loop.run_until_complete(
-                        generate_high_quality_pdf(drawio_file, pdf_dir, job_id)
-                    )
+                except RuntimeError:
+                    # Synchronous caller: convert on the converter's long-lived loop and warm page pool
+                    result_path = convert_drawio_to_pdf_sync(str(drawio_file), str(pdf_dir / f"{drawio_file.stem}.pdf"))
+                    high_quality_pdf = Path(result_path) if result_path else None
                     
                 if high_quality_pdf:
                     generated_files.append({
@@ -1265,7 +1287,6 @@ def generate_all_formats(archetype: str, applications: List[Dict[str, Any]],
         if not high_quality_pdf:
             try:
                 pdf_gen = PDFGenerator()
-                layout = drawio_gen._generate_layout_for_archetype(archetype, applications)
                 fallback_pdf = pdf_gen.generate_pdf_fallback(layout, archetype, clean_app_name, job_id, pdf_dir)
                 
                 generated_files.append({
@@ -1284,10 +1305,8 @@ def generate_all_formats(archetype: str, applications: List[Dict[str, Any]],
         # Generate Word Document
         try:
             word_gen = WordDocumentGenerator()
-            layout = drawio_gen._generate_layout_for_archetype(archetype, applications)
             
             # Create document directory
-            document_dir = base_results_dir / "document"
             document_dir.mkdir(parents=True, exist_ok=True)
             
             word_file = word_gen.generate_word_document(layout, archetype, clean_app_name, job_id, document_dir)
@@ -1342,6 +1361,244 @@ def generate_all_formats(archetype: str, applications: List[Dict[str, Any]],
         }
 
 
+# =================== PORTFOLIO BATCH GENERATION ===================
+
+PORTFOLIO_BATCH_CONFIG = {
+    "max_workers": int(os.getenv("PORTFOLIO_DIAGRAM_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    "chunk_size": int(os.getenv("PORTFOLIO_DIAGRAM_CHUNK_SIZE", "25")),
+    "manifest_path": os.getenv("PORTFOLIO_DIAGRAM_MANIFEST", "results/portfolio/manifest.json"),
+    # A pooled batch in which no chunk finishes for this long is treated as hung:
+    # the unfinished chunks are marked failed and the worker processes killed
+    "chunk_timeout_seconds": float(os.getenv("PORTFOLIO_DIAGRAM_CHUNK_TIMEOUT_SECONDS", "600"))
+}
+
+# Bump when generate_all_formats output changes so resumed batches re-render
+PRACTICAL_GENERATOR_VERSION = "1.0.0"
+
+# One generator per worker process; templates and stencils are loaded once
+_batch_drawio_gen: Optional[EnhancedDrawIOGenerator] = None
+
+
+def _init_portfolio_worker():
+    global _batch_drawio_gen
+    _batch_drawio_gen = EnhancedDrawIOGenerator()
+
+
+def _default_portfolio_applications(app_name: str) -> List[Dict[str, Any]]:
+    """Component list used when a portfolio entry has no application detail"""
+    return [
+        {"id": "web1", "name": app_name, "type": "web_application"},
+        {"id": "api1", "name": f"{app_name} API", "type": "api_service"},
+        {"id": "db1", "name": f"{app_name} DB", "type": "database"}
+    ]
+
+
+def _generate_portfolio_chunk(archetype: str, entries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Render a chunk of same-archetype apps with one generator and a shared layout cache"""
+    global _batch_drawio_gen
+    if _batch_drawio_gen is None:
+        _batch_drawio_gen = EnhancedDrawIOGenerator()
+    
+    layouts: Dict[str, Dict[str, Any]] = {}
+    results = []
+    for entry in entries:
+        try:
+            layout_key = json.dumps(entry["applications"], sort_keys=True, default=str)
+            layout = layouts.get(layout_key)
+            if layout is None:
+                layout = _batch_drawio_gen._generate_layout_for_archetype(archetype, entry["applications"])
+                layouts[layout_key] = layout
+            
+            result = generate_all_formats(
+                archetype, entry["applications"], entry["app_name"], entry["job_id"],
+                drawio_gen=_batch_drawio_gen, layout=layout
+            )
+        except Exception as e:
+            # One bad app fails on its own; the rest of the chunk still renders
+            logger.error(f"Portfolio app {entry['app_name']} failed: {e}")
+            result = {"success": False, "error": str(e)}
+        results.append({"entry": entry, "result": result})
+    return results
+
+
+def _load_portfolio_manifest(manifest_path: Path) -> Dict[str, Any]:
+    if manifest_path.exists():
+        try:
+            with open(manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable portfolio manifest {manifest_path}: {e}")
+    return {"applications": {}}
+
+
+def _write_portfolio_manifest(manifest_path: Path, manifest: Dict[str, Any]):
+    """Atomically replace the manifest so an interrupted batch can resume from it"""
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = manifest_path.with_suffix(".tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, default=str)
+    os.replace(tmp_path, manifest_path)
+
+
+def _portfolio_entry_is_current(previous: Optional[Dict[str, Any]], input_key: str) -> bool:
+    return bool(
+        previous
+        and previous.get("input_key") == input_key
+        and previous.get("status") == "completed"
+        and all(Path(f["path"]).exists() for f in previous.get("files", []))
+    )
+
+
+def _terminate_pool(pool: ProcessPoolExecutor):
+    """Kill the workers of a pool whose tasks are hung and release it without waiting"""
+    pool.shutdown(wait=False, cancel_futures=True)
+    # ProcessPoolExecutor has no public way to stop a running task before Python 3.14
+    for process in list((getattr(pool, "_processes", None) or {}).values()):
+        if process.is_alive():
+            process.terminate()
+
+
+def generate_portfolio_formats(portfolio: List[Dict[str, Any]], manifest_path: Optional[str] = None,
+                               max_workers: Optional[int] = None, force: bool = False,
+                               progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Generate practical diagram formats for a whole application portfolio.
+    
+    Each portfolio entry needs ``app_name`` and may carry ``archetype``
+    (default three_tier) and ``applications``. Apps are grouped by archetype
+    and rendered in chunks across a process pool; every worker loads the
+    templates once. Results are recorded in a single manifest keyed by app
+    name, and apps whose inputs hash to the same key as a completed manifest
+    entry (with all files still present) are skipped unless ``force`` is set.
+    
+    In the pooled path, if no chunk completes within ``chunk_timeout_seconds``
+    the remaining chunks are recorded as failed and the workers are killed,
+    so a hung render cannot hold the batch open.
+    """
+    started = time.perf_counter()
+    manifest_path = Path(manifest_path or PORTFOLIO_BATCH_CONFIG["manifest_path"])
+    max_workers = max_workers or PORTFOLIO_BATCH_CONFIG["max_workers"]
+    chunk_size = max(1, PORTFOLIO_BATCH_CONFIG["chunk_size"])
+    
+    manifest = _load_portfolio_manifest(manifest_path)
+    app_entries = manifest.setdefault("applications", {})
+    
+    pending_by_archetype: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    skipped = []
+    for item in portfolio:
+        app_name = item["app_name"]
+        archetype = item.get("archetype") or "three_tier"
+        applications = item.get("applications") or _default_portfolio_applications(app_name)
+        input_key = make_cache_key(
+            {"archetype": archetype, "applications": applications, "app_name": app_name},
+            "practical", "all", PRACTICAL_GENERATOR_VERSION
+        )
+        
+        if not force and _portfolio_entry_is_current(app_entries.get(app_name), input_key):
+            skipped.append(app_name)
+            continue
+        
+        pending_by_archetype[archetype].append({
+            "app_name": app_name,
+            "archetype": archetype,
+            "applications": applications,
+            "input_key": input_key,
+            # Stable per-input job id keeps file names identical across reruns
+            "job_id": input_key[:12]
+        })
+    
+    chunks = [
+        (archetype, entries[i:i + chunk_size])
+        for archetype, entries in pending_by_archetype.items()
+        for i in range(0, len(entries), chunk_size)
+    ]
+    total_pending = sum(len(entries) for _, entries in chunks)
+    logger.info(f"Portfolio batch: {total_pending} apps to generate in {len(chunks)} chunks, {len(skipped)} unchanged")
+    
+    generated, failed, done = [], [], 0
+    
+    def record(chunk_results: List[Dict[str, Any]]):
+        nonlocal done
+        for item in chunk_results:
+            entry, result = item["entry"], item["result"]
+            success = bool(result.get("success"))
+            app_entries[entry["app_name"]] = {
+                "archetype": entry["archetype"],
+                "input_key": entry["input_key"],
+                "job_id": entry["job_id"],
+                "status": "completed" if success else "failed",
+                "error": result.get("error"),
+                "files": [
+                    {key: f.get(key) for key in ("format", "path", "filename", "file_size")}
+                    for f in result.get("files", [])
+                ],
+                "generated_at": result.get("generated_at", datetime.now().isoformat())
+            }
+            (generated if success else failed).append(entry["app_name"])
+        done += len(chunk_results)
+        _write_portfolio_manifest(manifest_path, manifest)
+        if progress_callback:
+            progress_callback(done, total_pending)
+    
+    def chunk_failed(entries: List[Dict[str, Any]], error: Exception) -> List[Dict[str, Any]]:
+        logger.error(f"Portfolio chunk of {len(entries)} apps failed: {error}")
+        return [{"entry": entry, "result": {"success": False, "error": str(error)}} for entry in entries]
+    
+    if chunks and max_workers > 1 and len(chunks) > 1:
+        chunk_timeout = PORTFOLIO_BATCH_CONFIG["chunk_timeout_seconds"]
+        pool = ProcessPoolExecutor(max_workers=min(max_workers, len(chunks)),
+                                   initializer=_init_portfolio_worker)
+        hung = False
+        try:
+            futures = {pool.submit(_generate_portfolio_chunk, archetype, entries): entries
+                       for archetype, entries in chunks}
+            pending = set(futures)
+            while pending:
+                finished, pending = wait(pending, timeout=chunk_timeout, return_when=FIRST_COMPLETED)
+                if not finished:
+                    hung = True
+                    error = TimeoutError(f"no portfolio chunk finished within {chunk_timeout}s")
+                    for future in pending:
+                        record(chunk_failed(futures[future], error))
+                    break
+                for future in finished:
+                    try:
+                        record(future.result())
+                    except Exception as e:
+                        record(chunk_failed(futures[future], e))
+        finally:
+            if hung:
+                _terminate_pool(pool)
+            else:
+                pool.shutdown(wait=True)
+    else:
+        for archetype, entries in chunks:
+            try:
+                record(_generate_portfolio_chunk(archetype, entries))
+            except Exception as e:
+                record(chunk_failed(entries, e))
+    
+    manifest["last_run"] = {
+        "completed_at": datetime.now().isoformat(),
+        "requested": len(portfolio),
+        "generated": len(generated),
+        "skipped": len(skipped),
+        "failed": len(failed),
+        "duration_seconds": round(time.perf_counter() - started, 2),
+        "generator_version": PRACTICAL_GENERATOR_VERSION
+    }
+    _write_portfolio_manifest(manifest_path, manifest)
+    
+    return {
+        "success": not failed,
+        "manifest_path": str(manifest_path),
+        **manifest["last_run"],
+        "generated_apps": generated,
+        "skipped_apps": skipped,
+        "failed_apps": failed
+    }
+
+
 # Test function for the enhanced system
 def test_banking_style_generation():
     """Test the enhanced banking-style diagram generation"""
@@ -0,0 +1,135 @@
+"""
+Format render pool
+Runs the per-format renderers of ProfessionalDiagramService (Visio, Lucid,
+Word, Excel, PDF) in worker processes so their CPU work and blocking file
+writes stay off the event loop. Each render has its own timeout; a timed-out
+render is reported as such while the worker finishes in the background.
+"""
+
+import asyncio
+import importlib
+import logging
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+RENDER_POOL_CONFIG = {
+    "max_workers": int(os.getenv("RENDER_POOL_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    "format_timeout_seconds": float(os.getenv("RENDER_FORMAT_TIMEOUT_SECONDS", "60")),
+    "use_processes": os.getenv("RENDER_POOL_USE_PROCESSES", "true").lower() == "true"
+}
+
+# Worker-local service instances, keyed by (module, quality level)
+_worker_services: Dict[tuple, Any] = {}
+
+
+def render_format(module_name: str, quality_level: str, method_name: str, diagram: Dict[str, Any],
+                  job_id: str, config: Dict[str, Any], app_id: str, base_dir: str) -> Optional[Dict[str, Any]]:
+    """
+    Worker entry point: run one ``_render_*_output`` method of the
+    ProfessionalDiagramService defined in ``module_name`` and return its output
+    description. Module level so it can be pickled for the process pool.
+    """
+    service = _worker_services.get((module_name, quality_level))
+    if service is None:
+        module = importlib.import_module(module_name)
+        service = module.ProfessionalDiagramService(
+            quality_level=module.ProfessionalQualityLevel(quality_level)
+        )
+        _worker_services[(module_name, quality_level)] = service
+
+    render = getattr(service, method_name)
+    return asyncio.run(render(diagram, job_id, config, app_id, Path(base_dir)))
+
+
+class RenderPool:
+    """Process pool with per-format timeouts and timing counters"""
+
+    def __init__(self, max_workers: Optional[int] = None, format_timeout: Optional[float] = None,
+                 use_processes: Optional[bool] = None):
+        self.max_workers = max(1, max_workers or RENDER_POOL_CONFIG["max_workers"])
+        self.format_timeout = format_timeout or RENDER_POOL_CONFIG["format_timeout_seconds"]
+        self.use_processes = RENDER_POOL_CONFIG["use_processes"] if use_processes is None else use_processes
+        self._executor: Optional[Executor] = None
+        self.in_flight = 0
+        self.stats = {"submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "pool_restarts": 0}
+        # format -> [renders, total seconds, max seconds]
+        self._format_times: Dict[str, list] = {}
+
+    def _ensure_started(self) -> Executor:
+        if self._executor is None:
+            if self.use_processes:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="render")
+        return self._executor
+
+    async def render(self, module_name: str, quality_level: str, output_format: str, method_name: str,
+                     diagram: Dict[str, Any], job_id: str, config: Dict[str, Any], app_id: str,
+                     base_dir: Path, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Render one format in the pool. Raises ``asyncio.TimeoutError`` when the
+        render exceeds its timeout and re-raises renderer exceptions.
+        """
+        executor = self._ensure_started()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        self.stats["submitted"] += 1
+        self.in_flight += 1
+        try:
+            future = loop.run_in_executor(
+                executor, render_format,
+                module_name, quality_level, method_name, diagram, job_id, config, app_id, str(base_dir)
+            )
+            output = await asyncio.wait_for(future, timeout=timeout or self.format_timeout)
+        except asyncio.TimeoutError:
+            self.stats["timeouts"] += 1
+            logger.error(f"Rendering {output_format} for {app_id} timed out after {timeout or self.format_timeout}s")
+            raise
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); start a fresh pool for the next render
+            self.stats["failed"] += 1
+            self.stats["pool_restarts"] += 1
+            self.shutdown()
+            raise
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        elapsed = time.perf_counter() - started
+        self.stats["completed"] += 1
+        times = self._format_times.setdefault(output_format, [0, 0.0, 0.0])
+        times[0] += 1
+        times[1] += elapsed
+        times[2] = max(times[2], elapsed)
+        return output
+
+    def get_metrics(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_workers": self.max_workers,
+            "use_processes": self.use_processes,
+            "format_timeout_seconds": self.format_timeout,
+            "in_flight": self.in_flight,
+            "format_seconds": {
+                fmt: {"renders": n, "avg": round(total / n, 3), "max": round(peak, 3)}
+                for fmt, (n, total, peak) in self._format_times.items()
+            }
+        }
+
+    def shutdown(self):
+        """Stop worker processes (called on application shutdown)"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+# Shared pool for the document generators
+render_pool = RenderPool()
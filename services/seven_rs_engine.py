@@ -0,0 +1,507 @@
+"""
+Batch 7R's strategy analysis
+Scores every application in a portfolio against all seven migration
+strategies in one vectorized pass. Each application's archetype, complexity,
+business criticality, cloud readiness, compliance scope and dependency count
+index small fit/risk tables, and the business case per strategy comes from the
+unit-cost tables of the portfolio cost engine (services/cost_engine.py), so a
+portfolio of thousands of applications is scored as a handful of [n, 7] array
+operations.
+
+Results are persisted per application together with their scoring inputs and
+a fingerprint of the inputs and model (weights, horizon, MODEL_VERSION) that
+produced them; a re-run only rescores applications whose inputs changed, and
+a run under a different model also rescores the stored applications it did
+not submit, so the whole stored table is always ranked under one model. The
+result database is opened on first use.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from services.cost_engine import (
+    COMPLEXITIES, COMPLEXITY_MULTIPLIERS, CONTINGENCY_RATES, DEFAULT_RI_COVERAGE, NETWORK_OPTIMIZATION_FACTOR,
+    STORAGE_TIERING_FACTOR, STRATEGIES, PortfolioCostModel, _archetype_classes
+)
+from services.cost_service import AWSCostFactors
+
+logger = logging.getLogger(__name__)
+
+SEVEN_RS_CONFIG = {
+    "results_path": os.getenv("SEVEN_RS_RESULTS_PATH", "data_staging/seven_rs_results.sqlite"),
+    "time_horizon_years": int(os.getenv("SEVEN_RS_TIME_HORIZON_YEARS", "3"))
+}
+
+# Bump when the tables below change so stored results are rescored
+MODEL_VERSION = "1"
+
+DEFAULT_CRITERIA_WEIGHTS = {"fit": 0.5, "value": 0.35, "risk": 0.15}
+
+CRITICALITIES = ("low", "medium", "high", "critical")
+# First matching keyword wins, in this order; "other" when none match
+FIT_ARCHETYPES = ("other", "microservices", "web + api", "3-tier", "soa", "event-driven", "monolithic",
+                  "client-server")
+
+# Columns follow STRATEGIES: rehost, replatform, refactor, retire, retain, repurchase, relocate
+ARCHETYPE_FIT = np.array([
+    [0.60, 0.50, 0.30, 0.10, 0.40, 0.30, 0.40],   # other
+    [0.50, 0.90, 0.40, 0.05, 0.30, 0.20, 0.40],   # microservices
+    [0.80, 0.60, 0.40, 0.10, 0.30, 0.30, 0.50],   # web + api
+    [0.60, 0.80, 0.50, 0.10, 0.30, 0.30, 0.40],   # 3-tier
+    [0.40, 0.60, 0.80, 0.10, 0.40, 0.40, 0.30],   # soa
+    [0.40, 0.80, 0.60, 0.05, 0.30, 0.20, 0.30],   # event-driven
+    [0.40, 0.50, 0.80, 0.10, 0.50, 0.50, 0.30],   # monolithic
+    [0.30, 0.30, 0.30, 0.80, 0.30, 0.60, 0.20]    # client-server
+])
+COMPLEXITY_FIT = np.array([
+    [0.10, 0.05, 0.00, 0.00, -0.10, 0.00, 0.05],  # low
+    [0.00, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00],   # medium
+    [-0.05, -0.05, -0.10, 0.00, 0.10, 0.05, 0.00],  # high
+    [-0.10, -0.10, -0.20, 0.00, 0.20, 0.10, 0.00]   # very_high
+])
+CRITICALITY_FIT = np.array([
+    [0.00, 0.00, -0.05, 0.15, -0.05, 0.05, 0.00],  # low
+    [0.00, 0.00, 0.00, 0.00, 0.00, 0.00, 0.00],    # medium
+    [0.00, 0.00, 0.00, -0.15, 0.05, 0.00, 0.00],   # high
+    [-0.05, 0.00, 0.00, -0.80, 0.10, -0.05, 0.00]  # critical
+])
+CLOUD_READY_FIT = np.array([0.10, 0.10, 0.05, 0.00, -0.10, 0.00, 0.05])
+# Per compliance framework and per dependency, up to MAX_COUNTED of each
+COMPLIANCE_FIT = np.array([0.00, 0.00, -0.02, 0.00, 0.03, -0.03, 0.00])
+DEPENDENCY_FIT = np.array([0.00, 0.00, -0.02, -0.05, 0.00, -0.03, 0.00])
+MAX_COUNTED = 5
+
+STRATEGY_RISK = np.array([0.20, 0.35, 0.60, 0.30, 0.10, 0.45, 0.15])
+COMPLEXITY_RISK_FACTORS = np.array([0.8, 1.0, 1.25, 1.5])
+CRITICALITY_RISK_FACTORS = np.array([0.9, 1.0, 1.15, 1.3])
+
+STRATEGY_WEEKS = np.array([6, 10, 20, 4, 1, 12, 4], dtype=float)
+EFFORT_LEVELS = ("low", "medium", "high", "very_high")
+EFFORT_WEEK_LIMITS = (6, 12, 24)
+
+RETAIN = STRATEGIES.index("retain")
+RETIRE = STRATEGIES.index("retire")
+RELOCATE = STRATEGIES.index("relocate")
+REPURCHASE = STRATEGIES.index("repurchase")
+
+# Inputs that decide an application's result; a change in any of them triggers a rescore
+FINGERPRINT_FIELDS = ("archetype", "complexity", "business_criticality", "cloud_ready",
+                      "compliance_count", "dependency_count")
+# Descriptive inputs copied into the stored row; a change rewrites the row so it is not stale
+DESCRIPTIVE_FIELDS = ("application_name", "current_strategy")
+
+# Result columns, in table order; one SQLite column each. The scoring inputs are
+# kept so stored applications can be rescored when the model changes
+RESULT_COLUMNS = (
+    "application_id", "application_name", "archetype", "complexity", "business_criticality",
+    "cloud_ready", "compliance_count", "dependency_count",
+    "current_strategy", "recommended_strategy", "score", "runner_up_strategy", "score_margin", "fit", "risk",
+    "estimated_cost", "current_annual_cost", "target_annual_cost", "annual_savings", "net_benefit",
+    "roi_percentage", "payback_period_months", "timeline_weeks", "effort_estimate", "time_horizon_years",
+    "strategy_changed", *(f"score_{strategy}" for strategy in STRATEGIES), "fingerprint"
+)
+INPUT_COLUMNS = ("application_id", "application_name", *FINGERPRINT_FIELDS, "current_strategy")
+# Leading characters of a fingerprint that identify the scoring model
+MODEL_HASH_LENGTH = 16
+
+
+def _codes(values: pd.Series, categories: Iterable[str], default: str) -> np.ndarray:
+    """Lower-cased category codes, with unknown values coded as ``default``"""
+    categories = tuple(categories)
+    codes = pd.Categorical(values.fillna(default).astype(str).str.lower().str.replace(" ", "_"),
+                           categories=categories).codes.astype(np.int64)
+    return np.where(codes >= 0, codes, categories.index(default))
+
+
+def _fit_archetypes(archetypes: pd.Series) -> np.ndarray:
+    lowered = archetypes.fillna("").astype(str).str.lower()
+    conditions = [lowered.str.contains(keyword, regex=False).values for keyword in FIT_ARCHETYPES[1:]]
+    return np.select(conditions, list(range(1, len(FIT_ARCHETYPES))), default=0)
+
+
+def _count(value: Any) -> int:
+    if isinstance(value, (list, tuple, set)):
+        return len(value)
+    return int(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else 0
+
+
+def normalize_applications(applications: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    One row of scoring inputs per application. Accepts portfolio records
+    (id, name, archetype, compliance, dependencies) and the router's
+    ApplicationInfo shape (application_id, application_name,
+    current_archetype, compliance_requirements).
+    """
+    rows = []
+    for i, app in enumerate(applications):
+        app_id = app.get("id") or app.get("application_id") or f"APP_{i:05d}"
+        rows.append({
+            "application_id": str(app_id),
+            "application_name": app.get("name") or app.get("application_name") or str(app_id),
+            "archetype": app.get("archetype") or app.get("current_archetype") or "",
+            "complexity": str(app.get("complexity") or "medium").lower(),
+            "business_criticality": str(app.get("business_criticality") or "medium").lower(),
+            "cloud_ready": bool(app.get("cloud_ready", False)),
+            "compliance_count": _count(app.get("compliance", app.get("compliance_requirements"))),
+            "dependency_count": _count(app.get("dependencies")),
+            "current_strategy": str(app.get("strategy") or "").lower()
+        })
+    frame = pd.DataFrame(rows, columns=list(INPUT_COLUMNS))
+    # The first record wins for duplicate ids, as in the portfolio store
+    return frame.drop_duplicates("application_id").reset_index(drop=True)
+
+
+class SevenRsResultStore:
+    """SQLite table of per-application results keyed by application id, with input fingerprints"""
+
+    def __init__(self, db_path: str = ':memory:'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The database connection, opened on first use (callers hold the lock)"""
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+
+    def _open(self) -> sqlite3.Connection:
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        existing = [row[1] for row in conn.execute('PRAGMA table_info(recommendations)')]
+        if existing and existing != [*RESULT_COLUMNS, "analyzed_epoch"]:
+            # Results from an older layout cannot be rescored; the next full run rebuilds them
+            logger.warning("Dropping 7R's results stored in an older table layout")
+            conn.execute('DROP TABLE recommendations')
+        columns = ", ".join(f'"{column}"' for column in RESULT_COLUMNS[1:])
+        conn.execute(f"""
+            CREATE TABLE IF NOT EXISTS recommendations (
+                application_id TEXT PRIMARY KEY,
+                {columns},
+                analyzed_epoch REAL NOT NULL
+            )
+        """)
+        return conn
+
+    def fingerprints(self) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._conn.execute('SELECT application_id, fingerprint FROM recommendations'))
+
+    def upsert(self, results: pd.DataFrame):
+        """Insert or replace scored rows (``SevenRsAnalyzer.score`` output)"""
+        if results.empty:
+            return
+        frame = results.loc[:, list(RESULT_COLUMNS)].astype(object).assign(analyzed_epoch=time.time())
+        placeholders = ", ".join("?" * len(frame.columns))
+        columns = ", ".join(f'"{column}"' for column in frame.columns)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.executemany(
+                    f'INSERT OR REPLACE INTO recommendations ({columns}) VALUES ({placeholders})',
+                    frame.itertuples(index=False, name=None))
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+
+    def inputs(self, application_ids: Iterable[str]) -> pd.DataFrame:
+        """Stored scoring inputs of the given applications, in ``normalize_applications`` shape"""
+        columns = ", ".join(f'"{column}"' for column in INPUT_COLUMNS)
+        with self._lock:
+            frame = pd.read_sql_query(f'SELECT {columns} FROM recommendations', self._conn)
+        frame = frame[frame["application_id"].isin(set(application_ids))].reset_index(drop=True)
+        return frame.astype({"cloud_ready": bool, "compliance_count": int, "dependency_count": int})
+
+    def delete(self, application_ids: Iterable[str]) -> int:
+        ids = [(app_id,) for app_id in application_ids]
+        with self._lock:
+            return self._conn.executemany('DELETE FROM recommendations WHERE application_id = ?', ids).rowcount
+
+    def load(self) -> pd.DataFrame:
+        """Every stored result, without the bookkeeping columns"""
+        with self._lock:
+            frame = pd.read_sql_query('SELECT * FROM recommendations', self._conn)
+        frame = frame.astype({"strategy_changed": bool, "cloud_ready": bool})
+        return frame.drop(columns=["fingerprint", "analyzed_epoch"])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM recommendations').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+class SevenRsAnalyzer:
+    """Vectorized 7R's scoring, ranking and business case over a portfolio"""
+
+    def __init__(self, store: Optional[SevenRsResultStore] = None, aws_factors: Any = None):
+        self.store = store
+        self.aws_factors = aws_factors or AWSCostFactors()
+        self.cost_model = PortfolioCostModel(self.aws_factors)
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------ scoring
+
+    @staticmethod
+    def _weights(criteria_weights: Optional[Dict[str, float]]) -> Dict[str, float]:
+        weights = dict(DEFAULT_CRITERIA_WEIGHTS)
+        for key, value in (criteria_weights or {}).items():
+            if key not in weights:
+                raise ValueError(f"Unknown criteria weight '{key}'; expected one of {sorted(weights)}")
+            if float(value) < 0:
+                raise ValueError(f"Criteria weight '{key}' must not be negative")
+            weights[key] = float(value)
+        if sum(weights.values()) <= 0:
+            raise ValueError("At least one criteria weight must be positive")
+        return weights
+
+    @staticmethod
+    def _horizon(time_horizon_years: Optional[int]) -> int:
+        if time_horizon_years is None:
+            return SEVEN_RS_CONFIG["time_horizon_years"]
+        if int(time_horizon_years) < 1:
+            raise ValueError("time_horizon_years must be at least 1")
+        return int(time_horizon_years)
+
+    @staticmethod
+    def _model_hash(weights: Dict[str, float], years: int) -> str:
+        model_key = json.dumps([MODEL_VERSION, sorted(weights.items()), years])
+        return hashlib.sha1(model_key.encode("utf-8")).hexdigest()[:MODEL_HASH_LENGTH]
+
+    @classmethod
+    def _fingerprints(cls, inputs: pd.DataFrame, weights: Dict[str, float], years: int) -> List[str]:
+        fields = [*FINGERPRINT_FIELDS, *DESCRIPTIVE_FIELDS]
+        hashed = pd.util.hash_pandas_object(inputs.loc[:, fields].astype(str), index=False)
+        model_hash = cls._model_hash(weights, years)
+        return [f"{model_hash}{value:016x}" for value in hashed.to_numpy()]
+
+    def _run_costs(self, complexity: np.ndarray, cost_class: np.ndarray) -> Dict[str, np.ndarray]:
+        """Per-application [n, 7] migration cost and annual run cost after each strategy"""
+        migration = self.cost_model.migration_unit[:, complexity, cost_class].sum(axis=2).T
+        migration = migration * (1 + CONTINGENCY_RATES["phased"])
+        current = self.cost_model.current_unit[complexity, cost_class].sum(axis=1)
+
+        aws = self.cost_model.aws_unit[:, complexity, cost_class].copy()          # [7, n, category]
+        discount = self.aws_factors.reserved_instance_discount
+        aws[:, :, 0] *= DEFAULT_RI_COVERAGE * (1 - discount) + (1 - DEFAULT_RI_COVERAGE)
+        aws[:, :, 1] *= STORAGE_TIERING_FACTOR
+        aws[:, :, 2] *= NETWORK_OPTIMIZATION_FACTOR
+        target = aws.sum(axis=2).T
+        # Retained applications keep their current cost; retired ones stop costing anything.
+        # The cost engine prices no compute for relocate and repurchase, which would make
+        # them look free to run: relocated VMs cost what rehosted ones do, and a SaaS
+        # replacement is priced like the replatformed (managed) footprint
+        target[:, RETAIN] = current
+        target[:, RETIRE] = 0.0
+        target[:, RELOCATE] = target[:, STRATEGIES.index("rehost")]
+        target[:, REPURCHASE] = target[:, STRATEGIES.index("replatform")]
+        return {"migration": migration, "current": current, "target": target}
+
+    def score(self, applications: List[Dict[str, Any]], criteria_weights: Optional[Dict[str, float]] = None,
+              time_horizon_years: Optional[int] = None) -> pd.DataFrame:
+        """
+        Score applications against all seven strategies. Returns one row per
+        application with the recommended strategy, its business case figures,
+        the runner-up and a ``score_<strategy>`` column per strategy.
+        """
+        return self._score_inputs(normalize_applications(applications), self._weights(criteria_weights),
+                                  self._horizon(time_horizon_years))
+
+    def _score_inputs(self, inputs: pd.DataFrame, weights: Dict[str, float], years: int) -> pd.DataFrame:
+        n = len(inputs)
+
+        complexity = _codes(inputs["complexity"], COMPLEXITIES, "medium")
+        criticality = _codes(inputs["business_criticality"], CRITICALITIES, "medium")
+        archetype = _fit_archetypes(inputs["archetype"])
+        cost_class = _archetype_classes(inputs["archetype"]).astype(np.int64)
+        compliance = np.minimum(inputs["compliance_count"].to_numpy(dtype=float), MAX_COUNTED)
+        dependencies = np.minimum(inputs["dependency_count"].to_numpy(dtype=float), MAX_COUNTED)
+        cloud_ready = inputs["cloud_ready"].to_numpy(dtype=float)
+
+        fit = (ARCHETYPE_FIT[archetype] + COMPLEXITY_FIT[complexity] + CRITICALITY_FIT[criticality]
+               + cloud_ready[:, None] * CLOUD_READY_FIT
+               + compliance[:, None] * COMPLIANCE_FIT + dependencies[:, None] * DEPENDENCY_FIT)
+        fit = np.clip(fit, 0.0, 1.0)
+
+        risk = np.clip(STRATEGY_RISK[None, :] * COMPLEXITY_RISK_FACTORS[complexity, None]
+                       * CRITICALITY_RISK_FACTORS[criticality, None], 0.0, 1.0)
+
+        costs = self._run_costs(complexity, cost_class)
+        annual_savings = costs["current"][:, None] - costs["target"]
+        net_benefit = annual_savings * years - costs["migration"]
+        # Value compares the strategies of one application: best net benefit 1, worst 0
+        low = net_benefit.min(axis=1, keepdims=True) if n else net_benefit
+        spread = (net_benefit.max(axis=1, keepdims=True) - low) if n else net_benefit
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value = np.where(spread > 0, (net_benefit - low) / spread, 0.5)
+
+        total = sum(weights.values())
+        score = (weights["fit"] * fit + weights["value"] * value - weights["risk"] * risk) / total
+
+        order = np.argsort(-score, axis=1, kind="stable")
+        best, second = (order[:, 0], order[:, 1]) if n else (np.zeros(0, int), np.zeros(0, int))
+        rows = np.arange(n)
+        migration_cost = costs["migration"][rows, best]
+        savings = annual_savings[rows, best]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            roi = np.where(migration_cost > 0, net_benefit[rows, best] / migration_cost * 100, 0.0)
+            payback = np.where(savings > 0, migration_cost / savings * 12, np.inf)
+        weeks = np.ceil(STRATEGY_WEEKS[best] * np.array(COMPLEXITY_MULTIPLIERS)[complexity]).astype(int)
+
+        strategies = np.array(STRATEGIES)
+        results = pd.DataFrame({
+            "application_id": inputs["application_id"],
+            "application_name": inputs["application_name"],
+            "archetype": inputs["archetype"],
+            "complexity": np.array(COMPLEXITIES)[complexity],
+            "business_criticality": np.array(CRITICALITIES)[criticality],
+            "cloud_ready": inputs["cloud_ready"].astype(bool),
+            "compliance_count": inputs["compliance_count"].astype(int),
+            "dependency_count": inputs["dependency_count"].astype(int),
+            "current_strategy": inputs["current_strategy"],
+            "recommended_strategy": strategies[best],
+            "score": score[rows, best].round(4),
+            "runner_up_strategy": strategies[second],
+            "score_margin": (score[rows, best] - score[rows, second]).round(4),
+            "fit": fit[rows, best].round(4),
+            "risk": risk[rows, best].round(4),
+            "estimated_cost": migration_cost.round(2),
+            "current_annual_cost": costs["current"].round(2),
+            "target_annual_cost": costs["target"][rows, best].round(2),
+            "annual_savings": savings.round(2),
+            "net_benefit": net_benefit[rows, best].round(2),
+            "roi_percentage": roi.round(2),
+            "payback_period_months": np.minimum(payback, 999).round(1),
+            "timeline_weeks": weeks,
+            "effort_estimate": np.array(EFFORT_LEVELS)[np.searchsorted(EFFORT_WEEK_LIMITS, weeks)],
+            "time_horizon_years": years
+        })
+        results["strategy_changed"] = (results["current_strategy"] != "") & (
+            results["current_strategy"] != results["recommended_strategy"])
+        for j, strategy in enumerate(STRATEGIES):
+            results[f"score_{strategy}"] = score[:, j].round(4)
+        results["fingerprint"] = self._fingerprints(inputs, weights, years)
+        return results
+
+    # ------------------------------------------------------------ ranking and business case
+
+    @staticmethod
+    def rank(results: pd.DataFrame) -> pd.DataFrame:
+        """Portfolio ranking: best score first, ties by net benefit; priority by thirds of the ranking"""
+        if results.empty:
+            return results.assign(rank=pd.Series(dtype=int), priority=pd.Series(dtype=str))
+        ranked = results.sort_values(["score", "net_benefit", "application_id"],
+                                     ascending=[False, False, True], kind="stable").reset_index(drop=True)
+        ranked["rank"] = np.arange(1, len(ranked) + 1)
+        thirds = np.minimum((np.arange(len(ranked)) * 3) // len(ranked), 2)
+        ranked["priority"] = np.array(["high", "medium", "low"])[thirds]
+        return ranked
+
+    @staticmethod
+    def business_case(results: pd.DataFrame) -> List[Dict[str, Any]]:
+        """Aggregated business case per recommended strategy, in the router's BusinessCase shape"""
+        if results.empty:
+            return []
+        grouped = results.groupby("recommended_strategy", sort=False).agg(
+            application_count=("application_id", "size"),
+            total_cost=("estimated_cost", "sum"),
+            annual_savings=("annual_savings", "sum"),
+            net_benefit=("net_benefit", "sum"),
+            average_score=("score", "mean"),
+            timeline_weeks=("timeline_weeks", "max")
+        )
+        with np.errstate(divide="ignore", invalid="ignore"):
+            grouped["roi_percentage"] = np.where(grouped["total_cost"] > 0,
+                                                 grouped["net_benefit"] / grouped["total_cost"] * 100, 0.0)
+            grouped["payback_period_months"] = np.where(grouped["annual_savings"] > 0,
+                                                        grouped["total_cost"] / grouped["annual_savings"] * 12,
+                                                        999)
+        grouped = grouped.round(2).reindex([s for s in STRATEGIES if s in grouped.index])
+        grouped["application_count"] = grouped["application_count"].astype(int)
+        grouped["timeline_weeks"] = grouped["timeline_weeks"].astype(int)
+        return [{"strategy": strategy, **record}
+                for strategy, record in zip(grouped.index, grouped.to_dict("records"))]
+
+    # ------------------------------------------------------------ incremental batch runs
+
+    def run_batch(self, applications: List[Dict[str, Any]], criteria_weights: Optional[Dict[str, float]] = None,
+                  time_horizon_years: Optional[int] = None, full_rerun: bool = False,
+                  prune_missing: bool = False) -> Dict[str, Any]:
+        """
+        Score the applications whose inputs changed since the stored run (all
+        of them with ``full_rerun``), persist them, and return a summary with
+        the re-ranked business case over everything stored. ``prune_missing``
+        drops stored applications that are not in ``applications``. Stored
+        applications that were not submitted but were scored under different
+        weights, horizon or model version are rescored from their stored
+        inputs, so the ranking never mixes models.
+        """
+        if self.store is None:
+            raise RuntimeError("SevenRsAnalyzer needs a result store for batch runs")
+        weights, years = self._weights(criteria_weights), self._horizon(time_horizon_years)
+        model_hash = self._model_hash(weights, years)
+        started = time.perf_counter()
+        with self._lock:
+            results = self._score_inputs(normalize_applications(applications), weights, years)
+            stored = self.store.fingerprints()
+            changed = results[[full_rerun or stored.get(app_id) != fp
+                               for app_id, fp in zip(results["application_id"], results["fingerprint"])]]
+            self.store.upsert(changed)
+            current = set(results["application_id"])
+            removed = 0
+            if prune_missing:
+                removed = self.store.delete([app_id for app_id in stored if app_id not in current])
+            stale = [app_id for app_id, fp in stored.items() if app_id not in current and not prune_missing
+                     and (full_rerun or fp[:MODEL_HASH_LENGTH] != model_hash)]
+            if stale:
+                self.store.upsert(self._score_inputs(self.store.inputs(stale), weights, years))
+            table = self.rank(self.store.load())
+
+        return {
+            "applications_submitted": len(results),
+            "applications_rescored": len(changed),
+            "applications_reused": len(results) - len(changed),
+            "applications_removed": removed,
+            "stored_applications_rescored": len(stale),
+            "applications_stored": len(table),
+            "criteria_weights": weights,
+            "time_horizon_years": years,
+            "strategy_distribution": table["recommended_strategy"].value_counts().to_dict() if len(table) else {},
+            "business_case": self.business_case(table),
+            "processing_seconds": round(time.perf_counter() - started, 4)
+        }
+
+    def recommendations(self, strategy: Optional[str] = None, priority: Optional[str] = None,
+                        limit: Optional[int] = None, offset: int = 0) -> Dict[str, Any]:
+        """Page of the ranked recommendation table from the stored results"""
+        table = self.rank(self.store.load()) if self.store is not None else self.rank(pd.DataFrame())
+        if strategy and len(table):
+            table = table[table["recommended_strategy"] == strategy.lower()]
+        if priority and len(table):
+            table = table[table["priority"] == priority.lower()]
+        total = len(table)
+        page = table.iloc[offset:offset + limit] if limit else table.iloc[offset:]
+        return {"total": total, "recommendations": page.to_dict("records")}
+
+
+# Shared analyzer for the 7R's router, persisting to data_staging
+seven_rs_analyzer = SevenRsAnalyzer(store=SevenRsResultStore(SEVEN_RS_CONFIG["results_path"]))
@@ -0,0 +1,284 @@
+"""
+Auth token store
+Bearer tokens issued by routers/auth.py live in a local SQLite database, so
+they survive restarts and every uvicorn worker sharing the file accepts them.
+Only a SHA-256 digest of each token is stored and used as the lookup key,
+which keeps lookups independent of how much of a guessed token is right.
+Recently verified tokens are served from a small in-process LRU, and an expiry
+heap lets a background sweeper drop expired tokens without scanning. The
+database is opened on first use, and async callers use the ``*_async``
+methods, which run the SQLite work in a thread.
+"""
+
+import asyncio
+import hashlib
+import heapq
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOKEN_STORE_CONFIG = {
+    "db_path": os.getenv("AUTH_TOKEN_STORE_PATH", "data_staging/auth_tokens.sqlite"),
+    "cache_size": int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000")),
+    # How long a cached token is trusted before re-reading it, so a logout in
+    # another worker takes effect within this many seconds
+    "cache_ttl_seconds": float(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", "5")),
+    "sweep_interval_seconds": float(os.getenv("AUTH_TOKEN_SWEEP_INTERVAL_SECONDS", "30")),
+    # last_used is written back at most this often per token
+    "touch_interval_seconds": float(os.getenv("AUTH_TOKEN_TOUCH_INTERVAL_SECONDS", "60"))
+}
+
+
+def token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenStore:
+    """
+    SQLite-backed bearer token store with an LRU cache and an expiry heap.
+
+    Records are ``{"username", "roles", "created_at", "last_used",
+    "expires_at"}`` with epoch-second timestamps, keyed by token digest.
+    """
+
+    def __init__(self, db_path: str = ':memory:', cache_size: int = 10000, cache_ttl_seconds: float = 5,
+                 sweep_interval_seconds: float = 30, touch_interval_seconds: float = 60):
+        self.db_path = db_path
+        self.cache_size = max(1, cache_size)
+        self.cache_ttl_seconds = cache_ttl_seconds
+        self.sweep_interval_seconds = sweep_interval_seconds
+        self.touch_interval_seconds = touch_interval_seconds
+
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+
+        # digest -> (record, cached_at), least recently used first
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        # (expires_at, digest) for the tokens this process issued or verified, one entry per digest
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._heap_digests: Set[str] = set()
+        self._sweeper: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {"issued": 0, "cache_hits": 0, "cache_misses": 0, "rejected": 0, "revoked": 0, "swept": 0}
+
+    @property
+    def _conn(self) -> sqlite3.Connection:
+        """The database connection, opened on first use (callers hold the lock)"""
+        if self._connection is None:
+            self._connection = self._open()
+        return self._connection
+
+    def _open(self) -> sqlite3.Connection:
+        if self.db_path != ':memory:':
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS tokens (
+                digest TEXT PRIMARY KEY,
+                username TEXT NOT NULL,
+                roles TEXT NOT NULL,
+                token_preview TEXT,
+                created_epoch REAL NOT NULL,
+                last_used_epoch REAL NOT NULL,
+                expires_epoch REAL NOT NULL
+            )
+        """)
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tokens_expires ON tokens(expires_epoch)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tokens_username ON tokens(username)')
+        return conn
+
+    # ------------------------------------------------------------------ tokens
+    def issue(self, username: str, roles: List[str], ttl_seconds: float) -> str:
+        """Create, store and return a new bearer token"""
+        token = secrets.token_urlsafe(32)
+        digest = token_digest(token)
+        now = time.time()
+        record = {"username": username, "roles": list(roles), "created_at": now,
+                  "last_used": now, "expires_at": now + ttl_seconds}
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO tokens (digest, username, roles, token_preview, created_epoch, last_used_epoch, '
+                'expires_epoch) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (digest, username, json.dumps(record["roles"]), token[:8], now, now, record["expires_at"])
+            )
+            self._remember(digest, record, now)
+            self.stats["issued"] += 1
+        self.start_sweeper()
+        return token
+
+    def get(self, token: str) -> Optional[Dict[str, Any]]:
+        """The record of a valid token, or None if it is unknown, revoked or expired"""
+        digest = token_digest(token)
+        now = time.time()
+        with self._lock:
+            cached = self._cache.get(digest)
+            if cached is not None and now - cached[1] < self.cache_ttl_seconds:
+                self._cache.move_to_end(digest)
+                record = cached[0]
+                self.stats["cache_hits"] += 1
+            else:
+                self.stats["cache_misses"] += 1
+                row = self._conn.execute(
+                    'SELECT username, roles, created_epoch, last_used_epoch, expires_epoch '
+                    'FROM tokens WHERE digest = ?', (digest,)
+                ).fetchone()
+                if row is None:
+                    self._cache.pop(digest, None)
+                    self.stats["rejected"] += 1
+                    return None
+                record = {"username": row[0], "roles": json.loads(row[1]), "created_at": row[2],
+                          "last_used": row[3], "expires_at": row[4]}
+                self._remember(digest, record, now)
+
+            if now > record["expires_at"]:
+                self._forget(digest)
+                self.stats["rejected"] += 1
+                return None
+
+            if now - record["last_used"] >= self.touch_interval_seconds:
+                self._conn.execute('UPDATE tokens SET last_used_epoch = ? WHERE digest = ?', (now, digest))
+                record["last_used"] = now
+            return dict(record)
+
+    def revoke(self, token: str) -> bool:
+        digest = token_digest(token)
+        with self._lock:
+            removed = self._forget(digest)
+        if removed:
+            self.stats["revoked"] += 1
+        return removed
+
+    def revoke_user(self, username: str) -> int:
+        """Revoke every token of one user; returns how many were removed"""
+        with self._lock:
+            digests = [row[0] for row in self._conn.execute(
+                'SELECT digest FROM tokens WHERE username = ?', (username,))]
+            for digest in digests:
+                self._forget(digest)
+        self.stats["revoked"] += len(digests)
+        return len(digests)
+
+    def _remember(self, digest: str, record: Dict[str, Any], now: float):
+        # A token dropped from the LRU and read again keeps its one heap entry
+        if digest not in self._heap_digests:
+            heapq.heappush(self._expiry_heap, (record["expires_at"], digest))
+            self._heap_digests.add(digest)
+        self._cache[digest] = (record, now)
+        self._cache.move_to_end(digest)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _forget(self, digest: str) -> bool:
+        self._cache.pop(digest, None)
+        return self._conn.execute('DELETE FROM tokens WHERE digest = ?', (digest,)).rowcount > 0
+
+    # ------------------------------------------------------------------ expiry
+    def sweep(self, now: Optional[float] = None) -> int:
+        """Drop expired tokens from the cache and the database; returns the database rows removed"""
+        now = now or time.time()
+        with self._lock:
+            # The heap yields this process's expired tokens without scanning the cache
+            while self._expiry_heap and self._expiry_heap[0][0] <= now:
+                _, digest = heapq.heappop(self._expiry_heap)
+                self._heap_digests.discard(digest)
+                self._cache.pop(digest, None)
+            # Indexed range delete also covers tokens issued by other workers
+            removed = self._conn.execute('DELETE FROM tokens WHERE expires_epoch <= ?', (now,)).rowcount
+        self.stats["swept"] += removed
+        if removed:
+            logger.info(f"Swept {removed} expired auth tokens")
+        return removed
+
+    def start_sweeper(self):
+        """Start the background sweep thread once; a zero interval leaves sweeping to callers"""
+        if self.sweep_interval_seconds <= 0 or self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None:
+                return
+            self._sweeper = threading.Thread(target=self._sweep_loop, name="auth-token-sweeper", daemon=True)
+            self._sweeper.start()
+
+    def _sweep_loop(self):
+        while not self._stop.wait(self.sweep_interval_seconds):
+            try:
+                self.sweep()
+            except sqlite3.OperationalError as e:
+                # Another worker holds the write lock; try again next interval
+                logger.debug(f"Token sweep skipped: {e}")
+
+    # ------------------------------------------------------------------ queries
+    def sessions(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Unexpired tokens, newest first, without the token values"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT token_preview, username, created_epoch, last_used_epoch, expires_epoch '
+                'FROM tokens WHERE expires_epoch > ? ORDER BY created_epoch DESC', (now or time.time(),)
+            ).fetchall()
+        return [{"token_preview": preview, "username": username, "created_at": created,
+                 "last_used": last_used, "expires_at": expires}
+                for preview, username, created, last_used, expires in rows]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM tokens WHERE expires_epoch > ?', (time.time(),)).fetchone()[0]
+
+    def __contains__(self, token: str) -> bool:
+        return self.get(token) is not None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, "active_tokens": len(self), "cached_tokens": len(self._cache),
+                "cache_size": self.cache_size, "db_path": self.db_path}
+
+    # ------------------------------------------------------------------ async access
+    # A cache miss or write can wait on another worker's SQLite lock, so async
+    # code runs every call in a thread
+    async def issue_async(self, username: str, roles: List[str], ttl_seconds: float) -> str:
+        return await asyncio.to_thread(self.issue, username, roles, ttl_seconds)
+
+    async def get_async(self, token: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.get, token)
+
+    async def revoke_user_async(self, username: str) -> int:
+        return await asyncio.to_thread(self.revoke_user, username)
+
+    async def sweep_async(self) -> int:
+        return await asyncio.to_thread(self.sweep)
+
+    async def sessions_async(self) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.sessions)
+
+    async def count_async(self) -> int:
+        return await asyncio.to_thread(len, self)
+
+    async def get_stats_async(self) -> Dict[str, Any]:
+        return await asyncio.to_thread(self.get_stats)
+
+    def close(self):
+        self._stop.set()
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+
+# Shared store for routers/auth.py
+token_store = TokenStore(
+    db_path=TOKEN_STORE_CONFIG["db_path"],
+    cache_size=TOKEN_STORE_CONFIG["cache_size"],
+    cache_ttl_seconds=TOKEN_STORE_CONFIG["cache_ttl_seconds"],
+    sweep_interval_seconds=TOKEN_STORE_CONFIG["sweep_interval_seconds"],
+    touch_interval_seconds=TOKEN_STORE_CONFIG["touch_interval_seconds"]
+)
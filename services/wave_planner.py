@@ -0,0 +1,286 @@
+"""
+Dependency-aware migration wave planner
+Builds an application-to-application dependency graph from the processed
+network flow files in data_staging: a destination IP belongs to the
+application that most often appears with it as a source, so every flow to
+that IP becomes a dependency on that application. Applications that depend
+on each other in a cycle (strongly connected components) form one move
+group, groups are ordered so that providers move no later than the
+applications calling them, and waves are packed first-fit under an
+application count and a summed risk budget. Each plan reports how much flow
+traffic crosses wave boundaries.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+WAVE_PLANNER_CONFIG = {
+    "flow_dirs": [d for d in os.getenv("WAVE_PLANNER_FLOW_DIRS", "data_staging,data_staging/processed").split(",") if d],
+    "flow_pattern": os.getenv("WAVE_PLANNER_FLOW_PATTERN", "*_normalized_*.csv"),
+    "max_apps_per_wave": int(os.getenv("WAVE_PLANNER_MAX_APPS_PER_WAVE", "25")),
+    # Sum of per-application risk scores (0-1) allowed in one wave
+    "max_risk_per_wave": float(os.getenv("WAVE_PLANNER_MAX_RISK_PER_WAVE", "12.0")),
+    "top_cross_wave_dependencies": int(os.getenv("WAVE_PLANNER_TOP_CROSS_WAVE", "10"))
+}
+
+FLOW_COLUMNS = ("application", "source_ip", "destination_ip", "bytes_in", "bytes_out")
+EDGE_COLUMNS = ["source_app", "target_app", "flows", "bytes"]
+
+
+def dependency_edges_from_flows(flows: pd.DataFrame) -> pd.DataFrame:
+    """
+    Aggregate flow records into application dependencies.
+
+    Returns one row per (source_app, target_app) with the number of flow
+    records and bytes; ``source_app`` calls ``target_app``.
+    """
+    if flows.empty or not {"application", "source_ip", "destination_ip"}.issubset(flows.columns):
+        return pd.DataFrame(columns=EDGE_COLUMNS)
+
+    flows = flows.dropna(subset=["application", "source_ip", "destination_ip"])
+    applications = flows["application"].astype(str).str.strip()
+    source_ips = flows["source_ip"].astype(str).str.strip()
+    destination_ips = flows["destination_ip"].astype(str).str.strip()
+
+    # Each IP is owned by the application that uses it as a source most often
+    ownership = (pd.DataFrame({"ip": source_ips, "owner": applications})
+                 .value_counts(sort=True)
+                 .reset_index()
+                 .drop_duplicates("ip"))
+    owners = pd.Series(ownership["owner"].values, index=ownership["ip"].values)
+
+    byte_columns = [c for c in ("bytes_in", "bytes_out") if c in flows.columns]
+    if byte_columns:
+        flow_bytes = flows[byte_columns].apply(pd.to_numeric, errors="coerce").fillna(0).sum(axis=1).values
+    else:
+        flow_bytes = np.zeros(len(flows))
+
+    edges = pd.DataFrame({
+        "source_app": applications.values,
+        "target_app": destination_ips.map(owners).values,
+        "bytes": flow_bytes
+    })
+    edges = edges[edges["target_app"].notna() & (edges["source_app"] != edges["target_app"])]
+    return (edges.groupby(["source_app", "target_app"], sort=False)
+            .agg(flows=("bytes", "size"), bytes=("bytes", "sum"))
+            .reset_index()[EDGE_COLUMNS])
+
+
+@dataclass
+class WavePlan:
+    """Application ids per wave plus the dependency and traffic report behind them"""
+    waves: List[List[str]]
+    wave_risk: List[float]
+    # Earlier waves each wave depends on (0-based indexes)
+    wave_dependencies: List[List[int]]
+    move_groups: List[List[str]]
+    traffic: Dict[str, Any]
+    planning_seconds: float = 0.0
+    limits: Dict[str, float] = field(default_factory=dict)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "total_waves": len(self.waves),
+            "applications_planned": sum(len(w) for w in self.waves),
+            "move_groups": self.move_groups,
+            "wave_sizes": [len(w) for w in self.waves],
+            "wave_risk": [round(r, 2) for r in self.wave_risk],
+            "limits": self.limits,
+            "cross_wave_traffic": self.traffic,
+            "planning_seconds": round(self.planning_seconds, 3)
+        }
+
+
+class MigrationWavePlanner:
+    """Flow-graph based wave planning; dependency edges are cached until the flow files change"""
+
+    def __init__(self, flow_dirs: Optional[Sequence[str]] = None, flow_pattern: Optional[str] = None,
+                 max_apps_per_wave: Optional[int] = None, max_risk_per_wave: Optional[float] = None):
+        self.flow_dirs = [Path(d) for d in (flow_dirs or WAVE_PLANNER_CONFIG["flow_dirs"])]
+        self.flow_pattern = flow_pattern or WAVE_PLANNER_CONFIG["flow_pattern"]
+        self.max_apps_per_wave = max_apps_per_wave or WAVE_PLANNER_CONFIG["max_apps_per_wave"]
+        self.max_risk_per_wave = max_risk_per_wave or WAVE_PLANNER_CONFIG["max_risk_per_wave"]
+        self._edges_signature = None
+        self._edges = pd.DataFrame(columns=EDGE_COLUMNS)
+        # Plans run in worker threads; one of them re-reads changed flow files at a time
+        self._edges_lock = threading.Lock()
+
+    def _flow_files(self) -> List[Path]:
+        files = set()
+        for directory in self.flow_dirs:
+            if directory.is_dir():
+                files.update(directory.glob(self.flow_pattern))
+        return sorted(files)
+
+    def load_dependency_edges(self) -> pd.DataFrame:
+        """Dependency edges from all processed flow files, re-read only when the files change"""
+        with self._edges_lock:
+            return self._load_dependency_edges()
+
+    def _load_dependency_edges(self) -> pd.DataFrame:
+        files = self._flow_files()
+        signature = []
+        for path in files:
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+        signature = tuple(signature)
+        if signature == self._edges_signature:
+            return self._edges
+
+        frames = []
+        for path, _, _ in signature:
+            try:
+                frames.append(pd.read_csv(path, usecols=lambda c: c in FLOW_COLUMNS, dtype=str))
+            except Exception as e:
+                logger.warning(f"Skipping flow file {path}: {e}")
+        flows = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=list(FLOW_COLUMNS))
+
+        self._edges = dependency_edges_from_flows(flows)
+        self._edges_signature = signature
+        logger.info(f"Wave planner loaded {len(self._edges)} application dependencies "
+                    f"from {len(frames)} flow files ({len(flows)} flows)")
+        return self._edges
+
+    def plan(self, applications: List[Dict], risk_score: Callable[[Dict], float],
+             priority: Callable[[Dict], float], edges: Optional[pd.DataFrame] = None,
+             max_apps_per_wave: Optional[int] = None, max_risk_per_wave: Optional[float] = None) -> WavePlan:
+        """
+        Plan waves for ``applications``.
+
+        ``priority`` orders independent move groups (lower moves first) and
+        ``risk_score`` is summed against the per-wave risk budget. A move group
+        larger than either budget gets a wave of its own.
+        """
+        started = time.perf_counter()
+        max_apps = max_apps_per_wave or self.max_apps_per_wave
+        max_risk = max_risk_per_wave or self.max_risk_per_wave
+        if edges is None:
+            edges = self.load_dependency_edges()
+
+        app_ids = [app["id"] for app in applications]
+        index = {app_id: i for i, app_id in enumerate(app_ids)}
+        risks = np.array([risk_score(app) for app in applications], dtype=float)
+        priorities = np.array([priority(app) for app in applications], dtype=float)
+
+        # Dependencies between applications in this plan only
+        source = edges["source_app"].map(index)
+        target = edges["target_app"].map(index)
+        known = source.notna().values & target.notna().values
+        callers = source.values[known].astype(np.int64)
+        providers = target.values[known].astype(np.int64)
+        flow_counts = edges["flows"].values[known].astype(np.int64)
+        flow_bytes = edges["bytes"].values[known].astype(float)
+
+        # Provider -> caller, so a topological order moves providers first
+        graph = nx.DiGraph()
+        graph.add_nodes_from(range(len(app_ids)))
+        graph.add_edges_from(zip(providers.tolist(), callers.tolist()))
+        groups = nx.condensation(graph)
+        members = [sorted(groups.nodes[g]["members"]) for g in range(groups.number_of_nodes())]
+        group_risk = [float(risks[m].sum()) for m in members]
+        group_priority = [float(priorities[m].min()) for m in members]
+
+        order = nx.lexicographical_topological_sort(groups, key=lambda g: (group_priority[g], members[g][0]))
+
+        wave_of_group: Dict[int, int] = {}
+        wave_counts: List[int] = []
+        wave_risks: List[float] = []
+        wave_members: List[List[int]] = []
+        first_open = 0
+        for g in order:
+            size, risk = len(members[g]), group_risk[g]
+            earliest = max((wave_of_group[p] for p in groups.predecessors(g)), default=0)
+            placed = None
+            if size <= max_apps and risk <= max_risk:
+                for w in range(max(earliest, first_open), len(wave_counts)):
+                    if wave_counts[w] + size <= max_apps and wave_risks[w] + risk <= max_risk:
+                        placed = w
+                        break
+            if placed is None:
+                placed = len(wave_counts)
+                wave_counts.append(0)
+                wave_risks.append(0.0)
+                wave_members.append([])
+            wave_of_group[g] = placed
+            wave_counts[placed] += size
+            wave_risks[placed] += risk
+            wave_members[placed].extend(members[g])
+            while first_open < len(wave_counts) and wave_counts[first_open] >= max_apps:
+                first_open += 1
+
+        wave_of_app = np.zeros(len(app_ids), dtype=np.int64)
+        for g, w in wave_of_group.items():
+            wave_of_app[members[g]] = w
+
+        wave_dependencies: List[set] = [set() for _ in wave_counts]
+        for g, w in wave_of_group.items():
+            for p in groups.predecessors(g):
+                if wave_of_group[p] != w:
+                    wave_dependencies[w].add(wave_of_group[p])
+
+        traffic = self._cross_wave_traffic(app_ids, wave_of_app, callers, providers, flow_counts,
+                                           flow_bytes, len(wave_counts))
+
+        return WavePlan(
+            waves=[[app_ids[i] for i in sorted(m)] for m in wave_members],
+            wave_risk=wave_risks,
+            wave_dependencies=[sorted(d) for d in wave_dependencies],
+            move_groups=[[app_ids[i] for i in m] for m in members if len(m) > 1],
+            traffic=traffic,
+            planning_seconds=time.perf_counter() - started,
+            limits={"max_apps_per_wave": max_apps, "max_risk_per_wave": max_risk}
+        )
+
+    @staticmethod
+    def _cross_wave_traffic(app_ids: List[str], wave_of_app: np.ndarray, callers: np.ndarray,
+                            providers: np.ndarray, flow_counts: np.ndarray, flow_bytes: np.ndarray,
+                            wave_count: int) -> Dict[str, Any]:
+        caller_wave = wave_of_app[callers]
+        provider_wave = wave_of_app[providers]
+        cross = caller_wave != provider_wave
+
+        total_flows = int(flow_counts.sum())
+        cross_flows = int(flow_counts[cross].sum())
+        internal = np.bincount(caller_wave[~cross], weights=flow_counts[~cross], minlength=wave_count)
+        outbound = np.bincount(caller_wave[cross], weights=flow_counts[cross], minlength=wave_count)
+        inbound = np.bincount(provider_wave[cross], weights=flow_counts[cross], minlength=wave_count)
+
+        top = np.flatnonzero(cross)
+        top = top[np.argsort(-flow_counts[top], kind="stable")][:WAVE_PLANNER_CONFIG["top_cross_wave_dependencies"]]
+
+        return {
+            "dependencies": int(len(flow_counts)),
+            "cross_wave_dependencies": int(cross.sum()),
+            "total_flows": total_flows,
+            "cross_wave_flows": cross_flows,
+            "cross_wave_ratio": round(cross_flows / total_flows, 4) if total_flows else 0.0,
+            "cross_wave_bytes": float(flow_bytes[cross].sum()),
+            "per_wave": [
+                {"wave": w + 1, "internal_flows": int(internal[w]),
+                 "outbound_flows": int(outbound[w]), "inbound_flows": int(inbound[w])}
+                for w in range(wave_count)
+            ],
+            "top_cross_wave_dependencies": [
+                {"source": app_ids[callers[i]], "target": app_ids[providers[i]], "flows": int(flow_counts[i]),
+                 "source_wave": int(caller_wave[i]) + 1, "target_wave": int(provider_wave[i]) + 1}
+                for i in top
+            ]
+        }
+
+
+# Shared planner so the flow-derived dependency edges are cached across requests
+wave_planner = MigrationWavePlanner()
@@ -0,0 +1,231 @@
+"""
+WebSocket pub/sub hub
+Routes job updates to the clients subscribed to each job. Every client gets a
+bounded outbound queue drained by its own sender task, so a slow socket never
+delays the others. Progress updates for a job that are still waiting to be
+sent are merged, so slow consumers only receive the latest state.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from fastapi import WebSocket
+
+logger = logging.getLogger(__name__)
+
+# Subscribing to this topic delivers updates for every job
+ALL_JOBS = "*"
+
+
+class _ClientState:
+    """Outbound queue and delivery counters for one WebSocket"""
+
+    __slots__ = (
+        "websocket", "pending", "wakeup", "sender_task", "subscriptions",
+        "sent", "dropped", "coalesced", "max_lag", "total_lag", "connected_at"
+    )
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        # key -> (message, first enqueue time); job updates share a key per job
+        self.pending: "OrderedDict[Any, tuple]" = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.sender_task: Optional[asyncio.Task] = None
+        self.subscriptions: Set[str] = set()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.max_lag = 0.0
+        self.total_lag = 0.0
+        self.connected_at = datetime.now().isoformat()
+
+
+class WebSocketHub:
+    """Per-subscriber fan-out of job updates and broadcasts"""
+
+    def __init__(self, max_queue_size: int = 256, send_timeout: float = 10.0):
+        self.max_queue_size = max_queue_size
+        self.send_timeout = send_timeout
+        self._clients: Dict[WebSocket, _ClientState] = {}
+        self._job_subscribers: Dict[str, Set[_ClientState]] = {}
+        # Clients without subscriptions receive every job update
+        self._unsubscribed: Set[_ClientState] = set()
+        self._message_ids = itertools.count()
+        self.stats = {
+            "published": 0,
+            "delivered": 0,
+            "dropped": 0,
+            "coalesced": 0,
+            "send_failures": 0,
+            "max_lag_ms": 0.0
+        }
+
+    # ---------------------------------------------------------------- clients
+    @property
+    def active_connections(self) -> List[WebSocket]:
+        return list(self._clients)
+
+    async def connect(self, websocket: WebSocket, accept: bool = True):
+        if accept:
+            await websocket.accept()
+        self.register(websocket)
+        logger.info(f"WebSocket connected. Total connections: {len(self._clients)}")
+
+    def register(self, websocket: WebSocket) -> _ClientState:
+        """Track an already accepted socket and start its sender task"""
+        client = self._clients.get(websocket)
+        if client is None:
+            client = _ClientState(websocket)
+            client.sender_task = asyncio.create_task(self._sender(client))
+            self._clients[websocket] = client
+            self._unsubscribed.add(client)
+        return client
+
+    def disconnect(self, websocket: WebSocket):
+        client = self._clients.pop(websocket, None)
+        if client is None:
+            return
+        self._unsubscribed.discard(client)
+        for job_id in client.subscriptions:
+            subscribers = self._job_subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(client)
+                if not subscribers:
+                    del self._job_subscribers[job_id]
+        client.pending.clear()
+        if client.sender_task is not None and client.sender_task is not asyncio.current_task():
+            client.sender_task.cancel()
+        logger.info(f"WebSocket disconnected. Remaining connections: {len(self._clients)}")
+
+    # ----------------------------------------------------------- subscriptions
+    def subscribe(self, websocket: WebSocket, job_id: str) -> bool:
+        client = self._clients.get(websocket)
+        if client is None or not job_id:
+            return False
+        client.subscriptions.add(job_id)
+        self._unsubscribed.discard(client)
+        self._job_subscribers.setdefault(job_id, set()).add(client)
+        return True
+
+    def unsubscribe(self, websocket: WebSocket, job_id: str) -> bool:
+        client = self._clients.get(websocket)
+        if client is None or job_id not in client.subscriptions:
+            return False
+        client.subscriptions.discard(job_id)
+        subscribers = self._job_subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(client)
+            if not subscribers:
+                del self._job_subscribers[job_id]
+        if not client.subscriptions:
+            self._unsubscribed.add(client)
+        return True
+
+    def _job_audience(self, job_id: str) -> Set[_ClientState]:
+        audience = set(self._unsubscribed)
+        audience.update(self._job_subscribers.get(job_id, ()))
+        audience.update(self._job_subscribers.get(ALL_JOBS, ()))
+        return audience
+
+    # ------------------------------------------------------------- publishing
+    def publish_job_update(self, job_id: str, data: Dict[str, Any]) -> int:
+        """Queue a job update for its subscribers; returns the number of recipients"""
+        message = {"type": "job_update", "job_id": job_id, **data}
+        audience = self._job_audience(job_id)
+        self.stats["published"] += 1
+        for client in audience:
+            self._enqueue(client, ("job", job_id), message, coalesce=True)
+        return len(audience)
+
+    def broadcast(self, message: Dict[str, Any]) -> int:
+        for client in list(self._clients.values()):
+            self._enqueue(client, next(self._message_ids), message)
+        return len(self._clients)
+
+    def send_personal(self, websocket: WebSocket, message: Dict[str, Any]) -> bool:
+        client = self._clients.get(websocket)
+        if client is None:
+            return False
+        self._enqueue(client, next(self._message_ids), message)
+        return True
+
+    def _enqueue(self, client: _ClientState, key, message: Dict[str, Any], coalesce: bool = False):
+        pending = client.pending
+        if coalesce and key in pending:
+            # Merge into the queued update: latest values win, the queue slot and age are kept
+            queued, enqueued_at = pending[key]
+            pending[key] = ({**queued, **message}, enqueued_at)
+            client.coalesced += 1
+            self.stats["coalesced"] += 1
+            return
+
+        if len(pending) >= self.max_queue_size:
+            pending.popitem(last=False)
+            client.dropped += 1
+            self.stats["dropped"] += 1
+
+        pending[key] = (message, time.monotonic())
+        client.wakeup.set()
+
+    async def _sender(self, client: _ClientState):
+        """Drain one client's queue; a failed or stalled send drops the client"""
+        try:
+            while True:
+                await client.wakeup.wait()
+                client.wakeup.clear()
+                while client.pending:
+                    _, (message, enqueued_at) = client.pending.popitem(last=False)
+                    await asyncio.wait_for(client.websocket.send_json(message), timeout=self.send_timeout)
+
+                    lag = time.monotonic() - enqueued_at
+                    client.sent += 1
+                    client.total_lag += lag
+                    client.max_lag = max(client.max_lag, lag)
+                    self.stats["delivered"] += 1
+                    self.stats["max_lag_ms"] = max(self.stats["max_lag_ms"], lag * 1000)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Failed to send WebSocket message: {e}")
+            self.stats["send_failures"] += 1
+            self.disconnect(client.websocket)
+
+    async def flush(self, timeout: float = 5.0):
+        """Wait until every client queue is empty (used by tests and shutdown)"""
+        deadline = time.monotonic() + timeout
+        while any(c.pending for c in self._clients.values()) and time.monotonic() < deadline:
+            await asyncio.sleep(0.01)
+
+    async def close(self):
+        tasks = [c.sender_task for c in self._clients.values() if c.sender_task]
+        for websocket in list(self._clients):
+            self.disconnect(websocket)
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # ---------------------------------------------------------------- metrics
+    def get_metrics(self) -> Dict[str, Any]:
+        clients = list(self._clients.values())
+        queued = [len(c.pending) for c in clients]
+        sent = sum(c.sent for c in clients)
+        now = time.monotonic()
+        oldest = max((now - entry[1] for c in clients for entry in c.pending.values()), default=0.0)
+        return {
+            **self.stats,
+            "connections": len(clients),
+            "subscribed_jobs": len(self._job_subscribers),
+            "queued_messages": sum(queued),
+            "max_queue_depth": max(queued, default=0),
+            "oldest_queued_ms": round(oldest * 1000, 2),
+            "avg_lag_ms": round(sum(c.total_lag for c in clients) / sent * 1000, 2) if sent else 0.0,
+            "slow_clients": sum(1 for c in clients if c.dropped or c.coalesced),
+            "max_queue_size": self.max_queue_size
+        }
+
+
+# Shared hub for main.py and the routers
+websocket_hub = WebSocketHub()
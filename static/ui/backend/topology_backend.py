@@ -14,12 +14,20 @@ from datetime import datetime
 import asyncio
 from dataclasses import dataclass
 import openpyxl
-from collections import defaultdict
+from pandas.api.types import union_categoricals
+from scipy import sparse
+from scipy.sparse import csgraph
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Low-cardinality flow columns are parsed straight into categoricals
+FLOW_COLUMN_DTYPES = {
+    'src': 'category', 'dst': 'category', 'application': 'category',
+    'archetype': 'category', 'protocol': 'category', 'behavior': 'category'
+}
+
 @dataclass
 class TopologyConfig:
     """Configuration for topology processing"""
@@ -29,6 +37,121 @@ class TopologyConfig:
     include_downstream: bool = False
     archetype_mapping: Dict[str, str] = None
 
+class GraphFeatureEngine:
+    """
+    Whole-graph structural features on a CSR adjacency matrix.
+    
+    The graph is treated as undirected and simple (duplicate links and
+    self-loops collapse). Every metric is computed for all nodes at once,
+    so graphs with ~100k nodes stay tractable.
+    """
+    
+    def __init__(self, node_ids: List[str], links: List[Dict[str, Any]],
+                 betweenness_samples: int = 64, seed: int = 42):
+        # Endpoints that only appear in links still count towards degree
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        rows, cols = [], []
+        for link in links:
+            source, target = link["source"], link["target"]
+            if source == target:
+                continue
+            i = index.setdefault(source, len(index))
+            j = index.setdefault(target, len(index))
+            rows.append(i)
+            cols.append(j)
+        
+        n = len(index)
+        data = np.ones(len(rows), dtype=np.float64)
+        adjacency = sparse.coo_matrix((data, (rows, cols)), shape=(n, n)).tocsr()
+        adjacency = adjacency + adjacency.T
+        adjacency.data[:] = 1.0  # collapse parallel edges
+        adjacency.eliminate_zeros()
+        
+        self.node_count = len(node_ids)
+        self.adjacency = adjacency
+        self.betweenness_samples = betweenness_samples
+        self.seed = seed
+    
+    def degree(self) -> np.ndarray:
+        return np.diff(self.adjacency.indptr)
+    
+    def clustering_coefficient(self) -> np.ndarray:
+        """Local clustering via sparse triangle counting: t_i = ((A @ A) ∘ A).sum(i) / 2"""
+        adjacency = self.adjacency
+        triangles = np.asarray((adjacency @ adjacency).multiply(adjacency).sum(axis=1)).ravel() / 2
+        degree = self.degree().astype(np.float64)
+        possible = degree * (degree - 1) / 2
+        return np.divide(triangles, possible, out=np.zeros_like(triangles), where=possible > 0)
+    
+    def approximate_betweenness(self) -> np.ndarray:
+        """
+        Brandes betweenness estimated from a sample of BFS sources.
+        
+        All sampled sources are expanded together: each BFS level is one
+        sparse-dense product, and dependencies are accumulated level by level
+        on the way back. Scores are normalised to [0, 1].
+        """
+        adjacency = self.adjacency
+        n = adjacency.shape[0]
+        if n < 3 or adjacency.nnz == 0:
+            return np.zeros(n)
+        
+        k = min(self.betweenness_samples, n)
+        sources = np.random.default_rng(self.seed).choice(n, size=k, replace=False)
+        
+        source_mask = np.zeros((n, k), dtype=bool)
+        source_mask[sources, np.arange(k)] = True
+        sigma = source_mask.astype(np.float64)
+        visited = source_mask.copy()
+        frontier = sigma.copy()
+        levels = []
+        
+        # Forward sweep: shortest-path counts per level
+        while True:
+            reached = adjacency @ frontier
+            reached[visited] = 0.0
+            mask = reached > 0
+            if not mask.any():
+                break
+            sigma += reached
+            visited |= mask
+            levels.append(mask)
+            frontier = reached
+        
+        # Backward sweep: dependency accumulation
+        delta = np.zeros((n, k))
+        for depth in range(len(levels) - 1, -1, -1):
+            mask = levels[depth]
+            coefficient = np.where(mask, (1.0 + delta) / np.where(sigma > 0, sigma, 1.0), 0.0)
+            parents = levels[depth - 1] if depth > 0 else source_mask
+            delta += np.where(parents, sigma * (adjacency @ coefficient), 0.0)
+        
+        delta[source_mask] = 0.0
+        # Extrapolate from k sources, halve for undirected paths, then normalise
+        betweenness = delta.sum(axis=1) * (n / k) / 2
+        scale = (n - 1) * (n - 2) / 2
+        return np.clip(betweenness / scale, 0.0, 1.0)
+    
+    def connected_components(self):
+        """Component label per node and the size of each node's component"""
+        count, labels = csgraph.connected_components(self.adjacency, directed=False)
+        sizes = np.bincount(labels, minlength=count)
+        return count, labels, sizes[labels]
+    
+    def compute(self) -> Dict[str, Any]:
+        """All structural features, trimmed to the requested nodes"""
+        n = self.node_count
+        component_count, labels, component_sizes = self.connected_components()
+        return {
+            "degree": self.degree()[:n],
+            "clustering_coefficient": self.clustering_coefficient()[:n],
+            "betweenness_centrality": self.approximate_betweenness()[:n],
+            "component": labels[:n],
+            "component_size": component_sizes[:n],
+            "component_count": int(np.unique(labels[:n]).size) if n else 0,
+        }
+
+
 class TopologyDataProcessor:
     """Main class for processing topology data"""
     
@@ -156,13 +279,14 @@ class TopologyDataProcessor:
         try:
             # Load Excel file
             if file_path.endswith('.xlsx'):
-                df = pd.read_excel(file_path)
+                df = pd.read_excel(file_path, dtype=FLOW_COLUMN_DTYPES)
             elif file_path.endswith('.csv'):
-                df = pd.read_csv(file_path)
+                df = pd.read_csv(file_path, dtype=FLOW_COLUMN_DTYPES)
             else:
                 raise ValueError("Unsupported file format")
             
             logger.info(f"Loaded {len(df)} flow records")
+            df = self._optimize_dtypes(df)
             
             # Extract unique nodes from src and dst
             nodes_data = self._extract_nodes(df)
@@ -200,100 +324,157 @@ class TopologyDataProcessor:
             logger.error(f"Error processing dataset: {str(e)}")
             raise
     
+    def _optimize_dtypes(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Downcast flow columns so groupby aggregations stay cheap on millions of rows"""
+        df = df.copy(deep=False)
+        for col in FLOW_COLUMN_DTYPES:
+            if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype('category')
+        if 'port' in df.columns:
+            df['port'] = pd.to_numeric(df['port'], errors='coerce').fillna(80).astype('int32')
+        return df
+    
     def _extract_nodes(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
         """Extract unique nodes from flow data"""
-        # Get all unique IP addresses
-        src_ips = set(df['src'].dropna().unique())
-        dst_ips = set(df['dst'].dropna().unique())
-        all_ips = src_ips.union(dst_ips)
+        ip_to_app_map = self._create_ip_to_application_mapping(df)
         
-        logger.info(f"Found {len(all_ips)} unique IP addresses")
+        logger.info(f"Found {len(ip_to_app_map)} unique IP addresses")
         
+        # Archetype only depends on the application and the connection-count band
+        archetype_cache = {}
         nodes = []
-        ip_to_app_map = self._create_ip_to_application_mapping(df)
-        
-        for ip in all_ips:
-            app_info = ip_to_app_map.get(ip, {})
-            application = app_info.get('application', 'Unknown')
-            archetype = self._determine_archetype(application, app_info)
+        for ip, app_info in ip_to_app_map.items():
+            application = app_info['application']
+            count = app_info['connection_count']
+            band = 2 if count > 100 else 1 if count > 50 else 0
+            cache_key = (application, band)
+            archetype = archetype_cache.get(cache_key)
+            if archetype is None:
+                archetype = archetype_cache[cache_key] = self._determine_archetype(application, app_info)
             
-            node = {
+            nodes.append({
                 "id": ip,
                 "ip": ip,
                 "application": application,
                 "archetype": archetype,
                 "cluster": hash(archetype) % 20,  # Distribute across 20 clusters
                 "group": hash(application) % 10,  # Distribute across 10 groups
-                "connectionCount": app_info.get('connection_count', 0)
-            }
-            nodes.append(node)
+                "connectionCount": count
+            })
         
         return nodes
     
+    @staticmethod
+    def _category_codes(series: pd.Series):
+        """Integer codes and their labels for a column (codes are -1 for missing)"""
+        if not isinstance(series.dtype, pd.CategoricalDtype):
+            series = series.astype('category')
+        labels = series.cat.categories.astype(object).to_numpy()
+        return series.cat.codes.to_numpy(), labels
+    
     def _extract_links(self, df: pd.DataFrame) -> List[Dict[str, Any]]:
-        """Extract links from flow data"""
-        links = []
-        
-        # Sample data if too large
-        sample_size = min(len(df), self.config.max_links)
-        df_sample = df.sample(n=sample_size) if len(df) > sample_size else df
-        
-        for _, row in df_sample.iterrows():
-            if pd.isna(row['src']) or pd.isna(row['dst']):
-                continue
-                
-            link = {
-                "source": str(row['src']),
-                "target": str(row['dst']),
-                "protocol": row.get('protocol', 'TCP'),
-                "port": int(row.get('port', 80)),
-                "application": row.get('application', 'Unknown'),
-                "archetype": row.get('archetype', 'Unknown'),
-                "value": 1
-            }
-            
-            # Add additional metadata if available
-            if 'timestamp' in row:
-                link['timestamp'] = row['timestamp']
-            if 'behavior' in row:
-                link['behavior'] = row['behavior']
-                
-            links.append(link)
-        
-        logger.info(f"Created {len(links)} links from flow data")
+        """Aggregate flows into weighted links per (src, dst, protocol, port)"""
+        flows = df[df['src'].notna() & df['dst'].notna()]
+        if flows.empty:
+            return []
+        
+        # Group on integer codes; labels are decoded only for the surviving links
+        labels = {}
+        keys = {}
+        for col, default in (('src', None), ('dst', None), ('protocol', 'TCP'),
+                             ('application', 'Unknown'), ('archetype', 'Unknown'), ('behavior', None)):
+            if col in flows.columns:
+                keys[col], labels[col] = self._category_codes(flows[col])
+            elif default is not None:
+                keys[col] = np.zeros(len(flows), dtype=np.int8)
+                labels[col] = np.array([default], dtype=object)
+        keys['port'] = (flows['port'].to_numpy() if 'port' in flows.columns
+                        else np.full(len(flows), 80, dtype=np.int32))
+        if 'timestamp' in flows.columns:
+            keys['timestamp'] = flows['timestamp'].to_numpy()
+        frame = pd.DataFrame(keys)
+        frame['value'] = 1
+        
+        agg_spec = {'value': 'sum', 'application': 'first', 'archetype': 'first'}
+        if 'behavior' in frame.columns:
+            agg_spec['behavior'] = 'first'
+        if 'timestamp' in frame.columns:
+            agg_spec['timestamp'] = 'max'
+        
+        grouped = (frame.groupby(['src', 'dst', 'protocol', 'port'], sort=False)
+                   .agg(agg_spec)
+                   .reset_index())
+        
+        # Keep the heaviest links when the aggregate still exceeds the render budget
+        if len(grouped) > self.config.max_links:
+            grouped = grouped.nlargest(self.config.max_links, 'value')
+        
+        def decode(col):
+            codes = grouped[col].to_numpy()
+            values = labels[col][np.maximum(codes, 0)]
+            return np.where(codes >= 0, values, None)
+        
+        result = pd.DataFrame({
+            'source': decode('src').astype(str),
+            'target': decode('dst').astype(str),
+            'protocol': decode('protocol'),
+            'port': grouped['port'].astype(int).to_numpy(),
+            'application': decode('application'),
+            'archetype': decode('archetype'),
+            'value': grouped['value'].astype(int).to_numpy(),
+        })
+        if 'timestamp' in grouped.columns:
+            result['timestamp'] = grouped['timestamp'].astype(str).to_numpy()
+        if 'behavior' in grouped.columns:
+            result['behavior'] = decode('behavior')
+        
+        links = result.to_dict('records')
+        
+        logger.info(f"Aggregated {len(flows)} flows into {len(links)} links")
         return links
     
     def _create_ip_to_application_mapping(self, df: pd.DataFrame) -> Dict[str, Dict[str, Any]]:
-        """Create mapping of IP addresses to applications"""
-        ip_app_map = defaultdict(lambda: {'applications': [], 'connection_count': 0})
-        
-        # Count connections per IP
-        for _, row in df.iterrows():
-            for ip_col in ['src', 'dst']:
-                if pd.notna(row[ip_col]):
-                    ip = str(row[ip_col])
-                    app = row.get('application', 'Unknown')
-                    
-                    ip_app_map[ip]['applications'].append(app)
-                    ip_app_map[ip]['connection_count'] += 1
-        
-        # Determine most common application per IP
-        final_mapping = {}
-        for ip, data in ip_app_map.items():
-            # Get most frequent application
-            app_counts = defaultdict(int)
-            for app in data['applications']:
-                app_counts[app] += 1
-            
-            most_common_app = max(app_counts.items(), key=lambda x: x[1])[0]
-            
-            final_mapping[ip] = {
-                'application': most_common_app,
-                'connection_count': data['connection_count'],
-                'all_applications': list(set(data['applications']))
+        """Create mapping of IP addresses to their most common application"""
+        src = df['src'] if isinstance(df['src'].dtype, pd.CategoricalDtype) else df['src'].astype('category')
+        dst = df['dst'] if isinstance(df['dst'].dtype, pd.CategoricalDtype) else df['dst'].astype('category')
+        
+        if 'application' in df.columns:
+            app_codes, app_names = self._category_codes(df['application'])
+            app_names = np.append(app_names, 'Unknown')
+            app_codes = np.where(app_codes < 0, len(app_names) - 1, app_codes)
+        else:
+            app_codes = np.zeros(len(df), dtype=np.int64)
+            app_names = np.array(['Unknown'], dtype=object)
+        
+        # Stack src and dst on a shared category space so every endpoint occurrence is one row
+        ips = union_categoricals([src.array, dst.array])
+        stacked = pd.DataFrame({
+            'ip': ips.codes,
+            'app': np.concatenate([app_codes, app_codes]),
+        })
+        stacked = stacked[stacked['ip'] >= 0]
+        if stacked.empty:
+            return {}
+        
+        # Count (ip, application) pairs, then order each IP's pairs by frequency
+        pair_counts = (stacked.groupby(['ip', 'app'], sort=False).size()
+                       .reset_index(name='count')
+                       .sort_values(['ip', 'count'], ascending=[True, False], kind='stable'))
+        ip_codes = pair_counts['ip'].to_numpy()
+        pair_apps = pair_counts['app'].to_numpy()
+        starts = np.flatnonzero(np.r_[True, ip_codes[1:] != ip_codes[:-1]])
+        ends = np.r_[starts[1:], len(ip_codes)]
+        connection_counts = np.add.reduceat(pair_counts['count'].to_numpy(), starts)
+        
+        ip_names = ips.categories.astype(str)
+        mapping = {}
+        for start, end, count in zip(starts, ends, connection_counts):
+            mapping[ip_names[ip_codes[start]]] = {
+                'application': app_names[pair_apps[start]],
+                'connection_count': int(count),
+                'all_applications': list(app_names[pair_apps[start:end]])
             }
-        
-        return final_mapping
+        return mapping
     
     def _determine_archetype(self, application: str, app_info: Dict) -> str:
         """Determine archetype based on application name and connection patterns"""
@@ -359,73 +540,70 @@ class TopologyDataProcessor:
         sorted_links = sorted(links, key=link_priority, reverse=True)
         return sorted_links[:max_count]
 
-    def normalize_data(self, data: Dict[str, Any]) -> Dict[str, Any]:
+    FEATURE_NAMES = [
+        "node_degree", "clustering_coefficient", "betweenness_centrality",
+        "archetype_encoded", "application_encoded", "ip_subnet", "component_size"
+    ]
+    
+    def normalize_data(self, data: Dict[str, Any], betweenness_samples: int = 64) -> Dict[str, Any]:
         """Normalize data for ML training and ServiceNow enrichment"""
         logger.info("Normalizing topology data for ML training")
         
-        normalized = {
-            "normalized_at": datetime.now().isoformat(),
-            "source_metadata": data.get("metadata", {}),
-            "feature_vectors": [],
-            "training_labels": [],
-            "node_features": {},
-            "graph_statistics": {}
-        }
-        
-        # Extract features for each node
         nodes = data.get("nodes", [])
         links = data.get("links", [])
+        node_ids = [node["id"] for node in nodes]
         
-        # Create adjacency information
-        adjacency = defaultdict(list)
-        for link in links:
-            adjacency[link["source"]].append(link["target"])
-            adjacency[link["target"]].append(link["source"])
+        metrics = GraphFeatureEngine(node_ids, links, betweenness_samples=betweenness_samples).compute()
         
-        for node in nodes:
-            node_id = node["id"]
-            neighbors = adjacency[node_id]
-            
-            # Calculate network features
-            features = {
-                "node_degree": len(neighbors),
-                "clustering_coefficient": self._calculate_clustering_coefficient(node_id, adjacency),
-                "betweenness_centrality": np.random.random(),  # Placeholder
-                "archetype_encoded": self._encode_archetype(node["archetype"]),
-                "application_encoded": hash(node["application"]) % 1000,
-                "ip_subnet": int(node["ip"].split(".")[2]) if "." in node["ip"] else 0
+        archetypes = np.array([self._encode_archetype(node["archetype"]) for node in nodes], dtype=np.float64)
+        applications = np.array([hash(node["application"]) % 1000 for node in nodes], dtype=np.float64)
+        subnets = np.array([self._ip_subnet(node["ip"]) for node in nodes], dtype=np.float64)
+        
+        feature_vectors = np.column_stack([
+            metrics["degree"], metrics["clustering_coefficient"], metrics["betweenness_centrality"],
+            archetypes, applications, subnets, metrics["component_size"]
+        ]) if nodes else np.empty((0, len(self.FEATURE_NAMES)))
+        
+        node_features = {
+            node_id: dict(zip(self.FEATURE_NAMES, row.tolist()))
+            for node_id, row in zip(node_ids, feature_vectors)
+        }
+        for node_id, component in zip(node_ids, metrics["component"].tolist()):
+            node_features[node_id]["component"] = component
+        
+        node_count = len(nodes)
+        edge_count = int(metrics["degree"].sum() // 2)
+        
+        normalized = {
+            "normalized_at": datetime.now().isoformat(),
+            "source_metadata": data.get("metadata", {}),
+            "feature_names": list(self.FEATURE_NAMES),
+            "feature_vectors": feature_vectors,
+            "training_labels": [node["archetype"] for node in nodes],
+            "node_features": node_features,
+            "graph_statistics": {
+                "total_nodes": node_count,
+                "total_edges": len(links),
+                "unique_edges": edge_count,
+                "average_degree": float(metrics["degree"].mean()) if node_count else 0,
+                "density": len(links) / (node_count * (node_count - 1) / 2) if node_count > 1 else 0,
+                "average_clustering": float(metrics["clustering_coefficient"].mean()) if node_count else 0,
+                "connected_components": metrics["component_count"],
+                "largest_component_size": int(metrics["component_size"].max()) if node_count else 0,
+                "betweenness_samples": betweenness_samples
             }
-            
-            normalized["feature_vectors"].append(list(features.values()))
-            normalized["training_labels"].append(node["archetype"])
-            normalized["node_features"][node_id] = features
-        
-        # Calculate graph-level statistics
-        normalized["graph_statistics"] = {
-            "total_nodes": len(nodes),
-            "total_edges": len(links),
-            "average_degree": sum(len(neighbors) for neighbors in adjacency.values()) / len(nodes) if nodes else 0,
-            "density": len(links) / (len(nodes) * (len(nodes) - 1) / 2) if len(nodes) > 1 else 0
         }
         
-        logger.info(f"Normalized data with {len(normalized['feature_vectors'])} feature vectors")
+        logger.info(f"Normalized data with {len(feature_vectors)} feature vectors")
         return normalized
     
-    def _calculate_clustering_coefficient(self, node_id: str, adjacency: Dict) -> float:
-        """Calculate clustering coefficient for a node"""
-        neighbors = adjacency[node_id]
-        if len(neighbors) < 2:
-            return 0.0
-        
-        # Count triangles
-        triangles = 0
-        for i in range(len(neighbors)):
-            for j in range(i + 1, len(neighbors)):
-                if neighbors[j] in adjacency[neighbors[i]]:
-                    triangles += 1
-        
-        possible_triangles = len(neighbors) * (len(neighbors) - 1) / 2
-        return triangles / possible_triangles if possible_triangles > 0 else 0.0
+    @staticmethod
+    def _ip_subnet(ip: str) -> int:
+        """Third octet of an IPv4 address (0 when unavailable)"""
+        parts = ip.split(".")
+        if len(parts) == 4 and parts[2].isdigit():
+            return int(parts[2])
+        return 0
     
     def _encode_archetype(self, archetype: str) -> int:
         """Encode archetype as integer for ML training"""
@@ -458,7 +636,7 @@ async def main():
             json.dump(topology, f, indent=2)
             
         with open("topology_normalized.json", "w") as f:
-            json.dump(normalized, f, indent=2)
+            json.dump({**normalized, "feature_vectors": normalized["feature_vectors"].tolist()}, f, indent=2)
             
         print("Processing complete!")
         
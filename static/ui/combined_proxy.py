@@ -1,92 +1,233 @@
 # combined_proxy.py
-from http.server import HTTPServer, BaseHTTPRequestHandler
-import requests
-
-class CombinedProxyHandler(BaseHTTPRequestHandler):
-    def handle_request(self, method):
-        # Route API calls to FastAPI (port 8001), everything else to frontend (port 8000)
-        if self.path.startswith('/api') or self.path.startswith('/docs') or self.path.startswith('/redoc'):
-            target = f"http://127.0.0.1:8001{self.path}"
-            service = "API"
-        else:
-            target = f"http://127.0.0.1:8002{self.path}"
-            service = "Frontend"
-        
-        print(f"🔗 {method} {self.path} → {service} ({target})")
-        
-        try:
-            # Forward request to appropriate local service
-            if method == 'GET':
-                response = requests.get(target)
-            elif method == 'POST':
-                content_length = int(self.headers.get('content-length', 0))
-                post_data = self.rfile.read(content_length) if content_length > 0 else b''
-                response = requests.post(target, data=post_data, 
-                                       headers={k: v for k, v in self.headers.items()})
-            elif method == 'PUT':
-                content_length = int(self.headers.get('content-length', 0))
-                put_data = self.rfile.read(content_length) if content_length > 0 else b''
-                response = requests.put(target, data=put_data,
-                                      headers={k: v for k, v in self.headers.items()})
-            elif method == 'DELETE':
-                response = requests.delete(target)
-            elif method == 'HEAD':
-                response = requests.head(target)  # Add HEAD support
-            else:
-                self.send_response(405)
-                self.end_headers()
-                return
-            
-            # Send response back
-            self.send_response(response.status_code)
-            
-            # Copy headers (excluding problematic ones)
-            for header, value in response.headers.items():
-                if header.lower() not in ['content-encoding', 'transfer-encoding', 'connection']:
-                    self.send_header(header, value)
-            
-            self.end_headers()
-            self.wfile.write(response.content)
-            
-        except requests.exceptions.ConnectionError:
-            print(f"❌ Connection failed to {service} server")
-            self.send_response(502)
-            self.end_headers()
-            self.wfile.write(f"{service} service unavailable - is it running?".encode())
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            self.send_response(500)
-            self.end_headers()
-            self.wfile.write(f"Proxy Error: {e}".encode())
-
-    def do_GET(self):
-        self.handle_request('GET')
-    
-    def do_POST(self):
-        self.handle_request('POST')
-        
-    def do_PUT(self):
-        self.handle_request('PUT')
-        
-    def do_DELETE(self):
-        self.handle_request('DELETE')
-        
-    def do_HEAD(self):
-        self.handle_request('HEAD')  # Add HEAD method handler
+"""
+Combined reverse proxy on port 9000
+Routes API calls (/api, /docs, /redoc, /openapi.json, /ws) to FastAPI on port
+8001 and everything else to the frontend on port 8002, so a single ngrok tunnel
+can serve both.
+
+Runs on aiohttp: each upstream has its own keep-alive connection pool, request
+and response bodies are streamed through in chunks (so a large export or a
+slow upstream only occupies its own connection), and WebSocket upgrades are
+relayed to the API.
+"""
+
+import argparse
+import asyncio
+import os
+
+from aiohttp import ClientConnectorError, ClientError, ClientSession, ClientTimeout, DummyCookieJar, TCPConnector, WSMsgType, web
+from yarl import URL
+
+PROXY_CONFIG = {
+    "host": os.getenv("COMBINED_PROXY_HOST", "127.0.0.1"),
+    "port": int(os.getenv("COMBINED_PROXY_PORT", "9000")),
+    "api_upstream": os.getenv("COMBINED_PROXY_API_UPSTREAM", "http://127.0.0.1:8001"),
+    "frontend_upstream": os.getenv("COMBINED_PROXY_FRONTEND_UPSTREAM", "http://127.0.0.1:8002"),
+    # Keep-alive connections per upstream
+    "pool_size": int(os.getenv("COMBINED_PROXY_POOL_SIZE", "200")),
+    "chunk_size": int(os.getenv("COMBINED_PROXY_CHUNK_SIZE", str(64 * 1024))),
+    "connect_timeout": float(os.getenv("COMBINED_PROXY_CONNECT_TIMEOUT", "5")),
+    # Longest silence allowed while reading an upstream body (exports can be slow)
+    "read_timeout": float(os.getenv("COMBINED_PROXY_READ_TIMEOUT", "300"))
+}
+
+CONFIG = web.AppKey("config", dict)
+SESSIONS = web.AppKey("sessions", dict)
+
+API_PREFIXES = ('/api', '/docs', '/redoc', '/openapi.json', '/ws')
+
+# Hop-by-hop headers apply to a single connection and are never forwarded
+HOP_BY_HOP_HEADERS = frozenset({
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade'
+})
+# Set by the client library for the upstream handshake
+WEBSOCKET_HANDSHAKE_HEADERS = frozenset({
+    'sec-websocket-key', 'sec-websocket-version', 'sec-websocket-extensions', 'sec-websocket-protocol'
+})
+
+
+def route(path):
+    """Return (service name, upstream key) for a request path"""
+    if path.startswith(API_PREFIXES):
+        return "API", "api_upstream"
+    return "Frontend", "frontend_upstream"
+
+
+def forward_headers(request, exclude=frozenset()):
+    headers = {}
+    for name, value in request.headers.items():
+        lower = name.lower()
+        if lower in HOP_BY_HOP_HEADERS or lower == 'host' or lower in exclude:
+            continue
+        headers[name] = value
+    headers['X-Forwarded-For'] = request.remote or ''
+    headers['X-Forwarded-Host'] = request.host
+    headers['X-Forwarded-Proto'] = request.scheme
+    return headers
+
+
+async def proxy_http(request, session, target, service):
+    """Relay one HTTP request, streaming the body in both directions"""
+    config = request.app[CONFIG]
+    body = request.content if request.body_exists else None
+
+    try:
+        upstream = await session.request(
+            request.method, target,
+            headers=forward_headers(request),
+            data=body,
+            allow_redirects=False
+        )
+    except ClientConnectorError:
+        print(f"❌ Connection failed to {service} server")
+        return web.Response(status=502, text=f"{service} service unavailable - is it running?")
+    except asyncio.TimeoutError:
+        print(f"❌ {service} server timed out: {request.method} {request.path_qs}")
+        return web.Response(status=504, text=f"{service} service timed out")
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return web.Response(status=500, text=f"Proxy Error: {e}")
+
+    try:
+        response = web.StreamResponse(status=upstream.status, reason=upstream.reason)
+        for name, value in upstream.headers.items():
+            if name.lower() not in HOP_BY_HOP_HEADERS:
+                response.headers.add(name, value)
+        await response.prepare(request)
+
+        # write() waits for the client to drain, so memory stays at about one chunk per request
+        async for chunk in upstream.content.iter_chunked(config["chunk_size"]):
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+    except (ConnectionResetError, asyncio.CancelledError):
+        # Browser went away mid-download; drop the upstream connection with it
+        upstream.close()
+        raise
+    except (ClientError, asyncio.TimeoutError) as e:
+        # Upstream failed after the status line went out, so no error response can be sent;
+        # cut the client connection so it sees a truncated body rather than a complete one
+        upstream.close()
+        print(f"❌ {service} upstream failed mid-response: {request.method} {request.path_qs}: {e!r}")
+        if request.transport is not None:
+            request.transport.abort()
+        return response
+    finally:
+        upstream.release()
+
+
+async def proxy_websocket(request, session, target, service):
+    """Relay a WebSocket upgrade to the upstream and pump frames both ways"""
+    protocols = [p.strip() for p in request.headers.get('Sec-WebSocket-Protocol', '').split(',') if p.strip()]
+
+    try:
+        upstream_ws = await session.ws_connect(
+            target.with_scheme('wss' if target.scheme == 'https' else 'ws'),
+            headers=forward_headers(request, exclude=WEBSOCKET_HANDSHAKE_HEADERS),
+            protocols=protocols,
+            max_msg_size=0
+        )
+    except Exception as e:
+        print(f"❌ WebSocket connection to {service} failed: {e}")
+        return web.Response(status=502, text=f"{service} WebSocket unavailable")
+
+    client_ws = web.WebSocketResponse(
+        protocols=[upstream_ws.protocol] if upstream_ws.protocol else (),
+        max_msg_size=0
+    )
+    await client_ws.prepare(request)
+
+    async def pump(source, destination):
+        async for message in source:
+            if message.type == WSMsgType.TEXT:
+                await destination.send_str(message.data)
+            elif message.type == WSMsgType.BINARY:
+                await destination.send_bytes(message.data)
+            elif message.type in (WSMsgType.CLOSE, WSMsgType.ERROR):
+                break
+        await destination.close()
+
+    pumps = [asyncio.create_task(pump(client_ws, upstream_ws)),
+             asyncio.create_task(pump(upstream_ws, client_ws))]
+    try:
+        await asyncio.wait(pumps, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in pumps:
+            task.cancel()
+        await upstream_ws.close()
+        await client_ws.close()
+    return client_ws
+
+
+async def handle_request(request):
+    service, upstream_key = route(request.path)
+    target = URL(request.app[CONFIG][upstream_key] + request.raw_path, encoded=True)
+    session = request.app[SESSIONS][upstream_key]
+
+    if not request.app[CONFIG].get("quiet"):
+        print(f"🔗 {request.method} {request.path_qs} → {service} ({target})")
+
+    if request.headers.get('Upgrade', '').lower() == 'websocket':
+        return await proxy_websocket(request, session, target, service)
+    return await proxy_http(request, session, target, service)
+
+
+async def upstream_sessions(app):
+    """One pooled keep-alive client session per upstream for the lifetime of the app"""
+    config = app[CONFIG]
+    timeout = ClientTimeout(total=None, connect=config["connect_timeout"], sock_read=config["read_timeout"])
+    app[SESSIONS] = {
+        key: ClientSession(
+            connector=TCPConnector(limit=config["pool_size"], keepalive_timeout=60),
+            timeout=timeout,
+            # Pass compressed bodies through untouched
+            auto_decompress=False,
+            # Cookies belong to the browser; the shared session must never keep them
+            cookie_jar=DummyCookieJar()
+        )
+        for key in ("api_upstream", "frontend_upstream")
+    }
+    yield
+    for session in app[SESSIONS].values():
+        await session.close()
+
+
+def create_app(config=None):
+    app = web.Application()
+    app[CONFIG] = {**PROXY_CONFIG, **(config or {})}
+    app.cleanup_ctx.append(upstream_sessions)
+    app.router.add_route('*', '/{tail:.*}', handle_request)
+    return app
+
 
 if __name__ == '__main__':
-    server = HTTPServer(('127.0.0.1', 9000), CombinedProxyHandler)
-    print("🚀 Combined proxy server running on http://127.0.0.1:9000")
-    print("📁 Frontend: http://127.0.0.1:9000/html/index.html")
-    print("🔌 API: http://127.0.0.1:9000/api/*")
-    print("📖 API Docs: http://127.0.0.1:9000/docs")
+    parser = argparse.ArgumentParser(description="Combined API/frontend reverse proxy")
+    parser.add_argument("--host", default=PROXY_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=PROXY_CONFIG["port"])
+    parser.add_argument("--api-upstream", default=PROXY_CONFIG["api_upstream"])
+    parser.add_argument("--frontend-upstream", default=PROXY_CONFIG["frontend_upstream"])
+    parser.add_argument("--quiet", action="store_true", help="Don't print a line per request")
+    args = parser.parse_args()
+
+    app = create_app({
+        "api_upstream": args.api_upstream.rstrip('/'),
+        "frontend_upstream": args.frontend_upstream.rstrip('/'),
+        "quiet": args.quiet
+    })
+
+    base = f"http://{args.host}:{args.port}"
+    print(f"🚀 Combined proxy server running on {base}")
+    print(f"📁 Frontend: {base}/html/index.html")
+    print(f"🔌 API: {base}/api/*")
+    print(f"📖 API Docs: {base}/docs")
     print("")
     print("Make sure both services are running:")
     print("  Frontend: python -m http.server 8002")
     print("  FastAPI: uvicorn main:app --port 8001")
     print("")
     print("Next steps:")
-    print("  1. Run: ngrok http 9000")
+    print(f"  1. Run: ngrok http {args.port}")
     print("  2. Run your redirect_server.py")
     print("")
-    server.serve_forever()
\ No newline at end of file
+    web.run_app(app, host=args.host, port=args.port, access_log=None, print=None)
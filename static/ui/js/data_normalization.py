@@ -12,6 +12,10 @@ from datetime import datetime, timezone
 from typing import Dict, List, Tuple, Optional, Any, Union
 from pathlib import Path
 import io
+import os
+import sqlite3
+import threading
+import time
 from dataclasses import dataclass, asdict
 from collections import defaultdict
 import warnings
@@ -23,6 +27,12 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Relative store paths resolve against the project root, not the working directory
+PROJECT_ROOT = Path(__file__).resolve().parents[3]
+DEFAULT_DEDUP_STORE_PATH = os.getenv(
+    'NORMALIZER_DEDUP_STORE_PATH', str(PROJECT_ROOT / 'data_staging' / 'normalizer_dedup_index.sqlite')
+)
+
 @dataclass
 class ProcessingConfig:
     """Configuration for data processing pipeline"""
@@ -33,6 +43,8 @@ class ProcessingConfig:
     max_file_size_mb: int = 100
     time_window_minutes: int = 5
     quality_threshold: float = 0.8
+    dedup_store_path: str = DEFAULT_DEDUP_STORE_PATH
+    dedup_retention_days: int = 30
 
 @dataclass
 class ProcessingResult:
@@ -50,6 +62,159 @@ class ProcessingResult:
     status: str = 'completed'
     errors: List[str] = None
 
+class RecordIndexStore:
+    """
+    Disk-backed cross-batch dedup index (SQLite).
+    
+    Maps record key -> (content hash, merged record, first_seen, last_updated,
+    update_count). Batches look up their keys in bulk, so memory stays bounded
+    by the batch size rather than by every record ever seen. Rows not updated
+    within the retention window are evicted.
+    
+    Reads through the mapping interface (len, in, [key], items()) so existing
+    callers of ``global_record_store`` keep working.
+    """
+    
+    LOOKUP_CHUNK = 900  # stay under SQLite's bound-parameter limit
+    PAGE_SIZE = 1000    # rows per page when iterating items()
+    
+    def __init__(self, path: str = ':memory:', retention_days: int = 30):
+        self.path = path
+        self.retention_seconds = retention_days * 86400 if retention_days else None
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS records (
+                record_key TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                data TEXT NOT NULL,
+                first_seen TEXT NOT NULL,
+                last_updated TEXT NOT NULL,
+                last_updated_epoch REAL NOT NULL,
+                update_count INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_records_last_updated ON records(last_updated_epoch)'
+        )
+        self._conn.commit()
+    
+    def lookup_hashes(self, keys: List[str]) -> Dict[str, str]:
+        """Stored content hash for each known key"""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self.LOOKUP_CHUNK):
+                chunk = keys[i:i + self.LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT record_key, content_hash FROM records WHERE record_key IN ({placeholders})',
+                    chunk
+                )
+                found.update(rows)
+        return found
+    
+    def get_many(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Full record info for each known key"""
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), self.LOOKUP_CHUNK):
+                chunk = keys[i:i + self.LOOKUP_CHUNK]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT * FROM records WHERE record_key IN ({placeholders})', chunk
+                )
+                for row in rows:
+                    found[row[0]] = self._row_to_info(row)
+        return found
+    
+    def upsert_many(self, entries: Dict[str, Dict[str, Any]]):
+        """Write record infos for a batch in one transaction"""
+        if not entries:
+            return
+        now = time.time()
+        rows = [
+            (key, info['hash'], json.dumps(info['data'], default=str), info['first_seen'],
+             info['last_updated'], now, info.get('update_count', 0))
+            for key, info in entries.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO records VALUES (?, ?, ?, ?, ?, ?, ?)', rows
+            )
+            self._conn.commit()
+    
+    def evict_expired(self, now: Optional[float] = None) -> int:
+        """Drop records not updated within the retention window"""
+        if not self.retention_seconds:
+            return 0
+        cutoff = (now or time.time()) - self.retention_seconds
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM records WHERE last_updated_epoch < ?', (cutoff,))
+            self._conn.commit()
+        return cursor.rowcount
+    
+    def clear(self):
+        with self._lock:
+            self._conn.execute('DELETE FROM records')
+            self._conn.commit()
+    
+    def close(self):
+        with self._lock:
+            self._conn.close()
+    
+    @staticmethod
+    def _row_to_info(row) -> Dict[str, Any]:
+        return {
+            'data': json.loads(row[2]),
+            'hash': row[1],
+            'first_seen': row[3],
+            'last_updated': row[4],
+            'update_count': row[6]
+        }
+    
+    # Mapping-style read access
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM records').fetchone()[0]
+    
+    def __bool__(self) -> bool:
+        with self._lock:
+            return self._conn.execute('SELECT 1 FROM records LIMIT 1').fetchone() is not None
+    
+    def __contains__(self, key: str) -> bool:
+        return bool(self.lookup_hashes([key]))
+    
+    def __getitem__(self, key: str) -> Dict[str, Any]:
+        found = self.get_many([key])
+        if key not in found:
+            raise KeyError(key)
+        return found[key]
+    
+    def items(self):
+        """Stream (key, record info) pairs a page at a time, without loading the whole index"""
+        last_key = None
+        while True:
+            # Keyset pages: the lock is not held between pages, so writers may run while callers iterate
+            with self._lock:
+                if last_key is None:
+                    rows = self._conn.execute(
+                        'SELECT * FROM records ORDER BY record_key LIMIT ?', (self.PAGE_SIZE,)).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        'SELECT * FROM records WHERE record_key > ? ORDER BY record_key LIMIT ?',
+                        (last_key, self.PAGE_SIZE)).fetchall()
+            for row in rows:
+                yield row[0], self._row_to_info(row)
+            if len(rows) < self.PAGE_SIZE:
+                return
+            last_key = rows[-1][0]
+
+
 class DataNormalizer:
     """Main class for network data normalization and ML preparation"""
     
@@ -99,13 +264,27 @@ class DataNormalizer:
     def __init__(self, config: ProcessingConfig = None):
         """Initialize the DataNormalizer with configuration"""
         self.config = config or ProcessingConfig()
-        self.global_record_store = {}  # Cross-batch duplicate tracking
+        # Cross-batch duplicate tracking (persistent, time-windowed)
+        self.global_record_store = RecordIndexStore(
+            self._resolve_store_path(self.config.dedup_store_path),
+            retention_days=self.config.dedup_retention_days
+        )
         self.processing_logs = []
         self.session_id = self._generate_session_id()
         
         logger.info(f"DataNormalizer initialized with session {self.session_id}")
         self._log_event('standard', 'initialization', 'DataNormalizer initialized')
     
+    @staticmethod
+    def _resolve_store_path(path: Optional[str]) -> str:
+        """Dedup store location, with relative paths anchored at the project root"""
+        if not path or path == ':memory:':
+            return ':memory:'
+        store_path = Path(path)
+        if not store_path.is_absolute():
+            store_path = PROJECT_ROOT / store_path
+        return str(store_path)
+    
     def _generate_session_id(self) -> str:
         """Generate a unique session ID"""
         return f"session_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{hash(id(self)) % 10000:04d}"
@@ -388,6 +567,7 @@ class DataNormalizer:
             'new_records': 0,
             'updated_records': 0,
             'ignored_duplicates': 0,
+            'evicted_records': 0,
             'conflicts': [],
             'processing_time': 0
         }
@@ -396,88 +576,146 @@ class DataNormalizer:
         
         self._log_event('standard', 'duplicate_processing', f'Starting cross-batch duplicate handling for {filename}')
         
+        store = self.global_record_store
+        duplicate_info['evicted_records'] = store.evict_expired()
+        
+        if df.empty:
+            duplicate_info['processing_time'] = (datetime.now() - start_time).total_seconds()
+            return df.iloc[0:0], duplicate_info
+        
+        # Keys and content hashes for the whole batch at once
+        record_keys = self._create_record_keys(df)
+        record_hashes = self._create_content_hashes(df)
+        
+        unique_keys = pd.unique(record_keys).tolist()
+        stored_hashes = pd.Series(store.lookup_hashes(unique_keys), dtype=object)
+        previous_hash = record_keys.map(stored_hashes)
+        
+        # Only rows with a new key or a changed hash go on to field-level diffing
+        candidate_mask = (previous_hash.isna() | (previous_hash != record_hashes)).to_numpy()
+        duplicate_info['ignored_duplicates'] += int((~candidate_mask).sum())
+        
+        candidates = df.loc[candidate_mask]
+        candidate_keys = record_keys[candidate_mask].tolist()
+        candidate_hashes = record_hashes[candidate_mask].tolist()
+        candidate_rows = json.loads(candidates.to_json(orient='records', date_format='iso'))
+        
+        existing = store.get_many([key for key in set(candidate_keys) if key in stored_hashes.index])
+        touched = {}
         processed_records = []
+        now_iso = datetime.now(timezone.utc).isoformat()
         
-        for _, row in df.iterrows():
-            record_key = self._create_advanced_record_key(row)
-            record_hash = self._create_data_hash(row)
+        for record_key, record_hash, row in zip(candidate_keys, candidate_hashes, candidate_rows):
+            existing_record = touched.get(record_key) or existing.get(record_key)
             
-            if record_key in self.global_record_store:
-                existing_record = self.global_record_store[record_key]
-                change_detection = self._detect_field_changes(existing_record['data'], row)
-                
-                if change_detection['has_changes']:
-                    if self.config.duplicate_strategy == 'smart_upsert':
-                        updated_record = self._perform_smart_upsert(
-                            existing_record['data'], row, change_detection
-                        )
-                        
-                        self.global_record_store[record_key] = {
-                            'data': updated_record,
-                            'hash': self._create_data_hash(updated_record),
-                            'first_seen': existing_record['first_seen'],
-                            'last_updated': datetime.now(timezone.utc).isoformat(),
-                            'update_count': existing_record.get('update_count', 0) + 1
-                        }
-                        
-                        processed_records.append(updated_record)
-                        duplicate_info['updated_records'] += 1
-                        
-                        self._log_event('debug', 'smart_upsert', f'Record upserted: {record_key}', {
-                            'changes': change_detection['changes']
-                        })
-                        
-                    elif self.config.duplicate_strategy == 'timestamp_priority':
-                        if self._is_newer_record(row, existing_record['data']):
-                            self.global_record_store[record_key] = {
-                                'data': row,
-                                'hash': record_hash,
-                                'first_seen': existing_record['first_seen'],
-                                'last_updated': datetime.now(timezone.utc).isoformat(),
-                                'update_count': existing_record.get('update_count', 0) + 1
-                            }
-                            processed_records.append(row)
-                            duplicate_info['updated_records'] += 1
-                        else:
-                            duplicate_info['ignored_duplicates'] += 1
-                    else:
-                        duplicate_info['ignored_duplicates'] += 1
-                else:
-                    duplicate_info['ignored_duplicates'] += 1
-            else:
+            if existing_record is None:
                 # New record
-                self.global_record_store[record_key] = {
+                touched[record_key] = {
                     'data': row,
                     'hash': record_hash,
-                    'first_seen': datetime.now(timezone.utc).isoformat(),
-                    'last_updated': datetime.now(timezone.utc).isoformat(),
+                    'first_seen': now_iso,
+                    'last_updated': now_iso,
                     'update_count': 0
                 }
                 processed_records.append(row)
                 duplicate_info['new_records'] += 1
+                continue
+            
+            if existing_record['hash'] == record_hash:
+                duplicate_info['ignored_duplicates'] += 1
+                continue
+            
+            change_detection = self._detect_field_changes(existing_record['data'], row)
+            
+            if not change_detection['has_changes']:
+                duplicate_info['ignored_duplicates'] += 1
+            elif self.config.duplicate_strategy == 'smart_upsert':
+                updated_record = self._perform_smart_upsert(
+                    existing_record['data'], row, change_detection
+                )
+                touched[record_key] = {
+                    'data': updated_record,
+                    'hash': record_hash,
+                    'first_seen': existing_record['first_seen'],
+                    'last_updated': now_iso,
+                    'update_count': existing_record.get('update_count', 0) + 1
+                }
+                processed_records.append(updated_record)
+                duplicate_info['updated_records'] += 1
+                
+                self._log_event('debug', 'smart_upsert', f'Record upserted: {record_key}', {
+                    'changes': change_detection['changes']
+                })
+            elif self.config.duplicate_strategy == 'timestamp_priority':
+                if self._is_newer_record(row, existing_record['data']):
+                    touched[record_key] = {
+                        'data': row,
+                        'hash': record_hash,
+                        'first_seen': existing_record['first_seen'],
+                        'last_updated': now_iso,
+                        'update_count': existing_record.get('update_count', 0) + 1
+                    }
+                    processed_records.append(row)
+                    duplicate_info['updated_records'] += 1
+                else:
+                    duplicate_info['ignored_duplicates'] += 1
+            else:
+                duplicate_info['ignored_duplicates'] += 1
+        
+        store.upsert_many(touched)
+        
+        result_df = pd.DataFrame(processed_records)
+        for time_field in ['timestamp', 'first_seen', 'last_seen']:
+            if time_field in result_df.columns:
+                result_df[time_field] = pd.to_datetime(result_df[time_field], errors='coerce')
         
         duplicate_info['processing_time'] = (datetime.now() - start_time).total_seconds()
         
         self._log_event('standard', 'duplicate_processing', f'Cross-batch duplicate processing completed for {filename}', duplicate_info)
         
-        return pd.DataFrame(processed_records), duplicate_info
+        return result_df, duplicate_info
     
-    def _create_advanced_record_key(self, row: pd.Series) -> str:
-        """Create advanced record key for duplicate detection"""
+    def _create_record_keys(self, df: pd.DataFrame) -> pd.Series:
+        """Vectorised record keys: primary fields plus the dedup time window"""
         primary_keys = ['source_ip', 'destination_ip', 'application', 'protocol', 'port']
         
-        key_values = []
+        keys = None
         for key in primary_keys:
-            value = row.get(key, '')
-            key_values.append(str(value).lower().strip())
+            if key in df.columns:
+                # str() per value, so missing values key as 'none'/'nan' on every pandas version
+                text = df[key].to_numpy(dtype=object).astype(str)
+                part = pd.Series(text, index=df.index, dtype=object).str.lower().str.strip()
+            else:
+                part = pd.Series('', index=df.index)
+            keys = part if keys is None else keys + '|' + part
         
         # Add temporal component for time-windowed deduplication
-        timestamp = row.get('timestamp', datetime.now())
-        if pd.notna(timestamp):
-            time_window = int(pd.Timestamp(timestamp).timestamp() // (self.config.time_window_minutes * 60))
-            key_values.append(str(time_window))
-        
-        return '|'.join(key_values)
+        window_seconds = self.config.time_window_minutes * 60
+        if 'timestamp' in df.columns:
+            # Parsed per value like the row-wise key, so mixed ISO forms and offsets all resolve
+            timestamps = pd.to_datetime(df['timestamp'], errors='coerce', utc=True, format='mixed')
+        else:
+            timestamps = pd.Series(pd.Timestamp.now(tz='UTC'), index=df.index)
+        valid = timestamps.notna()
+        epoch_seconds = (timestamps[valid] - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(seconds=1)
+        windows = (epoch_seconds // window_seconds).astype('int64').astype(str)
+        keys = keys.copy()
+        keys[valid] = keys[valid] + '|' + windows
+        
+        return keys
+    
+    def _create_advanced_record_key(self, row: pd.Series) -> str:
+        """Create advanced record key for duplicate detection"""
+        return self._create_record_keys(pd.DataFrame([row])).iloc[0]
+    
+    def _create_content_hashes(self, df: pd.DataFrame) -> pd.Series:
+        """Vectorised 64-bit content hash per row, ignoring _-prefixed bookkeeping columns"""
+        content_columns = sorted(col for col in df.columns if not str(col).startswith('_'))
+        if not content_columns:
+            return pd.Series('', index=df.index)
+        # Hash the text form so a value inferred as int in one batch and str in another matches
+        hashes = pd.util.hash_pandas_object(df[content_columns].astype(str), index=False)
+        return hashes.map('{:016x}'.format)
     
     def _create_data_hash(self, row: Union[pd.Series, Dict]) -> str:
         """Create hash for data change detection"""
@@ -853,10 +1091,10 @@ class DataNormalizer:
             self._log_event('standard', 'export', 'No data available for export')
             return
         
-        # Convert global record store to DataFrame
+        # Stream the global record store into a DataFrame
         records = []
         for key, record_info in self.global_record_store.items():
-            record = record_info['data'].copy()
+            record = dict(record_info['data'])
             record['_global_key'] = key
             record['_first_seen'] = record_info['first_seen']
             record['_last_updated'] = record_info['last_updated']
@@ -453,8 +453,12 @@ class PortScopeExcelProcessor {
             // Update UI
             document.getElementById('row-count').textContent = result.total_rows.toLocaleString();
             
-            // Request job status via WebSocket if available
+            // Subscribe to this job's updates and request its status via WebSocket if available
             if (result.websocket_available && this.websocket && this.websocket.readyState === WebSocket.OPEN) {
+                this.sendWebSocketMessage({
+                    type: 'subscribe_job',
+                    job_id: this.currentJob
+                });
                 this.sendWebSocketMessage({
                     type: 'get_job_status',
                     job_id: this.currentJob
@@ -580,9 +584,18 @@ class PortScopeExcelProcessor {
             </div>
         `;
         
-        // Update dashboard if available
+        // Update dashboard if available (applications live in the job's result file)
         if (window.dashboard && job.result?.applications) {
             this.updateDashboard(job.result.applications);
+        } else if (window.dashboard && job.result?.result_url) {
+            fetch(`${this.apiUrl}${job.result.result_url}`)
+                .then(response => response.ok ? response.json() : null)
+                .then(result => {
+                    if (result?.applications) {
+                        this.updateDashboard(result.applications);
+                    }
+                })
+                .catch(error => console.warn('Could not load job applications:', error));
         }
         
         console.log('Processing completed successfully');
@@ -0,0 +1,134 @@
+# tests/test_combined_proxy.py - Streaming, header filtering and WebSocket relay through the combined proxy
+
+import asyncio
+
+import pytest
+from aiohttp import ClientPayloadError, WSMsgType, web
+from aiohttp.test_utils import TestClient, TestServer
+
+from static.ui.combined_proxy import create_app
+
+
+def make_upstream(release):
+    """Upstream app: a slow streamed download, a header echo, a broken body and a WebSocket echo"""
+
+    async def download(request):
+        response = web.StreamResponse(headers={"X-Upstream": "yes", "Proxy-Authenticate": "Basic"})
+        await response.prepare(request)
+        await response.write(b"first chunk;")
+        # The rest only follows once the client has seen the first chunk
+        await release.wait()
+        for i in range(50):
+            await response.write(b"x" * 1024)
+        await response.write_eof()
+        return response
+
+    async def echo_headers(request):
+        body = await request.read()
+        return web.json_response({"headers": {k.lower(): v for k, v in request.headers.items()},
+                                  "body_length": len(body)})
+
+    async def broken(request):
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"partial")
+        await asyncio.sleep(0.05)
+        request.transport.abort()
+        return response
+
+    async def ws_echo(request):
+        ws = web.WebSocketResponse(protocols=("v1",))
+        await ws.prepare(request)
+        async for message in ws:
+            if message.type == WSMsgType.TEXT:
+                await ws.send_str(f"echo:{message.data}")
+            elif message.type == WSMsgType.BINARY:
+                await ws.send_bytes(message.data[::-1])
+        return ws
+
+    app = web.Application()
+    app.router.add_get("/api/download", download)
+    app.router.add_route("*", "/api/echo", echo_headers)
+    app.router.add_get("/api/broken", broken)
+    app.router.add_get("/ws", ws_echo)
+    return app
+
+
+def run_with_proxy(check):
+    """Start the upstream and a proxy pointing both routes at it, then run ``check(client, release)``"""
+
+    async def main():
+        release = asyncio.Event()
+        upstream = TestServer(make_upstream(release))
+        await upstream.start_server()
+        base = str(upstream.make_url("")).rstrip("/")
+        client = TestClient(TestServer(create_app({"api_upstream": base, "frontend_upstream": base, "quiet": True})))
+        await client.start_server()
+        try:
+            await check(client, release)
+        finally:
+            release.set()
+            await client.close()
+            await upstream.close()
+
+    asyncio.run(main())
+
+
+class TestCombinedProxy:
+    """Pass-through of bodies, headers and WebSocket frames"""
+
+    def test_body_is_streamed_not_buffered(self):
+        async def check(client, release):
+            response = await client.get("/api/download")
+            assert response.status == 200
+            # The upstream is still holding the rest of the body back
+            first = await asyncio.wait_for(response.content.readexactly(len(b"first chunk;")), timeout=5)
+            assert first == b"first chunk;"
+            release.set()
+            rest = await response.read()
+            assert rest == b"x" * 1024 * 50
+
+        run_with_proxy(check)
+
+    def test_hop_by_hop_headers_are_stripped(self):
+        async def check(client, release):
+            release.set()
+            response = await client.get("/api/download")
+            assert response.headers["X-Upstream"] == "yes"
+            assert "Proxy-Authenticate" not in response.headers
+            await response.read()
+
+            response = await client.post("/api/echo", data=b"y" * 300_000, headers={
+                "Proxy-Authorization": "Basic abc", "TE": "trailers", "X-Custom": "kept"})
+            seen = await response.json()
+            headers = seen["headers"]
+            assert seen["body_length"] == 300_000
+            assert headers["x-custom"] == "kept"
+            assert "proxy-authorization" not in headers and "te" not in headers
+            assert headers["x-forwarded-host"] == f"{client.host}:{client.port}"
+            assert headers["x-forwarded-proto"] == "http"
+
+        run_with_proxy(check)
+
+    def test_upstream_failure_mid_body_aborts_the_client(self, capsys):
+        async def check(client, release):
+            response = await client.get("/api/broken")
+            assert response.status == 200
+            with pytest.raises(ClientPayloadError):
+                await response.read()
+
+        run_with_proxy(check)
+        assert "upstream failed mid-response: GET /api/broken" in capsys.readouterr().out
+
+    def test_websocket_frames_are_relayed(self):
+        async def check(client, release):
+            ws = await client.ws_connect("/ws", protocols=("v1",))
+            assert ws.protocol == "v1"
+            await ws.send_str("hello")
+            assert (await ws.receive(timeout=5)).data == "echo:hello"
+            await ws.send_bytes(b"\x01\x02\x03")
+            assert (await ws.receive(timeout=5)).data == b"\x03\x02\x01"
+            await ws.close()
+            assert ws.closed
+
+        run_with_proxy(check)
@@ -0,0 +1,133 @@
+# tests/test_composite_architecture_analyzer.py - Vectorized pattern scoring against the per-application loop
+
+from collections import Counter, defaultdict
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.composite_architecture_analyzer import (
+    PATTERN_INDICATORS,
+    CompositeArchitectureAnalyzer,
+    _ipv4_subnet24,
+)
+
+
+def make_flows(rows=1500, seed=7):
+    """Random flows for 12 applications over a few /24s, with missing endpoints and hostnames"""
+    rng = np.random.default_rng(seed)
+    ips = np.array([f"10.{a}.{b}.{c}" for a in (1, 2) for b in (0, 5) for c in (4, 9, 17)] +
+                   ["fe80::1", "fe80::2"], dtype=object)
+    protocols = np.array(["HTTP", "HTTPS", "GRPC", "POSTGRESQL", "TDS", "KAFKA", "IBMMQ", "REDIS", "LDAP", "SSH"],
+                         dtype=object)
+    ports = np.array([80, 443, 3001, 3060, 5432, 1433, 9092, 1414, 6379, 389, 22, 8443], dtype=object)
+    hosts = np.array(["web01", "app02", "db01", None], dtype=object)
+    flows = pd.DataFrame({
+        "application": np.array([f"APP{i:02d}" for i in range(12)], dtype=object)[rng.integers(0, 12, rows)],
+        "source_ip": ips[rng.integers(0, len(ips), rows)],
+        "destination_ip": ips[rng.integers(0, len(ips), rows)],
+        "source_hostname": hosts[rng.integers(0, len(hosts), rows)],
+        "destination_hostname": hosts[rng.integers(0, len(hosts), rows)],
+        "protocol": protocols[rng.integers(0, len(protocols), rows)],
+        "port": ports[rng.integers(0, len(ports), rows)].astype(int),
+        "bytes_in": rng.integers(0, 9000, rows),
+        "bytes_out": rng.integers(0, 9000, rows),
+    })
+    flows.loc[rng.choice(rows, 30, replace=False), "source_ip"] = None
+    flows.loc[rng.choice(rows, 30, replace=False), "destination_ip"] = None
+    # One application sees only a handful of flows, all inside one subnet
+    flows.loc[:4, ["application", "source_ip", "destination_ip"]] = ["APP99", "10.9.9.1", "10.9.9.2"]
+    return flows
+
+
+def reference_internal_traffic(app_data):
+    """Same-/24 connections counted row by row (the old loop raised TypeError on missing IPs)"""
+    count = 0
+    for _, row in app_data.iterrows():
+        src_ip, dest_ip = row.get('source_ip', ''), row.get('destination_ip', '')
+        if pd.notna(src_ip) and pd.notna(dest_ip) and '.' in src_ip and '.' in dest_ip:
+            if src_ip.split('.')[:3] == dest_ip.split('.')[:3]:
+                count += 1
+    return count
+
+
+def reference_pattern_scores(app_data):
+    """Pattern scores for one application as the per-application loop computed them"""
+    scores = defaultdict(float)
+    protocol_counts, port_counts = Counter(app_data['protocol']), Counter(app_data['port'])
+    total = len(app_data)
+    sources = app_data['source_ip'].nunique() + app_data['source_hostname'].nunique()
+    destinations = app_data['destination_ip'].nunique() + app_data['destination_hostname'].nunique()
+    bytes_in, bytes_out = app_data['bytes_in'].mean(), app_data['bytes_out'].mean()
+
+    for name, config in PATTERN_INDICATORS.items():
+        score = 0.0
+        protocol_matches = sum(protocol_counts.get(p, 0) for p in config['protocols'])
+        if protocol_matches:
+            score += protocol_matches / total * config['weight']
+        port_matches = sum(port_counts.get(p, 0) for p in config['ports'])
+        if port_matches:
+            score += port_matches / total * config['weight'] * 0.5
+        characteristics = config.get('characteristics', [])
+        if 'high_fanout' in characteristics and destinations > 5:
+            score += 0.3
+        if 'aggregation_point' in characteristics and sources > destinations * 2:
+            score += 0.2
+        if 'east_west_traffic' in characteristics and reference_internal_traffic(app_data) > total * 0.3:
+            score += 0.4
+        if 'async_communication' in characteristics and bytes_out > bytes_in * 0.5 and protocol_matches:
+            score += 0.3
+        if 'high_read_write' in characteristics and bytes_in + bytes_out > 5000 and protocol_matches:
+            score += 0.4
+        if 'pub_sub' in characteristics and sources > 2 and destinations > 2 and protocol_matches:
+            score += 0.3
+        scores[name] = min(score, 2.0)
+    return scores
+
+
+class TestPatternScoring:
+    """Scores for every application and pattern, and the /24 parser behind east-west traffic"""
+
+    def test_scores_match_per_application_loop(self):
+        flows = make_flows()
+        scores = CompositeArchitectureAnalyzer(flows)._score_patterns(flows)
+
+        assert list(scores.columns) == list(PATTERN_INDICATORS)
+        assert sorted(scores.index) == sorted(flows['application'].unique())
+        for app_name, app_data in flows.groupby('application'):
+            expected = reference_pattern_scores(app_data)
+            for pattern in PATTERN_INDICATORS:
+                assert scores.loc[app_name, pattern] == pytest.approx(expected[pattern]), (app_name, pattern)
+
+        # The small single-subnet application gets the east-west bonus
+        assert scores.loc["APP99", "app_services"] >= 0.4
+
+    def test_subnet_parser_matches_string_prefixes(self):
+        values = pd.Series(["10.1.0.4", "10.1.0.9", "10.1.5.4", "192.168.255.1", "0.0.0.0", "10.1.0.4"])
+        subnets = _ipv4_subnet24(values)
+
+        assert subnets.tolist() == [(10 << 16) | (1 << 8), (10 << 16) | (1 << 8), (10 << 16) | (1 << 8) | 5,
+                                    (192 << 16) | (168 << 8) | 255, 0, (10 << 16) | (1 << 8)]
+        for i, a in enumerate(values):
+            for j, b in enumerate(values):
+                assert (subnets[i] == subnets[j]) == (a.split('.')[:3] == b.split('.')[:3])
+
+    def test_malformed_addresses_are_not_ipv4(self):
+        malformed = pd.Series(["10.1.0", "10.1.0.256", "10.1.0.4.7", "a.b.c.d", "10.-1.0.4", "db01.corp.local",
+                               "fe80::1", "", None, np.nan, "10.1.0.4"], dtype=object)
+        subnets = _ipv4_subnet24(malformed)
+
+        assert subnets[:-1].tolist() == [-1] * (len(malformed) - 1)
+        assert subnets[-1] == (10 << 16) | (1 << 8)
+        assert _ipv4_subnet24(pd.Series([], dtype=object)).tolist() == []
+        assert _ipv4_subnet24(pd.Series([None, None], dtype=object)).tolist() == [-1, -1]
+
+        # Malformed addresses never count as internal traffic, even when their prefixes agree
+        flows = pd.DataFrame({
+            "application": ["APP"] * 3, "protocol": ["HTTP"] * 3, "port": [80] * 3,
+            "source_ip": ["10.1.0.999", "10.1.0.4", None], "destination_ip": ["10.1.0.5", "10.1.0.5", "10.1.0.5"],
+            "source_hostname": [None] * 3, "destination_hostname": [None] * 3,
+            "bytes_in": [1, 2, 3], "bytes_out": [1, 2, 3],
+        })
+        features, _, _ = CompositeArchitectureAnalyzer(flows)._compute_app_features(flows)
+        assert features.loc["APP", "internal_connections"] == 1
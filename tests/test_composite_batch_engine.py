@@ -0,0 +1,88 @@
+# tests/test_composite_batch_engine.py - In-process composite engine against the generate_file.py CLI path
+
+import random
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import composite_batch_engine as engine
+
+SAMPLE = Path(__file__).resolve().parent.parent / "data" / "App_Code_XECHK.csv"
+
+
+@pytest.fixture
+def analyzers(monkeypatch):
+    """The engine's analyzers with DNS lookups answered locally"""
+    a = engine.load_analyzers()
+    monkeypatch.setattr(a.generate_file, "reverse_dns_socket", lambda ip, timeout=0.75: None)
+    monkeypatch.setattr(a.generate_file, "forward_dns_socket", lambda hostname, timeout=0.75: None)
+    return a
+
+
+@pytest.fixture
+def app_file(tmp_path, monkeypatch):
+    """A 60-row App_Code export plus one blank row, in a scratch working directory"""
+    monkeypatch.chdir(tmp_path)
+    rows = SAMPLE.read_text().splitlines()[:61] + [",,,,,,,,"]
+    path = tmp_path / "data" / "App_Code_TINY.csv"
+    path.parent.mkdir()
+    path.write_text("\n".join(rows) + "\n")
+    return path
+
+
+class TestCompositeBatchEngine:
+    """Shared data preparation, a full in-process run and the per-file deadline"""
+
+    def test_prepare_matches_generate_file_main(self, analyzers, app_file, tmp_path, monkeypatch):
+        prepared = engine.prepare_network_data(analyzers, app_file, str(tmp_path / "engine"), min_rows=100)
+
+        argv = ["generate_file.py", "--input", str(app_file), "--staging-dir", str(tmp_path / "cli"),
+                "--min-rows", "100"] + engine.GENERATE_FILE_OPTIONS
+        monkeypatch.setattr(sys, "argv", argv)
+        random.seed(42)
+        np.random.seed(42)
+        assert analyzers.generate_file.main() == 0
+
+        # Identical apart from the processing timestamps
+        engine_rows = pd.read_csv(prepared).drop(columns=["timestamp"])
+        cli_rows = pd.read_csv(next((tmp_path / "cli").glob("*.csv"))).drop(columns=["timestamp"])
+        assert engine_rows.equals(cli_rows)
+        assert len(engine_rows) == 100
+
+    def test_full_run_in_process(self, analyzers, app_file, tmp_path):
+        result = engine.run_composite_analysis(str(app_file), str(tmp_path / "out"), staging_dir="staging",
+                                               central_dir="central", min_rows=0)
+
+        assert result["status"] == "SUCCESS", result["error"]
+        assert list(result["step_seconds"]) == list(engine.WORKFLOW_STEPS)
+        assert Path(result["processed_file"]).parent == Path("staging")
+        for suffix in ("composite_patterns.png", "traffic_weighted_network.png",
+                       "composite_architecture_report.md", "connectivity_analysis.txt"):
+            assert (tmp_path / "central" / f"TINY_{suffix}").exists(), suffix
+
+        # Step output goes to the log, including generate_file's blank-row handling
+        log = (tmp_path / "out" / "workflow.log").read_text()
+        assert "Removed 1 blank rows" in log and "Processed 27 network edge records" in log
+
+    def test_deadline_stops_the_file(self, analyzers, app_file, tmp_path, monkeypatch):
+        def stuck(a, df, results_dir):
+            # An analyzer that swallows every error still cannot run past the deadline
+            try:
+                time.sleep(30)
+            except Exception:
+                pass
+
+        monkeypatch.setattr(engine, "_composite_patterns", lambda a, df, results_dir: None)
+        monkeypatch.setattr(engine, "_traffic_visualization", stuck)
+
+        started = time.monotonic()
+        result = engine.run_composite_analysis(str(app_file), str(tmp_path / "out"), staging_dir="staging",
+                                               central_dir="central", min_rows=0, timeout=1)
+
+        assert result["status"] == "TIMEOUT"
+        assert time.monotonic() - started < 10
+        assert "traffic_visualization" in result["step_seconds"] and "report" not in result["step_seconds"]
@@ -0,0 +1,95 @@
+# tests/test_cost_engine.py - Vectorized portfolio cost engine tests
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from routers.migration import CostScenarioRequest, compare_cost_scenarios
+from services.cost_engine import (
+    COST_ENGINE_CONFIG, CostScenario, PortfolioCostModel, PortfolioCostTable, ScenarioLimitError,
+    build_scenario_grid, scenarios_from_dicts
+)
+from services.cost_service import AWSCostFactors, CostService
+from services.portfolio_store import PortfolioStore
+
+
+def app(strategy, complexity="low", archetype="Client-Server"):
+    return {"id": f"{strategy}-{complexity}", "strategy": strategy, "complexity": complexity, "archetype": archetype}
+
+
+class TestCostEngine:
+    """Cell aggregation, scenario sweeps and strategy mixes"""
+
+    def setup_method(self):
+        self.model = PortfolioCostModel(AWSCostFactors())
+
+    def test_single_application_hand_values(self):
+        table = PortfolioCostTable([app("Rehost")])
+        costs = self.model.migration_costs(table, approach="phased")
+
+        # Rehost, low complexity, no archetype adjustment: 37,000 plus 15% contingency
+        assert costs["breakdown"]["professional_services"] == 15000
+        assert costs["breakdown"]["contingency"] == pytest.approx(5550)
+        assert costs["total"] == pytest.approx(42550)
+        assert costs["by_strategy"]["rehost"] == 37000
+
+        bigbang = self.model.migration_costs(table, approach="bigbang")
+        assert bigbang["breakdown"]["professional_services"] == pytest.approx(21000)
+        assert bigbang["contingency_rate"] == 0.20
+
+    def test_cells_collapse_identical_applications(self):
+        apps = [app("Refactor", "high", "Monolithic")] * 40 + [app("Rehost")] * 10
+        table = PortfolioCostTable(apps)
+        assert len(table.cell_count) == 2
+
+        single = self.model.migration_costs(PortfolioCostTable([app("Refactor", "high", "Monolithic")]))
+        combined = self.model.migration_costs(table)
+        assert combined["by_strategy"]["refactor"] == pytest.approx(40 * single["by_strategy"]["refactor"])
+
+    def test_grid_and_strategy_mix(self):
+        table = PortfolioCostTable([app("Rehost"), app("Replatform", "medium"), app("Retain")])
+        grid = build_scenario_grid(approaches=["phased", "bigbang"], contingency_rates=[0.1, 0.2, 0.3],
+                                   strategy_mixes=[{}, {"*": "refactor"}])
+        assert len(grid) == 12
+        assert len({s.name for s in grid}) == 12
+
+        matrix = self.model.compare(table, grid)
+        assert len(matrix) == 12
+        everything_refactored = matrix[matrix["strategy_mix"] != matrix["strategy_mix"].iloc[0]]
+        assert (everything_refactored["apps_refactor"] == 3).all()
+        baseline = matrix[(matrix["approach"] == "phased") & (matrix["strategy_mix"] == matrix["strategy_mix"].iloc[0])]
+        assert baseline["migration_cost"].is_monotonic_increasing
+        assert baseline["contingency_rate"].tolist() == [0.1, 0.2, 0.3]
+
+        cheaper_cloud = self.model.compare(table, [CostScenario("aws"), CostScenario("other", cloud_cost_multiplier=0.8)])
+        assert cheaper_cloud["cloud_annual_cost"][1] == pytest.approx(0.8 * cheaper_cloud["cloud_annual_cost"][0])
+        assert cheaper_cloud["annual_savings"][1] > cheaper_cloud["annual_savings"][0]
+
+    def test_invalid_scenarios_are_rejected(self):
+        table = PortfolioCostTable([app("Rehost")])
+        with pytest.raises(ValueError):
+            self.model.compare(table, scenarios_from_dicts([{"strategy_mix": {"rehost": "teleport"}}]))
+        with pytest.raises(TypeError):
+            scenarios_from_dicts([{"no_such_field": 1}])
+        # Only AWS is priced, so a target cloud is not a scenario field
+        with pytest.raises(TypeError):
+            scenarios_from_dicts([{"target_cloud": "azure"}])
+
+    def test_oversized_grids_are_rejected_before_expanding(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(COST_ENGINE_CONFIG, "max_scenarios", 100)
+        assert len(build_scenario_grid(approaches=["phased", "bigbang"], ri_coverages=[i / 50 for i in range(50)])) == 100
+        with pytest.raises(ScenarioLimitError):
+            build_scenario_grid(ri_coverages=[i / 1000 for i in range(1000)], timeline_years=list(range(1, 1001)))
+
+        service = CostService()
+        apps = [app("Rehost")]
+        with pytest.raises(ScenarioLimitError):
+            asyncio.run(service.compare_scenarios(apps, scenarios=[{}] * 60, grid={"ri_coverages": [0.1 * i for i in range(50)]}))
+        assert asyncio.run(service.compare_scenarios(apps, scenarios=[{}] * 50, grid={"ri_coverages": [0.5]}))["scenario_count"] == 51
+
+        # The endpoint answers an oversized grid with 422
+        request = CostScenarioRequest(applications=["all"], grid={"timeline_years": list(range(1, 102))})
+        with pytest.raises(HTTPException) as rejected:
+            asyncio.run(compare_cost_scenarios(request, CostService.from_store(PortfolioStore(data_folder=str(tmp_path)))))
+        assert rejected.value.status_code == 422
@@ -0,0 +1,73 @@
+# tests/test_data_normalization.py - Vectorized dedup keys and hashes against the per-row reference
+
+import numpy as np
+import pandas as pd
+
+import static.ui.js.data_normalization as normalization
+from static.ui.js.data_normalization import DataNormalizer, ProcessingConfig
+
+FLOWS = pd.DataFrame({
+    "source_ip": ["10.0.0.1", "10.0.0.1 ", "10.0.0.2", "10.0.0.3", None],
+    "destination_ip": ["10.0.1.1", "10.0.1.1", "10.0.1.2", "10.0.1.3", "10.0.1.4"],
+    "application": ["Payments", "PAYMENTS", "Ledger", None, "Portal"],
+    "protocol": ["TCP", "tcp", "UDP", "TCP", "TCP"],
+    "port": [443, 443, 53, 8080, 80],
+    "timestamp": ["2026-03-01 10:01:00", "2026-03-01 10:04:59", "2026-03-01 10:07:00", None,
+                  "2026-03-01T10:00:00+02:00"],
+    "bytes": [100, 200, 300, 400, 500],
+})
+
+
+def reference_record_key(row, window_minutes):
+    """Record key as the per-row dedup path built it"""
+    values = [str(row.get(key, "")).lower().strip()
+              for key in ["source_ip", "destination_ip", "application", "protocol", "port"]]
+    timestamp = row.get("timestamp")
+    if pd.notna(timestamp):
+        stamp = pd.Timestamp(timestamp)
+        stamp = stamp.tz_localize("UTC") if stamp.tzinfo is None else stamp
+        values.append(str(int(stamp.timestamp() // (window_minutes * 60))))
+    return "|".join(values)
+
+
+def make_normalizer(tmp_path, **config):
+    return DataNormalizer(ProcessingConfig(dedup_store_path=str(tmp_path / "dedup.sqlite"), **config))
+
+
+class TestCrossBatchDedup:
+    """Record keys, dtype-independent content hashes and the store location"""
+
+    def test_record_keys_match_the_per_row_keys(self, tmp_path):
+        normalizer = make_normalizer(tmp_path)
+        keys = normalizer._create_record_keys(FLOWS)
+
+        expected = [reference_record_key(row, 5) for _, row in FLOWS.iterrows()]
+        assert keys.tolist() == expected
+        # The first two rows share a key: same endpoints and protocol in one five-minute window
+        assert keys[0] == keys[1] and keys.nunique() == len(FLOWS) - 1
+
+    def test_replayed_rows_are_ignored_whatever_their_inferred_dtypes(self, tmp_path):
+        normalizer = make_normalizer(tmp_path)
+        batch = FLOWS.drop(index=1).reset_index(drop=True)
+
+        first, info = normalizer.handle_cross_batch_duplicates(batch, "first.csv")
+        assert (info["new_records"], info["ignored_duplicates"]) == (len(batch), 0)
+
+        # Same rows, read back with every column as text
+        as_text = batch.astype(str).replace({"None": None})
+        _, replay = normalizer.handle_cross_batch_duplicates(as_text, "replay.csv")
+        assert (replay["new_records"], replay["updated_records"], replay["ignored_duplicates"]) == (0, 0, len(batch))
+        assert np.array_equal(normalizer._create_content_hashes(batch), normalizer._create_content_hashes(as_text))
+
+        changed = batch.assign(bytes=[100, 999, 400, 500])
+        _, update = normalizer.handle_cross_batch_duplicates(changed, "changed.csv")
+        assert (update["updated_records"], update["ignored_duplicates"]) == (1, len(batch) - 1)
+        assert len(normalizer.global_record_store) == len(batch)
+
+    def test_relative_store_paths_resolve_against_the_project_root(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        assert DataNormalizer._resolve_store_path("data_staging/x.sqlite") == \
+            str(normalization.PROJECT_ROOT / "data_staging" / "x.sqlite")
+        assert DataNormalizer._resolve_store_path(str(tmp_path / "abs.sqlite")) == str(tmp_path / "abs.sqlite")
+        assert DataNormalizer._resolve_store_path(None) == ":memory:"
+        assert (normalization.PROJECT_ROOT / "static" / "ui" / "js" / "data_normalization.py").exists()
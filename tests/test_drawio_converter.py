@@ -0,0 +1,180 @@
+# tests/test_drawio_converter.py - Draw.io PDF page pool tests (fake browser, no Playwright needed)
+
+import asyncio
+import multiprocessing
+import os
+import time
+
+import pytest
+
+import services.drawio_converter as drawio_converter
+from services.drawio_converter import DrawioPDFConverter
+
+
+class FakeHandle:
+    async def dispose(self):
+        pass
+
+
+class FakePage:
+    """Records what the converter does; 'broken' diagrams report a render error"""
+
+    active = 0
+    peak = 0
+
+    def __init__(self, context):
+        self.context = context
+        self.html = ""
+        self.loads = 0
+
+    def is_closed(self):
+        return self.context.closed
+
+    async def set_content(self, html, wait_until=None, timeout=None):
+        self.html = html
+        self.loads += 1
+
+    async def wait_for_function(self, expression, arg=None, timeout=None):
+        assert arg in self.html
+        FakePage.active += 1
+        FakePage.peak = max(FakePage.peak, FakePage.active)
+        await asyncio.sleep(0.01)
+        FakePage.active -= 1
+        return FakeHandle()
+
+    async def evaluate(self, expression):
+        return "viewer error" if "broken" in self.html else None
+
+    async def pdf(self, path=None, **options):
+        with open(path, "wb") as f:
+            f.write(b"%PDF-fake")
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+        self.pages = []
+
+    async def route(self, url, handler):
+        pass
+
+    async def new_page(self):
+        page = FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    async def new_context(self, viewport=None):
+        context = FakeContext()
+        self.contexts.append(context)
+        return context
+
+
+async def started_converter(pool_size):
+    converter = DrawioPDFConverter(pool_size=pool_size, render_timeout_ms=1000)
+    converter._bind_loop()
+    converter.browser = FakeBrowser()
+    converter._initialized = True
+    return converter
+
+
+class TestDrawioPagePool:
+    """Bounded concurrency, page reuse, failure isolation and batch timing"""
+
+    def test_batch_reuses_a_bounded_pool(self, tmp_path):
+        paths = []
+        for i in range(10):
+            path = tmp_path / f"diagram_{i}.drawio"
+            path.write_text(f"<mxfile><diagram name='d{i}'/></mxfile>")
+            paths.append(str(path))
+
+        async def run():
+            converter = await started_converter(pool_size=3)
+            return converter, await converter.convert_batch(paths, str(tmp_path / "pdf"))
+
+        FakePage.peak = 0
+        converter, report = asyncio.run(run())
+
+        assert report["converted"] == 10 and report["failed"] == 0
+        assert len(converter.browser.contexts) == 3
+        assert FakePage.peak == 3
+        assert sum(page.loads for c in converter.browser.contexts for page in c.pages) == 10
+        for result in report["results"]:
+            assert (tmp_path / "pdf" / f"{result['drawio_path'].rsplit('/', 1)[-1][:-7]}.pdf").exists()
+            assert result["seconds"] >= result["render_seconds"] >= 0
+
+    def test_failed_render_discards_page_and_continues(self, tmp_path):
+        good = tmp_path / "good.drawio"
+        good.write_text("<mxfile/>")
+        broken = tmp_path / "broken.drawio"
+        broken.write_text("<mxfile>broken</mxfile>")
+
+        async def run():
+            converter = await started_converter(pool_size=1)
+            report = await converter.convert_batch([str(broken), str(good), str(tmp_path / "missing.drawio")])
+            single = await converter.convert_to_pdf_direct(str(good))
+            return converter, report, single
+
+        converter, report, single = asyncio.run(run())
+
+        outcomes = {r["drawio_path"].rsplit("/", 1)[-1]: r for r in report["results"]}
+        assert not outcomes["broken.drawio"]["success"]
+        assert "viewer error" in outcomes["broken.drawio"]["error"]
+        assert outcomes["good.drawio"]["success"]
+        assert "not found" in outcomes["missing.drawio"]["error"]
+        assert single == str(good.with_suffix(".pdf"))
+
+        metrics = converter.get_metrics()
+        assert metrics["pages_discarded"] == 1
+        assert metrics["pages_open"] == 1
+        assert converter.browser.contexts[0].closed
+
+
+async def loop_thread_pid(converter):
+    return os.getpid(), converter is drawio_converter._sync_converter
+
+
+def run_sync_in_child(_):
+    return drawio_converter._run_sync(loop_thread_pid, timeout=5)
+
+
+class TestSyncConverter:
+    """The shared synchronous loop across forks and slow conversions"""
+
+    def test_forked_worker_builds_its_own_loop(self):
+        parent_pid, _ = drawio_converter._run_sync(loop_thread_pid, timeout=5)
+        parent_loop = drawio_converter._sync_loop
+
+        # A forked child inherits the loop object but not the thread running it
+        with multiprocessing.get_context("fork").Pool(1) as pool:
+            child_pid, same_converter = pool.map(run_sync_in_child, [0], chunksize=1)[0]
+
+        assert parent_pid == os.getpid() and child_pid != parent_pid and same_converter
+        assert drawio_converter._sync_loop is parent_loop
+
+    def test_slow_conversion_times_out_and_is_cancelled(self):
+        cancelled = []
+
+        async def hang(converter):
+            try:
+                await asyncio.sleep(30)
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+
+        started = time.perf_counter()
+        with pytest.raises(TimeoutError):
+            drawio_converter._run_sync(hang, timeout=0.2)
+        assert time.perf_counter() - started < 5
+
+        deadline = time.monotonic() + 5
+        while not cancelled and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert cancelled
@@ -0,0 +1,218 @@
+# tests/test_excel_processing_router.py - Excel job execution and vectorized analysis against the in-line path
+
+import asyncio
+import json
+import queue
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import routers.excel_processing_router as excel
+from services.job_registry import JobRegistry
+
+SETTINGS = {
+    "port_column": "port,dst_port",
+    "protocol_column": "protocol,proto",
+    "app_column": "app_id",
+    "info_column": "info",
+    "sheet_name": None,
+    "fallback_parsing": True,
+}
+
+SHEET = pd.DataFrame({
+    "app_id": ["PAY", "PAY", "PAY", "LEDGER", "LEDGER", "PORTAL", "PORTAL", "BATCH"],
+    "src_ip": ["10.0.0.1", "10.0.0.2", "10.0.0.1", "10.0.1.1", "10.0.1.1", "10.0.2.1", "10.0.2.2", "10.0.3.1"],
+    "dst_ip": ["10.1.0.1", "10.1.0.1", "10.1.0.2", "10.1.1.1", "10.1.1.2", "10.1.2.1", "10.1.2.1", "10.1.3.1"],
+    "port": [443, 8080, 443, 5432, 1433, 80, 443, None],
+    "protocol": ["tcp", "http", "tcp", "tcp", "tcp", "https", "http", None],
+    "info": [None, None, None, "database replication", None, None, None, "file share port=445 over ftp"],
+})
+
+
+def reference_result(df):
+    """Applications and summary as the request handler built them before jobs moved to worker processes"""
+    applications = excel.analyze_applications_from_excel_enhanced(
+        df, SETTINGS["port_column"], SETTINGS["protocol_column"], SETTINGS["app_column"],
+        SETTINGS["info_column"], SETTINGS["fallback_parsing"], "reference"
+    )
+    classified = []
+    for app in applications:
+        details = excel.archetype_service.get_archetype_details(app.get("architecture", "Unknown"))
+        classified.append({
+            **app,
+            "archetype_details": details,
+            "cloud_readiness": details.get("cloud_readiness", "Unknown") if details else "Unknown",
+            "modernization_effort": details.get("modernization_effort", "Unknown") if details else "Unknown",
+            "aws_services": details.get("aws_services", []) if details else []
+        })
+    return classified, excel.generate_processing_summary(classified)
+
+
+def reference_analyze_applications(df, port_columns, protocol_columns, app_columns, info_columns, fallback_parsing):
+    """Per-application analysis as the per-group loop computed it"""
+    pick = lambda options: next((c.strip() for c in options.split(',') if c.strip() in df.columns), None)
+    port_col, protocol_col = pick(port_columns), pick(protocol_columns)
+    app_col, info_col = pick(app_columns), pick(info_columns)
+
+    if app_col:
+        keys = df[app_col]
+    elif info_col:
+        keys = df[info_col].fillna('unknown').apply(lambda x: f"App_{hash(str(x)[:50]) % 1000:03d}")
+    else:
+        keys = pd.Series(df.index // 100, index=df.index)
+
+    applications = []
+    for app_name, group in df.groupby(keys):
+        ports, protocols, services = [], [], []
+        if port_col:
+            for val in group[port_col].dropna():
+                if isinstance(val, (int, float)) or (isinstance(val, str) and val.isdigit()):
+                    ports.append(int(val))
+        if protocol_col:
+            protocols = [str(p).upper() for p in group[protocol_col].dropna().unique()
+                         if str(p).upper() in ['TCP', 'UDP', 'HTTP', 'HTTPS']]
+        if fallback_parsing and (not ports or not protocols) and info_col:
+            for info_text in group[info_col].dropna():
+                parsed = excel.parse_traffic_info(str(info_text))
+                for field, found in (("port", ports), ("protocol", protocols), ("service", services)):
+                    if parsed.get(field) and parsed[field] not in found:
+                        found.append(parsed[field])
+
+        ports = sorted(set(ports))
+        has_ip_pairs = 'src_ip' in df.columns and 'dst_ip' in df.columns
+        applications.append({
+            "app_id": str(app_name),
+            "app_name": str(app_name),
+            "architecture": excel.classify_architecture_from_enhanced_data(ports, list(set(protocols)), list(set(services))),
+            "ports": [str(p) for p in ports],
+            "protocols": sorted(set(protocols)),
+            "services": sorted(set(services)),
+            "port_count": len(ports),
+            "flow_count": len(group),
+            "risk_level": excel.calculate_risk_level(ports, len(group)),
+            "confidence": excel.calculate_confidence_score_enhanced(len(group), ports, protocols, services, has_ip_pairs),
+            "source_ips": group['src_ip'].nunique() if 'src_ip' in df.columns else 0,
+            "dest_ips": group['dst_ip'].nunique() if 'dst_ip' in df.columns else 0,
+            "parsing_method": "dedicated_columns" if (port_col or protocol_col) else "info_field_fallback"
+        })
+    return applications
+
+
+def make_mixed_sheet(rows=3000, seed=11):
+    """Random flows with ports as numbers, digit strings, junk text and gaps, and info-only applications"""
+    rng = np.random.default_rng(seed)
+    ports = np.array([80, 443, 22, 5432, 8080.0, "1433", "3389", "https", " 25", None], dtype=object)
+    protocols = np.array(["tcp", "UDP", "Http", "https", "icmp", None], dtype=object)
+    info = np.array(["web server over tcp port 443", "api gateway :8080 protocol http", "db sync 5432/tcp",
+                     "mail relay over smtp port 25", "file share port=445", "monitoring agent",
+                     "admin console :99999", None], dtype=object)
+    app_ids = rng.integers(0, 60, rows)
+    sheet = pd.DataFrame({
+        "app_id": [f"APP{a:03d}" for a in app_ids],
+        "src_ip": [f"10.0.{a}.{b}" for a, b in zip(app_ids, rng.integers(0, 5, rows))],
+        "dst_ip": [f"10.1.{a}.{b}" for a, b in zip(app_ids, rng.integers(0, 9, rows))],
+        "port": ports[rng.integers(0, len(ports), rows)],
+        "protocol": protocols[rng.integers(0, len(protocols), rows)],
+        "info": info[rng.integers(0, len(info), rows)],
+    })
+    # Every fifth application relies on the info field alone
+    info_only = app_ids % 5 == 0
+    sheet.loc[info_only, ["port", "protocol"]] = None
+    return sheet
+
+
+def assert_same_applications(df, *columns):
+    expected = reference_analyze_applications(df.copy(), *columns, True)
+    actual = excel.analyze_applications_from_excel_enhanced(df.copy(), *columns, True, "test")
+    assert [app["app_id"] for app in actual] == [app["app_id"] for app in expected]
+    for old, new in zip(expected, actual):
+        assert new == old, old["app_id"]
+    return actual
+
+
+@pytest.fixture
+def sheet_path(tmp_path):
+    path = tmp_path / "flows.csv"
+    SHEET.to_csv(path, index=False)
+    return str(path)
+
+
+class TestExcelJobWorker:
+    """The worker function writes the same applications the in-line path produced"""
+
+    def test_worker_matches_in_line_processing(self, tmp_path, sheet_path):
+        progress = queue.Queue()
+        summary = excel.run_excel_processing_job("job-1", sheet_path, SETTINGS, str(tmp_path / "out"), progress)
+
+        expected_apps, expected_summary = reference_result(pd.read_csv(sheet_path))
+        with open(summary["output_file"]) as f:
+            written = json.load(f)
+        assert written["applications"] == json.loads(json.dumps(expected_apps, default=str))
+        assert summary["summary"] == written["summary"] == expected_summary
+        assert (summary["rows_processed"], summary["applications_identified"]) == (len(SHEET), 4)
+
+        updates = [progress.get_nowait()[1] for _ in range(progress.qsize())]
+        assert updates[0]["progress"] == 10 and updates[-1]["progress"] == 90
+        assert all("applications" not in update for update in updates)
+
+
+class TestExcelJobExecutor:
+    """Queue limits and a full run through the process pool"""
+
+    def test_capacity_counts_running_and_queued_jobs(self):
+        executor = excel.ExcelJobExecutor(max_concurrent_jobs=2, max_queued_jobs=1)
+        for _ in range(3):
+            assert executor.has_capacity()
+            executor.reserve()
+        assert not executor.has_capacity()
+        assert executor.get_status()["queued_jobs"] == 3
+
+    def test_pool_run_completes_the_job(self, tmp_path, sheet_path, monkeypatch):
+        registry = JobRegistry(db_path=str(tmp_path / "jobs.sqlite"), payload_dir=str(tmp_path / "payloads"))
+        monkeypatch.setattr(excel, "job_registry", registry)
+        monkeypatch.setitem(excel.EXCEL_JOB_CONFIG, "results_dir", str(tmp_path / "out"))
+        job_id = registry.create_job(excel.EXCEL_JOB_TYPE, status="queued")
+
+        executor = excel.ExcelJobExecutor(max_concurrent_jobs=1, max_queued_jobs=0, progress_poll_interval=0.05)
+        executor.reserve()
+        try:
+            asyncio.run(executor.run(job_id, sheet_path, SETTINGS))
+        finally:
+            executor.shutdown()
+
+        job = registry.get_job(job_id)
+        assert job["status"] == "completed" and job["progress"] == 100
+        assert job["result"]["applications_identified"] == 4
+        assert executor.pending_jobs == 0 and executor.running_jobs == 0
+
+        page = asyncio.run(excel.get_job_result(job_id, offset=1, limit=2))
+        expected_apps, _ = reference_result(pd.read_csv(sheet_path))
+        assert page["total_applications"] == 4
+        assert [app["app_id"] for app in page["applications"]] == [app["app_id"] for app in expected_apps[1:3]]
+
+
+class TestVectorizedAnalysis:
+    """Frame-wide extraction against the per-group loop"""
+
+    def test_mixed_port_and_protocol_cells(self):
+        applications = assert_same_applications(make_mixed_sheet(), "port", "protocol", "app_id", "info")
+        assert len(applications) == 60
+        assert any(app["services"] for app in applications)
+
+    def test_info_only_and_row_grouped_sheets(self):
+        sheet = make_mixed_sheet(rows=450)
+        # Without an application column apps are derived from the info text, then from row blocks
+        assert_same_applications(sheet.drop(columns=["app_id"]), "port", "protocol", "app_id", "info")
+        assert_same_applications(sheet.drop(columns=["app_id", "info"]), "port", "protocol", "app_id", "info")
+        assert_same_applications(sheet[["app_id", "info"]], "port", "protocol", "app_id", "info")
+
+    def test_info_fields_match_the_per_string_parser(self):
+        texts = pd.Series(make_mixed_sheet(rows=200)["info"].dropna().unique().tolist() + [
+            "port 70000 then :8443", "ssh over SSH", "service: auth via ldap", "", "443/udp dns"])
+        fields = excel.extract_traffic_info_fields(texts)
+        for text, row in zip(texts, fields.itertuples(index=False)):
+            parsed = excel.parse_traffic_info(text)
+            assert (None if pd.isna(row.port) else int(row.port)) == parsed.get("port"), text
+            assert (None if pd.isna(row.protocol) else row.protocol) == parsed.get("protocol"), text
+            assert (None if pd.isna(row.service) else row.service) == parsed.get("service"), text
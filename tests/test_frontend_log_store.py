@@ -0,0 +1,96 @@
+# tests/test_frontend_log_store.py - Ring-buffered frontend log store tests
+
+import asyncio
+import gzip
+import json
+import time
+
+import routers.frontend_logging as frontend_logging
+from services.frontend_log_store import FrontendLogStore
+
+
+def entry(session, i, level="INFO"):
+    return {"session_id": session, "message": f"{session} event {i}", "level": level, "seq": i}
+
+
+class TestFrontendLogStore:
+    """Bounded buffer, index consistency, validation and disk segments"""
+
+    def test_ring_evicts_oldest_and_keeps_indexes_consistent(self):
+        store = FrontendLogStore(capacity=10, flush_dir="")
+        for i in range(25):
+            store.add_batch([entry("a" if i % 3 else "b", i, "ERROR" if i % 5 == 0 else "info")], "batch")
+
+        assert len(store) == 10
+        assert store.stats["evicted"] == 15
+        recent = store.recent(100)
+        assert [e["seq"] for e in recent] == list(range(15, 25))
+
+        # Indexes hold exactly the buffered entries, oldest first
+        assert [e["seq"] for e in store.session_logs("b")] == [i for i in range(15, 25) if i % 3 == 0]
+        assert [e["seq"] for e in store.session_logs("a", limit=2)] == [22, 23]
+        assert [e["seq"] for e in store.level_logs("error")] == [15, 20]
+        assert sum(store.get_metrics()["levels"].values()) == 10
+        # Session counters cover everything received, not just what is buffered
+        assert store.session_stats("b")["log_count"] == 9
+        # Memory-only: nothing is queued for disk, so wrapping the ring is not reported as data loss
+        metrics = store.get_metrics()
+        assert (metrics["pending_flush"], metrics["unflushed_dropped"], metrics["flush_dir"]) == (0, 0, None)
+
+    def test_batch_validation_and_session_limit(self):
+        store = FrontendLogStore(capacity=100, max_sessions=2, flush_dir="")
+        accepted, errors = store.add_batch(
+            [entry("s1", 1), {"session_id": "s1"}, "not a dict", entry("s2", 2), entry("s3", 3)], "b1")
+
+        assert accepted == 3
+        assert errors == ["Missing message field", "Log entry must be an object"]
+        assert store.add_batch({"oops": 1}, "b2") == (0, ["Logs must be a list"])
+        assert store.session_count == 2
+        assert store.session_stats("s1") == {}
+        assert store.session_logs("s1") == []
+        assert [e["seq"] for e in store.session_logs("s3")] == [3]
+
+        # A returning session starts a fresh index; old entries leaving the ring do not disturb it
+        store.add_batch([entry("s1", 4)], "b3")
+        assert [e["seq"] for e in store.session_logs("s1")] == [4]
+
+    def test_flush_writes_compressed_segments(self, tmp_path):
+        store = FrontendLogStore(capacity=50, flush_dir=str(tmp_path), flush_interval=3600, flush_batch_size=5)
+        store.add_batch([entry("s", i) for i in range(3)], "b1")
+        assert not store.flush_due()
+        store.add_batch([entry("s", i) for i in range(3, 7)], "b2")
+        assert store.flush_due()
+
+        path = store.flush()
+        assert path is not None and path.name.endswith(".jsonl.gz")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            written = [json.loads(line) for line in f]
+        assert [e["seq"] for e in written] == list(range(7))
+        assert {e["batch_id"] for e in written} == {"b1", "b2"}
+        assert not store.flush_due()
+        assert store.flush() is None
+
+    def test_timed_flush_and_flush_on_shutdown(self, tmp_path, monkeypatch):
+        store = FrontendLogStore(capacity=50, flush_dir=str(tmp_path), flush_interval=0.05, flush_batch_size=1000)
+        store.add_batch([entry("s", 0)], "b1")
+        store.start_flusher()
+
+        # A lone entry below the batch size still reaches disk within an interval
+        deadline = time.monotonic() + 5
+        while not store.stats["segments_written"] and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert store.stats["segments_written"] == 1
+
+        # The router's lifespan flushes what is pending when the app shuts down
+        store = FrontendLogStore(capacity=50, flush_dir=str(tmp_path / "shutdown"), flush_interval=3600)
+        monkeypatch.setattr(frontend_logging, "frontend_log_store", store)
+
+        async def run_app():
+            async with frontend_logging.router.lifespan_context(None):
+                store.add_batch([entry("s", i) for i in range(3)], "b2")
+                assert not store.flush_due()
+
+        asyncio.run(run_app())
+        segments = list((tmp_path / "shutdown").glob("*.jsonl.gz"))
+        assert len(segments) == 1 and store.get_metrics()["pending_flush"] == 0
+        assert store._flusher is None
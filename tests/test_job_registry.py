@@ -0,0 +1,91 @@
+# tests/test_job_registry.py - Shared job registry tests
+
+import asyncio
+import time
+
+from services.job_registry import JobRegistry
+
+
+def make_registry(tmp_path, **kwargs):
+    return JobRegistry(
+        db_path=str(tmp_path / "jobs.sqlite"),
+        payload_dir=str(tmp_path / "payloads"),
+        **kwargs
+    )
+
+
+class TestJobRegistry:
+    """Persistence, spilling and eviction of job records"""
+
+    def test_create_update_and_filter(self, tmp_path):
+        registry = make_registry(tmp_path)
+        excel_id = registry.create_job("excel_processing", status="queued")
+        diagram_id = registry.create_job("diagram_generation")
+
+        assert registry.update_job(excel_id, status="processing", progress=40)
+        assert not registry.update_job("missing", status="processing")
+
+        job = registry.get_job(excel_id)
+        assert job["status"] == "processing" and job["progress"] == 40
+        assert [j["job_id"] for j in registry.list_jobs(status=["queued", "processing"])] == [excel_id]
+        assert registry.count_jobs(job_type="diagram_generation") == 1
+        assert diagram_id in registry
+
+    def test_large_result_is_spilled_to_disk(self, tmp_path):
+        registry = make_registry(tmp_path, inline_result_bytes=1024)
+        job_id = registry.create_job("excel_processing")
+        result = {"applications": [{"app_id": f"APP{i}", "ports": ["80", "443"]} for i in range(200)]}
+
+        registry.update_job(job_id, status="completed", result=result)
+        payloads = list((tmp_path / "payloads").glob("*.result.json"))
+        assert len(payloads) == 1
+
+        # Status-only reads skip the payload; full reads load it back
+        assert registry.get_job(job_id, include_result=False)["result"] is None
+        assert registry.get_job(job_id)["result"] == result
+
+        # Later progress updates keep the spilled payload
+        registry.update_job(job_id, message="done")
+        assert registry.get_job(job_id)["result"] == result
+
+        registry.delete_job(job_id)
+        assert not payloads[0].exists()
+
+    def test_jobs_are_shared_between_connections(self, tmp_path):
+        worker_a = make_registry(tmp_path)
+        worker_b = make_registry(tmp_path)
+
+        job_id = worker_a.create_job("diagram_generation", status="queued")
+        worker_b.update_job(job_id, status="completed", progress=100)
+
+        assert worker_a.get_job(job_id)["status"] == "completed"
+
+    def test_ttl_and_max_jobs_eviction(self, tmp_path):
+        registry = make_registry(tmp_path, ttl_hours=1, max_jobs=3)
+        old_id = registry.create_job("excel_processing", status="completed")
+        assert registry.cleanup_expired(now=time.time() + 2 * 3600) == 1
+        assert registry.get_job(old_id) is None
+
+        for i in range(5):
+            registry.create_job("excel_processing", status="completed")
+        active_id = registry.create_job("excel_processing", status="processing")
+        registry.cleanup_expired()
+
+        assert registry.count_jobs() == 3
+        # Running jobs are never evicted by the size bound
+        assert registry.get_job(active_id) is not None
+
+    def test_database_opens_lazily_and_async_calls_run_in_threads(self, tmp_path):
+        registry = make_registry(tmp_path)
+        assert not (tmp_path / "jobs.sqlite").exists()
+
+        async def scenario():
+            job_id = await registry.create_job_async("excel_processing", status="queued")
+            assert await registry.update_job_async(job_id, status="processing")
+            return job_id, await registry.get_job_async(job_id), await registry.count_jobs_async(status="processing")
+
+        job_id, job, active = asyncio.run(scenario())
+        assert (tmp_path / "jobs.sqlite").exists()
+        assert job["status"] == "processing" and active == 1
+        registry.close()
+        assert registry.get_job(job_id)["status"] == "processing"
@@ -0,0 +1,168 @@
+# tests/test_log_ingest.py - Streaming upload storage and flow log parsing tests
+
+import asyncio
+import csv
+import gzip
+import hashlib
+import io
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+from starlette.requests import Request
+
+import routers.log_management as log_management
+from services.job_registry import JobRegistry
+from services.log_ingest import (
+    LOG_INGEST_CONFIG, NORMALIZED_FLOW_COLUMNS, FlowLogParser, MultipartUploadWriter, UploadTooLarge,
+    parse_log_files, store_upload
+)
+
+BOUNDARY = "----logupload"
+CONTENT_TYPE = f"multipart/form-data; boundary={BOUNDARY}"
+
+
+def multipart_body(*files, fields=()):
+    """A multipart/form-data body with (filename, bytes) file parts under "files" and plain fields"""
+    parts = [f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+             for name, value in fields]
+    for filename, data in files:
+        parts.append(f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="files"; filename="{filename}"\r\n'
+                     f'Content-Type: text/plain\r\n\r\n'.encode() + data + b"\r\n")
+    return b"".join(parts) + f"--{BOUNDARY}--\r\n".encode()
+
+
+def chunked(body, size):
+    return [body[i:i + size] for i in range(0, len(body), size)]
+
+
+def upload_request(body, chunk_size=7, content_type=CONTENT_TYPE):
+    """A request whose body arrives in small ASGI messages, as a large upload would"""
+    messages = [{"type": "http.request", "body": chunk, "more_body": True} for chunk in chunked(body, chunk_size)]
+    messages.append({"type": "http.request", "body": b"", "more_body": False})
+
+    async def receive():
+        return messages.pop(0)
+
+    scope = {"type": "http", "method": "POST", "path": "/upload", "query_string": b"",
+             "headers": [(b"content-type", content_type.encode())]}
+    return Request(scope, receive)
+
+LINES = [
+    "<134>Jan 15 10:00:00 fw01 kernel: IN=eth0 OUT= SRC=10.0.0.5 DST=10.0.1.9 LEN=60 PROTO=TCP SPT=51000 DPT=443",
+    '2024-01-15T10:00:01Z fgt01 date=2024-01-15 time=10:00:01 srcip=10.0.0.6 dstip=8.8.8.8 dstport=53 proto=17 '
+    'action="accept" sentbyte=120 rcvdbyte=300',
+    "Jan 15 10:00:02 asa01 %ASA-6-302013: Built outbound TCP connection 77 for outside:203.0.113.7/443 "
+    "(203.0.113.7/443) to inside:10.0.0.7/52000 (10.0.0.7/52000)",
+    "Jan 15 10:00:03 host01 sshd[42]: Accepted publickey for admin from 10.0.0.8 port 2222",
+    "srcip=not-an-ip dstip=10.0.0.1",
+]
+
+
+class TestLogIngest:
+    """Chunked upload storage, line normalization and chunked file parsing"""
+
+    def test_store_upload_streams_with_checksum_and_limit(self, tmp_path):
+        data = b"x" * 10_000
+        stored = store_upload(io.BytesIO(data), tmp_path / "up" / "a.log", max_bytes=20_000, chunk_size=1024)
+        assert stored["size"] == 10_000
+        assert stored["sha256"] == hashlib.sha256(data).hexdigest()
+        assert (tmp_path / "up" / "a.log").read_bytes() == data
+
+        with pytest.raises(UploadTooLarge):
+            store_upload(io.BytesIO(data), tmp_path / "up" / "b.log", max_bytes=5_000, chunk_size=1024)
+        assert sorted(p.name for p in (tmp_path / "up").iterdir()) == ["a.log"]
+
+    def test_multipart_writer_streams_parts_to_disk(self, tmp_path):
+        first, second = b"line one\nline two\n" * 50, b"\r\n--not-a-boundary\r\n" * 20
+        body = multipart_body(("../fw.log", first), ("b.log", second), fields=[("note", "ignored")])
+
+        writer = MultipartUploadWriter(CONTENT_TYPE, tmp_path / "job", max_bytes=10_000)
+        for chunk in chunked(body, 5):
+            writer.write(chunk)
+        stored = writer.finish()
+
+        assert [(f["filename"], f["size"]) for f in stored] == [("../fw.log", len(first)), ("b.log", len(second))]
+        assert stored[0]["path"].endswith("000_fw.log") and stored[0]["content_type"] == "text/plain"
+        assert (tmp_path / "job" / "001_b.log").read_bytes() == second
+        assert stored[1]["sha256"] == hashlib.sha256(second).hexdigest()
+
+        # The limit applies per file while streaming, and abort leaves nothing behind
+        writer = MultipartUploadWriter(CONTENT_TYPE, tmp_path / "big", max_bytes=len(second) - 1)
+        with pytest.raises(UploadTooLarge):
+            for chunk in chunked(body, 64):
+                writer.write(chunk)
+        writer.abort()
+        assert not (tmp_path / "big").exists()
+
+        with pytest.raises(ValueError):
+            MultipartUploadWriter("application/json", tmp_path)
+        truncated = MultipartUploadWriter(CONTENT_TYPE, tmp_path / "cut")
+        truncated.write(body[:len(body) // 2])
+        with pytest.raises(ValueError):
+            truncated.finish()
+
+    def test_upload_endpoint_streams_and_queues_the_job(self, tmp_path, monkeypatch):
+        registry = JobRegistry(db_path=str(tmp_path / "jobs.sqlite"))
+        monkeypatch.setattr(log_management, "job_registry", registry)
+        monkeypatch.setitem(LOG_INGEST_CONFIG, "upload_dir", str(tmp_path / "uploads"))
+        data = ("\n".join(LINES) + "\n").encode()
+
+        async def upload(body, **kwargs):
+            return await log_management.upload_log_files(
+                upload_request(body, **kwargs), BackgroundTasks(), source_type="firewall",
+                parse_immediately=False, application="APP", current_user="admin")
+
+        response = asyncio.run(upload(multipart_body(("fw.log", data))))
+        assert response["files"][0]["size"] == len(data)
+        job = registry.get_job(response["job_id"])
+        assert job["status"] == "uploaded" and job["source_files"] == ["fw.log"]
+
+        monkeypatch.setitem(LOG_INGEST_CONFIG, "max_upload_bytes", 10)
+        for body, kwargs, status in [(multipart_body(("fw.log", data)), {}, 413),
+                                     (multipart_body(fields=[("note", "x")]), {}, 400),
+                                     (b"{}", {"content_type": "application/json"}, 415)]:
+            with pytest.raises(HTTPException) as rejected:
+                asyncio.run(upload(body, **kwargs))
+            assert rejected.value.status_code == status
+        assert [p.name for p in (tmp_path / "uploads").iterdir()] == [response["job_id"]]
+        registry.close()
+
+    def test_parse_line_formats(self):
+        parser = FlowLogParser(application="APP1")
+        rows = [parser.parse_line(line) for line in LINES]
+        iptables, fortigate, asa, sshd, invalid = rows
+
+        assert iptables[1:9] == ["10.0.0.5", "", "10.0.1.9", "", 443, "TCP", 0, 60]
+        assert iptables[0] == "APP1" and iptables[9].endswith("-01-15T10:00:00") and "fw01" in iptables[11]
+        assert fortigate[1:9] == ["10.0.0.6", "", "8.8.8.8", "", 53, "UDP", 300, 120]
+        assert fortigate[9] == "2024-01-15T10:00:01" and fortigate[11].startswith("firewall:accept")
+        # Outbound: the inside host opened the connection
+        assert asa[1:7] == ["10.0.0.7", "", "203.0.113.7", "", 443, "TCP"]
+        assert sshd is None and invalid is None
+
+    def test_parse_files_in_chunks_with_progress(self, tmp_path):
+        plain = tmp_path / "fw.log"
+        plain.write_text("\n".join(LINES * 5) + "\n")
+        packed = tmp_path / "fw.log.gz"
+        with gzip.open(packed, "wt") as f:
+            f.write("\n".join(LINES * 3) + "\n")
+        files = [{"filename": p.name, "path": str(p), "size": p.stat().st_size} for p in (plain, packed)]
+
+        updates = []
+        output = tmp_path / "out" / "APP_normalized_test.csv"
+        results = parse_log_files(files, str(output), application="APP", progress=updates.append, chunk_lines=4)
+
+        assert results["traffic_flows_extracted"] == 3 * 8
+        assert results["lines_read"] == len(LINES) * 8 and results["lines_skipped"] == 2 * 8
+        assert results["unique_sources"] == 3 and results["unique_destinations"] == 3
+        assert results["protocols_detected"] == ["TCP", "UDP"]
+        assert [f["flows_extracted"] for f in results["files"]] == [15, 9]
+
+        progress = [u["progress"] for u in updates]
+        assert len(updates) > 4 and progress == sorted(progress) and progress[-1] == 100.0
+        assert updates[-1]["entries_processed"] == 24
+
+        with open(output, newline="") as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == NORMALIZED_FLOW_COLUMNS and len(rows) == 25
+        assert not list(output.parent.glob("*.part"))
@@ -0,0 +1,56 @@
+# tests/test_output_cache.py - Content-addressed output cache tests
+
+from services.output_cache import OutputCache, make_cache_key
+
+
+def write_artifact(tmp_path, name, content):
+    path = tmp_path / "results" / name
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content)
+    return {"format": "lucid", "filename": name, "file_path": str(path)}
+
+
+class TestOutputCache:
+    """Keying, restore and eviction of cached artifacts"""
+
+    def test_key_ignores_volatile_timestamps(self):
+        diagram = {"applications": [{"id": "APP1", "professional_metadata": {"last_updated": "t1"}}]}
+        rerun = {"applications": [{"id": "APP1", "professional_metadata": {"last_updated": "t2"}}]}
+
+        assert make_cache_key(diagram, "professional", "pdf", "1") == make_cache_key(rerun, "professional", "pdf", "1")
+        assert make_cache_key(diagram, "professional", "pdf", "1") != make_cache_key(diagram, "executive", "pdf", "1")
+        assert make_cache_key(diagram, "professional", "pdf", "1") != make_cache_key(diagram, "professional", "pdf", "2")
+
+    def test_hit_restores_artifact(self, tmp_path):
+        cache = OutputCache(cache_dir=str(tmp_path / "cache"), enabled=True)
+        # Nothing is created until the cache is first used
+        assert not (tmp_path / "cache").exists()
+        output = write_artifact(tmp_path, "APP1.lucid", "<lucid/>")
+
+        assert cache.get("k1") is None
+        assert cache.put("k1", output)
+
+        (tmp_path / "results" / "APP1.lucid").unlink()
+        assert cache.get("k1") == output
+        assert (tmp_path / "results" / "APP1.lucid").read_text() == "<lucid/>"
+
+        metrics = cache.get_metrics()
+        assert (metrics["hits"], metrics["misses"], metrics["entries"]) == (1, 1, 1)
+
+        # A fresh instance picks up entries already on disk
+        assert OutputCache(cache_dir=str(tmp_path / "cache"), enabled=True).get("k1") == output
+
+    def test_lru_eviction_by_count_and_size(self, tmp_path):
+        cache = OutputCache(cache_dir=str(tmp_path / "cache"), max_entries=2, enabled=True)
+        for key in ("a", "b"):
+            cache.put(key, write_artifact(tmp_path, f"{key}.pdf", key))
+        cache.get("a")
+        cache.put("c", write_artifact(tmp_path, "c.pdf", "c"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+        assert cache.stats["evictions"] == 1
+
+        small = OutputCache(cache_dir=str(tmp_path / "small"), max_size_mb=0.001, enabled=True)
+        small.put("big", write_artifact(tmp_path, "big.pdf", "x" * 4096))
+        assert small.get_metrics()["entries"] == 0
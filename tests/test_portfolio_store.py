@@ -0,0 +1,108 @@
+# tests/test_portfolio_store.py - Shared application portfolio store tests
+
+import asyncio
+import os
+from types import SimpleNamespace
+
+from services.app_service import AppService
+from services.cost_service import CostService
+from services.migration_service import MigrationService
+from services.portfolio_store import PortfolioStore, portfolio_store
+
+
+def write_application_list(folder, names):
+    lines = ["app_id,app_name"] + [f"APP{i:04d},{name}" for i, name in enumerate(names)]
+    (folder / "applicationList.csv").write_text("\n".join(lines) + "\n")
+
+
+def make_store(tmp_path, names):
+    write_application_list(tmp_path, names)
+    return PortfolioStore(data_folder=str(tmp_path), check_interval=0)
+
+
+NAMES = ["Payments API", "Customer Portal", "Reporting Dashboard", "Core Banking System",
+         "Notification Service", "Legacy Desktop Client", "Workflow Engine", "Fraud Event Stream"] * 50
+
+
+class TestPortfolioStore:
+    """Indexed queries, change detection and sharing across services"""
+
+    def test_filters_match_linear_scan(self, tmp_path):
+        store = make_store(tmp_path, NAMES)
+        apps = store.all_applications()
+        assert len(apps) == len(NAMES)
+
+        filters = dict(strategy=["replatform", "REHOST"], risk=["Medium", "Low"], business_criticality=["Critical"])
+        expected = [app for app in apps
+                    if app["strategy"].lower() in ("replatform", "rehost")
+                    and app["risk"] in ("Medium", "Low")
+                    and app["business_criticality"] == "Critical"]
+        assert expected
+        assert store.filter_applications(**filters) == expected
+
+        assert store.get_applications(["APP0003", "APP0001", "missing"]) == [apps[1], apps[3]]
+        assert store.get_application("APP0002") is apps[2]
+        assert store.filter_applications(archetype=["No Such Archetype"], risk=["Low"]) == []
+
+    def test_reloads_only_when_content_changes(self, tmp_path):
+        store = make_store(tmp_path, NAMES[:8])
+        first = store.all_applications()
+        assert store.stats["loads"] == 1
+
+        # Touched but identical: stat differs, hash does not
+        csv_path = tmp_path / "applicationList.csv"
+        stat = csv_path.stat()
+        os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 5_000_000_000))
+        assert store.all_applications() is first
+        assert store.stats["loads"] == 1
+
+        write_application_list(tmp_path, NAMES[:3])
+        assert len(store.all_applications()) == 3
+        assert store.stats["loads"] == 2
+
+    def test_updates_move_between_indexes(self, tmp_path):
+        store = make_store(tmp_path, NAMES[:8])
+        service = AppService(store=store)
+        before = store.distribution("strategy")
+        original_strategy = store.get_application("APP0000")["strategy"]
+        snapshot = store._state
+        snapshot_buckets = {value: set(positions) for value, positions in snapshot.indexes["strategy"].items()}
+
+        app = asyncio.run(service.update_strategy("APP0000", "retire"))
+        assert app["strategy"] == "Retire"
+        assert app in store.filter_applications(strategy=["retire"])
+        assert app not in store.filter_applications(strategy=[original_strategy])
+        assert sum(store.distribution("strategy").values()) == sum(before.values())
+        # A reader holding the previous state sees it unchanged
+        assert snapshot.indexes["strategy"] == snapshot_buckets and store._state is not snapshot
+
+        filtered = asyncio.run(service.get_filtered_applications(SimpleNamespace(strategies=["Retire"], risk_levels=None)))
+        assert app in filtered
+
+    def test_uses_the_injected_builder(self, tmp_path):
+        write_application_list(tmp_path, NAMES[:3])
+        calls = []
+
+        def builder(app_df, archetype_mapping):
+            calls.append(list(app_df["app_name"]))
+            return [{"id": row["app_id"], "archetype": "Monolithic"} for row in app_df.to_dict("records")]
+
+        store = PortfolioStore(data_folder=str(tmp_path), builder=builder, check_interval=0)
+        assert [app["id"] for app in store.filter_applications(archetype=["Monolithic"])] == [
+            "APP0000", "APP0001", "APP0002"]
+        assert calls == [NAMES[:3]]
+
+    def test_services_share_one_portfolio(self, tmp_path):
+        store = make_store(tmp_path, NAMES[:8])
+        # Constructed without arguments (FastAPI dependencies) they share the module store
+        default = MigrationService()
+        assert default.portfolio is default.cost_service.portfolio is default.app_service.store is portfolio_store
+
+        migration = MigrationService.from_store(store)
+        cost = CostService.from_store(store)
+
+        apps = asyncio.run(migration._get_applications(["all"]))
+        assert apps is store.all_applications()
+        assert asyncio.run(cost.get_applications_for_cost_analysis(["APP0001"])) == [apps[1]]
+        assert migration.app_service.store is store
+        assert store.stats["loads"] == 1
@@ -0,0 +1,160 @@
+# tests/test_practical_diagram_generators.py - Portfolio batch chunking, pooling, isolation and timeout tests
+
+import asyncio
+import time
+
+import pytest
+from fastapi import BackgroundTasks, HTTPException
+
+import routers.archetype_router as archetype_router
+import services.practical_diagram_generators as practical
+from services.job_registry import JobRegistry
+
+generate_chunk = practical._generate_portfolio_chunk
+
+
+def fake_chunk(archetype, entries):
+    """Stand-in for _generate_portfolio_chunk; apps named 'broken*' fail and 'hung*' never return"""
+    results = []
+    for entry in entries:
+        if entry["app_name"].startswith("hung"):
+            time.sleep(60)
+        if entry["app_name"].startswith("broken"):
+            result = {"success": False, "error": "render failed"}
+        else:
+            result = {"success": True, "files": []}
+        results.append({"entry": entry, "result": result})
+    return results
+
+
+def exploding_chunk(archetype, entries):
+    if archetype == "microservices":
+        raise RuntimeError("worker crashed")
+    return fake_chunk(archetype, entries)
+
+
+def portfolio(*names, archetype="three_tier"):
+    return [{"app_name": name, "archetype": archetype} for name in names]
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    """Run generate_portfolio_formats against a tmp manifest with chunks of two apps"""
+    monkeypatch.setitem(practical.PORTFOLIO_BATCH_CONFIG, "chunk_size", 2)
+    monkeypatch.setitem(practical.PORTFOLIO_BATCH_CONFIG, "chunk_timeout_seconds", 30)
+    chunks = []
+
+    def run(apps, chunk=fake_chunk, **kwargs):
+        def recording(archetype, entries):
+            chunks.append((archetype, [e["app_name"] for e in entries]))
+            return chunk(archetype, entries)
+
+        # Pool workers need a picklable module-level function; serial runs also record the chunking
+        monkeypatch.setattr(practical, "_generate_portfolio_chunk",
+                            recording if kwargs.get("max_workers") == 1 else chunk)
+        return practical.generate_portfolio_formats(apps, manifest_path=str(tmp_path / "manifest.json"), **kwargs)
+
+    run.chunks = chunks
+    return run
+
+
+class TestPortfolioBatch:
+    """Archetype chunking, serial and pooled runs, per-app failures and hung workers"""
+
+    def test_groups_by_archetype_in_chunks_and_skips_unchanged(self, batch):
+        apps = portfolio("a", "b", "c") + portfolio("m1", archetype="microservices")
+        result = batch(apps, max_workers=1)
+
+        assert batch.chunks == [("three_tier", ["a", "b"]), ("three_tier", ["c"]), ("microservices", ["m1"])]
+        assert result["success"] and result["generated"] == 4 and result["skipped"] == 0
+
+        rerun = batch(apps + portfolio("d"), max_workers=1)
+        assert rerun["skipped_apps"] == ["a", "b", "c", "m1"] and rerun["generated_apps"] == ["d"]
+        assert batch(apps, max_workers=1, force=True)["generated"] == 4
+
+    def test_pooled_run_renders_in_worker_processes(self, batch, tmp_path):
+        result = batch(portfolio("a", "b", "c", "d", "e"), max_workers=2)
+
+        assert result["success"] and sorted(result["generated_apps"]) == ["a", "b", "c", "d", "e"]
+        manifest = practical._load_portfolio_manifest(tmp_path / "manifest.json")
+        assert manifest["last_run"]["generated"] == 5
+        assert all(entry["status"] == "completed" for entry in manifest["applications"].values())
+
+    def test_failures_are_isolated_per_app_and_per_chunk(self, batch, tmp_path):
+        apps = portfolio("a", "broken", "c") + portfolio("m1", "m2", archetype="microservices")
+        for max_workers in (1, 2):
+            result = batch(apps, chunk=exploding_chunk, max_workers=max_workers, force=True)
+            assert sorted(result["failed_apps"]) == ["broken", "m1", "m2"]
+            assert sorted(result["generated_apps"]) == ["a", "c"] and not result["success"]
+
+        manifest = practical._load_portfolio_manifest(tmp_path / "manifest.json")["applications"]
+        assert manifest["m1"]["error"] == "worker crashed" and manifest["broken"]["status"] == "failed"
+
+    def test_app_that_raises_only_fails_itself(self, monkeypatch):
+        def generate(archetype, applications, app_name, job_id, **kwargs):
+            if app_name == "broken":
+                raise ValueError("bad input")
+            return {"success": True, "files": []}
+
+        class Generator:
+            def _generate_layout_for_archetype(self, archetype, applications):
+                return {}
+
+        monkeypatch.setattr(practical, "generate_all_formats", generate)
+        monkeypatch.setattr(practical, "_batch_drawio_gen", Generator())
+        entries = [{"app_name": name, "applications": [{"id": name}], "job_id": name}
+                   for name in ("a", "broken", "c")]
+
+        results = {item["entry"]["app_name"]: item["result"] for item in generate_chunk("three_tier", entries)}
+        assert results["a"]["success"] and results["c"]["success"]
+        assert results["broken"] == {"success": False, "error": "bad input"}
+
+    def test_hung_worker_times_out_the_unfinished_chunks(self, batch, monkeypatch):
+        monkeypatch.setitem(practical.PORTFOLIO_BATCH_CONFIG, "chunk_timeout_seconds", 1)
+        started = time.perf_counter()
+        result = batch(portfolio("a", "b", "hung", "c"), max_workers=2)
+
+        assert time.perf_counter() - started < 20
+        assert sorted(result["generated_apps"]) == ["a", "b"]
+        assert sorted(result["failed_apps"]) == ["c", "hung"]
+
+
+class TestPortfolioBatchEndpoint:
+    """The /generate-practical-diagrams/batch job lifecycle"""
+
+    def test_batch_job_runs_and_reports_the_result(self, tmp_path, monkeypatch):
+        registry = JobRegistry(db_path=str(tmp_path / "jobs.sqlite"))
+        monkeypatch.setattr(archetype_router.job_manager, "_registry", registry)
+        calls = []
+
+        def generate(apps, max_workers=None, force=False, progress_callback=None):
+            calls.append((apps, max_workers, force))
+            progress_callback(len(apps), len(apps))
+            return {"success": True, "generated": len(apps), "skipped": 0, "failed": 0}
+
+        monkeypatch.setattr(archetype_router, "generate_portfolio_formats", generate)
+        request = archetype_router.PracticalDiagramBatchRequest(
+            apps=[{"app_name": "Payments API"}, {"app_name": "Portal", "archetype": "microservices"}],
+            max_workers=3)
+        tasks = BackgroundTasks()
+
+        async def scenario():
+            response = await archetype_router.generate_practical_diagrams_batch(request, tasks)
+            queued = await archetype_router.get_job_status(response["job_id"])
+            await tasks()
+            return response, queued, await archetype_router.get_job_status(response["job_id"])
+
+        response, queued, job = asyncio.run(scenario())
+        assert response["status"] == "queued" and response["total_apps"] == 2
+        assert queued["status"] == "queued"
+        assert job["status"] == "completed" and job["progress"] == 100 and job["result"]["generated"] == 2
+
+        apps, max_workers, force = calls[0]
+        assert [app["archetype"] for app in apps] == ["three_tier", "microservices"]
+        assert all(app["applications"] for app in apps) and (max_workers, force) == (3, False)
+
+        with pytest.raises(HTTPException) as empty:
+            asyncio.run(archetype_router.generate_practical_diagrams_batch(
+                archetype_router.PracticalDiagramBatchRequest(apps=[]), BackgroundTasks()))
+        assert empty.value.status_code == 400
+        registry.close()
@@ -0,0 +1,84 @@
+# tests/test_render_pool.py - Concurrent format rendering and early-return tests
+
+import asyncio
+import threading
+
+import pytest
+
+import services.enhanced_diagram_generator as generator
+from services.enhanced_diagram_generator import ProfessionalDiagramService
+from services.output_cache import OutputCache
+from services.render_pool import RenderPool
+
+DATA = {"applications": [{"id": "PAY", "name": "Payments API", "type": "api_service"},
+                         {"id": "WEB", "name": "Customer Portal", "type": "web_application"}]}
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    """A professional diagram service rendering into tmp_path through a thread pool, with no output cache"""
+    monkeypatch.chdir(tmp_path)
+    pool = RenderPool(max_workers=4, use_processes=False)
+    monkeypatch.setattr(generator, "render_pool", pool)
+    monkeypatch.setattr(generator, "output_cache", OutputCache(cache_dir=str(tmp_path / "cache"), enabled=False))
+    yield ProfessionalDiagramService()
+    pool.shutdown()
+
+
+def gate_pdf_render(monkeypatch):
+    """Hold every PDF render until the returned event is set"""
+    release = threading.Event()
+    render_pdf = ProfessionalDiagramService._render_pdf_output
+
+    async def gated(self, *args):
+        release.wait(10)
+        return await render_pdf(self, *args)
+
+    monkeypatch.setattr(ProfessionalDiagramService, "_render_pdf_output", gated)
+    return release
+
+
+class TestRenderPool:
+    """Per-format timeouts, completion tracking and returning on the first format"""
+
+    def test_waits_for_every_format_by_default(self, service):
+        result = asyncio.run(service.generate_professional_diagram("network_topology", DATA))
+
+        assert result["success"] and result["status"] == "completed"
+        assert sorted(f["format"] for f in result["files"]) == ["document", "excel", "lucid", "pdf"]
+        assert {fmt: state["status"] for fmt, state in result["formats"].items()} == dict.fromkeys(
+            ("lucid", "document", "excel", "pdf"), "completed")
+        assert generator.render_pool.get_metrics()["completed"] == 4
+
+    def test_returns_on_first_format_and_finishes_the_rest(self, service, monkeypatch):
+        release = gate_pdf_render(monkeypatch)
+
+        async def scenario():
+            result = await service.generate_professional_diagram("network_topology", DATA,
+                                                                 wait_for_all_formats=False)
+            # The gated PDF render is still running when the call returns
+            early = (result["status"], result["formats"]["pdf"]["status"], len(result["files"]))
+            release.set()
+            await asyncio.gather(*list(service._export_tasks))
+            return result, early, await service.get_job_status(result["job_id"])
+
+        result, early, status = asyncio.run(scenario())
+        assert result["success"]
+        assert early[0] == "processing" and early[1] == "rendering" and 1 <= early[2] < 4
+        assert status["status"] == "completed"
+        assert all(state["status"] == "completed" for state in status["formats"].values())
+        assert len(status["files"]) == 4 and not service._export_tasks
+
+    def test_slow_format_times_out_without_failing_the_job(self, service, monkeypatch):
+        release = gate_pdf_render(monkeypatch)
+        generator.render_pool.format_timeout = 0.2
+
+        try:
+            result = asyncio.run(service.generate_professional_diagram("network_topology", DATA))
+        finally:
+            release.set()
+
+        assert result["success"]
+        assert result["formats"]["pdf"]["status"] == "timeout"
+        assert sorted(f["format"] for f in result["files"]) == ["document", "excel", "lucid"]
+        assert generator.render_pool.get_metrics()["timeouts"] == 1
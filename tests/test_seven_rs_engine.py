@@ -0,0 +1,154 @@
+# tests/test_seven_rs_engine.py - Batch 7R's scoring, ranking and incremental re-run tests
+
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+import routers.seven_rs as seven_rs_router
+from services.cost_engine import STRATEGIES
+import services.seven_rs_engine as seven_rs_engine
+from services.seven_rs_engine import SevenRsAnalyzer, SevenRsResultStore
+
+
+def application(app_id, archetype, complexity="Medium", criticality="Medium", **extra):
+    return {"id": app_id, "name": f"App {app_id}", "archetype": archetype, "complexity": complexity,
+            "business_criticality": criticality, "cloud_ready": False, "compliance": [], "dependencies": [],
+            **extra}
+
+
+PORTFOLIO = [
+    application("WEB", "Web + API Headless", "Low"),
+    application("MICRO", "Microservices", cloud_ready=True),
+    application("MONO", "Monolithic", "High"),
+    application("LEGACY", "Client-Server", "Low", "Low"),
+]
+
+
+class TestSevenRsEngine:
+    """Vectorized scoring, business case figures and incremental persistence"""
+
+    def test_scores_every_strategy_and_recommends_the_best(self):
+        analyzer = SevenRsAnalyzer()
+        results = analyzer.score(PORTFOLIO).set_index("application_id")
+
+        assert results["recommended_strategy"].to_dict() == {
+            "WEB": "rehost", "MICRO": "replatform", "MONO": "refactor", "LEGACY": "retire"}
+        score_columns = [f"score_{s}" for s in STRATEGIES]
+        assert (results[score_columns].max(axis=1) == results["score"]).all()
+        assert (results["score_margin"] >= 0).all()
+
+        # Business case figures come from the cost engine's unit tables
+        legacy = results.loc["LEGACY"]
+        assert legacy["target_annual_cost"] == 0 and legacy["annual_savings"] == legacy["current_annual_cost"]
+        mono = results.loc["MONO"]
+        assert mono["net_benefit"] == pytest.approx(mono["annual_savings"] * 3 - mono["estimated_cost"], abs=0.02)
+
+        # A critical application is not retired
+        critical = analyzer.score([application("CORE", "Client-Server", "Low", "Critical")])
+        assert critical["recommended_strategy"][0] != "retire"
+
+        with pytest.raises(ValueError):
+            analyzer.score(PORTFOLIO, criteria_weights={"speed": 1})
+
+    def test_incremental_reruns_rank_and_prune(self):
+        analyzer = SevenRsAnalyzer(store=SevenRsResultStore())
+        first = analyzer.run_batch(PORTFOLIO)
+        assert (first["applications_rescored"], first["applications_stored"]) == (4, 4)
+        assert sum(case["application_count"] for case in first["business_case"]) == 4
+
+        changed = [dict(app, complexity="Very_High") if app["id"] == "MONO" else app for app in PORTFOLIO[1:]]
+        second = analyzer.run_batch(changed, prune_missing=True)
+        assert (second["applications_rescored"], second["applications_reused"]) == (1, 2)
+        assert second["applications_removed"] == 1
+
+        # New weights invalidate every stored result
+        third = analyzer.run_batch(changed, criteria_weights={"value": 1.0})
+        assert third["applications_rescored"] == 3
+
+        table = analyzer.recommendations()
+        assert table["total"] == 3
+        ranks = [row["rank"] for row in table["recommendations"]]
+        scores = [row["score"] for row in table["recommendations"]]
+        assert ranks == [1, 2, 3] and scores == sorted(scores, reverse=True)
+        assert analyzer.recommendations(limit=1, offset=1)["recommendations"][0]["rank"] == 2
+
+    def test_renamed_applications_rewrite_their_stored_rows(self):
+        analyzer = SevenRsAnalyzer(store=SevenRsResultStore())
+        analyzer.run_batch(PORTFOLIO)
+
+        renamed = [dict(app, name="Payments Web") if app["id"] == "WEB" else app for app in PORTFOLIO]
+        renamed = [dict(app, strategy="Rehost") if app["id"] == "MONO" else app for app in renamed]
+        summary = analyzer.run_batch(renamed)
+        assert (summary["applications_rescored"], summary["applications_reused"]) == (2, 2)
+
+        rows = {row["application_id"]: row for row in analyzer.recommendations()["recommendations"]}
+        assert rows["WEB"]["application_name"] == "Payments Web"
+        assert rows["MONO"]["current_strategy"] == "rehost" and rows["MONO"]["strategy_changed"]
+
+    def test_partial_run_under_new_weights_rescores_the_stored_table(self):
+        analyzer = SevenRsAnalyzer(store=SevenRsResultStore())
+        analyzer.run_batch(PORTFOLIO)
+
+        summary = analyzer.run_batch(PORTFOLIO[:1], criteria_weights={"fit": 1, "value": 0, "risk": 0})
+        assert (summary["applications_rescored"], summary["stored_applications_rescored"]) == (1, 3)
+        assert summary["criteria_weights"] == {"fit": 1.0, "value": 0.0, "risk": 0.0}
+
+        # Every stored row matches a from-scratch scoring under the new weights
+        expected = analyzer.score(PORTFOLIO, criteria_weights={"fit": 1, "value": 0, "risk": 0})
+        stored = {row["application_id"]: row for row in analyzer.recommendations()["recommendations"]}
+        for row in expected.to_dict("records"):
+            assert stored[row["application_id"]]["score"] == row["score"], row["application_id"]
+            assert stored[row["application_id"]]["recommended_strategy"] == row["recommended_strategy"]
+
+        # Same for a new horizon, and a run under the stored model leaves the others alone
+        summary = analyzer.run_batch(PORTFOLIO[1:2], criteria_weights={"fit": 1, "value": 0, "risk": 0},
+                                     time_horizon_years=5)
+        assert summary["stored_applications_rescored"] == 3
+        assert {row["time_horizon_years"] for row in analyzer.recommendations()["recommendations"]} == {5}
+        summary = analyzer.run_batch(PORTFOLIO[1:2], criteria_weights={"fit": 1, "value": 0, "risk": 0},
+                                     time_horizon_years=5)
+        assert (summary["applications_rescored"], summary["stored_applications_rescored"]) == (0, 0)
+
+    def test_time_horizon_is_validated(self, monkeypatch):
+        analyzer = SevenRsAnalyzer()
+        monkeypatch.setitem(seven_rs_engine.SEVEN_RS_CONFIG, "time_horizon_years", 7)
+        assert analyzer.score(PORTFOLIO[:1])["time_horizon_years"][0] == 7
+        assert analyzer.score(PORTFOLIO[:1], time_horizon_years=1)["time_horizon_years"][0] == 1
+        for years in (0, -2):
+            with pytest.raises(ValueError):
+                analyzer.score(PORTFOLIO[:1], time_horizon_years=years)
+
+    def test_result_database_opens_on_first_use(self, tmp_path):
+        store = SevenRsResultStore(str(tmp_path / "results" / "seven_rs.sqlite"))
+        assert not (tmp_path / "results").exists()
+
+        SevenRsAnalyzer(store=store).run_batch(PORTFOLIO[:1])
+        assert (tmp_path / "results" / "seven_rs.sqlite").exists() and len(store) == 1
+        store.close()
+
+
+class TestSevenRsRouter:
+    """Endpoints backed by the optional SevenRsService"""
+
+    def test_missing_service_answers_503(self, monkeypatch):
+        monkeypatch.setattr(seven_rs_router, "SevenRsService", None)
+
+        with pytest.raises(HTTPException) as missing:
+            asyncio.run(seven_rs_router.get_analysis_status("job-1", current_user={}))
+        assert missing.value.status_code == 503
+
+        with pytest.raises(HTTPException) as bad_format:
+            asyncio.run(seven_rs_router.export_seven_rs_analysis("job-1", export_format="csv", current_user={}))
+        assert bad_format.value.status_code == 400
+
+        health = asyncio.run(seven_rs_router.seven_rs_health_check())
+        assert health["status"] == "unavailable"
+
+    def test_batch_request_horizon_defaults_to_the_config(self):
+        assert seven_rs_router.SevenRsBatchRequest().time_horizon_years is None
+        assert seven_rs_router.SevenRsBatchRequest(time_horizon_years=5).time_horizon_years == 5
+        for years in (0, -1):
+            with pytest.raises(ValidationError):
+                seven_rs_router.SevenRsBatchRequest(time_horizon_years=years)
@@ -0,0 +1,86 @@
+# tests/test_token_store.py - Shared auth token store tests
+
+import asyncio
+import sqlite3
+
+from services.token_store import TokenStore, token_digest
+
+
+def make_store(tmp_path, **kwargs):
+    kwargs.setdefault("sweep_interval_seconds", 0)
+    return TokenStore(db_path=str(tmp_path / "tokens.sqlite"), **kwargs)
+
+
+class TestTokenStore:
+    """Issuing, cross-worker verification, revocation and expiry sweeps"""
+
+    def test_tokens_are_shared_and_stored_hashed(self, tmp_path):
+        worker_a = make_store(tmp_path)
+        worker_b = make_store(tmp_path, cache_ttl_seconds=0)
+
+        token = worker_a.issue("admin", ["admin", "user"], ttl_seconds=60)
+        record = worker_b.get(token)
+        assert record["username"] == "admin" and record["roles"] == ["admin", "user"]
+        assert worker_b.get(token + "x") is None
+
+        rows = sqlite3.connect(str(tmp_path / "tokens.sqlite")).execute("SELECT digest FROM tokens").fetchall()
+        assert rows == [(token_digest(token),)]
+
+        # Hot tokens are answered from the cache
+        worker_a.get(token)
+        assert worker_a.stats["cache_hits"] == 1
+
+        # Logout in one worker is seen by a worker that re-reads the database
+        assert worker_a.revoke_user("admin") == 1
+        assert worker_b.get(token) is None
+        assert token not in worker_a
+
+    def test_expired_tokens_are_rejected_and_swept(self, tmp_path):
+        store = make_store(tmp_path, cache_size=2)
+        expired = [store.issue("user", ["user"], ttl_seconds=-1) for _ in range(3)]
+        live = store.issue("user", ["user"], ttl_seconds=60)
+
+        assert store.get(expired[0]) is None
+        assert len(store) == 1
+        assert store.sweep() == 2
+        assert len(store._cache) <= 2 and not any(exp < 0 for exp, _ in store._expiry_heap)
+        assert store.get(live)["username"] == "user"
+        assert [s["token_preview"] for s in store.sessions()] == [live[:8]]
+
+    def test_database_opens_on_first_use(self, tmp_path):
+        store = make_store(tmp_path)
+        assert not (tmp_path / "tokens.sqlite").exists()
+
+        token = store.issue("user", ["user"], ttl_seconds=60)
+        assert (tmp_path / "tokens.sqlite").exists() and store.get(token)["username"] == "user"
+        store.close()
+        make_store(tmp_path / "unused").close()
+        assert not (tmp_path / "unused").exists()
+
+    def test_evicted_tokens_keep_one_heap_entry(self, tmp_path):
+        store = make_store(tmp_path, cache_size=1, cache_ttl_seconds=0)
+        tokens = [store.issue("user", ["user"], ttl_seconds=60) for _ in range(3)]
+        for _ in range(3):
+            for token in tokens:
+                assert store.get(token) is not None
+
+        digests = [digest for _, digest in store._expiry_heap]
+        assert sorted(digests) == sorted(token_digest(token) for token in tokens)
+
+    def test_async_access_runs_off_the_loop(self, tmp_path):
+        store = make_store(tmp_path)
+
+        async def scenario():
+            token = await store.issue_async("admin", ["admin"], ttl_seconds=60)
+            await store.issue_async("admin", ["admin"], ttl_seconds=-1)
+            record = await store.get_async(token)
+            swept = await store.sweep_async()
+            sessions = await store.sessions_async()
+            count = await store.count_async()
+            revoked = await store.revoke_user_async("admin")
+            return record, swept, sessions, count, revoked, await store.get_stats_async()
+
+        record, swept, sessions, count, revoked, stats = asyncio.run(scenario())
+        assert record["username"] == "admin" and swept == 1
+        assert len(sessions) == 1 and count == 1 and revoked == 1
+        assert stats["active_tokens"] == 0
@@ -0,0 +1,133 @@
+# tests/test_topology_backend.py - Vectorized flow extraction and sparse graph features against reference implementations
+
+from collections import Counter, defaultdict
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+import pytest
+
+from static.ui.backend.topology_backend import GraphFeatureEngine, TopologyConfig, TopologyDataProcessor
+
+
+def make_flows(rows=2000, seed=3):
+    """Random flows over 30 IPs and 5 applications, with some missing endpoints and applications"""
+    rng = np.random.default_rng(seed)
+    ips = np.array([f"10.0.{i // 10}.{i}" for i in range(30)], dtype=object)
+    apps = np.array(["Payments API", "Core Ledger", "Web Portal", "Risk Engine", "Batch"], dtype=object)
+    flows = pd.DataFrame({
+        "src": ips[rng.integers(0, 30, rows)],
+        "dst": ips[rng.integers(0, 30, rows)],
+        "application": apps[rng.integers(0, 5, rows)],
+        "protocol": np.array(["TCP", "UDP"], dtype=object)[rng.integers(0, 2, rows)],
+        "port": np.array([80, 443, 5432], dtype=object)[rng.integers(0, 3, rows)],
+    })
+    flows.loc[rng.choice(rows, 40, replace=False), "src"] = None
+    flows.loc[rng.choice(rows, 40, replace=False), "dst"] = None
+    flows.loc[rng.choice(rows, 40, replace=False), "application"] = None
+    return flows
+
+
+def reference_mapping(flows):
+    """Connection count and tied-most-common applications per IP, row by row"""
+    apps = defaultdict(Counter)
+    for row in flows.itertuples(index=False):
+        for ip in (row.src, row.dst):
+            if pd.notna(ip):
+                # Missing applications count as Unknown
+                apps[ip][row.application if pd.notna(row.application) else "Unknown"] += 1
+    result = {}
+    for ip, counts in apps.items():
+        top = max(counts.values())
+        result[ip] = (sum(counts.values()), {app for app, n in counts.items() if n == top}, set(counts))
+    return result
+
+
+class TestFlowExtraction:
+    """IP-to-application mapping, node archetypes and aggregated links"""
+
+    def test_mapping_matches_per_row_counts(self):
+        processor = TopologyDataProcessor()
+        flows = processor._optimize_dtypes(make_flows())
+        expected = reference_mapping(make_flows())
+
+        mapping = processor._create_ip_to_application_mapping(flows)
+        assert set(mapping) == set(expected)
+        for ip, (count, top_apps, all_apps) in expected.items():
+            assert mapping[ip]["connection_count"] == count, ip
+            assert mapping[ip]["application"] in top_apps, ip
+            assert set(mapping[ip]["all_applications"]) == all_apps, ip
+
+        nodes = {node["id"]: node for node in processor._extract_nodes(flows)}
+        for ip, info in mapping.items():
+            assert nodes[ip]["archetype"] == processor._determine_archetype(info["application"], info)
+            assert nodes[ip]["connectionCount"] == info["connection_count"]
+
+    def test_links_carry_the_flow_count_per_key(self):
+        processor = TopologyDataProcessor()
+        raw = make_flows()
+        links = processor._extract_links(processor._optimize_dtypes(raw))
+
+        valid = raw.dropna(subset=["src", "dst"])
+        expected = Counter(zip(valid["src"], valid["dst"], valid["protocol"], valid["port"].astype(int)))
+        assert {(l["source"], l["target"], l["protocol"], l["port"]): l["value"] for l in links} == expected
+        assert sum(link["value"] for link in links) == len(valid)
+
+        # Over the render budget only the heaviest links are kept
+        capped = TopologyDataProcessor(TopologyConfig(max_links=10))
+        heaviest = capped._extract_links(capped._optimize_dtypes(raw))
+        assert len(heaviest) == 10
+        assert min(link["value"] for link in heaviest) == sorted(expected.values(), reverse=True)[9]
+
+
+def make_graph(seed=5):
+    """A small random graph plus an isolated pair, duplicate links, a self-loop and an isolated node"""
+    graph = nx.gnm_random_graph(40, 90, seed=seed)
+    node_ids = [f"n{i}" for i in range(40)] + ["a", "b", "lonely"]
+    links = [{"source": f"n{u}", "target": f"n{v}"} for u, v in graph.edges()]
+    links += [{"source": "a", "target": "b"}, {"source": "b", "target": "a"}, {"source": "n1", "target": "n1"}]
+    reference = nx.Graph()
+    reference.add_nodes_from(node_ids)
+    reference.add_edges_from((link["source"], link["target"]) for link in links if link["source"] != link["target"])
+    return node_ids, links, reference
+
+
+class TestGraphFeatureEngine:
+    """Sparse degree, clustering, betweenness and components against networkx"""
+
+    def test_exact_mode_matches_networkx(self):
+        node_ids, links, reference = make_graph()
+        metrics = GraphFeatureEngine(node_ids, links, betweenness_samples=len(node_ids)).compute()
+
+        degree = dict(reference.degree())
+        clustering = nx.clustering(reference)
+        betweenness = nx.betweenness_centrality(reference, normalized=True)
+        for i, node_id in enumerate(node_ids):
+            assert metrics["degree"][i] == degree[node_id], node_id
+            assert metrics["clustering_coefficient"][i] == pytest.approx(clustering[node_id]), node_id
+            assert metrics["betweenness_centrality"][i] == pytest.approx(betweenness[node_id], abs=1e-9), node_id
+            assert metrics["component_size"][i] == len(nx.node_connected_component(reference, node_id))
+        assert metrics["component_count"] == nx.number_connected_components(reference)
+
+    def test_sampled_betweenness_tracks_exact_ranking(self):
+        node_ids, links, reference = make_graph()
+        sampled = GraphFeatureEngine(node_ids, links, betweenness_samples=20).approximate_betweenness()
+        exact = nx.betweenness_centrality(reference, normalized=True)
+
+        top = max(exact, key=exact.get)
+        assert sampled[node_ids.index(top)] > np.median(sampled)
+        assert ((sampled >= 0) & (sampled <= 1)).all()
+
+    def test_normalize_data_feature_matrix(self):
+        processor = TopologyDataProcessor()
+        node_ids, links, reference = make_graph()
+        nodes = [{"id": node_id, "ip": f"10.1.{i}.1", "archetype": "SOA", "application": "Core Ledger"}
+                 for i, node_id in enumerate(node_ids)]
+
+        normalized = processor.normalize_data({"nodes": nodes, "links": links}, betweenness_samples=len(nodes))
+        vectors = normalized["feature_vectors"]
+        assert vectors.shape == (len(nodes), len(normalized["feature_names"]))
+        degree = vectors[:, normalized["feature_names"].index("node_degree")]
+        assert degree.tolist() == [reference.degree(node_id) for node_id in node_ids]
+        assert normalized["node_features"]["n3"]["ip_subnet"] == 3
+        assert normalized["graph_statistics"]["connected_components"] == nx.number_connected_components(reference)
@@ -0,0 +1,139 @@
+# tests/test_traffic_weighted_visualizer.py - Grouped edge build and node patterns against the per-row graph build
+
+from collections import Counter, defaultdict
+
+import networkx as nx
+import numpy as np
+import pandas as pd
+
+from data.traffic_weighted_visualizer import TrafficWeightedVisualizer
+
+
+def make_flows(rows=1200, seed=9):
+    """Random flows between 15 endpoints, some known only by hostname and some with no endpoint at all"""
+    rng = np.random.default_rng(seed)
+    ips = np.array([f"10.0.{i // 5}.{i}" for i in range(12)] + ["", None, None], dtype=object)
+    hosts = np.array([f"host{i}" for i in range(15)], dtype=object)
+    protocols = np.array(["HTTP", "HTTPS", "GRPC", "POSTGRESQL", "TDS", "IBMMQ", "KAFKA", "REDIS", "RDP", "SSH"],
+                         dtype=object)
+    src, dst = rng.integers(0, 15, rows), rng.integers(0, 15, rows)
+    flows = pd.DataFrame({
+        "source_ip": ips[src],
+        "source_hostname": hosts[src],
+        "destination_ip": ips[dst],
+        "destination_hostname": hosts[dst],
+        # Skewed so that most edges have a clear dominant protocol, but ties still occur
+        "protocol": protocols[np.minimum(rng.geometric(0.35, rows) - 1, len(protocols) - 1)],
+        "port": rng.choice([80, 443, 5432, 1414, 6379], rows),
+        "bytes_in": rng.integers(0, 5000, rows),
+        "bytes_out": rng.integers(0, 5000, rows),
+        "service_type": rng.choice(["web", "db", "mq"], rows),
+        "application": rng.choice(["Payments", "Ledger", "Portal", "Batch"], rows),
+    })
+    # Rows without any usable source endpoint are skipped
+    flows.loc[rng.choice(rows, 20, replace=False), ["source_ip", "source_hostname"]] = None
+    return flows
+
+
+def reference_graph(df):
+    """Edges, per-connection records and node patterns built row by row"""
+    groups = defaultdict(lambda: {'total_bytes': 0, 'connections': [], 'protocols': Counter(), 'applications': set()})
+    for _, row in df.iterrows():
+        # IP first, hostname as the fallback, skipping rows where neither is known
+        src = row['source_ip'] if pd.notna(row['source_ip']) and row['source_ip'] else row['source_hostname']
+        dst = row['destination_ip'] if pd.notna(row['destination_ip']) and row['destination_ip'] \
+            else row['destination_hostname']
+        if pd.isna(src) or pd.isna(dst):
+            continue
+        group = groups[(src, dst)]
+        bytes_in, bytes_out = int(row['bytes_in']), int(row['bytes_out'])
+        group['total_bytes'] += bytes_in + bytes_out
+        group['connections'].append({'protocol': row['protocol'], 'port': row['port'], 'bytes_in': bytes_in,
+                                     'bytes_out': bytes_out, 'service_type': row['service_type'],
+                                     'application': row['application']})
+        group['protocols'][row['protocol']] += 1
+        group['applications'].add(row['application'])
+
+    graph = nx.MultiDiGraph()
+    for (src, dst), data in groups.items():
+        graph.add_edge(src, dst, weight=data['total_bytes'], connection_count=len(data['connections']),
+                       protocols=list(data['protocols']), dominant_protocol=data['protocols'].most_common(1)[0][0],
+                       applications=data['applications'])
+
+    patterns = {}
+    for node in graph.nodes():
+        neighbours = [graph[p][node][0] for p in graph.predecessors(node)] + \
+            [graph[node][s][0] for s in graph.successors(node)]
+        seen = {protocol for edge in neighbours for protocol in edge['protocols']}
+        found = set()
+        if seen & {'HTTP', 'HTTPS'}:
+            found.add('web_layer')
+        if seen & {'MYSQL', 'POSTGRESQL', 'ORACLE-TNS', 'TDS', 'MONGODB'}:
+            found.add('data_layer')
+        if seen & {'IBMMQ', 'IBMMQ-SSL', 'AMQP', 'KAFKA', 'JMS', 'MQTT'}:
+            found.add('messaging_layer')
+            if any(p.startswith('IBMMQ') for p in seen):
+                found.add('ibm_mq_integration')
+        if len(list(graph.successors(node))) > 3 and 'HTTP' in seen:
+            found.add('api_gateway')
+        if 'GRPC' in seen:
+            found.add('microservices')
+        if seen & {'RDP', 'TELNET', 'TDS'}:
+            found.add('legacy_system')
+        if 'REDIS' in seen:
+            found.add('cache_layer')
+        if len(list(graph.predecessors(node))) + len(list(graph.successors(node))) > 5:
+            found.add('integration_hub')
+        patterns[node] = found or {'simple_service'}
+    return graph, groups, patterns
+
+
+class TestTrafficGraphBuild:
+    """Aggregated edges, flow details on request and node pattern detection"""
+
+    def test_edges_and_patterns_match_per_row_build(self):
+        flows = make_flows()
+        visualizer = TrafficWeightedVisualizer(flows)
+        visualizer.build_traffic_graph()
+        graph, groups, patterns = reference_graph(flows)
+
+        assert set(visualizer.G.nodes()) == set(graph.nodes())
+        assert visualizer.G.number_of_edges() == graph.number_of_edges() == len(groups)
+        for src, dst, expected in graph.edges(data=True):
+            actual = visualizer.G[src][dst][0]
+            assert actual['weight'] == expected['weight'] == visualizer.traffic_flows[src][dst]
+            assert actual['connection_count'] == expected['connection_count']
+            assert actual['protocols'] == expected['protocols'], (src, dst)
+            assert actual['dominant_protocol'] == expected['dominant_protocol'], (src, dst)
+            assert set(actual['applications']) == expected['applications']
+            assert actual['avg_bytes'] == expected['weight'] / expected['connection_count']
+        assert visualizer.composite_patterns == patterns
+
+        # Per-connection records are not kept unless asked for
+        assert len(visualizer.protocol_flows) == 0
+
+    def test_flow_details_kept_on_request(self):
+        flows = make_flows(rows=300)
+        visualizer = TrafficWeightedVisualizer(flows, keep_flow_details=True)
+        visualizer.build_traffic_graph()
+        _, groups, _ = reference_graph(flows)
+
+        details = {(src, dst): records for src, targets in visualizer.protocol_flows.items()
+                   for dst, records in targets.items()}
+        assert set(details) == set(groups)
+        for key, group in groups.items():
+            assert details[key] == group['connections'], key
+
+    def test_missing_columns_and_empty_frames(self):
+        # Hostname-only exports with no byte or application columns still build a graph
+        flows = pd.DataFrame({"source_hostname": ["a", "a", "b"], "destination_hostname": ["b", "c", "c"],
+                              "protocol": ["HTTP", None, "REDIS"]})
+        visualizer = TrafficWeightedVisualizer(flows)
+        visualizer.build_traffic_graph()
+        assert visualizer.G["a"]["c"][0]['protocols'] == ['Unknown']
+        assert visualizer.G["a"]["b"][0]['weight'] == 0
+        assert visualizer.composite_patterns["c"] == {'cache_layer'}
+
+        empty = TrafficWeightedVisualizer(flows.iloc[:0])
+        empty.build_traffic_graph()
+        assert empty.G.number_of_nodes() == 0 and empty.composite_patterns == {}
@@ -0,0 +1,84 @@
+# tests/test_utils/test_network_ocr_processor.py - Batched OCR pipeline against the per-image path
+
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("pytesseract")
+pytest.importorskip("cv2")
+
+import utils.network_ocr_processor as ocr
+
+SCREENSHOTS = {
+    "a.png": "fe80::1a2b VMware ABC123 10.0.0.5(host-a) SSL:443 1200 3400\n"
+             "fe80::1a2c VMware DEF456 10.0.0.6 udp:161 500 700",
+    "b.png": None,  # same content as a.png
+    "c.png": "fe80::1a2b VMware ABC123 10.0.0.5(host-a) SSL:443 1200 3400\n"
+             "fe80::9f00 Cisco R2 10.0.0.9 tcp:22 80 90",
+    "empty.png": "nothing useful on this screen",
+}
+COMPARED = ["Connection_Hash", "Source_Image", "IP_Address", "Device_Name", "Peer_Info", "Protocol",
+            "Bytes_In", "Bytes_Out"]
+
+
+def text_worker(image_path, tesseract_cmd=None):
+    """Stand-in for ocr_image_worker: the 'screenshot' holds its OCR text"""
+    return image_path, Path(image_path).read_text(), None
+
+
+@pytest.fixture
+def processor(tmp_path, monkeypatch):
+    """A processor whose download, staging and log folders live in tmp_path, with OCR faked"""
+    download = tmp_path / "download"
+    monkeypatch.setattr(ocr, "DOWNLOAD_FOLDER", download)
+    monkeypatch.setattr(ocr, "PROCESSED_FOLDER", download / "processed")
+    monkeypatch.setattr(ocr, "DATA_STAGING_FOLDER", tmp_path / "staging")
+    monkeypatch.setattr(ocr, "LOGS_FOLDER", tmp_path / "logs")
+    monkeypatch.setattr(ocr.NetworkOCRProcessor, "setup_tesseract", lambda self: None)
+    # Pool workers are forked, so they see the patched worker
+    monkeypatch.setattr(ocr, "ocr_image_worker", text_worker)
+
+    def make():
+        return ocr.NetworkOCRProcessor()
+
+    make.download = download
+    return make
+
+
+def serial_records(processor, names):
+    """Rows the per-image path commits for ``names``, processed in order"""
+    records = []
+    for name in names:
+        parsed = processor.parse_network_monitoring_data(SCREENSHOTS[name])
+        for record in parsed:
+            record["Source_Image"] = name
+        records.extend(parsed)
+    return pd.DataFrame(processor.check_duplicates(records))
+
+
+class TestOCRPipeline:
+    """Content-hash skips, per-batch commits and equivalence with per-image parsing"""
+
+    def test_pipeline_commits_what_the_per_image_path_would(self, processor):
+        first = processor()
+        for name, text in SCREENSHOTS.items():
+            (processor.download / name).write_text(SCREENSHOTS["a.png"] if text is None else text)
+
+        expected = serial_records(first, ["a.png", "c.png"])
+        stats = first.run_ocr_pipeline(first.find_image_files(processor.download), max_workers=2, batch_size=1)
+        assert (stats["skipped_known"], stats["images_ocrd"], stats["successful"]) == (1, 3, 2)
+
+        staged = pd.read_csv(first.staging_file_path)
+        assert stats["records_added"] == len(staged) == len(expected) == 3
+        key = ["Connection_Hash"]
+        assert staged[COMPARED].sort_values(key).reset_index(drop=True).astype(str).equals(
+            expected[COMPARED].sort_values(key).reset_index(drop=True).astype(str))
+
+        # Committed images are moved; the image without rows and the in-run copy stay to be retried
+        assert sorted(p.name for p in processor.download.glob("*.png")) == ["b.png", "empty.png"]
+
+        second = processor()
+        assert len(second.df_existing) == 3 and len(second.image_hashes) == 2
+        rerun = second.run_ocr_pipeline(second.find_image_files(processor.download), max_workers=1)
+        assert (rerun["skipped_known"], rerun["images_ocrd"], rerun["records_added"]) == (1, 1, 0)
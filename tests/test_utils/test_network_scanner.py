@@ -0,0 +1,128 @@
+# tests/test_utils/test_network_scanner.py - Single-pass scan accumulator against per-record aggregation
+
+import asyncio
+from datetime import datetime
+
+import pandas as pd
+
+from utils.network_scanner import NetworkScanner
+
+LOGS = [
+    {"source_ip": "10.0.0.5", "dest_ip": "10.0.1.20", "timestamp": "2026-03-01T10:00:00", "protocol": "tcp",
+     "dest_port": 443, "service": "https", "bytes_sent": 1200, "bytes_received": 800, "hostname": "web-01"},
+    {"source_ip": "10.0.0.5", "dest_ip": "10.0.1.20", "timestamp": "2026-03-01T09:30:00", "protocol": "TCP",
+     "dest_port": "8443", "service": "https", "bytes_sent": 300, "bytes_received": 0},
+    {"source_ip": "10.0.0.6", "dest_ip": "10.0.1.20", "timestamp": "2026-03-01 11:15:00", "protocol": "udp",
+     "port": 53, "application": "dns", "bytes": 90},
+    {"source_ip": "10.0.1.20", "dest_ip": "10.0.2.2", "timestamp": "2026-03-02T00:00:00", "proto": "tcp",
+     "port": "5432", "service": "postgresql", "bytes_sent": 5000, "bytes_received": 7000},
+    {"source_ip": "10.0.0.5", "dest_ip": "not-an-ip", "timestamp": "2026-03-01T12:00:00", "bytes_sent": "10"},
+    {"source_ip": "10.0.0.6", "dest_ip": "10.0.0.5", "protocol": "tcp", "dest_port": "bogus",
+     "bytes_sent": None, "bytes_received": 40},
+]
+
+
+def reference_scan(logs, validate):
+    """Node and edge aggregates as the per-record extraction passes computed them"""
+    nodes, edges = {}, {}
+    for entry in logs:
+        source_ip, dest_ip = entry.get("source_ip"), entry.get("dest_ip")
+        timestamp = entry.get("timestamp")
+        timestamp = pd.to_datetime(timestamp) if timestamp else None
+        for ip in (source_ip, dest_ip):
+            if not (ip and validate(ip)):
+                continue
+            node = nodes.setdefault(ip, {"ports": set(), "protocols": set(), "services": set(), "hostnames": set(),
+                                         "traffic_volume": 0, "connection_count": 0, "seen": []})
+            if entry.get("hostname"):
+                node["hostnames"].add(entry["hostname"])
+            service = entry.get("service") or entry.get("application")
+            if service:
+                node["services"].add(service)
+            port = str(entry.get("port") or entry.get("dest_port") or "")
+            if port.isdigit():
+                node["ports"].add(int(port))
+            protocol = entry.get("protocol") or entry.get("proto")
+            if protocol:
+                node["protocols"].add(protocol.upper())
+            try:
+                node["traffic_volume"] += int(entry.get("bytes_sent") or entry.get("bytes") or 0) + \
+                    int(entry.get("bytes_received") or 0)
+            except ValueError:
+                pass
+            node["connection_count"] += 1
+            if timestamp is not None:
+                node["seen"].append(timestamp)
+
+        if source_ip in nodes and dest_ip in nodes:
+            edge = edges.setdefault((source_ip, dest_ip), {"protocols": set(), "ports": set(), "total_bytes": 0,
+                                                            "packet_count": 0})
+            edge["protocols"].add(entry.get("protocol", "TCP").upper())
+            port = str(entry.get("dest_port") or entry.get("port") or "")
+            if port.isdigit():
+                edge["ports"].add(int(port))
+            edge["total_bytes"] += int((entry.get("bytes_sent", 0) or 0) + (entry.get("bytes_received", 0) or 0))
+            edge["packet_count"] += 1
+    return nodes, edges
+
+
+async def chunks(records, size):
+    for start in range(0, len(records), size):
+        for entry in records[start:start + size]:
+            yield entry
+        await asyncio.sleep(0)
+
+
+class TestNetworkScanner:
+    """Node and edge aggregates, chunked feeds and the scan time range"""
+
+    def test_single_pass_matches_per_record_aggregation(self):
+        scanner = NetworkScanner()
+        result = asyncio.run(scanner.scan_from_logs(LOGS, "splunk"))
+        expected_nodes, expected_edges = reference_scan(LOGS, scanner.network_utils.validate_ip_address)
+
+        nodes = {node.ip_address: node for node in result["nodes"]}
+        assert set(nodes) == set(expected_nodes)
+        for ip, expected in expected_nodes.items():
+            node = nodes[ip]
+            assert set(node.ports) == expected["ports"], ip
+            assert set(node.services) == expected["services"], ip
+            assert set(node.metadata["protocols"]) == expected["protocols"], ip
+            assert (node.metadata["traffic_volume"], node.metadata["connection_count"]) == \
+                (expected["traffic_volume"], expected["connection_count"]), ip
+            assert node.hostname == (next(iter(expected["hostnames"])) if expected["hostnames"] else None)
+            if expected["seen"]:
+                assert node.discovered_at == min(expected["seen"]) and node.last_seen == max(expected["seen"])
+
+        edges = {(edge.source_node_id, edge.target_node_id): edge.metadata for edge in result["connections"]}
+        assert len(edges) == len(expected_edges)
+        for (source_ip, dest_ip), expected in expected_edges.items():
+            metadata = edges[(f"node_{source_ip.replace('.', '_')}", f"node_{dest_ip.replace('.', '_')}")]
+            assert set(metadata["protocols"]) == expected["protocols"]
+            assert set(metadata["ports"]) == expected["ports"]
+            assert (metadata["total_bytes"], metadata["packet_count"]) == \
+                (expected["total_bytes"], expected["packet_count"])
+
+        time_range = result["statistics"]["time_range"]
+        assert time_range["start"] == datetime(2026, 3, 1, 9, 30) and time_range["end"] == datetime(2026, 3, 2)
+
+    def test_chunked_async_feed_matches_one_shot(self):
+        one_shot = asyncio.run(NetworkScanner().scan_from_logs(LOGS))
+
+        scanner = NetworkScanner()
+
+        async def feed():
+            consumed = await scanner.scan_more(chunks(LOGS[:4], 2))
+            consumed += await scanner.scan_more(iter(LOGS[4:]))
+            return consumed, scanner.build_results()
+
+        consumed, chunked = asyncio.run(feed())
+        assert consumed == len(LOGS)
+
+        def summary(result):
+            return sorted((node.ip_address, node.node_type, node.metadata["traffic_volume"],
+                           node.metadata["outbound_connections"], node.metadata["inbound_connections"])
+                          for node in result["nodes"])
+
+        assert summary(chunked) == summary(one_shot)
+        assert chunked["statistics"]["total_connections"] == one_shot["statistics"]["total_connections"]
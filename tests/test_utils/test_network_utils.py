@@ -0,0 +1,90 @@
+# tests/test_utils/test_network_utils.py - Compiled IP classifier tests
+
+import ipaddress
+
+import numpy as np
+
+from models.topology_models import NodeType
+from utils.network_utils import SPECIAL_IPV4_NETWORKS, IPClassifier, NetworkUtils, parse_ipv4
+
+
+def reference_node_type(address):
+    """Node type conventions as NetworkUtils applied them per address"""
+    try:
+        ip = ipaddress.ip_address(address)
+        if str(ip).endswith('.1') or str(ip).endswith('.254'):
+            return NodeType.ROUTER
+        if ip.is_private:
+            last_octet = int(str(ip).split('.')[-1])
+            if 1 <= last_octet <= 50:
+                return NodeType.SERVER
+            elif 100 <= last_octet <= 200:
+                return NodeType.WORKSTATION
+    except ValueError:
+        pass
+    return NodeType.UNKNOWN
+
+
+class TestIPClassifier:
+    """Bulk parsing, range lookups, zones and caching"""
+
+    def test_parser_accepts_what_ipaddress_accepts(self):
+        samples = ["10.0.0.1", "0.0.0.0", "255.255.255.255", "1.22.133.4", "256.1.1.1", "01.2.3.4",
+                   "1.2.3.04", "1.2.3", "1.2.3.4.5", "1..2.3", "1.2.3.", " 1.2.3.4", "1.2.3.4 ",
+                   "1.2.3.4444", "999999999999999", "1.2.3.4/24", "::1", ""]
+        values, valid = parse_ipv4(samples)
+
+        for sample, value, ok in zip(samples, values.tolist(), valid.tolist()):
+            try:
+                expected = int(ipaddress.IPv4Address(sample))
+            except ValueError:
+                expected = None
+            assert ok == (expected is not None), sample
+            if ok:
+                assert value == expected
+
+    def test_flags_and_node_types_match_ipaddress(self):
+        rng = np.random.default_rng(7)
+        ints = rng.integers(0, 2 ** 32, 20000).tolist()
+        for cidr in SPECIAL_IPV4_NETWORKS:
+            network = ipaddress.IPv4Network(cidr)
+            low, high = int(network.network_address), int(network.broadcast_address)
+            ints += [v % 2 ** 32 for v in (low - 1, low, high, high + 1)]
+        addresses = [str(ipaddress.IPv4Address(v)) for v in ints] + ["fe80::1", "::ffff:10.0.0.1", "bogus", None]
+
+        result = IPClassifier(zones=[]).classify(addresses)
+        assert len(result) == len(addresses)
+        for address, row in zip(addresses, result.itertuples(index=False)):
+            assert row.node_type == reference_node_type(address).value, address
+            if address in ("bogus", None):
+                assert not row.valid
+                continue
+            ip = ipaddress.ip_address(address)
+            assert (row.is_private, row.is_multicast, row.is_loopback, row.is_link_local) == \
+                (ip.is_private, ip.is_multicast, ip.is_loopback, ip.is_link_local), address
+
+    def test_most_specific_zone_wins(self):
+        zones = [
+            {"id": "corp", "name": "Corporate", "network_cidrs": ["10.0.0.0/8", "fd00::/8"]},
+            {"id": "db", "name": "Databases", "network_cidrs": ["10.5.0.0/16"], "node_type": "server"}
+        ]
+        result = IPClassifier(zones=zones).classify(["10.5.3.77", "10.6.0.77", "8.8.8.8", "fd00::9"])
+
+        assert result["zone"].tolist() == ["db", "corp", None, "corp"]
+        assert result["subnet"].tolist() == ["10.5.0.0/16", "10.0.0.0/8", None, "fd00::/8"]
+        # The zone hint only fills in where the address conventions give no type
+        assert result["node_type"].tolist() == ["server", "unknown", "unknown", "unknown"]
+
+    def test_repeated_addresses_are_cached(self):
+        classifier = IPClassifier(zones=[])
+        first = classifier.classify(["10.0.0.5", "10.0.0.5", "10.0.0.150"] * 100)
+        assert classifier.stats["cache_hits"] == 0
+        second = classifier.classify(["10.0.0.150", "10.0.0.5"])
+        assert classifier.stats["cache_hits"] == 2
+        assert second["node_type"].tolist() == ["workstation", "server"]
+        assert first["node_type"].tolist()[:3] == ["server", "server", "workstation"]
+
+        utils = NetworkUtils(classifier=classifier)
+        assert utils.determine_node_type_from_ip("10.0.0.150") == NodeType.WORKSTATION
+        assert utils.get_network_info("not-an-ip") == {"error": "Invalid IP address"}
+        assert utils.get_network_info("172.16.4.4")["network_class"] == "Class B"
@@ -0,0 +1,105 @@
+# tests/test_wave_planner.py - Dependency-aware migration wave planner tests
+
+import asyncio
+
+import pandas as pd
+import pytest
+
+import services.migration_service as migration_service
+from services.migration_service import MigrationService
+from services.portfolio_store import PortfolioStore
+from services.wave_planner import EDGE_COLUMNS, MigrationWavePlanner, dependency_edges_from_flows
+
+
+def app(app_id, strategy="Rehost", risk="Low", complexity="Low"):
+    return {"id": app_id, "name": app_id, "strategy": strategy, "risk": risk, "complexity": complexity,
+            "annual_savings": 1000, "timeline_months": 2}
+
+
+def edges(*pairs):
+    return pd.DataFrame([(s, t, n, 0.0) for s, t, n in pairs], columns=EDGE_COLUMNS)
+
+
+class TestWavePlanner:
+    """Dependency graph, move groups, packing and traffic report"""
+
+    def test_edges_follow_ip_ownership(self):
+        flows = pd.DataFrame({
+            "application": ["WEB", "WEB", "API", "API", "DB"],
+            "source_ip": ["10.0.0.1", "10.0.0.1", "10.0.0.2", "10.0.0.2", "10.0.0.3"],
+            "destination_ip": ["10.0.0.2", "10.0.0.2", "10.0.0.3", "8.8.8.8", "10.0.0.9"],
+            "bytes_in": ["10", "20", "5", "1", "0"],
+            "bytes_out": ["0", "0", "5", "1", "0"]
+        })
+        result = dependency_edges_from_flows(flows).set_index(["source_app", "target_app"])
+
+        assert sorted(result.index) == [("API", "DB"), ("WEB", "API")]
+        assert result.loc[("WEB", "API"), "flows"] == 2
+        assert result.loc[("WEB", "API"), "bytes"] == 30
+
+    def test_cycles_move_together_and_providers_first(self):
+        apps = [app("A"), app("B"), app("C"), app("D", strategy="Refactor", risk="High")]
+        # A <-> B form a cycle and call C; D calls A
+        deps = edges(("A", "B", 5), ("B", "A", 5), ("A", "C", 3), ("D", "A", 7))
+        planner = MigrationWavePlanner(flow_dirs=[])
+        plan = planner.plan(apps, risk_score=lambda a: 0.5, priority=lambda a: 0,
+                            edges=deps, max_apps_per_wave=2)
+
+        wave_of = {app_id: w for w, ids in enumerate(plan.waves) for app_id in ids}
+        assert plan.move_groups == [["A", "B"]]
+        assert wave_of["A"] == wave_of["B"]
+        assert wave_of["C"] <= wave_of["A"] <= wave_of["D"]
+        assert max(len(w) for w in plan.waves) <= 2
+
+        traffic = plan.traffic
+        assert traffic["total_flows"] == 20
+        assert traffic["cross_wave_flows"] == sum(
+            n for s, t, n in [("A", "C", 3), ("D", "A", 7)] if wave_of[s] != wave_of[t])
+
+    def test_risk_budget_splits_waves(self):
+        apps = [app(f"APP{i}") for i in range(6)]
+        plan = MigrationWavePlanner(flow_dirs=[]).plan(
+            apps, risk_score=lambda a: 1.0, priority=lambda a: 0, edges=edges(),
+            max_apps_per_wave=10, max_risk_per_wave=2.0)
+
+        assert [len(w) for w in plan.waves] == [2, 2, 2]
+        assert plan.traffic["cross_wave_ratio"] == 0.0
+
+    def test_migration_service_uses_dependency_plan(self, tmp_path):
+        (tmp_path / "applicationList.csv").write_text(
+            "app_id,app_name\nPAY,Payments API\nWEB,Customer Portal\nRPT,Reporting Dashboard\n")
+        store = PortfolioStore(data_folder=str(tmp_path), check_interval=0)
+        service = MigrationService.from_store(store)
+
+        waves = asyncio.run(service.generate_migration_waves(["all"], approach="phased"))
+
+        planned = [app_id for wave in waves for app_id in wave.applications]
+        assert sorted(planned) == ["PAY", "RPT", "WEB"]
+        assert waves[0].start_month == 1
+        assert service.last_wave_plan["applications_planned"] == 3
+
+    def test_waves_start_after_their_dependencies(self, tmp_path, monkeypatch):
+        (tmp_path / "applicationList.csv").write_text("app_id\nPAY\nWEB\nRPT\n")
+        durations = {"PAY": 2, "WEB": 3, "RPT": 4}
+
+        def builder(app_df, archetype_mapping):
+            return [dict(app(app_id), timeline_months=durations[app_id]) for app_id in app_df["app_id"]]
+
+        # One app per wave; WEB calls PAY, RPT is independent
+        planner = MigrationWavePlanner(flow_dirs=[], max_apps_per_wave=1)
+        monkeypatch.setattr(planner, "load_dependency_edges", lambda: edges(("WEB", "PAY", 4)))
+        monkeypatch.setattr(migration_service, "wave_planner", planner)
+        service = MigrationService.from_store(
+            PortfolioStore(data_folder=str(tmp_path), builder=builder, check_interval=0))
+
+        waves = {wave.applications[0]: wave for wave in asyncio.run(service.generate_migration_waves(["all"]))}
+        assert waves["PAY"].start_month == 1 and waves["RPT"].start_month == 1
+        assert waves["WEB"].start_month == 3
+        assert waves["WEB"].dependencies == [waves["PAY"].name.split(":")[0]]
+
+        # WEB ends in month 5 and RPT in month 4
+        assert len(asyncio.run(service.generate_migration_waves(["all"], timeline_constraint=5))) == 3
+        with pytest.raises(ValueError, match="5 months"):
+            asyncio.run(service.generate_migration_waves(["all"], timeline_constraint=4))
+        with pytest.raises(ValueError):
+            asyncio.run(service.generate_migration_waves(["all"], timeline_constraint=0))
@@ -0,0 +1,161 @@
+# tests/test_websocket_hub.py - WebSocket hub fan-out and load tests
+
+import asyncio
+import time
+
+import pytest
+
+from services.websocket_hub import ALL_JOBS, WebSocketHub
+
+pytestmark = pytest.mark.asyncio
+
+
+class FakeWebSocket:
+    """Records messages; an optional per-send delay simulates a slow client"""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.messages = []
+        self.accepted = False
+
+    async def accept(self):
+        self.accepted = True
+
+    async def send_json(self, message):
+        if self.fail:
+            raise ConnectionError("socket closed")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        self.messages.append((time.monotonic(), message))
+
+
+class TestWebSocketHub:
+    """Routing, coalescing and back-pressure behaviour of the hub"""
+
+    async def test_updates_only_reach_subscribers(self):
+        hub = WebSocketHub()
+        watcher, other, legacy = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+        for ws in (watcher, other, legacy):
+            await hub.connect(ws)
+        hub.subscribe(watcher, "job-1")
+        hub.subscribe(other, "job-2")
+
+        hub.publish_job_update("job-1", {"progress": 50})
+        await hub.flush()
+
+        assert [m["job_id"] for _, m in watcher.messages] == ["job-1"]
+        assert other.messages == []
+        # Clients that never subscribed keep the old broadcast behaviour
+        assert [m["job_id"] for _, m in legacy.messages] == ["job-1"]
+        await hub.close()
+
+    async def test_wildcard_subscription_and_unsubscribe(self):
+        hub = WebSocketHub()
+        ws = FakeWebSocket()
+        await hub.connect(ws)
+        hub.subscribe(ws, ALL_JOBS)
+        hub.publish_job_update("job-9", {"progress": 10})
+        await hub.flush()
+        assert len(ws.messages) == 1
+
+        hub.unsubscribe(ws, ALL_JOBS)
+        hub.subscribe(ws, "job-1")
+        hub.publish_job_update("job-9", {"progress": 20})
+        await hub.flush()
+        assert len(ws.messages) == 1
+        await hub.close()
+
+    async def test_slow_client_receives_latest_coalesced_progress(self):
+        hub = WebSocketHub()
+        slow = FakeWebSocket(delay=0.05)
+        await hub.connect(slow)
+        hub.subscribe(slow, "job-1")
+
+        hub.publish_job_update("job-1", {"progress": 0})
+        await asyncio.sleep(0.01)  # first message is now in flight
+        hub.publish_job_update("job-1", {"progress": 1, "total_rows": 1000})
+        for progress in range(2, 101):
+            hub.publish_job_update("job-1", {"progress": progress})
+        await hub.flush()
+        await asyncio.sleep(0.1)
+
+        received = [m for _, m in slow.messages]
+        assert len(received) == 2
+        assert received[-1]["progress"] == 100
+        # Merged updates keep fields that later updates did not repeat
+        assert received[-1]["total_rows"] == 1000
+        assert hub.stats["coalesced"] == 99
+        await hub.close()
+
+    async def test_bounded_queue_drops_oldest(self):
+        hub = WebSocketHub(max_queue_size=5)
+        slow = FakeWebSocket(delay=0.2)
+        await hub.connect(slow)
+        for i in range(20):
+            hub.send_personal(slow, {"type": "notice", "seq": i})
+
+        metrics = hub.get_metrics()
+        assert metrics["max_queue_depth"] <= 5
+        assert metrics["dropped"] >= 14
+        await hub.close()
+
+    async def test_failed_client_is_disconnected(self):
+        hub = WebSocketHub()
+        broken, healthy = FakeWebSocket(fail=True), FakeWebSocket()
+        await hub.connect(broken)
+        await hub.connect(healthy)
+        hub.broadcast({"type": "notice"})
+        await hub.flush()
+        await asyncio.sleep(0)
+
+        assert hub.active_connections == [healthy]
+        assert hub.stats["send_failures"] == 1
+        await hub.close()
+
+    async def test_load_slow_clients_do_not_delay_fast_clients(self):
+        """500 simulated clients across 50 jobs, a fifth of them slow"""
+        hub = WebSocketHub()
+        jobs = [f"job-{i}" for i in range(50)]
+        fast_clients, slow_clients, subscribed_job = [], [], {}
+
+        for i in range(500):
+            slow = i % 5 == 0
+            ws = FakeWebSocket(delay=0.02 if slow else 0.0)
+            await hub.connect(ws)
+            hub.subscribe(ws, jobs[i % len(jobs)])
+            subscribed_job[ws] = jobs[i % len(jobs)]
+            (slow_clients if slow else fast_clients).append(ws)
+
+        started = time.monotonic()
+        for progress in range(1, 101):
+            for job_id in jobs:
+                hub.publish_job_update(job_id, {"progress": progress})
+            await asyncio.sleep(0)
+        publish_time = time.monotonic() - started
+        await hub.flush(timeout=10)
+        await asyncio.sleep(0.05)
+
+        # Publishing never waits on sockets
+        assert publish_time < 2.0
+
+        for ws in fast_clients:
+            assert ws.messages[-1][1]["progress"] == 100
+            assert {m["job_id"] for _, m in ws.messages} == {subscribed_job[ws]}
+
+        # Fast clients are done long before the slow ones finish draining
+        fast_done = max(ws.messages[-1][0] for ws in fast_clients)
+        slow_done = max(ws.messages[-1][0] for ws in slow_clients)
+        assert fast_done < slow_done
+
+        for ws in slow_clients:
+            # Slow consumers still end on the latest state, with far fewer sends
+            assert ws.messages[-1][1]["progress"] == 100
+            assert len(ws.messages) < 100
+
+        metrics = hub.get_metrics()
+        assert metrics["connections"] == 500
+        assert metrics["coalesced"] > 0
+        assert metrics["dropped"] == 0
+        assert metrics["queued_messages"] == 0
+        await hub.close()
@@ -13,6 +13,13 @@ Usage:
     python utils/network_ocr_processor.py
     python utils/network_ocr_processor.py --single image.png
     python utils/network_ocr_processor.py --watch
+    python utils/network_ocr_processor.py --workers 6 --batch-size 40
+    python utils/network_ocr_processor.py --benchmark samples/screenshots
+
+Folder processing runs OpenCV preprocessing and Tesseract in a process pool.
+Parsed rows are appended once per batch to a CSV staging store, and the
+consolidated Excel workbook is written once at the end of the run. Images
+whose content hash was already OCR'd are skipped.
 
 Author: Application Auto Discoverer Team
 """
@@ -20,10 +27,12 @@ Author: Application Auto Discoverer Team
 import os
 import sys
 import re
+import json
 import hashlib
 import shutil
 import time
 import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 import logging
@@ -58,6 +67,60 @@ OCR_CONFIG = {
     'supported_formats': ['.png', '.jpg', '.jpeg', '.tiff', '.bmp']
 }
 
+# Batch pipeline configuration
+PIPELINE_CONFIG = {
+    'batch_size': 20,
+    'max_workers': max(1, (os.cpu_count() or 2) - 1),
+    'staging_file': 'network_connections_staging.csv',
+    'hash_file': 'network_ocr_processed_hashes.json'
+}
+
+# Fixed column order so batches can be appended to the staging CSV
+STAGING_COLUMNS = [
+    'IP_Address', 'Device_Name', 'Peer_Info', 'Protocol',
+    'Bytes_In', 'Bytes_Out', 'Total_Bytes', 'Extraction_Timestamp',
+    'Raw_Line', 'Line_Number', 'Connection_Hash', 'Source_Image', 'Source_Path'
+]
+
+
+def preprocess_image_array(img):
+    """Grayscale, Otsu threshold and morphological close for OCR"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    kernel = np.ones((1,1), np.uint8)
+    return cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
+
+
+def ocr_image_worker(image_path, tesseract_cmd=None):
+    """
+    Process-pool worker: preprocess and OCR a single image.
+    Returns (image_path, text, error) so failures never break the pool.
+    """
+    try:
+        if tesseract_cmd:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+        img = cv2.imread(image_path)
+        if img is None:
+            return image_path, None, f"Could not load image: {image_path}"
+
+        processed = preprocess_image_array(img)
+        text = pytesseract.image_to_string(processed, config=OCR_CONFIG['custom_config'])
+        return image_path, text.strip(), None
+
+    except Exception as e:
+        return image_path, None, str(e)
+
+
+def compute_file_hash(file_path, chunk_size=1024 * 1024):
+    """SHA-256 of the file content, read in chunks"""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 class NetworkOCRProcessor:
     """
     Standalone Network OCR Processor for Application Auto Discoverer
@@ -69,11 +132,19 @@ class NetworkOCRProcessor:
         self.setup_logging()
         self.setup_tesseract()
         
-        # Output file path
+        # Output file paths
         self.excel_file_path = DATA_STAGING_FOLDER / "network_connections_consolidated.xlsx"
+        self.staging_file_path = DATA_STAGING_FOLDER / PIPELINE_CONFIG['staging_file']
+        self.hash_file_path = DATA_STAGING_FOLDER / PIPELINE_CONFIG['hash_file']
+        
+        # Content hashes of images that were already OCR'd
+        self.image_hashes = set()
+        self.processed_images = {}
+        self.load_processed_hashes()
         
         # Load existing data
         self.df_existing = self.load_existing_data()
+        self.existing_hashes = set(self.df_existing.get('Connection_Hash', pd.Series(dtype=object)).dropna())
         
         self.logger.info(f"Network OCR Processor initialized - {len(self.df_existing)} existing records")
         print(f"🚀 Network OCR Processor Ready")
@@ -120,9 +191,13 @@ class NetworkOCRProcessor:
             sys.exit(1)
     
     def load_existing_data(self):
-        """Load existing Excel data"""
+        """Load existing data, preferring the append-only staging CSV over Excel"""
         try:
-            if self.excel_file_path.exists():
+            if self.staging_file_path.exists():
+                df = pd.read_csv(self.staging_file_path)
+                self.logger.info(f"Loaded {len(df)} existing records from staging store")
+                return df
+            elif self.excel_file_path.exists():
                 df = pd.read_excel(self.excel_file_path, engine='openpyxl')
                 self.logger.info(f"Loaded {len(df)} existing records")
                 return df
@@ -133,25 +208,38 @@ class NetworkOCRProcessor:
             self.logger.error(f"Error loading existing data: {e}")
             return pd.DataFrame()
     
+    def load_processed_hashes(self):
+        """Load content hashes of images OCR'd in previous runs"""
+        try:
+            if self.hash_file_path.exists():
+                with open(self.hash_file_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.image_hashes = set(data.get('hashes', []))
+                self.processed_images = data.get('files', {})
+                self.logger.info(f"Loaded {len(self.image_hashes)} processed image hashes")
+        except Exception as e:
+            self.logger.warning(f"Could not load processed image hashes: {e}")
+    
+    def save_processed_hashes(self):
+        """Persist content hashes of OCR'd images"""
+        try:
+            with open(self.hash_file_path, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'hashes': sorted(self.image_hashes),
+                    'files': self.processed_images,
+                    'last_updated': datetime.now().isoformat()
+                }, f, indent=2, ensure_ascii=False)
+        except Exception as e:
+            self.logger.warning(f"Could not save processed image hashes: {e}")
+    
     def preprocess_image(self, image_path):
         """Enhance image for better OCR accuracy"""
         try:
-            # Read image
             img = cv2.imread(str(image_path))
             if img is None:
                 raise ValueError(f"Could not load image: {image_path}")
             
-            # Convert to grayscale
-            gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-            
-            # Apply threshold for better contrast
-            _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            
-            # Clean up with morphological operations
-            kernel = np.ones((1,1), np.uint8)
-            processed = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-            
-            return processed
+            return preprocess_image_array(img)
             
         except Exception as e:
             self.logger.error(f"Image preprocessing error: {e}")
@@ -459,17 +547,19 @@ class NetworkOCRProcessor:
     
     def check_duplicates(self, new_data):
         """Check for duplicates using connection hash"""
-        if self.df_existing.empty or not new_data:
+        if not new_data:
             return new_data
         
         unique_data = []
-        existing_hashes = set(self.df_existing.get('Connection_Hash', []))
+        existing_hashes = self.existing_hashes
+        # Known hashes are only extended by append_to_staging once rows are committed
+        batch_hashes = set()
         
         for record in new_data:
             connection_hash = record.get('Connection_Hash')
-            if connection_hash not in existing_hashes:
+            if connection_hash not in existing_hashes and connection_hash not in batch_hashes:
                 unique_data.append(record)
-                existing_hashes.add(connection_hash)
+                batch_hashes.add(connection_hash)
             else:
                 self.logger.debug(f"Duplicate connection found: {record.get('IP_Address', 'Unknown')}")
         
@@ -479,32 +569,58 @@ class NetworkOCRProcessor:
         
         return unique_data
     
-    def save_to_excel(self, new_data):
-        """Save data to Excel file"""
+    def append_to_staging(self, new_data):
+        """Append a batch of de-duplicated records to the staging CSV"""
         if not new_data:
-            self.logger.info("No new data to save")
-            return
+            return 0
         
         try:
-            df_new = pd.DataFrame(new_data)
+            df_new = pd.DataFrame(new_data).reindex(columns=STAGING_COLUMNS)
+            write_header = not self.staging_file_path.exists()
             
-            # Combine with existing data
-            if not self.df_existing.empty:
-                df_combined = pd.concat([self.df_existing, df_new], ignore_index=True, sort=False)
-            else:
-                df_combined = df_new
+            # Seed the staging store from a pre-existing workbook on first use
+            if write_header and not self.df_existing.empty:
+                self.df_existing.reindex(columns=STAGING_COLUMNS).to_csv(
+                    self.staging_file_path, index=False)
+                write_header = False
             
-            # Save to Excel
-            df_combined.to_excel(self.excel_file_path, index=False, engine='openpyxl')
+            df_new.to_csv(self.staging_file_path, mode='a', header=write_header, index=False)
+            self.existing_hashes.update(df_new['Connection_Hash'].dropna())
             
-            # Update internal data
-            self.df_existing = df_combined
+            if not self.df_existing.empty:
+                self.df_existing = pd.concat([self.df_existing, df_new], ignore_index=True, sort=False)
+            else:
+                self.df_existing = df_new
             
-            self.logger.info(f"Saved {len(new_data)} new records. Total: {len(df_combined)}")
+            self.logger.info(f"Committed {len(df_new)} records. Total: {len(self.df_existing)}")
+            return len(df_new)
             
+        except Exception as e:
+            self.logger.error(f"Error appending to staging store: {e}")
+            return 0
+    
+    def export_to_excel(self):
+        """Write the consolidated Excel workbook from accumulated data"""
+        if self.df_existing.empty:
+            return
+        
+        try:
+            self.df_existing.to_excel(self.excel_file_path, index=False, engine='openpyxl')
+            self.logger.info(f"Exported {len(self.df_existing)} records to {self.excel_file_path.name}")
         except Exception as e:
             self.logger.error(f"Error saving to Excel: {e}")
     
+    def save_to_excel(self, new_data):
+        """Save data to Excel file; returns the number of records committed"""
+        if not new_data:
+            self.logger.info("No new data to save")
+            return 0
+        
+        committed = self.append_to_staging(new_data)
+        if committed:
+            self.export_to_excel()
+        return committed
+    
     def move_processed_image(self, image_path):
         """Move processed image to processed folder"""
         try:
@@ -529,6 +645,11 @@ class NetworkOCRProcessor:
         print(f"🔍 Processing: {image_path.name}")
         
         try:
+            image_hash = compute_file_hash(image_path)
+            if image_hash in self.image_hashes:
+                print("⏭️  Image content already processed, skipping")
+                return 0
+            
             # Extract text
             extracted_text = self.extract_text_from_image(image_path)
             if not extracted_text:
@@ -557,8 +678,12 @@ class NetworkOCRProcessor:
             # Check duplicates
             unique_data = self.check_duplicates(parsed_data)
             
-            # Save to Excel
-            self.save_to_excel(unique_data)
+            # Save to Excel; a failed commit leaves the image unrecorded so it is retried
+            if unique_data and not self.save_to_excel(unique_data):
+                print("❌ Could not commit records, image left for the next run")
+                return 0
+            self.record_image_hash(image_hash, image_path, len(unique_data))
+            self.save_processed_hashes()
             
             # Move processed image
             self.move_processed_image(image_path)
@@ -573,36 +698,142 @@ class NetworkOCRProcessor:
             print(f"❌ Error: {e}")
             return 0
     
-    def process_download_folder(self):
-        """Process all images in download folder - ENHANCED with duplicate prevention"""
+    def record_image_hash(self, image_hash, image_path, records_added):
+        """Remember that an image's content has been OCR'd"""
+        self.image_hashes.add(image_hash)
+        self.processed_images[image_hash] = {
+            'file': Path(image_path).name,
+            'records': records_added,
+            'processed_at': datetime.now().isoformat()
+        }
+    
+    def find_image_files(self, folder=DOWNLOAD_FOLDER):
+        """Find supported images with a single directory scan (any extension case)"""
+        supported = {ext.lower() for ext in OCR_CONFIG['supported_formats']}
+        try:
+            with os.scandir(folder) as entries:
+                image_files = [Path(entry.path) for entry in entries
+                               if entry.is_file() and Path(entry.name).suffix.lower() in supported]
+        except FileNotFoundError:
+            return []
+        return sorted(image_files)
+    
+    def run_ocr_pipeline(self, image_files, max_workers=None, batch_size=None,
+                         persist=True, skip_known=True):
+        """
+        OCR images in a process pool and commit parsed rows once per batch.
+        
+        Returns a stats dict with counts, elapsed seconds and images/minute.
+        With persist=False nothing is written or moved (benchmark mode).
+        Only images whose rows were committed are recorded as known; images
+        that yielded no rows, or whose batch failed to commit, are retried
+        on the next run.
+        """
+        max_workers = max_workers or PIPELINE_CONFIG['max_workers']
+        batch_size = batch_size or PIPELINE_CONFIG['batch_size']
+        tesseract_cmd = pytesseract.pytesseract.tesseract_cmd
+        
+        stats = {
+            'images_found': len(image_files),
+            'images_ocrd': 0,
+            'skipped_known': 0,
+            'failed': 0,
+            'successful': 0,
+            'records_added': 0,
+            'elapsed_seconds': 0.0,
+            'images_per_minute': 0.0
+        }
+        
+        # Hash first so already-OCR'd content (and in-run copies) never hits the pool
+        pending = []
+        seen_hashes = set()
+        for image_path in image_files:
+            try:
+                image_hash = compute_file_hash(image_path)
+            except OSError as e:
+                self.logger.warning(f"Could not hash {image_path.name}: {e}")
+                stats['failed'] += 1
+                continue
+            if image_hash in seen_hashes or (skip_known and image_hash in self.image_hashes):
+                stats['skipped_known'] += 1
+                continue
+            seen_hashes.add(image_hash)
+            pending.append((image_path, image_hash))
+        
+        if not pending:
+            return stats
+        
+        started = time.perf_counter()
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            for batch_start in range(0, len(pending), batch_size):
+                batch = pending[batch_start:batch_start + batch_size]
+                futures = {
+                    executor.submit(ocr_image_worker, str(image_path), tesseract_cmd): (image_path, image_hash)
+                    for image_path, image_hash in batch
+                }
+                
+                batch_records = []
+                ocrd_images = []
+                
+                for future in as_completed(futures):
+                    image_path, image_hash = futures[future]
+                    _, text, error = future.result()
+                    
+                    if error:
+                        self.logger.error(f"OCR extraction error for {image_path}: {error}")
+                        stats['failed'] += 1
+                        continue
+                    
+                    stats['images_ocrd'] += 1
+                    parsed_data = self.parse_network_monitoring_data(text) if text else []
+                    for record in parsed_data:
+                        record['Source_Image'] = image_path.name
+                        record['Source_Path'] = str(image_path)
+                    
+                    batch_records.extend(parsed_data)
+                    ocrd_images.append((image_path, image_hash, len(parsed_data)))
+                
+                if not persist:
+                    stats['records_added'] += len(batch_records)
+                    stats['successful'] += sum(1 for _, _, n in ocrd_images if n)
+                    continue
+                
+                # One commit per batch
+                unique_data = self.check_duplicates(batch_records)
+                committed = self.append_to_staging(unique_data)
+                stats['records_added'] += committed
+                if unique_data and not committed:
+                    self.logger.warning(f"Batch of {len(ocrd_images)} images not committed; will retry next run")
+                    continue
+                
+                for image_path, image_hash, record_count in ocrd_images:
+                    # Zero rows may be a transient OCR failure, so keep the image retryable
+                    if not record_count:
+                        continue
+                    self.record_image_hash(image_hash, image_path, record_count)
+                    stats['successful'] += 1
+                    self.move_processed_image(image_path)
+                self.save_processed_hashes()
+                
+                done = min(batch_start + batch_size, len(pending))
+                print(f"   📦 Batch committed: {done}/{len(pending)} images, "
+                      f"{stats['records_added']} new records")
+        
+        elapsed = time.perf_counter() - started
+        stats['elapsed_seconds'] = round(elapsed, 2)
+        if elapsed > 0:
+            stats['images_per_minute'] = round(stats['images_ocrd'] * 60.0 / elapsed, 1)
+        
+        return stats
+    
+    def process_download_folder(self, max_workers=None, batch_size=None):
+        """Process all images in download folder through the batched OCR pipeline"""
         if not DOWNLOAD_FOLDER.exists():
             print(f"❌ Download folder not found: {DOWNLOAD_FOLDER}")
             return
         
-        # Find image files with duplicate prevention
-        image_files = []
-        seen_files = set()  # Track files we've already found
-        
-        for ext in OCR_CONFIG['supported_formats']:
-            # Only search lowercase to avoid case sensitivity issues
-            found_files = list(DOWNLOAD_FOLDER.glob(f"*{ext}"))
-            
-            for file in found_files:
-                # Use absolute path to avoid duplicates
-                file_key = str(file.resolve()).lower()
-                if file_key not in seen_files:
-                    image_files.append(file)
-                    seen_files.add(file_key)
-        
-        # Also check for uppercase extensions separately
-        for ext in OCR_CONFIG['supported_formats']:
-            found_files = list(DOWNLOAD_FOLDER.glob(f"*{ext.upper()}"))
-            
-            for file in found_files:
-                file_key = str(file.resolve()).lower()
-                if file_key not in seen_files:
-                    image_files.append(file)
-                    seen_files.add(file_key)
+        image_files = self.find_image_files(DOWNLOAD_FOLDER)
         
         if not image_files:
             print(f"📁 No images found in {DOWNLOAD_FOLDER}")
@@ -618,30 +849,50 @@ class NetworkOCRProcessor:
         
         print("-" * 50)
         
-        successful = 0
-        total_records = 0
+        stats = self.run_ocr_pipeline(image_files, max_workers=max_workers, batch_size=batch_size)
         
-        for i, image_file in enumerate(image_files, 1):
-            print(f"\n[{i}/{len(image_files)}] ", end="")
-            records_added = self.process_single_image(image_file)
-            
-            if records_added > 0:
-                successful += 1
-                total_records += records_added
+        # Excel is produced once, after all batches are committed
+        if stats['records_added'] > 0:
+            self.export_to_excel()
         
         # Summary
         print("\n" + "=" * 50)
         print("🎉 BATCH PROCESSING COMPLETE!")
-        print(f"📊 Successfully processed: {successful}/{len(image_files)} images")
-        print(f"📝 Total new records: {total_records}")
+        print(f"📊 Successfully processed: {stats['successful']}/{len(image_files)} images")
+        print(f"⏭️  Skipped (already OCR'd): {stats['skipped_known']}")
+        print(f"📝 Total new records: {stats['records_added']}")
+        print(f"⚡ Throughput: {stats['images_per_minute']} images/minute")
         print(f"💾 Output saved to: {self.excel_file_path.relative_to(PROJECT_ROOT)}")
         
-        if total_records > 0:
+        if stats['records_added'] > 0:
             self.show_summary()
+        
+        return stats
+    
+    def benchmark_folder(self, folder, max_workers=None, batch_size=None):
+        """Measure OCR throughput on a folder of sample screenshots without writing output"""
+        image_files = self.find_image_files(Path(folder))
+        if not image_files:
+            print(f"📁 No images found in {folder}")
+            return None
+        
+        print(f"⏱️  Benchmarking {len(image_files)} images from {folder}")
+        stats = self.run_ocr_pipeline(image_files, max_workers=max_workers, batch_size=batch_size,
+                                      persist=False, skip_known=False)
+        
+        print("\n" + "=" * 50)
+        print(f"🖼️  Images OCR'd: {stats['images_ocrd']} ({stats['failed']} failed)")
+        print(f"📝 Rows parsed: {stats['records_added']}")
+        print(f"⏱️  Elapsed: {stats['elapsed_seconds']}s with "
+              f"{max_workers or PIPELINE_CONFIG['max_workers']} workers")
+        print(f"⚡ Throughput: {stats['images_per_minute']} images/minute")
+        
+        return stats
     
-    def watch_download_folder(self, check_interval=5):
+    def watch_download_folder(self, check_interval=5, max_workers=None, batch_size=None):
         """Watch download folder for new images"""
-        processed_files = set()
+        # Files are tracked by (path, mtime, size) so unchanged files are not re-hashed each poll
+        seen_signatures = set()
         
         print(f"👀 Watching {DOWNLOAD_FOLDER} for new images...")
         print(f"⏱️  Check interval: {check_interval} seconds")
@@ -650,22 +901,24 @@ class NetworkOCRProcessor:
         
         try:
             while True:
-                # Find current image files
-                current_files = set()
-                for ext in OCR_CONFIG['supported_formats']:
-                    current_files.update(DOWNLOAD_FOLDER.glob(f"*{ext}"))
-                    current_files.update(DOWNLOAD_FOLDER.glob(f"*{ext.upper()}"))
-                
-                # Process new files
-                new_files = current_files - processed_files
+                new_files = []
+                for image_file in self.find_image_files(DOWNLOAD_FOLDER):
+                    try:
+                        stat = image_file.stat()
+                    except FileNotFoundError:
+                        continue
+                    signature = (str(image_file), stat.st_mtime_ns, stat.st_size)
+                    if signature not in seen_signatures:
+                        seen_signatures.add(signature)
+                        new_files.append(image_file)
                 
-                for new_file in new_files:
-                    print(f"\n🆕 New file detected: {new_file.name}")
-                    records_added = self.process_single_image(new_file)
+                if new_files:
+                    print(f"\n🆕 {len(new_files)} new file(s) detected")
+                    stats = self.run_ocr_pipeline(new_files, max_workers=max_workers, batch_size=batch_size)
                     
-                    if records_added > 0:
-                        processed_files.add(new_file)
-                        print("✅ Processing complete")
+                    if stats['records_added'] > 0:
+                        self.export_to_excel()
+                        print(f"✅ Processing complete - {stats['records_added']} new records")
                     else:
                         print("❌ No data extracted")
                 
@@ -712,6 +965,8 @@ Examples:
   python utils/network_ocr_processor.py --watch
   python utils/network_ocr_processor.py --summary
   python utils/network_ocr_processor.py --list-files
+  python utils/network_ocr_processor.py --workers 6 --batch-size 40
+  python utils/network_ocr_processor.py --benchmark samples/screenshots
 
 Folders:
   Input:  {DOWNLOAD_FOLDER}
@@ -729,6 +984,12 @@ Folders:
                        help='List all files in download folder (debug)')
     parser.add_argument('--interval', type=int, default=5,
                        help='Watch interval in seconds (default: 5)')
+    parser.add_argument('--workers', type=int, default=None,
+                       help=f"OCR worker processes (default: {PIPELINE_CONFIG['max_workers']})")
+    parser.add_argument('--batch-size', type=int, default=None,
+                       help=f"Images per committed batch (default: {PIPELINE_CONFIG['batch_size']})")
+    parser.add_argument('--benchmark', metavar='FOLDER',
+                       help='Report images/minute for a folder of sample screenshots (no output written)')
     
     args = parser.parse_args()
     
@@ -745,9 +1006,13 @@ Folders:
         image_path = DOWNLOAD_FOLDER / args.single
         processor.process_single_image(image_path)
         
+    elif args.benchmark:
+        # Throughput benchmark
+        processor.benchmark_folder(args.benchmark, args.workers, args.batch_size)
+        
     elif args.watch:
         # Watch folder mode
-        processor.watch_download_folder(args.interval)
+        processor.watch_download_folder(args.interval, args.workers, args.batch_size)
         
     elif args.summary:
         # Show summary only
@@ -759,7 +1024,7 @@ Folders:
         
     else:
         # Default: process all images in download folder
-        processor.process_download_folder()
+        processor.process_download_folder(args.workers, args.batch_size)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -4,178 +4,320 @@ Network scanner service for log-based network discovery
 
 import logging
 import pandas as pd
-from datetime import datetime
-from typing import Dict, List, Optional, Set, Any
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Set, Any, Iterable, AsyncIterable, Tuple, Union
 from models.topology_models import TopologyNode, TopologyEdge, NodeType, ConnectionType
 from utils.network_utils import NetworkUtils
 
 logger = logging.getLogger(__name__)
 
+LogRecords = Union[Iterable[Dict[str, Any]], AsyncIterable[Dict[str, Any]]]
+
+
+@lru_cache(maxsize=65536)
+def _parse_timestamp_string(value: str) -> Optional[datetime]:
+    """Parse a timestamp string, trying the fast ISO parser before pandas"""
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        try:
+            parsed = pd.to_datetime(value).to_pydatetime()
+        except (ValueError, TypeError, OverflowError):
+            return None
+    # Normalise to naive UTC so timestamps from mixed sources stay comparable
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_log_timestamp(value: Any) -> Optional[datetime]:
+    """Convert a log timestamp (ISO string, epoch seconds or datetime) to datetime"""
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+    if isinstance(value, str):
+        return _parse_timestamp_string(value)
+    if isinstance(value, (int, float)):
+        try:
+            return datetime.fromtimestamp(value, tz=timezone.utc).replace(tzinfo=None)
+        except (ValueError, OverflowError, OSError):
+            return None
+    return None
+
+
+class _NodeState:
+    """Per-IP accumulator updated once per log record"""
+    __slots__ = ("hostnames", "services", "ports", "protocols", "first_seen", "last_seen",
+                 "traffic_volume", "connection_count", "outbound", "inbound",
+                 "destinations", "sources")
+
+    def __init__(self):
+        self.hostnames: Set[str] = set()
+        self.services: Set[str] = set()
+        self.ports: Set[int] = set()
+        self.protocols: Set[str] = set()
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+        self.traffic_volume = 0
+        self.connection_count = 0
+        self.outbound = 0
+        self.inbound = 0
+        self.destinations: Set[str] = set()
+        self.sources: Set[str] = set()
+
+
+class _EdgeState:
+    """Per (source, destination) accumulator"""
+    __slots__ = ("protocols", "ports", "services", "total_bytes", "packet_count",
+                 "first_seen", "last_seen")
+
+    def __init__(self):
+        self.protocols: Set[str] = set()
+        self.ports: Set[int] = set()
+        self.services: Set[str] = set()
+        self.total_bytes = 0
+        self.packet_count = 0
+        self.first_seen: Optional[datetime] = None
+        self.last_seen: Optional[datetime] = None
+
+
+def _as_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (ValueError, TypeError):
+        return None
+
+
 class NetworkScanner:
     """
     Log-based network scanner that analyzes network traffic logs
-    to discover topology and connections
+    to discover topology and connections.
+
+    Records are folded into per-node and per-edge state in a single pass,
+    so long exports can be fed in chunks with scan_more() and materialised
+    with build_results().
     """
     
     def __init__(self):
         self.network_utils = NetworkUtils()
         self.discovered_nodes: Dict[str, TopologyNode] = {}
         self.discovered_connections: List[TopologyEdge] = []
-        
-    async def scan_from_logs(self, log_data: List[Dict[str, Any]], source_type: str = "unknown") -> Dict[str, Any]:
+        self.reset()
+    
+    def reset(self):
+        """Clear accumulated scan state"""
+        self._nodes: Dict[str, _NodeState] = {}
+        self._edges: Dict[Tuple[str, str], _EdgeState] = {}
+        self._valid_ips: Dict[str, bool] = {}
+        self._records_processed = 0
+        self._earliest: Optional[datetime] = None
+        self._latest: Optional[datetime] = None
+        
+    async def scan_from_logs(self, log_data: LogRecords, source_type: str = "unknown") -> Dict[str, Any]:
         """
-        Main scanning method that analyzes log data to discover network topology
+        Main scanning method that analyzes log data to discover network topology.
+        Accepts a list, iterator or async iterator of log records.
         """
-        logger.info(f"Starting network scan from {len(log_data)} log entries from {source_type}")
-        
-        scan_results = {
-            "nodes": [],
-            "connections": [],
-            "statistics": {},
-            "source_type": source_type,
-            "scan_timestamp": datetime.now()
-        }
+        logger.info(f"Starting network scan from {source_type} logs")
         
+        self.reset()
         try:
-            # Extract nodes and connections from logs
-            nodes = await self._extract_nodes_from_logs(log_data, source_type)
-            connections = await self._extract_connections_from_logs(log_data, nodes)
-            
-            # Enhance node information
-            enhanced_nodes = await self._enhance_node_information(nodes, log_data)
-            
-            # Generate statistics
-            statistics = self._generate_scan_statistics(enhanced_nodes, connections, log_data)
-            
-            scan_results.update({
-                "nodes": enhanced_nodes,
-                "connections": connections,
-                "statistics": statistics
-            })
-            
-            logger.info(f"Scan completed: {len(enhanced_nodes)} nodes, {len(connections)} connections")
-            
+            await self.scan_more(log_data)
+            scan_results = self.build_results(source_type)
+            logger.info(f"Scan completed: {len(scan_results['nodes'])} nodes, "
+                        f"{len(scan_results['connections'])} connections "
+                        f"from {self._records_processed} log entries")
         except Exception as e:
             logger.error(f"Error during network scan: {str(e)}")
-            scan_results["error"] = str(e)
+            scan_results = {
+                "nodes": [],
+                "connections": [],
+                "statistics": {},
+                "source_type": source_type,
+                "scan_timestamp": datetime.now(),
+                "error": str(e)
+            }
         
         return scan_results
     
-    async def _extract_nodes_from_logs(self, log_data: List[Dict[str, Any]], source_type: str) -> List[TopologyNode]:
-        """Extract unique network nodes from log data"""
-        unique_ips = set()
-        node_info = {}
+    async def scan_more(self, records: LogRecords) -> int:
+        """Fold another chunk of log records into the scan state; returns records consumed"""
+        consumed = 0
+        if hasattr(records, "__aiter__"):
+            async for entry in records:
+                self._accumulate(entry)
+                consumed += 1
+        else:
+            for entry in records:
+                self._accumulate(entry)
+                consumed += 1
+        return consumed
+    
+    def _is_valid_ip(self, ip: Any) -> bool:
+        valid = self._valid_ips.get(ip)
+        if valid is None:
+            valid = isinstance(ip, str) and self.network_utils.validate_ip_address(ip)
+            self._valid_ips[ip] = valid
+        return valid
+    
+    def _accumulate(self, entry: Dict[str, Any]):
+        """Update node, edge and time-range state from a single log record"""
+        self._records_processed += 1
+        get = entry.get
+        
+        source_ip = get("source_ip") or get("src_ip") or get("client_ip")
+        dest_ip = get("dest_ip") or get("dst_ip") or get("server_ip")
+        
+        raw_timestamp = get("timestamp")
+        timestamp = parse_log_timestamp(raw_timestamp) if raw_timestamp else None
+        if timestamp is not None:
+            if self._earliest is None or timestamp < self._earliest:
+                self._earliest = timestamp
+            if self._latest is None or timestamp > self._latest:
+                self._latest = timestamp
+        elif raw_timestamp:
+            timestamp = datetime.now()
+        
+        # Fields shared by both endpoints are resolved once per record
+        hostname = get("hostname") or get("host") or get("server_name")
+        service = get("service") or get("application") or get("app")
+        port = _as_int(get("port") or get("dest_port") or get("server_port"))
+        protocol = get("protocol") or get("proto")
+        protocol = protocol.upper() if isinstance(protocol, str) else None
+        bytes_sent = _as_int(get("bytes_sent") or get("bytes") or 0)
+        bytes_received = _as_int(get("bytes_received") or 0)
+        volume = bytes_sent + bytes_received if bytes_sent is not None and bytes_received is not None else 0
+        
+        source_valid = bool(source_ip) and self._is_valid_ip(source_ip)
+        dest_valid = bool(dest_ip) and self._is_valid_ip(dest_ip)
+        
+        for ip, valid in ((source_ip, source_valid), (dest_ip, dest_valid)):
+            if not valid:
+                continue
+            node = self._nodes.get(ip)
+            if node is None:
+                node = self._nodes[ip] = _NodeState()
+            if timestamp is not None:
+                if node.first_seen is None or timestamp < node.first_seen:
+                    node.first_seen = timestamp
+                if node.last_seen is None or timestamp > node.last_seen:
+                    node.last_seen = timestamp
+            if hostname:
+                node.hostnames.add(hostname)
+            if service:
+                node.services.add(service)
+            if port:
+                node.ports.add(port)
+            if protocol:
+                node.protocols.add(protocol)
+            node.traffic_volume += volume
+            node.connection_count += 1
+        
+        # Communication pattern counters
+        if source_valid:
+            node = self._nodes[source_ip]
+            node.outbound += 1
+            if dest_ip:
+                node.destinations.add(dest_ip)
+        if dest_valid:
+            node = self._nodes[dest_ip]
+            node.inbound += 1
+            if source_ip:
+                node.sources.add(source_ip)
+        
+        if not (source_valid and dest_valid):
+            return
+        
+        key = (source_ip, dest_ip)
+        edge = self._edges.get(key)
+        if edge is None:
+            edge = self._edges[key] = _EdgeState()
+        
+        edge_protocol = get("protocol", "TCP")
+        if isinstance(edge_protocol, str) and edge_protocol:
+            edge.protocols.add(edge_protocol.upper())
+        edge_port = _as_int(get("dest_port") or get("port"))
+        if edge_port:
+            edge.ports.add(edge_port)
+        edge_service = get("service") or get("application")
+        if edge_service:
+            edge.services.add(edge_service)
+        edge_sent = _as_int(get("bytes_sent", 0) or 0)
+        edge_received = _as_int(get("bytes_received", 0) or 0)
+        if edge_sent is not None and edge_received is not None:
+            edge.total_bytes += edge_sent + edge_received
+        edge.packet_count += 1
+        if timestamp is not None:
+            if edge.first_seen is None or timestamp < edge.first_seen:
+                edge.first_seen = timestamp
+            if edge.last_seen is None or timestamp > edge.last_seen:
+                edge.last_seen = timestamp
+    
+    def build_results(self, source_type: str = "unknown") -> Dict[str, Any]:
+        """Materialise nodes, connections and statistics from the accumulated state"""
+        nodes = self._build_nodes(source_type)
+        connections = self._build_connections()
+        statistics = self._generate_scan_statistics(nodes, connections)
         
-        # Extract all unique IP addresses
-        for entry in log_data:
-            source_ip = entry.get("source_ip") or entry.get("src_ip") or entry.get("client_ip")
-            dest_ip = entry.get("dest_ip") or entry.get("dst_ip") or entry.get("server_ip")
-            
-            for ip in [source_ip, dest_ip]:
-                if ip and self.network_utils.validate_ip_address(ip):
-                    unique_ips.add(ip)
-                    
-                    # Initialize node info if not exists
-                    if ip not in node_info:
-                        node_info[ip] = {
-                            "ip_address": ip,
-                            "hostnames": set(),
-                            "services": set(),
-                            "ports": set(),
-                            "protocols": set(),
-                            "first_seen": None,
-                            "last_seen": None,
-                            "traffic_volume": 0,
-                            "connection_count": 0
-                        }
-                    
-                    # Update node information from log entry
-                    self._update_node_from_log_entry(node_info[ip], entry)
+        self.discovered_nodes = {node.ip_address: node for node in nodes}
+        self.discovered_connections = connections
         
-        # Convert to TopologyNode objects
+        return {
+            "nodes": nodes,
+            "connections": connections,
+            "statistics": statistics,
+            "source_type": source_type,
+            "scan_timestamp": datetime.now()
+        }
+    
+    def _build_nodes(self, source_type: str) -> List[TopologyNode]:
+        """Convert node state to TopologyNode objects, refined by communication pattern"""
         nodes = []
-        for ip, info in node_info.items():
-            node = TopologyNode(
+        for ip, state in self._nodes.items():
+            node_type = self._determine_node_type_from_logs(state)
+            
+            unique_destinations = len(state.destinations)
+            # Refine node type based on communication patterns
+            if node_type == NodeType.UNKNOWN:
+                if unique_destinations > 50:
+                    node_type = NodeType.LOAD_BALANCER
+                elif state.inbound > state.outbound * 3:
+                    node_type = NodeType.SERVER
+                elif state.outbound > state.inbound * 3:
+                    node_type = NodeType.WORKSTATION
+            
+            nodes.append(TopologyNode(
                 id=f"node_{ip.replace('.', '_')}",
                 ip_address=ip,
-                hostname=list(info["hostnames"])[0] if info["hostnames"] else None,
-                node_type=self._determine_node_type_from_logs(info),
-                services=list(info["services"]),
-                ports=list(info["ports"]),
-                discovered_at=info["first_seen"] or datetime.now(),
-                last_seen=info["last_seen"] or datetime.now(),
+                hostname=next(iter(state.hostnames)) if state.hostnames else None,
+                node_type=node_type,
+                services=list(state.services),
+                ports=list(state.ports),
+                discovered_at=state.first_seen or datetime.now(),
+                last_seen=state.last_seen or datetime.now(),
                 metadata={
                     "source_type": source_type,
-                    "traffic_volume": info["traffic_volume"],
-                    "connection_count": info["connection_count"],
-                    "protocols": list(info["protocols"])
+                    "traffic_volume": state.traffic_volume,
+                    "connection_count": state.connection_count,
+                    "protocols": list(state.protocols),
+                    "outbound_connections": state.outbound,
+                    "inbound_connections": state.inbound,
+                    "unique_destinations": unique_destinations,
+                    "unique_sources": len(state.sources),
+                    "communication_ratio": state.outbound / max(state.inbound, 1)
                 }
-            )
-            nodes.append(node)
-        
+            ))
         return nodes
     
-    def _update_node_from_log_entry(self, node_info: Dict, entry: Dict[str, Any]):
-        """Update node information from a single log entry"""
-        # Update timestamps
-        timestamp = entry.get("timestamp")
-        if timestamp:
-            if isinstance(timestamp, str):
-                try:
-                    timestamp = pd.to_datetime(timestamp)
-                except:
-                    timestamp = datetime.now()
-            
-            if node_info["first_seen"] is None or timestamp < node_info["first_seen"]:
-                node_info["first_seen"] = timestamp
-            if node_info["last_seen"] is None or timestamp > node_info["last_seen"]:
-                node_info["last_seen"] = timestamp
-        
-        # Update hostnames
-        hostname = entry.get("hostname") or entry.get("host") or entry.get("server_name")
-        if hostname:
-            node_info["hostnames"].add(hostname)
-        
-        # Update services and applications
-        service = entry.get("service") or entry.get("application") or entry.get("app")
-        if service:
-            node_info["services"].add(service)
-        
-        # Update ports
-        port = entry.get("port") or entry.get("dest_port") or entry.get("server_port")
-        if port:
-            try:
-                node_info["ports"].add(int(port))
-            except (ValueError, TypeError):
-                pass
-        
-        # Update protocols
-        protocol = entry.get("protocol") or entry.get("proto")
-        if protocol:
-            node_info["protocols"].add(protocol.upper())
-        
-        # Update traffic volume
-        bytes_sent = entry.get("bytes_sent") or entry.get("bytes") or 0
-        bytes_received = entry.get("bytes_received") or 0
-        try:
-            node_info["traffic_volume"] += int(bytes_sent) + int(bytes_received)
-        except (ValueError, TypeError):
-            pass
-        
-        # Update connection count
-        node_info["connection_count"] += 1
-    
-    def _determine_node_type_from_logs(self, node_info: Dict) -> NodeType:
+    def _determine_node_type_from_logs(self, node_info: _NodeState) -> NodeType:
         """Determine node type based on log analysis"""
-        services = node_info.get("services", set())
-        ports = node_info.get("ports", set())
-        protocols = node_info.get("protocols", set())
-        traffic_volume = node_info.get("traffic_volume", 0)
-        connection_count = node_info.get("connection_count", 0)
+        ports_list = node_info.ports
+        traffic_volume = node_info.traffic_volume
+        connection_count = node_info.connection_count
         
-        # Convert to lists for easier analysis
-        services_list = [s.lower() for s in services]
-        ports_list = list(ports)
+        services_list = {str(s).lower() for s in node_info.services}
         
         # Router indicators
         if any(service in services_list for service in ['snmp', 'bgp', 'ospf']):
@@ -219,92 +361,27 @@ class NetworkScanner:
         
         return NodeType.UNKNOWN
     
-    async def _extract_connections_from_logs(self, log_data: List[Dict[str, Any]], nodes: List[TopologyNode]) -> List[TopologyEdge]:
-        """Extract network connections from log data"""
-        connections = {}
-        node_map = {node.ip_address: node.id for node in nodes}
-        
-        for entry in log_data:
-            source_ip = entry.get("source_ip") or entry.get("src_ip") or entry.get("client_ip")
-            dest_ip = entry.get("dest_ip") or entry.get("dst_ip") or entry.get("server_ip")
-            
-            if source_ip and dest_ip and source_ip in node_map and dest_ip in node_map:
-                connection_key = (source_ip, dest_ip)
-                
-                if connection_key not in connections:
-                    connections[connection_key] = {
-                        "source_ip": source_ip,
-                        "dest_ip": dest_ip,
-                        "protocols": set(),
-                        "ports": set(),
-                        "services": set(),
-                        "total_bytes": 0,
-                        "packet_count": 0,
-                        "first_seen": None,
-                        "last_seen": None
-                    }
-                
-                conn = connections[connection_key]
-                
-                # Update connection information
-                protocol = entry.get("protocol", "TCP")
-                if protocol:
-                    conn["protocols"].add(protocol.upper())
-                
-                port = entry.get("dest_port") or entry.get("port")
-                if port:
-                    try:
-                        conn["ports"].add(int(port))
-                    except (ValueError, TypeError):
-                        pass
-                
-                service = entry.get("service") or entry.get("application")
-                if service:
-                    conn["services"].add(service)
-                
-                # Update traffic statistics
-                bytes_transferred = (entry.get("bytes_sent", 0) or 0) + (entry.get("bytes_received", 0) or 0)
-                try:
-                    conn["total_bytes"] += int(bytes_transferred)
-                except (ValueError, TypeError):
-                    pass
-                
-                conn["packet_count"] += 1
-                
-                # Update timestamps
-                timestamp = entry.get("timestamp")
-                if timestamp and isinstance(timestamp, str):
-                    try:
-                        timestamp = pd.to_datetime(timestamp)
-                    except:
-                        timestamp = datetime.now()
-                
-                if timestamp:
-                    if conn["first_seen"] is None or timestamp < conn["first_seen"]:
-                        conn["first_seen"] = timestamp
-                    if conn["last_seen"] is None or timestamp > conn["last_seen"]:
-                        conn["last_seen"] = timestamp
-        
-        # Convert to TopologyEdge objects
+    def _build_connections(self) -> List[TopologyEdge]:
+        """Convert edge state to TopologyEdge objects"""
         edges = []
-        for (source_ip, dest_ip), conn_info in connections.items():
-            edge = TopologyEdge(
+        for (source_ip, dest_ip), state in self._edges.items():
+            source_id = f"node_{source_ip.replace('.', '_')}"
+            target_id = f"node_{dest_ip.replace('.', '_')}"
+            edges.append(TopologyEdge(
                 id=f"edge_{source_ip.replace('.', '_')}_{dest_ip.replace('.', '_')}",
-                source_node_id=node_map[source_ip],
-                target_node_id=node_map[dest_ip],
-                connection_type=self._determine_connection_type(conn_info["protocols"]),
-                discovered_at=conn_info["first_seen"] or datetime.now(),
-                last_tested=conn_info["last_seen"] or datetime.now(),
+                source_node_id=source_id,
+                target_node_id=target_id,
+                connection_type=self._determine_connection_type(state.protocols),
+                discovered_at=state.first_seen or datetime.now(),
+                last_tested=state.last_seen or datetime.now(),
                 metadata={
-                    "protocols": list(conn_info["protocols"]),
-                    "ports": list(conn_info["ports"]),
-                    "services": list(conn_info["services"]),
-                    "total_bytes": conn_info["total_bytes"],
-                    "packet_count": conn_info["packet_count"]
+                    "protocols": list(state.protocols),
+                    "ports": list(state.ports),
+                    "services": list(state.services),
+                    "total_bytes": state.total_bytes,
+                    "packet_count": state.packet_count
                 }
-            )
-            edges.append(edge)
-        
+            ))
         return edges
     
     def _determine_connection_type(self, protocols: Set[str]) -> ConnectionType:
@@ -324,54 +401,7 @@ class NetworkScanner:
         
         return ConnectionType.UNKNOWN
     
-    async def _enhance_node_information(self, nodes: List[TopologyNode], log_data: List[Dict[str, Any]]) -> List[TopologyNode]:
-        """Enhance node information with additional analysis"""
-        # Create a map for quick lookup
-        node_map = {node.ip_address: node for node in nodes}
-        
-        # Analyze patterns and enhance nodes
-        for node in nodes:
-            # Analyze communication patterns
-            outbound_connections = 0
-            inbound_connections = 0
-            unique_destinations = set()
-            unique_sources = set()
-            
-            for entry in log_data:
-                source_ip = entry.get("source_ip") or entry.get("src_ip")
-                dest_ip = entry.get("dest_ip") or entry.get("dst_ip")
-                
-                if source_ip == node.ip_address:
-                    outbound_connections += 1
-                    if dest_ip:
-                        unique_destinations.add(dest_ip)
-                
-                if dest_ip == node.ip_address:
-                    inbound_connections += 1
-                    if source_ip:
-                        unique_sources.add(source_ip)
-            
-            # Update node metadata with enhanced information
-            node.metadata.update({
-                "outbound_connections": outbound_connections,
-                "inbound_connections": inbound_connections,
-                "unique_destinations": len(unique_destinations),
-                "unique_sources": len(unique_sources),
-                "communication_ratio": outbound_connections / max(inbound_connections, 1)
-            })
-            
-            # Refine node type based on communication patterns
-            if node.node_type == NodeType.UNKNOWN:
-                if len(unique_destinations) > 50:
-                    node.node_type = NodeType.LOAD_BALANCER
-                elif inbound_connections > outbound_connections * 3:
-                    node.node_type = NodeType.SERVER
-                elif outbound_connections > inbound_connections * 3:
-                    node.node_type = NodeType.WORKSTATION
-        
-        return nodes
-    
-    def _generate_scan_statistics(self, nodes: List[TopologyNode], connections: List[TopologyEdge], log_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def _generate_scan_statistics(self, nodes: List[TopologyNode], connections: List[TopologyEdge]) -> Dict[str, Any]:
         """Generate comprehensive scan statistics"""
         node_types = {}
         connection_types = {}
@@ -394,24 +424,13 @@ class NetworkScanner:
             if conn.metadata and "protocols" in conn.metadata:
                 protocols.update(conn.metadata["protocols"])
         
-        # Calculate time range
-        timestamps = []
-        for entry in log_data:
-            timestamp = entry.get("timestamp")
-            if timestamp:
-                try:
-                    if isinstance(timestamp, str):
-                        timestamp = pd.to_datetime(timestamp)
-                    timestamps.append(timestamp)
-                except:
-                    pass
-        
+        # Time range is tracked while scanning
         time_range = None
-        if timestamps:
+        if self._earliest is not None:
             time_range = {
-                "start": min(timestamps),
-                "end": max(timestamps),
-                "duration_hours": (max(timestamps) - min(timestamps)).total_seconds() / 3600
+                "start": self._earliest,
+                "end": self._latest,
+                "duration_hours": (self._latest - self._earliest).total_seconds() / 3600
             }
         
         return {
@@ -422,21 +441,21 @@ class NetworkScanner:
             "protocols_detected": list(protocols),
             "services_detected": list(services),
             "time_range": time_range,
-            "log_entries_processed": len(log_data),
+            "log_entries_processed": self._records_processed,
             "scan_completion_time": datetime.now()
         }
     
-    async def scan_extrahop_logs(self, log_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def scan_extrahop_logs(self, log_data: LogRecords) -> Dict[str, Any]:
         """Specialized scanning for ExtraHop log format"""
         logger.info("Scanning ExtraHop logs")
         return await self.scan_from_logs(log_data, "extrahop")
     
-    async def scan_splunk_logs(self, log_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def scan_splunk_logs(self, log_data: LogRecords) -> Dict[str, Any]:
         """Specialized scanning for Splunk log format"""
         logger.info("Scanning Splunk logs")
         return await self.scan_from_logs(log_data, "splunk")
     
-    async def scan_dynatrace_logs(self, log_data: List[Dict[str, Any]]) -> Dict[str, Any]:
+    async def scan_dynatrace_logs(self, log_data: LogRecords) -> Dict[str, Any]:
         """Specialized scanning for DynaTrace log format"""
         logger.info("Scanning DynaTrace logs")
         return await self.scan_from_logs(log_data, "dynatrace")
\ No newline at end of file
@@ -3,17 +3,348 @@ Network utility functions for the Application Auto Discoverer
 """
 
 import ipaddress
+import json
 import logging
-from typing import Dict, List, Optional, Any
+import os
+from typing import Dict, Iterable, List, Optional, Any, Tuple
+
+import numpy as np
+import pandas as pd
+
 from models.topology_models import NodeType, ConnectionType
 
 logger = logging.getLogger(__name__)
 
+IP_CLASSIFIER_CONFIG = {
+    # JSON list of zones shaped like NetworkSegmentationService zones:
+    # {"id": ..., "name": ..., "network_cidrs": [...], "node_type": optional hint}
+    "zones_file": os.getenv("IP_CLASSIFIER_ZONES_FILE", ""),
+    "cache_size": int(os.getenv("IP_CLASSIFIER_CACHE_SIZE", "500000"))
+}
+
+# Banking segmentation defaults, matching NetworkSegmentationService
+DEFAULT_IP_ZONES = [
+    {"id": "dmz-external", "name": "External DMZ Zone", "network_cidrs": ["10.1.0.0/24"]},
+    {"id": "core-banking", "name": "Core Banking Systems Zone", "network_cidrs": ["10.10.0.0/24"]},
+    {"id": "internal-apps", "name": "Internal Applications Zone", "network_cidrs": ["10.20.0.0/24"]},
+    {"id": "user-access", "name": "User Access Zone", "network_cidrs": ["10.30.0.0/22"]}
+]
+
+# IANA special-purpose IPv4 blocks. Only their boundaries are used: the
+# private/multicast/loopback/link-local flags of each resulting range are
+# taken from the ipaddress module itself.
+SPECIAL_IPV4_NETWORKS = (
+    "0.0.0.0/8", "10.0.0.0/8", "100.64.0.0/10", "127.0.0.0/8", "169.254.0.0/16", "172.16.0.0/12",
+    "192.0.0.0/24", "192.0.0.0/29", "192.0.0.8/32", "192.0.0.9/32", "192.0.0.10/32", "192.0.0.170/31",
+    "192.0.2.0/24", "192.31.196.0/24", "192.52.193.0/24", "192.88.99.0/24", "192.168.0.0/16",
+    "192.175.48.0/24", "198.18.0.0/15", "198.51.100.0/24", "203.0.113.0/24", "224.0.0.0/4",
+    "240.0.0.0/4", "255.255.255.255/32"
+)
+
+IP_FLAGS = ("is_private", "is_multicast", "is_loopback", "is_link_local")
+CLASSIFICATION_COLUMNS = ("ip_address", "valid", "version") + IP_FLAGS + (
+    "network_class", "zone", "zone_name", "subnet", "node_type")
+
+# Longest dotted-quad is 15 characters; one more column detects longer strings
+_IPV4_WIDTH = 16
+
+
+_NETWORK_CLASSES = ("Unknown", "Class A", "Class B", "Class C", "Class D (Multicast)", "Class E (Experimental)")
+_NODE_TYPE_HINTS = (NodeType.UNKNOWN.value, NodeType.ROUTER.value, NodeType.SERVER.value, NodeType.WORKSTATION.value)
+
+
+def _network_class(first_octet: np.ndarray) -> np.ndarray:
+    """Classful network code per first octet (0 and 127 are Unknown)"""
+    return np.select(
+        [(first_octet >= 1) & (first_octet <= 126), (first_octet >= 128) & (first_octet <= 191),
+         (first_octet >= 192) & (first_octet <= 223), (first_octet >= 224) & (first_octet <= 239),
+         first_octet >= 240],
+        [1, 2, 3, 4, 5], default=0)
+
+
+def _node_type_hint(last_octet: np.ndarray, is_private: np.ndarray) -> np.ndarray:
+    """Gateway, server and workstation conventions by last octet, as _NODE_TYPE_HINTS codes"""
+    return np.select(
+        [(last_octet == 1) | (last_octet == 254),
+         is_private & (last_octet >= 1) & (last_octet <= 50),
+         is_private & (last_octet >= 100) & (last_octet <= 200)],
+        [1, 2, 3], default=0)
+
+
+def _node_type_from_text(ip_text: str, is_private: bool) -> str:
+    """Same conventions applied to an address string (IPv6 fallback)"""
+    # Common gateway IPs
+    if ip_text.endswith('.1') or ip_text.endswith('.254'):
+        return NodeType.ROUTER.value
+
+    # Private network patterns
+    if is_private:
+        try:
+            last_octet = int(ip_text.split('.')[-1])
+        except ValueError:
+            return NodeType.UNKNOWN.value
+
+        # Server range (typically lower numbers)
+        if 1 <= last_octet <= 50:
+            return NodeType.SERVER.value
+        # Workstation range (typically higher numbers)
+        elif 100 <= last_octet <= 200:
+            return NodeType.WORKSTATION.value
+
+    return NodeType.UNKNOWN.value
+
+
+def parse_ipv4(addresses: Iterable[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Parse dotted-quad strings without per-address Python work. Returns the
+    addresses as integers and a validity mask; the accepted syntax is the
+    same as ipaddress.IPv4Address (no leading zeros, no whitespace).
+    """
+    chars = np.asarray(addresses if isinstance(addresses, np.ndarray) else list(addresses), dtype=f"U{_IPV4_WIDTH}")
+    n = len(chars)
+    matrix = chars.view(np.uint32).reshape(n, _IPV4_WIDTH) if n else np.zeros((0, _IPV4_WIDTH), np.uint32)
+
+    octets = np.zeros((n, 4), dtype=np.int64)
+    rows = np.arange(n)
+    current = np.zeros(n, dtype=np.int64)
+    digits = np.zeros(n, dtype=np.int64)
+    committed = np.zeros(n, dtype=np.int64)
+    leading_zero = np.zeros(n, dtype=bool)
+    ended = np.zeros(n, dtype=bool)
+    valid = matrix[:, -1] == 0
+
+    for column in range(_IPV4_WIDTH):
+        char = matrix[:, column].astype(np.int64)
+        is_digit = (char >= 48) & (char <= 57)
+        is_dot = char == 46
+        is_end = char == 0
+        valid &= (is_digit | is_dot | is_end) & ~(ended & ~is_end)
+        valid &= ~(is_digit & leading_zero & (digits == 1))
+        leading_zero = np.where(is_digit & (digits == 0), char == 48, leading_zero)
+        current = np.where(is_digit, current * 10 + char - 48, current)
+        digits += is_digit
+
+        commit = is_dot | (is_end & ~ended)
+        valid &= ~(commit & ((digits == 0) | (digits > 3) | (committed > 3)))
+        target = commit & (committed < 4)
+        octets[rows[target], committed[target]] = current[target]
+        committed += commit
+        current = np.where(commit, 0, current)
+        digits = np.where(commit, 0, digits)
+        ended |= is_end
+
+    valid &= (committed == 4) & (octets <= 255).all(axis=1)
+    values = (octets[:, 0] << 24) | (octets[:, 1] << 16) | (octets[:, 2] << 8) | octets[:, 3]
+    return np.where(valid, values, 0), valid
+
+
+class _RangeTable:
+    """
+    Non-overlapping integer ranges covering the IPv4 space, looked up with
+    a binary search. Nested networks are flattened so that every range maps
+    to the most specific network containing it.
+    """
+
+    def __init__(self, networks: List[ipaddress.IPv4Network]):
+        bounds = {0}
+        for network in networks:
+            bounds.add(int(network.network_address))
+            bounds.add(int(network.broadcast_address) + 1)
+        self.starts = np.array(sorted(b for b in bounds if b < 2 ** 32), dtype=np.int64)
+
+        by_specificity = sorted(range(len(networks)), key=lambda i: networks[i].prefixlen)
+        self.owner = np.full(len(self.starts), -1, dtype=np.int64)
+        for i in by_specificity:
+            network = networks[i]
+            low = int(network.network_address)
+            high = int(network.broadcast_address)
+            self.owner[(self.starts >= low) & (self.starts <= high)] = i
+
+    def lookup(self, values: np.ndarray) -> np.ndarray:
+        """Range position for each integer address"""
+        return np.searchsorted(self.starts, values, side="right") - 1
+
+
+class IPClassifier:
+    """
+    Compiled IP classifier: configured zones and the special-purpose ranges
+    are loaded once into sorted integer range tables, and whole arrays of
+    addresses are classified with vectorized lookups. Every address maps to
+    one of a small set of distinct outcomes, so results are kept as outcome
+    ids and cached per unique address; IPv6 and non-string values fall back
+    to ipaddress.
+    """
+
+    def __init__(self, zones: Optional[List[Dict[str, Any]]] = None, cache_size: Optional[int] = None):
+        self.cache_size = IP_CLASSIFIER_CONFIG["cache_size"] if cache_size is None else cache_size
+        self.stats = {"classified": 0, "cache_hits": 0}
+
+        self._special = _RangeTable([ipaddress.IPv4Network(cidr) for cidr in SPECIAL_IPV4_NETWORKS])
+        probes = [ipaddress.IPv4Address(int(start)) for start in self._special.starts]
+        self._special_flags = np.array([[getattr(ip, flag) for flag in IP_FLAGS] for ip in probes], dtype=bool)
+
+        self.load_zones(DEFAULT_IP_ZONES if zones is None else zones)
+
+    @classmethod
+    def from_config(cls) -> "IPClassifier":
+        """Classifier over the zones file in IP_CLASSIFIER_CONFIG, or the defaults"""
+        zones_file = IP_CLASSIFIER_CONFIG["zones_file"]
+        if zones_file:
+            try:
+                with open(zones_file, "r", encoding="utf-8") as f:
+                    return cls(zones=json.load(f))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not load IP zones from {zones_file}: {e}; using defaults")
+        return cls()
+
+    def load_zones(self, zones: List[Dict[str, Any]]):
+        """Compile zone subnets into the lookup tables and reset cached results"""
+        v4, v6 = [], []
+        for zone in zones:
+            for cidr in zone.get("network_cidrs", []):
+                network = ipaddress.ip_network(cidr, strict=False)
+                (v4 if network.version == 4 else v6).append((network, zone))
+
+        self.zones = zones
+        self._zone_networks = [network for network, _ in v4]
+        self._zone_of = [zone for _, zone in v4]
+        self._zone_table = _RangeTable(self._zone_networks)
+        # IPv6 subnets are rare here; keep them most-specific first for a linear scan
+        self._zone_networks_v6 = sorted(v6, key=lambda item: -item[0].prefixlen)
+
+        self._cache: Dict[Any, int] = {}
+        self._outcomes: List[Tuple] = []
+        self._outcome_ids: Dict[Tuple, int] = {}
+        self._invalid = self._register((False, 0) + (False,) * len(IP_FLAGS) +
+                                       ("Unknown", None, None, None, NodeType.UNKNOWN.value))
+
+    def _register(self, outcome: Tuple) -> int:
+        outcome_id = self._outcome_ids.get(outcome)
+        if outcome_id is None:
+            outcome_id = self._outcome_ids[outcome] = len(self._outcomes)
+            self._outcomes.append(outcome)
+        return outcome_id
+
+    @staticmethod
+    def _zone_node_type(node_type: str, zone: Optional[Dict[str, Any]]) -> str:
+        """A zone's node_type hint applies when the address conventions give none"""
+        if node_type == NodeType.UNKNOWN.value and zone and zone.get("node_type"):
+            return zone["node_type"]
+        return node_type
+
+    # ------------------------------------------------------------ classification
+
+    def _classify_ipv4(self, values: np.ndarray) -> np.ndarray:
+        """Outcome ids for integer IPv4 addresses"""
+        special = self._special.lookup(values)
+        owner = self._zone_table.owner[self._zone_table.lookup(values)]
+        is_private = self._special_flags[special, 0]
+        network_class = _network_class(values >> 24)
+        node_type = _node_type_hint(values & 0xFF, is_private)
+
+        # The outcome depends only on these four small codes
+        zones = len(self._zone_of) + 1
+        key = ((special * zones + owner + 1) * len(_NETWORK_CLASSES) + network_class) * len(_NODE_TYPE_HINTS) + node_type
+        keys, inverse = np.unique(key, return_inverse=True)
+
+        ids = []
+        for k in keys.tolist():
+            k, node_code = divmod(k, len(_NODE_TYPE_HINTS))
+            k, class_code = divmod(k, len(_NETWORK_CLASSES))
+            special_index, zone_code = divmod(k, zones)
+            zone = self._zone_of[zone_code - 1] if zone_code else None
+            subnet = str(self._zone_networks[zone_code - 1]) if zone_code else None
+            ids.append(self._register(
+                (True, 4) + tuple(bool(f) for f in self._special_flags[special_index]) + (
+                    _NETWORK_CLASSES[class_code], zone and zone.get("id"), zone and zone.get("name"), subnet,
+                    self._zone_node_type(_NODE_TYPE_HINTS[node_code], zone))))
+        return np.array(ids, dtype=np.int64)[inverse.ravel()]
+
+    def _classify_fallback(self, value: Any) -> int:
+        """Single address through ipaddress: IPv6, integers and anything unusual"""
+        try:
+            ip = ipaddress.ip_address(value)
+        except ValueError:
+            return self._invalid
+
+        if ip.version == 4:
+            return int(self._classify_ipv4(np.array([int(ip)], dtype=np.int64))[0])
+
+        network, zone = next(((n, z) for n, z in self._zone_networks_v6 if ip in n), (None, None))
+        node_type = self._zone_node_type(_node_type_from_text(str(ip), ip.is_private), zone)
+        return self._register((True, 6) + tuple(getattr(ip, flag) for flag in IP_FLAGS) + (
+            "Unknown", zone and zone.get("id"), zone and zone.get("name"), network and str(network), node_type))
+
+    def _classify_unique(self, addresses: np.ndarray) -> np.ndarray:
+        """Outcome ids for distinct addresses; dotted quads are parsed in bulk"""
+        # Non-strings are stringified here; integers and the like then fail and take the fallback
+        values, valid = parse_ipv4(addresses)
+
+        ids = np.empty(len(addresses), dtype=np.int64)
+        if valid.any():
+            ids[valid] = self._classify_ipv4(values[valid])
+        for position in np.flatnonzero(~valid).tolist():
+            address = addresses[position]
+            ids[position] = self._invalid if pd.isna(address) else self._classify_fallback(address)
+        return ids
+
+    def _lookup(self, addresses: np.ndarray) -> np.ndarray:
+        """Outcome ids for distinct addresses, through the per-address cache"""
+        cache = self._cache
+        ids = np.fromiter((cache.get(a, -1) for a in addresses), dtype=np.int64, count=len(addresses))
+        missing = np.flatnonzero(ids < 0)
+        self.stats["cache_hits"] += len(addresses) - len(missing)
+        if len(missing):
+            ids[missing] = self._classify_unique(addresses[missing])
+            if len(cache) + len(missing) > self.cache_size:
+                cache.clear()
+            keep = missing[:self.cache_size]
+            cache.update(zip(addresses[keep].tolist(), ids[keep].tolist()))
+        return ids
+
+    def classify(self, addresses: Iterable[Any]) -> pd.DataFrame:
+        """
+        Classify an array of addresses: validity, version, private/multicast/
+        loopback/link-local flags, network class, zone, configured subnet and
+        a node type hint. One row per input, in input order.
+        """
+        values = np.asarray(addresses.to_numpy(dtype=object) if isinstance(addresses, pd.Series)
+                            else list(addresses), dtype=object)
+        codes, uniques = pd.factorize(values, use_na_sentinel=True)
+        ids = self._lookup(np.asarray(uniques, dtype=object))
+        outcome = np.where(codes >= 0, ids[np.maximum(codes, 0)] if len(ids) else self._invalid, self._invalid)
+        self.stats["classified"] += len(values)
+
+        # Object columns keep None for addresses outside any zone
+        outcomes = pd.DataFrame({
+            column: pd.Series(column_values, dtype=bool if column == "valid" or column in IP_FLAGS
+                              else int if column == "version" else object)
+            for column, column_values in zip(CLASSIFICATION_COLUMNS[1:], zip(*self._outcomes))
+        })
+        result = outcomes.take(outcome).reset_index(drop=True)
+        result.insert(0, "ip_address", values)
+        return result
+
+    def classify_one(self, address: Any) -> Dict[str, Any]:
+        """Classification of a single address as a dict"""
+        single = np.empty(1, dtype=object)
+        single[0] = address
+        try:
+            outcome = self._lookup(single)[0]
+        except TypeError:
+            # Unhashable input is never a valid address
+            outcome = self._invalid
+        self.stats["classified"] += 1
+        return dict(zip(CLASSIFICATION_COLUMNS, (address,) + self._outcomes[outcome]))
+
+
+ip_classifier = IPClassifier.from_config()
+
 class NetworkUtils:
     """Utility class for network-related operations"""
     
-    def __init__(self):
-        pass
+    def __init__(self, classifier: Optional[IPClassifier] = None):
+        self.classifier = classifier or ip_classifier
     
     def validate_ip_address(self, ip_address: str) -> bool:
         """Validate IP address format"""
@@ -84,29 +415,11 @@ class NetworkUtils:
     
     def determine_node_type_from_ip(self, ip_address: str) -> NodeType:
         """Determine node type based on IP address patterns"""
-        try:
-            ip = ipaddress.ip_address(ip_address)
-            
-            # Common patterns based on IP ranges
-            if str(ip).endswith('.1') or str(ip).endswith('.254'):
-                return NodeType.ROUTER  # Common gateway IPs
-            
-            # Private network patterns
-            if ip.is_private:
-                octets = str(ip).split('.')
-                last_octet = int(octets[-1])
-                
-                # Server range (typically lower numbers)
-                if 1 <= last_octet <= 50:
-                    return NodeType.SERVER
-                # Workstation range (typically higher numbers)
-                elif 100 <= last_octet <= 200:
-                    return NodeType.WORKSTATION
-        
-        except ValueError:
-            pass
-        
-        return NodeType.UNKNOWN
+        return NodeType(self.classifier.classify_one(ip_address)["node_type"])
+    
+    def classify_ips(self, ip_addresses: Iterable[Any]) -> pd.DataFrame:
+        """Classify many IP addresses at once (see IPClassifier.classify)"""
+        return self.classifier.classify(ip_addresses)
     
     def determine_connection_type(self, protocols: List[str]) -> ConnectionType:
         """Determine connection type based on protocols"""
@@ -127,20 +440,22 @@ class NetworkUtils:
     
     def get_network_info(self, ip_address: str) -> Dict[str, Any]:
         """Get network information for an IP address"""
-        try:
-            ip = ipaddress.ip_address(ip_address)
-            
-            return {
-                "ip_address": str(ip),
-                "is_private": ip.is_private,
-                "is_multicast": ip.is_multicast,
-                "is_loopback": ip.is_loopback,
-                "is_link_local": ip.is_link_local,
-                "version": ip.version,
-                "network_class": self._get_network_class(str(ip))
-            }
-        except ValueError:
+        info = self.classifier.classify_one(ip_address)
+        if not info["valid"]:
             return {"error": "Invalid IP address"}
+        
+        return {
+            "ip_address": ip_address if info["version"] == 4 and isinstance(ip_address, str)
+            else str(ipaddress.ip_address(ip_address)),
+            "is_private": info["is_private"],
+            "is_multicast": info["is_multicast"],
+            "is_loopback": info["is_loopback"],
+            "is_link_local": info["is_link_local"],
+            "version": info["version"],
+            "network_class": info["network_class"],
+            "zone": info["zone"],
+            "subnet": info["subnet"]
+        }
     
     def _get_network_class(self, ip_address: str) -> str:
         """Get network class for IPv4 addresses"""